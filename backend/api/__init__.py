@@ -5,5 +5,7 @@ API 路由模組
 
 from backend.api.resume_router import router as resume_router
 from backend.api.interview_router import router as interview_router
+from backend.api.admin_router import router as admin_router
+from backend.api.health_router import router as health_router
 
-__all__ = ["resume_router", "interview_router"]
+__all__ = ["resume_router", "interview_router", "admin_router", "health_router"]
@@ -0,0 +1,88 @@
+# backend/api/admin_router.py
+from fastapi import APIRouter, HTTPException
+from fastapi.concurrency import run_in_threadpool
+from backend.services.rag_service import rag_service
+from backend.services.audio_archive import audio_archive
+from backend.services.audio_retention import sweep as sweep_audio
+from backend.services.speculation_service import speculation_service
+from backend.services.speech_service import speech_service, tts_cache
+
+router = APIRouter()
+
+
+@router.post("/knowledge/reload", summary="重新載入知識庫 (不需重啟服務)")
+async def reload_knowledge():
+    """
+    重新掃描 knowledge_base/，只重新編碼新增或變更的檔案，
+    完成後原子性地替換索引；進行中的面試會繼續使用舊索引直到該次查詢結束。
+
+    回傳：
+    - **added / changed / removed**: 變動的檔案清單
+    - **reembedded**: 本次重新編碼的筆數
+    - **total**: 新索引的資料筆數
+    """
+    try:
+        return await run_in_threadpool(rag_service.reload)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"知識庫重新載入失敗: {str(e)}")
+
+
+@router.get("/speculation/stats", summary="推測式預先出題統計")
+async def speculation_stats():
+    """
+    回傳：
+    - **hits / misses / not_ready / expired / failed**: 各種結果的次數
+    - **hit_rate**: 命中率 (命中 / 回答送達時有候選題可比對的次數)
+    - **saved_seconds / avg_saved_seconds**: 命中時省下的 RAG + LLM 時間
+    """
+    return speculation_service.stats()
+
+
+@router.get("/tts_cache/stats", summary="TTS 快取統計")
+async def tts_cache_stats():
+    """
+    回傳：
+    - **hits / misses / coalesced**: 命中、實際合成、併入進行中合成的次數
+    - **hit_ratio**: (hits + coalesced) / 總請求數
+    - **bytes_saved**: 命中時省下的合成音檔位元組數
+    - **entries / total_bytes / max_bytes / evictions**: 快取容量與 LRU 淘汰次數
+    """
+    return tts_cache.stats()
+
+
+@router.get("/speech_pool/stats", summary="語音引擎池統計")
+async def speech_pool_stats():
+    """
+    回傳：
+    - **tts / stt**: 已開始的合成 / 辨識次數
+    - **queue_timeouts / call_timeouts / errors**: 排隊逾時、執行逾時與其他失敗次數
+    - **in_flight / max_concurrency / idle_synthesizers**: 目前進行中的數量、上限與閒置合成器數
+    - **queue_wait_ms**: 最近排隊時間 (avg / p95 / max)
+    """
+    if not speech_service.ready:
+        raise HTTPException(status_code=503, detail="語音服務尚未初始化")
+    return speech_service.pool.stats()
+
+
+@router.get("/audio_archive/stats", summary="回答音檔歸檔統計")
+async def audio_archive_stats():
+    """
+    回傳：
+    - **submitted / written / failed / pending**: 背景寫檔的次數與佇列中的數量
+    - **bytes_in / bytes_written**: 原始與壓縮後的位元組數
+    - **index**: 尚未淘汰的歸檔數、總大小與壓縮比
+    """
+    return await run_in_threadpool(audio_archive.stats)
+
+
+@router.post("/audio_archive/sweep", summary="立即執行音檔淘汰")
+async def audio_archive_sweep():
+    """
+    補轉檔尚未建立索引的舊 .wav，並依 AUDIO_ARCHIVE_* / QUESTION_AUDIO_* 的保存天數與容量上限淘汰
+
+    回傳：
+    - **compacted**: 補轉檔的檔案數
+    - **answers**: 淘汰的回答錄音數與釋放的位元組數
+    - **questions**: 刪除的題目語音數與釋放的位元組數
+    """
+    return await run_in_threadpool(sweep_audio)
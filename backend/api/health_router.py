@@ -0,0 +1,44 @@
+# backend/api/health_router.py
+from fastapi import APIRouter
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, PlainTextResponse
+from backend.services.readiness_service import readiness_service
+from backend.utils.metrics import registry
+
+router = APIRouter()
+
+
+@router.get("/healthz", summary="存活檢查 (liveness)")
+def healthz():
+    """行程可以回應請求即回傳 200，不檢查任何相依服務"""
+    return {"status": "ok"}
+
+
+@router.get("/readyz", summary="就緒檢查 (readiness)")
+async def readyz():
+    """
+    逐項回報相依服務狀態；只有暖機成功且所有項目都就緒時回傳 200，否則回傳 503
+
+    - **embedding_model / faiss_index**: RAG 向量模型與索引
+    - **ollama**: LLM 模型是否已常駐 (keep_alive)
+    - **azure_speech**: 語音服務設定
+    - **database**: 資料庫連線池
+    """
+    status = await run_in_threadpool(readiness_service.check)
+    return JSONResponse(status_code=200 if status["ready"] else 503, content=status)
+
+
+@router.post("/warmup", summary="執行暖機 (RAG 檢索、LLM 生成、TTS 各一次)")
+async def warmup():
+    """執行合成的檢索 / 生成 / 語音合成；全部成功後 /readyz 才會回傳 200"""
+    report = await run_in_threadpool(readiness_service.warmup)
+    return JSONResponse(status_code=200 if report["warmed"] else 503, content=report)
+
+
+@router.get("/metrics", summary="Prometheus 指標")
+def metrics():
+    """
+    各處理階段 (stt / llm / rag / tts / db / ocr / gemini …) 與端點的耗時分佈，
+    以及階段執行緒池、TTS 快取、語音引擎池、音檔歸檔的統計 (Prometheus text format)
+    """
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
@@ -1,21 +1,31 @@
 # backend/api/interview_router.py
+import asyncio
+import functools
+import json
 import os
 import random
-import shutil
 import time
-import uuid
-from typing import Optional
+from typing import AsyncIterator, Callable, Iterator, List, Optional, Tuple
 from datetime import datetime
 import logging
 
-from fastapi import APIRouter, UploadFile, File, HTTPException, Form
+from fastapi import APIRouter, UploadFile, File, HTTPException, Form, WebSocket, WebSocketDisconnect
+from fastapi.responses import FileResponse, StreamingResponse
 from backend.services.session_service import create_session, get_session, update_session
 from backend.services.enhanced_agent_service import agent_factory
-from backend.services.speech_service import speech_service
+from backend.services.speech_service import speech_service, tts_cache
 from backend.services.feedback_service import feedback_service
-from backend.services.rag_service import rag_service
+from backend.services.rag_service import rag_service, format_chunk
+from backend.services.speculation_service import speculation_service
+from backend.services.stt_backends import get_stt_backend, SAMPLE_RATE as STT_SAMPLE_RATE
+from backend.services.audio_archive import audio_archive, locate_audio_path
+from backend.services.canned_audio import canned_audio, NOT_HEARD, INTERVIEW_EXITED, INTERVIEW_COMPLETED
 from backend.models.pydantic_models import InterviewStartRequest, InterviewAction
 from backend.config import settings  # 假設你有 config 設定檔，若無可直接寫死路徑
+from backend.utils.sentence_chunker import SentenceChunker
+from backend.utils.metrics import REQUEST_SECONDS, TIME_TO_FIRST_AUDIO, stage_timer
+from backend.utils.stage_pools import run_in_stage
+from backend.utils.wav_io import pcm_to_wav
 
 # 設定 Log
 logging.basicConfig(level=logging.INFO)
@@ -50,31 +60,173 @@ def check_voice_command(text: str) -> Optional[str]:
     
     return None
 
-def save_audio_file(session_id: str, audio_file: UploadFile) -> str:
+async def _synthesize(text: str, audio_filename: str) -> str:
     """
-    儲存音檔至永久目錄
-    Returns: file_path
+    合成語音並回傳 audio_url
+
+    固定語句有預錄音檔時直接回傳 (scripts/build_canned_audio.py)；啟用 TTS 快取時指向 static/audio/cache 內的快取檔 (相同文字只合成一次)，
+    否則照舊寫到 static/audio/<audio_filename>
     """
-    # 1. 建立永久儲存目錄
-    save_dir = os.path.join("saved_audio") # 或者用 settings.BASE_DIR 拼接
-    os.makedirs(save_dir, exist_ok=True)
+    canned_url = canned_audio.url_for(text)
+    if canned_url:
+        return canned_url
+    if settings.TTS_CACHE_ENABLED:
+        path = await run_in_stage("tts", lambda: speech_service.synthesize_cached(text))
+        return tts_cache.url_for(path)
+    await run_in_stage("tts", speech_service.text_to_speech, text, os.path.join("static/audio", audio_filename))
+    return f"/audio/{audio_filename}"
 
-    # 2. 產生唯一檔名 (包含時間戳記與 UUID 防止覆蓋)
-    unique_name = f"{session_id}_{int(time.time())}_{uuid.uuid4().hex[:5]}.wav"
-    file_path = os.path.join(save_dir, unique_name)
-    
-    # 3. 寫入檔案
+
+def _completed_response(session) -> dict:
+    """題數已滿 / 沒有下一題時的回應"""
+    return {
+        "end": True,
+        "message": INTERVIEW_COMPLETED,
+        "audio_url": canned_audio.url_for(INTERVIEW_COMPLETED) or "",
+        "question_count": session.question_count
+    }
+
+
+def _sse(event: str, data: dict) -> str:
+    """Server-Sent Events 格式的一筆事件"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+def _observe_stream(endpoint: str, done: dict):
+    """串流出題完成 (done 事件) 時記錄總耗時與 time-to-first-audio"""
+    REQUEST_SECONDS.observe(done["total_seconds"], endpoint=endpoint)
+    if done["time_to_first_audio"] is not None:
+        TIME_TO_FIRST_AUDIO.observe(done["time_to_first_audio"], endpoint=endpoint)
+
+
+async def _stream_question_audio(session, token_stream: Callable[[], Iterator[str]], request_start: float
+                                 ) -> AsyncIterator[Tuple[str, dict]]:
+    """
+    邊生成邊合成：LLM token 在 llm 執行緒池中逐段產出，湊滿一句 (。？！) 就立刻送去 TTS，
+    依句子順序產出 ("sentence", {...}) 事件，最後產出 ("done", {...})。
+
+    Args:
+        session: 面試 session (question_count 已更新)
+        token_stream: 呼叫後回傳 token 迭代器的函式 (例如 agent.stream_question)
+        request_start: 請求開始時間，用來計算 time_to_first_audio
+    """
+    loop = asyncio.get_running_loop()
+    sentences: asyncio.Queue = asyncio.Queue()
+    first_token_at: List[float] = []
+
+    def produce():
+        chunker = SentenceChunker()
+        try:
+            for token in token_stream():
+                if not first_token_at:
+                    first_token_at.append(time.time())
+                for sentence in chunker.feed(token):
+                    loop.call_soon_threadsafe(sentences.put_nowait, sentence)
+            for sentence in chunker.flush():
+                loop.call_soon_threadsafe(sentences.put_nowait, sentence)
+        finally:
+            loop.call_soon_threadsafe(sentences.put_nowait, None)
+
+    async def synthesize(index: int, sentence: str) -> dict:
+        audio_filename = f"q_{session.id}_{session.question_count}_{index}.mp3"
+        try:
+            audio_url = await _synthesize(sentence, audio_filename)
+        except Exception as e:
+            logger.warning(f"[TTS] 警告: 第 {index + 1} 句語音生成失敗 - {e}")
+            audio_url = ""
+        return {"index": index, "text": sentence, "audio_url": audio_url}
+
+    os.makedirs("static/audio", exist_ok=True)
+    producer = asyncio.ensure_future(run_in_stage("llm", produce))
+    pending: List[asyncio.Future] = []
+    parts: List[str] = []
+    first_audio = None
+    next_sentence: Optional[asyncio.Future] = asyncio.ensure_future(sentences.get())
     try:
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(audio_file.file, buffer)
-        logger.info(f"💾 音檔已儲存: {file_path}")
-        return file_path
+        # 同時等「下一句文字」與「最前面一句的語音」：句子一到就開始合成，語音好了就依序送出
+        while next_sentence is not None or pending:
+            waiting = [task for task in (next_sentence, pending[0] if pending else None) if task is not None]
+            done, _ = await asyncio.wait(waiting, return_when=asyncio.FIRST_COMPLETED)
+            if next_sentence in done:
+                sentence = next_sentence.result()
+                if sentence is None:
+                    next_sentence = None
+                else:
+                    parts.append(sentence)
+                    pending.append(asyncio.ensure_future(synthesize(len(parts) - 1, sentence)))
+                    next_sentence = asyncio.ensure_future(sentences.get())
+            while pending and pending[0].done():
+                segment = pending.pop(0).result()
+                if first_audio is None and segment["audio_url"]:
+                    first_audio = time.time() - request_start
+                yield "sentence", segment
+        await producer
+    finally:
+        for task in pending + [next_sentence]:
+            if task is not None:
+                task.cancel()
+
+    llm_seconds = (first_token_at[0] - request_start) if first_token_at else None
+    yield "done", {
+        "question": "".join(parts),
+        "sentences": len(parts),
+        "time_to_first_token": round(llm_seconds, 3) if llm_seconds is not None else None,
+        "time_to_first_audio": round(first_audio, 3) if first_audio is not None else None,
+        "total_seconds": round(time.time() - request_start, 3),
+    }
+
+
+def _speculate(session):
+    """題目送出後，趁求職者作答時在背景預先生成候選追問"""
+    if settings.SPECULATION_ENABLED:
+        speculation_service.schedule(session)
+
+
+async def _sse_events(session, events: AsyncIterator[Tuple[str, dict]], endpoint: str) -> AsyncIterator[str]:
+    """
+    將 (event, data) 轉成 SSE 文字
+
+    產生過程出錯時送出 event: error (HTTP 狀態碼已經送出，無法再改成 500)；
+    不論成功、失敗或用戶端中斷，結束時都會儲存 session，已記錄的回答不會遺失
+    """
+    try:
+        async for event, data in events:
+            yield _sse(event, data)
     except Exception as e:
-        logger.error(f"儲存音檔失敗: {e}")
-        raise HTTPException(status_code=500, detail="音檔儲存失敗")
+        logger.error(f"[SSE] {endpoint} 串流失敗: {e}")
+        yield _sse("error", {"detail": str(e)})
+    finally:
+        # 用戶端中斷時本協程已被取消，以 shield 讓儲存在 db 執行緒池中完成
+        await asyncio.shield(run_in_stage("db", update_session, session))
+
+
+def _event_stream(events: AsyncIterator[str]) -> StreamingResponse:
+    return StreamingResponse(
+        events,
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 # --- Endpoints ---
 
+async def _begin_interview(req: InterviewStartRequest):
+    """建立 session 並隨機選擇面試官個性"""
+    session = await run_in_stage(
+        "db", create_session,
+        user_id=req.user_id,
+        job_title=req.job_title,
+        resume_id=req.resume_id if req.resume_id else None,
+        resume_text=req.resume_text or ""
+    )
+
+    # 🎭 隨機選擇面試官個性(每次面試都不同)
+    personalities = ['friendly', 'neutral', 'strict', 'casual']
+    personality = random.choice(personalities)
+    logger.info(f"🎭 本次面試隨機選擇的面試官個性: {personality}")
+    agent = agent_factory.get_agent(req.job_title, personality=personality)
+    return session, agent, personality
+
+
 @router.post("/start_interview", summary="開始面試")
 async def start_interview(req: InterviewStartRequest):
     """開始面試
@@ -94,58 +246,34 @@ async def start_interview(req: InterviewStartRequest):
 
     try:
         total_start = time.time()
-        user_id_str = req.user_id
-        resume_id_str = req.resume_id if req.resume_id else None
-        
-        session = create_session(
-            user_id=user_id_str,
-            job_title=req.job_title,
-            resume_id=resume_id_str,
-            resume_text=req.resume_text or ""
-        )
-        
-        # 🎭 隨機選擇面試官個性(每次面試都不同)
-        personalities = ['friendly', 'neutral', 'strict', 'casual']
-        personality = random.choice(personalities)
-        logger.info(f"🎭 本次面試隨機選擇的面試官個性: {personality}")
-        agent = agent_factory.get_agent(req.job_title, personality=personality)
-
-        llm_start = time.time()
-        question = agent.generate_first_question(req.job_title, req.resume_text or "")
-        llm_end = time.time()
-        
-        # 生成第一題
-        question = agent.generate_first_question(req.job_title, req.resume_text or "")
+        session, agent, personality = await _begin_interview(req)
+
+        # 生成第一題 (各階段耗時由階段執行緒池記錄，見 GET /metrics)
+        question = await run_in_stage("llm", agent.generate_first_question, req.job_title, req.resume_text or "")
         print("========================================")
         print(f" AI 生成的第一題: {question}")
         print("========================================")
-        logger.info(f"⏱️ [計時] 1. 第一題 LLM 生成耗時: {llm_end - llm_start:.2f} 秒")
 
         session.current_question = question
         session.question_count = 1
-        update_session(session)
+        await run_in_stage("db", update_session, session)
+        _speculate(session)
         
         # 生成 TTS
-        tts_start = time.time() #計時
         audio_filename = f"q_{session.id}_0.mp3"
-        audio_path = os.path.join("static/audio", audio_filename)
+        audio_url = f"/audio/{audio_filename}"
         os.makedirs("static/audio", exist_ok=True)
         
         try:
-            speech_service.text_to_speech(question, audio_path)
+            audio_url = await _synthesize(question, audio_filename)
         except Exception as e:
             logger.warning(f"[TTS] 警告: 語音生成失敗 - {e}")
 
-        tts_end = time.time()
-        logger.info(f"⏱️ [計時] 2. 第一題 TTS 語音耗時: {tts_end - tts_start:.2f} 秒")
-
-        total_end = time.time()
-        logger.info(f"🚀 [計時總結] 第一題啟動總耗時: {total_end - total_start:.2f} 秒\n")
-        
+        REQUEST_SECONDS.observe(time.time() - total_start, endpoint="start_interview")
         return {
             "session_id": str(session.id),
             "question": question,
-            "audio_url": f"/audio/{audio_filename}",
+            "audio_url": audio_url,
             "question_number": 1,
             "total_questions": 6,
             "personality": personality
@@ -157,6 +285,155 @@ async def start_interview(req: InterviewStartRequest):
         raise HTTPException(status_code=500, detail=f"面試啟動失敗: {str(e)}")
 
 
+@router.post("/start_interview/stream", summary="開始面試 (SSE 串流)")
+async def start_interview_stream(req: InterviewStartRequest):
+    """開始面試的串流版本 (text/event-stream)
+
+    第一題邊生成邊逐句合成語音，事件依序為：
+    - **session**: {session_id, personality, question_number, total_questions}
+    - **sentence**: {index, text, audio_url}，每句一筆，可收到就播放
+    - **done**: {question, sentences, time_to_first_token, time_to_first_audio, total_seconds}
+    - **error**: {detail}，生成失敗時送出，之後串流結束
+    """
+    total_start = time.time()
+    try:
+        session, agent, personality = await _begin_interview(req)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"面試啟動失敗: {str(e)}")
+    session.question_count = 1
+
+    async def events():
+        yield "session", {
+            "session_id": str(session.id),
+            "personality": personality,
+            "question_number": 1,
+            "total_questions": 6
+        }
+        stream = functools.partial(agent.stream_first_question, req.job_title, req.resume_text or "")
+        async for event, data in _stream_question_audio(session, stream, total_start):
+            if event == "done":
+                session.current_question = data["question"]
+                _speculate(session)
+                _observe_stream("start_interview_stream", data)
+            yield event, data
+
+    return _event_stream(_sse_events(session, events(), "start_interview_stream"))
+
+
+async def _receive_answer(session_id: str, audio: UploadFile):
+    """
+    處理上傳的回答音檔：記憶體內 STT (背景歸檔音檔)，再交給 _handle_transcript
+
+    Returns:
+        同 _handle_transcript
+    """
+    session = await run_in_stage("db", get_session, session_id)
+    if not session:
+        raise HTTPException(404, "Session not found")
+
+    # 1. 直接從上傳緩衝區讀出音訊；存檔交給背景歸檔，不擋在辨識前面
+    data = await audio.read()
+    audio_path = audio_archive.submit(session_id, data)
+
+    # 2. STT 語音轉文字
+    user_answer = await run_in_stage("stt", lambda: speech_service.speech_to_text_bytes(data))
+    logger.info(f"🎤 使用者說 ({session_id}): {user_answer}")
+    return await _handle_transcript(session, user_answer, audio_path)
+
+
+async def _handle_transcript(session, user_answer: str, audio_path: Optional[str]):
+    """
+    取得逐字稿後直到可以生成下一題為止：語音指令、更新歷史、推測候選題比對與 RAG 檢索
+
+    Returns:
+        (session, response, question_kwargs, draft)
+        - response 不為 None 時直接回傳給前端 (沒聽清楚 / 退出 / 題數已滿)
+        - draft 不為 None 時表示推測的候選題命中，直接以 draft.question 作為下一題
+        - 否則以 question_kwargs 呼叫 agent.generate_question / stream_question
+    """
+    session_id = str(session.id)
+    if not user_answer:
+        return session, {
+            "question": NOT_HEARD,
+            "audio_url": canned_audio.url_for(NOT_HEARD) or "",
+            "is_chitchat": True,
+            "end": False
+        }, None, None
+
+    # 3. 🔥 指令判斷邏輯
+    command = check_voice_command(user_answer)
+
+    # --- 分支 A: 退出指令 ---
+    if command == "EXIT":
+        logger.info("🛑 偵測到語音退出指令")
+        session.ended_at = datetime.utcnow()
+        speculation_service.discard(session_id)
+        await run_in_stage("db", update_session, session)
+        return session, {
+            "end": True, 
+            "message": "收到退出指令，面試結束。",
+            "question": INTERVIEW_EXITED, # 前端顯示用
+            "audio_url": canned_audio.url_for(INTERVIEW_EXITED) or ""
+        }, None, None
+
+    if session.history is None:
+        session.history = []
+
+    # --- 分支 B: 下一題指令 ---
+    if command == "NEXT":
+        logger.info("⏭️ 偵測到下一題指令，跳過此題")
+        # 記錄跳過
+        answer = f"（使用者語音要求跳過：{user_answer}）"
+    # --- 分支 C: 正常回答 ---
+    else:
+        answer = user_answer
+
+    session.history.append({
+        "question": session.current_question,
+        "answer": answer,
+        "audio_path": audio_path, # 記錄音檔路徑
+        "timestamp": datetime.utcnow().isoformat()
+    })
+    # 跳過也算一題
+    session.question_count += 1
+
+    # 題數上限檢查（在生成問題之前）
+    if session.question_count >= 6:
+        speculation_service.discard(session_id)
+        return session, _completed_response(session), None, None
+
+    question_kwargs = {
+        "job_title": session.job_title,
+        "resume_text": session.resume_text or "",
+        "history": session.history
+    }
+
+    if command == "NEXT":
+        speculation_service.discard(session_id)
+        return session, None, question_kwargs, None
+
+    # 推測的候選題命中時，RAG 與 LLM 都不必再跑
+    draft = await run_in_stage("rag", speculation_service.take, session_id, session.history[-1]["question"], answer)
+    if draft is not None:
+        return session, None, question_kwargs, draft
+
+    # RAG 檢索 (跳過時不使用 RAG，因為沒有有效回答)
+    if session.resume_text:
+        # 以 lambda 包起來：rag_service 尚未暖機完成時，初始化也在執行緒池內進行
+        query = f"{session.job_title} {user_answer}"
+        retrieved = await run_in_stage(
+            "rag", lambda: rag_service.retrieve_chunks(query, top_k=3, method=settings.RAG_RETRIEVAL_METHOD)
+        )
+        if retrieved:
+            question_kwargs["context"] = "；".join(format_chunk(r) for r in retrieved)
+
+    return session, None, question_kwargs, None
+
+
+def _is_chitchat(question: str) -> bool:
+    return any(keyword in question for keyword in ["最近", "興趣", "喜歡", "壓力", "休息"])
+
+
 @router.post("/process_answer", summary="處理求職者回答")
 async def process_answer(
     session_id: str = Form(..., description="面試會話 ID"),
@@ -175,164 +452,52 @@ async def process_answer(
     try:
         total_start = time.time()
 
-        session = get_session(session_id)
-        if not session:
-            raise HTTPException(404, "Session not found")
-
-        # 1. 儲存音檔
-        audio_path = save_audio_file(session_id, audio)
-
-        # ==========================================
-        # ⏱️ 計時 1：STT 語音轉文字
-        # ==========================================
-        stt_start = time.time()
-        user_answer = speech_service.speech_to_text(audio_path)
-        stt_end = time.time()
-        logger.info(f"🎤 使用者說 ({session_id}): {user_answer}")
-        logger.info(f"⏱️ [計時] 1. STT 語音轉文字耗時: {stt_end - stt_start:.2f} 秒")
-        
-        if not user_answer:
-            return {
-                "question": "抱歉，我沒有聽清楚您的回答，可以再說一次嗎？",
-                "audio_url": "",
-                "is_chitchat": True,
-                "end": False
-            }
-
-        # 3. 🔥 指令判斷邏輯
-        command = check_voice_command(user_answer)
-
-        # --- 分支 A: 退出指令 ---
-        if command == "EXIT":
-            logger.info("🛑 偵測到語音退出指令")
-            session.ended_at = datetime.utcnow()
-            update_session(session)
-            return {
-                "end": True, 
-                "message": "收到退出指令，面試結束。",
-                "question": "好的，今天的面試到此結束，辛苦了。", # 前端顯示用
-                "audio_url": "" # 可選：生成一個結束語音
-            }
-
-        # --- 分支 B: 下一題指令 ---
-        elif command == "NEXT":
-            logger.info("⏭️ 偵測到下一題指令，跳過此題")
-            # 記錄跳過
-            if session.history is None:
-                session.history = []
-            
-            session.history.append({
-                "question": session.current_question,
-                "answer": f"（使用者語音要求跳過：{user_answer}）",
-                "audio_path": audio_path, # 記錄音檔路徑
-                "timestamp": datetime.utcnow().isoformat()
-            })
-            # 不增加 question_count，或者增加看你的邏輯，這裡假設跳過也算一題
-            session.question_count += 1
+        session, response, question_kwargs, draft = await _receive_answer(session_id, audio)
+        if response is not None:
+            return response
 
-            # 題數上限檢查（在生成問題之前）
-            if session.question_count >= 6:
-                return {
-                    "end": True,
-                    "message": "面試已完成，正在生成回饋報告…",
-                    "question_count": session.question_count
-                }
-            
-            # 生成下一題 (不使用 RAG，因為沒有有效回答)
-            agent = agent_factory.get_agent(session.job_title)
-            next_question = agent.generate_question(
-                job_title=session.job_title,
-                resume_text=session.resume_text or "",
-                history=session.history
-            )
-
-            print(f"========================================")
-            print(f" AI 生成的題目 (跳過後): {next_question}")
-            print(f"========================================")
-
-        # --- 分支 C: 正常回答 ---
+        # 生成下一題
+        if draft is not None:
+            next_question = draft.question
         else:
-            # 更新對話歷史
-            if session.history is None:
-                session.history = []
-            
-            session.history.append({
-                "question": session.current_question,
-                "answer": user_answer,
-                "audio_path": audio_path, # 記錄音檔路徑
-                "timestamp": datetime.utcnow().isoformat()
-            })
-            session.question_count += 1
-
-            # 題數上限檢查（在生成問題之前）
-            if session.question_count >= 6:
-                return {
-                    "end": True,
-                    "message": "面試已完成，正在生成回饋報告…",
-                    "question_count": session.question_count
-                }
-
-            # RAG 檢索
-            rag_context = ""
-            if session.resume_text:
-                retrieved = rag_service.retrieve(f"{session.job_title} {user_answer}", top_k=2)
-                if retrieved:
-                    rag_context = " ".join([r.get('position', '') for r in retrieved])
-
-            # 生成下一題
-            llm_start = time.time() #計時
             agent = agent_factory.get_agent(session.job_title)
-            next_question = agent.generate_question(
-                job_title=session.job_title,
-                resume_text=session.resume_text or "",
-                history=session.history,
-                context=rag_context
-            )
-            llm_end = time.time()
+            next_question = await run_in_stage("llm", agent.generate_question, **question_kwargs)
 
-            print(f"========================================")
-            print(f" AI 生成的題目: {next_question}")
-            print(f"========================================")
-            logger.info(f"⏱️ [計時] 2. LLM 生成題目耗時: {llm_end - llm_start:.2f} 秒")
+        print(f"========================================")
+        print(f" AI 生成的題目: {next_question}")
+        print(f"========================================")
 
         # --- 共用後續處理 (更新 Session & TTS) ---
         
         # 判斷是否結束 (題數上限 或 AI 沒題目了)
         if not next_question:
-             return {
-                "end": True,
-                "message": "面試已完成，正在生成回饋報告...",
-                "question_count": session.question_count
-            }
+            return _completed_response(session)
 
         # 更新 session
         session.current_question = next_question
-        update_session(session)
+        await run_in_stage("db", update_session, session)
+        _speculate(session)
 
         # 生成 TTS
-        tts_start = time.time() #計時
         audio_filename = f"q_{session.id}_{session.question_count}.mp3"
-        audio_path_tts = os.path.join("static/audio", audio_filename)
+        audio_url = f"/audio/{audio_filename}"
         
         try:
-            speech_service.text_to_speech(next_question, audio_path_tts)
+            audio_url = await _synthesize(next_question, audio_filename)
         except Exception as e:
             logger.warning(f"[TTS] 警告: {e}")
 
         # 判斷是否為閒聊
-        is_chitchat = any(keyword in next_question for keyword in ["最近", "興趣", "喜歡", "壓力", "休息"])
-
-        tts_end = time.time()
-        logger.info(f"⏱️ [計時] 3. TTS 文字轉語音耗時: {tts_end - tts_start:.2f} 秒")
+        is_chitchat = _is_chitchat(next_question)
 
-        total_end = time.time()
-        logger.info(f"🚀 [計時總結] 單題處理總耗時: {total_end - total_start:.2f} 秒\n")
+        REQUEST_SECONDS.observe(time.time() - total_start, endpoint="process_answer")
 
         return {
             "question": next_question,
-            "audio_url": f"/audio/{audio_filename}",
+            "audio_url": audio_url,
             "question_number": session.question_count,
             "is_chitchat": is_chitchat,
+            "speculative": draft is not None,
             "end": False
         }
 
@@ -344,6 +509,160 @@ async def process_answer(
         raise HTTPException(status_code=500, detail=f"處理回答失敗: {str(e)}")
 
 
+@router.post("/process_answer/stream", summary="處理求職者回答 (SSE 串流)")
+async def process_answer_stream(
+    session_id: str = Form(..., description="面試會話 ID"),
+    audio: UploadFile = File(..., description="求職者的回答音訊檔(wav 格式)")
+):
+    """
+    處理求職者回答的串流版本 (text/event-stream)
+
+    STT / 指令判斷 / RAG 與 /process_answer 相同；下一題邊生成邊逐句合成語音，事件依序為：
+    - **sentence**: {index, text, audio_url}，每句一筆，可收到就播放
+    - **done**: {question, question_number, is_chitchat, end, time_to_first_audio, ...}
+    - **result**: 不需要生成新題目時 (沒聽清楚 / 退出 / 題數已滿)，內容與 /process_answer 的回應相同
+    - **error**: {detail}，生成失敗時送出，之後串流結束 (已記錄的回答仍會儲存)
+    """
+    total_start = time.time()
+    try:
+        session, response, question_kwargs, draft = await _receive_answer(session_id, audio)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"處理回答失敗: {str(e)}")
+
+    events = _next_question_events(session, response, question_kwargs, draft, total_start,
+                                   endpoint="process_answer_stream")
+    return _event_stream(_sse_events(session, events, "process_answer_stream"))
+
+
+async def _next_question_events(session, response: Optional[dict], question_kwargs: Optional[dict], draft,
+                                request_start: float, endpoint: str) -> AsyncIterator[Tuple[str, dict]]:
+    """
+    _handle_transcript 之後的串流出題 (SSE 與 WebSocket 共用)
+
+    產出 ("result", 回應) 或一連串 ("sentence", ...) 再接 ("done", ...)；endpoint 為指標的標籤。
+    不會儲存 session，由呼叫端在串流結束時 (含失敗與中斷) 儲存
+    """
+    if response is not None:
+        yield "result", response
+        return
+
+    if draft is not None:
+        # 候選題已完整生成，直接交給斷句 + 逐句 TTS
+        stream = functools.partial(iter, [draft.question])
+    else:
+        agent = agent_factory.get_agent(session.job_title)
+        stream = functools.partial(agent.stream_question, **question_kwargs)
+    async for event, data in _stream_question_audio(session, stream, request_start):
+        if event == "done":
+            question = data["question"]
+            if not question:
+                yield "result", _completed_response(session)
+                return
+            session.current_question = question
+            _speculate(session)
+            data.update(question_number=session.question_count, is_chitchat=_is_chitchat(question),
+                        speculative=draft is not None, end=False)
+            _observe_stream(endpoint, data)
+        yield event, data
+
+
+@router.websocket("/answer_stream/{session_id}")
+async def answer_stream(websocket: WebSocket, session_id: str):
+    """
+    串流回答 (WebSocket)：邊說邊上傳 PCM，說完後幾百毫秒內即取得最終逐字稿
+
+    用戶端 -> 伺服器：
+    - 文字 {"type": "start", "sample_rate": 16000}：可省略，預設 16 kHz
+    - 二進位：16-bit mono PCM 片段，邊錄邊送
+    - 文字 {"type": "end"}：說完了
+
+    伺服器 -> 用戶端 (JSON)：
+    - {"type": "partial", "text"}：即時的部分逐字稿
+    - {"type": "final", "text", "finalize_ms"}：最終逐字稿，finalize_ms 為送出 end 到取得結果的毫秒數
+    - 之後與 /process_answer/stream 相同：{"type": "sentence", ...} 與 {"type": "done", ...}，
+      或不需要出題時的 {"type": "result", ...}
+    """
+    await websocket.accept()
+    session = await run_in_stage("db", get_session, session_id)
+    if not session:
+        await websocket.send_json({"type": "error", "detail": "Session not found"})
+        await websocket.close(code=4404)
+        return
+
+    loop = asyncio.get_running_loop()
+    outbox: asyncio.Queue = asyncio.Queue()
+
+    def on_partial(text: str):
+        # 由辨識器的執行緒呼叫
+        loop.call_soon_threadsafe(outbox.put_nowait, {"type": "partial", "text": text})
+
+    async def sender():
+        while (message := await outbox.get()) is not None:
+            await websocket.send_json(message)
+
+    sender_task = asyncio.ensure_future(sender())
+    backend = get_stt_backend()
+    stream = None
+    sample_rate = STT_SAMPLE_RATE
+    pcm = bytearray()
+    transcribed = False  # 取得逐字稿後 session 可能已被修改，結束時需要儲存
+    try:
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                raise WebSocketDisconnect(message.get("code", 1000))
+            if message.get("bytes"):
+                if stream is None:
+                    stream = await run_in_stage("stt", backend.open_stream, sample_rate, on_partial)
+                stream.write(message["bytes"])
+                pcm.extend(message["bytes"])
+            elif message.get("text"):
+                control = json.loads(message["text"])
+                if control.get("type") == "start" and stream is None:
+                    sample_rate = int(control.get("sample_rate", STT_SAMPLE_RATE))
+                    stream = await run_in_stage("stt", backend.open_stream, sample_rate, on_partial)
+                elif control.get("type") == "end":
+                    break
+
+        finalize_start = time.time()
+        with stage_timer("stt_finalize"):
+            user_answer = await run_in_stage("stt", stream.finish) if stream is not None else ""
+        finalize_ms = round((time.time() - finalize_start) * 1000)
+        stream = None
+        logger.info(f"🎤 使用者說 ({session_id}, {backend.name}): {user_answer}")
+        await outbox.put({"type": "final", "text": user_answer, "finalize_ms": finalize_ms})
+
+        # 沒有收到音訊就沒有東西可以歸檔
+        audio_path = audio_archive.submit(session_id, pcm_to_wav(bytes(pcm), sample_rate)) if pcm else None
+        transcribed = True
+        result = await _handle_transcript(session, user_answer, audio_path)
+        async for event, data in _next_question_events(*result, request_start=finalize_start,
+                                                       endpoint="answer_stream"):
+            await outbox.put({"type": event, **data})
+    except WebSocketDisconnect:
+        logger.info(f"[STT] WebSocket 已中斷 ({session_id})")
+    except Exception as e:
+        logger.error(f"[STT] 串流回答處理失敗: {e}")
+        await outbox.put({"type": "error", "detail": str(e)})
+    finally:
+        if stream is not None:
+            # close() 要等 Azure 停止辨識 (網路往返)，移出事件迴圈；shield 確保名額一定歸還
+            await asyncio.shield(run_in_stage("stt", stream.close))
+        if transcribed:
+            await asyncio.shield(run_in_stage("db", update_session, session))
+        outbox.put_nowait(None)
+        try:
+            await sender_task
+        except Exception:
+            pass
+    try:
+        await websocket.close()
+    except RuntimeError:
+        pass  # 用戶端已先關閉
+
+
 @router.post("/interview_action", summary="面試動作 (下一題/退出)")
 async def interview_action(action_req: InterviewAction):
     """
@@ -354,13 +673,13 @@ async def interview_action(action_req: InterviewAction):
     - **exit**: 退出面試並結束會話
     """
     try:
-        session = get_session(action_req.session_id)
+        session = await run_in_stage("db", get_session, action_req.session_id)
         if not session:
             raise HTTPException(404, "Session not found")
 
         if action_req.action == "exit":
             session.ended_at = datetime.utcnow()
-            update_session(session)
+            await run_in_stage("db", update_session, session)
             return {
                 "status": "exited",
                 "message": "面試已退出",
@@ -379,7 +698,8 @@ async def interview_action(action_req: InterviewAction):
             session.question_count += 1
             
             agent = agent_factory.get_agent(session.job_title)
-            next_question = agent.generate_question(
+            next_question = await run_in_stage(
+                "llm", agent.generate_question,
                 job_title=session.job_title,
                 resume_text=session.resume_text or "",
                 history=session.history
@@ -389,19 +709,20 @@ async def interview_action(action_req: InterviewAction):
                 return {"end": True, "message": "無更多題目"}
             
             session.current_question = next_question
-            update_session(session)
+            await run_in_stage("db", update_session, session)
+            _speculate(session)
             
             # TTS
             audio_filename = f"q_{session.id}_{session.question_count}.mp3"
-            audio_path = os.path.join("static/audio", audio_filename)
+            audio_url = f"/audio/{audio_filename}"
             try:
-                speech_service.text_to_speech(next_question, audio_path)
+                audio_url = await _synthesize(next_question, audio_filename)
             except Exception:
                 pass
             
             return {
                 "question": next_question,
-                "audio_url": f"/audio/{audio_filename}",
+                "audio_url": audio_url,
                 "question_number": session.question_count
             }
         
@@ -418,16 +739,41 @@ async def interview_action(action_req: InterviewAction):
 # ==========================================
 @router.post("/stop/{session_id}", summary="強制停止面試")
 async def stop_interview(session_id: str):
-    session = get_session(session_id)
+    session = await run_in_stage("db", get_session, session_id)
     if not session:
         raise HTTPException(status_code=404, detail="找不到面試紀錄")
     
     # 標記結束時間
     session.ended_at = datetime.utcnow()
-    update_session(session)
+    speculation_service.discard(session_id)
+    await run_in_stage("db", update_session, session)
     
     return {"status": "success", "message": "面試已強制停止"}
 
+@router.get("/answer_audio/{session_id}/{turn}", summary="取得某一題的回答錄音")
+async def get_answer_audio(session_id: str, turn: int):
+    """
+    回傳 history[turn] 的回答錄音 (依歸檔格式為 flac / opus / wav)
+
+    - **404**: 找不到面試紀錄或該題沒有錄音
+    - **410**: 錄音已超過保存期限或容量上限而被淘汰
+    - **425**: 錄音仍在背景寫檔中，稍後再試 (Retry-After)
+    """
+    session = await run_in_stage("db", get_session, session_id)
+    if not session:
+        raise HTTPException(status_code=404, detail="找不到面試紀錄")
+    history = session.history or []
+    if not 0 <= turn < len(history) or not history[turn].get("audio_path"):
+        raise HTTPException(status_code=404, detail="這一題沒有錄音")
+    state, path = await run_in_stage("db", locate_audio_path, history[turn]["audio_path"])
+    if state == "pending":
+        raise HTTPException(status_code=425, detail="錄音仍在儲存中，請稍後再試", headers={"Retry-After": "1"})
+    if state == "expired":
+        raise HTTPException(status_code=410, detail="錄音已過保存期限")
+    if path is None:
+        raise HTTPException(status_code=404, detail="找不到錄音檔")
+    return FileResponse(path)
+
 @router.get("/feedback/{session_id}", summary="取得面試回饋報告")
 async def get_feedback(session_id: str):
     """
@@ -444,11 +790,12 @@ async def get_feedback(session_id: str):
     print("⏳ AI (Ollama) 正在努力回顧對話並撰寫評語，這可能會花 1~3 分鐘，請耐心等候...\n")
 
     try:
-        session = get_session(session_id)
+        session = await run_in_stage("db", get_session, session_id)
         if not session:
             raise HTTPException(404, "Session not found")
         
-        feedback = feedback_service.analyze_interview(
+        feedback = await run_in_stage(
+            "feedback", feedback_service.analyze_interview,
             job_title=session.job_title,
             history=session.history or [],
             resume_text=session.resume_text or ""
@@ -460,7 +807,7 @@ async def get_feedback(session_id: str):
             "summary": feedback.summary
         }
         session.ended_at = datetime.utcnow()
-        update_session(session)
+        await run_in_stage("db", update_session, session)
 
         # 重點 3：在終端機漂亮地列印回饋報告
         print("\n" + "="*50)
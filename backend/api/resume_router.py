@@ -3,6 +3,7 @@ from fastapi import APIRouter, UploadFile, File, HTTPException, Form
 from backend.services.ocr_service import ocr_service
 from backend.services.resume_service import resume_service
 from backend.database import save_resume
+from backend.utils.metrics import REQUEST_SECONDS, stage_timer
 import uuid
 import os
 import shutil
@@ -73,14 +74,18 @@ async def upload_resume(file: UploadFile = File(...), user_id: str = Form(...)):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"檔案儲存失敗: {str(e)}")
 
+    total_start = time.time()
     preview_urls = generate_pdf_preview(file_path, SAVE_DIR)
 
     success, result = ocr_service.process_file(file_path)
     if not success:
         raise HTTPException(status_code=400, detail=result.get("error"))
 
-    structured = resume_service.structure_resume(result)
-    resume = save_resume(user_id=user_id, filename=file.filename, file_path=file_path, ocr_json=result, structured_data=structured)
+    with stage_timer("structure"):
+        structured = resume_service.structure_resume(result)
+    with stage_timer("db"):
+        resume = save_resume(user_id=user_id, filename=file.filename, file_path=file_path, ocr_json=result, structured_data=structured)
+    REQUEST_SECONDS.observe(time.time() - total_start, endpoint="resume_upload")
     
     gemini_data = result.get("resume_score", {}).get("gemini_score", {})
     score = gemini_data.get("score", 0)
@@ -116,28 +121,25 @@ async def upload_local_resume(user_id: str = Form(...)):
     # 🌟 修正 2：優先產預覽圖到 static 資料夾，解決 404 問題
     preview_urls = generate_pdf_preview(file_path, "static/resumes")
 
+    # 各階段耗時 (ocr / gemini / structure / db) 記錄在 GET /metrics
     total_start = time.time()
 
-    t0 = time.time()
     success, result = ocr_service.process_file(file_path)
-    t1 = time.time()
-    print(f"⏱️ [計時] 1. Azure OCR + Gemini 評分耗時: {t1 - t0:.2f} 秒")
 
     if not success:
         raise HTTPException(status_code=400, detail=result.get("error"))
     
-    structured = resume_service.structure_resume(result)
-    t2 = time.time()
-    print(f"⏱️ [計時] 2. 結構化與 Ollama 猜職位耗時: {t2 - t1:.2f} 秒")
+    with stage_timer("structure"):
+        structured = resume_service.structure_resume(result)
     
     try:
-        resume = save_resume(user_id=user_id, filename=target_filename, file_path=file_path, ocr_json=result, structured_data=structured)
+        with stage_timer("db"):
+            resume = save_resume(user_id=user_id, filename=target_filename, file_path=file_path, ocr_json=result, structured_data=structured)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"資料庫儲存失敗: {str(e)}")
     
-    t3 = time.time()
-    print(f"⏱️ [計時] 3. 資料庫儲存耗時: {t3 - t2:.2f} 秒")
-    print(f"🚀 [計時總結] 履歷處理總耗時: {t3 - total_start:.2f} 秒")
+    total_seconds = time.time() - total_start
+    REQUEST_SECONDS.observe(total_seconds, endpoint="resume_upload_local")
     
     gemini_data = result.get("resume_score", {}).get("gemini_score", {})
     score = gemini_data.get("score", 0)
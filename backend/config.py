@@ -21,6 +21,68 @@ class Settings(BaseSettings):
     
     UPLOAD_DIR: str = os.path.join(BASE_DIR, "uploads")
     AUDIO_DIR: str = os.path.join(BASE_DIR, "static", "audio")
+    SAVED_AUDIO_DIR: str = os.path.join(BASE_DIR, "saved_audio")  # 求職者回答音檔 (背景歸檔)
+
+    # --- 知識庫熱更新 ---
+    RAG_WATCH_KNOWLEDGE: bool = False  # 是否啟動背景監看 knowledge_base/ 的變動
+    RAG_WATCH_INTERVAL: float = 5.0    # 監看輪詢間隔 (秒)
+
+    # --- Ollama ---
+    OLLAMA_MODEL: str = "llama3.1:8b"
+    OLLAMA_KEEP_ALIVE: str = "30m"  # 模型在 Ollama 中常駐的時間，避免閒置後被卸載而重新載入
+
+    # --- 啟動 ---
+    WARMUP_ON_STARTUP: bool = True  # 啟動後在背景預先載入向量模型 / 語音 / OCR，而不是等第一個請求
+
+    # --- RAG 檢索方式 ---
+    RAG_RETRIEVAL_METHOD: str = "hybrid"  # dense / lexical / hybrid (BM25 + 向量融合)
+
+    # --- 各處理階段的執行緒池大小 (阻塞呼叫移出事件迴圈，見 backend/utils/stage_pools.py) ---
+    STAGE_POOL_STT: int = 4       # Azure 語音轉文字
+    STAGE_POOL_LLM: int = 2       # Ollama 出題 (對應 OLLAMA_NUM_PARALLEL，開太多只會在 Ollama 端排隊)
+    STAGE_POOL_FEEDBACK: int = 1  # 回饋報告 (動輒數分鐘，獨立一池避免卡住出題)
+    STAGE_POOL_RAG: int = 2       # 向量編碼 + 檢索
+    STAGE_POOL_TTS: int = 4       # Azure 文字轉語音
+    STAGE_POOL_DB: int = 8        # SQLAlchemy 同步查詢
+    STAGE_POOL_SPECULATION: int = 1  # 背景推測候選題
+
+    # --- 語音 ---
+    TTS_VOICE: str = "zh-TW-YunJheNeural"  # 台灣男聲
+    CANNED_AUDIO_VOICES: str = ""           # 預錄固定語句的語音 (逗號分隔)，空白時只用 TTS_VOICE
+    SPEECH_MAX_CONCURRENCY: int = 8     # 每個行程同時進行的 Azure TTS + STT 上限
+    SPEECH_SYNTHESIZERS: int = 4        # 預先建立並重複使用的合成器數 (0 = 每次呼叫才建立)
+    SPEECH_QUEUE_TIMEOUT: float = 10.0  # 排隊等待上限 (秒)
+    SPEECH_TTS_TIMEOUT: float = 15.0    # 單次合成上限 (秒)
+    SPEECH_STT_TIMEOUT: float = 60.0    # 單次 (整檔) 辨識上限 (秒)
+
+    # --- 串流語音辨識 (WebSocket /answer_stream) ---
+    STT_BACKEND: str = "azure"  # azure / scripted (離線替身，依收到的音訊量吐出 STT_SCRIPTED_TRANSCRIPT)
+    STT_SCRIPTED_TRANSCRIPT: str = "我在上一份工作主要負責後端 API 的效能優化。"
+
+    # --- TTS 快取 ---
+    TTS_CACHE_ENABLED: bool = True  # 相同文字的語音只合成一次 (static/audio/cache)
+    TTS_CACHE_MAX_MB: int = 512     # 快取總大小上限，超過時淘汰最久未使用的檔案
+
+    # --- 音檔歸檔與保存期限 ---
+    AUDIO_ARCHIVE_CODEC: str = "flac"        # 回答音檔的保存格式：flac (無損) / opus (24 kbps) / wav；需要 ffmpeg
+    AUDIO_ARCHIVE_MAX_MB: int = 4096          # saved_audio/ 總大小上限，超過時淘汰最久未存取的回答
+    AUDIO_ARCHIVE_MAX_AGE_DAYS: float = 90.0  # 回答音檔保存天數 (0 = 不限)
+    QUESTION_AUDIO_MAX_MB: int = 512          # static/audio/q_*.mp3 總大小上限
+    QUESTION_AUDIO_MAX_AGE_DAYS: float = 7.0  # 題目語音保存天數 (0 = 不限)
+    AUDIO_RETENTION_INTERVAL: float = 3600.0  # 背景淘汰的執行間隔 (秒，0 = 不在背景執行)
+
+    # --- STT 辨識記錄 (logs/stt_recognition，背景寫入) ---
+    STT_LOG_DIR: str = os.path.join(BASE_DIR, "logs", "stt_recognition")
+    STT_LOG_ROTATE_MB: int = 16          # 單一檔案超過此大小即輪替並 gzip 壓縮
+    STT_LOG_MAX_TOTAL_MB: int = 256      # 壓縮檔總大小上限，超過時刪除最舊的
+    STT_LOG_QUEUE_SIZE: int = 1000       # 待寫入記錄上限，滿了直接丟棄 (不拖慢請求)
+    STT_LOG_FLUSH_INTERVAL: float = 2.0  # 最長多久寫入一次 (秒)
+
+    # --- 推測式預先出題 (求職者作答時先在背景生成候選追問) ---
+    SPECULATION_ENABLED: bool = False
+    SPECULATION_DRAFTS: int = 2               # 每題預測幾種回答方向
+    SPECULATION_TTL: float = 180.0            # 候選題保留秒數
+    SPECULATION_MIN_SIMILARITY: float = 0.6   # 逐字稿與預測回答的餘弦相似度門檻
 
     class Config:
         # 指定讀取 .env 檔案
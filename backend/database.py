@@ -65,6 +65,21 @@ class InterviewSession(Base):
     
     user = relationship('User', back_populates='sessions')
 
+class AudioArchiveEntry(Base):
+    """回答音檔歸檔索引 (history 內的 audio_path -> 實際壓縮後的檔案)"""
+    __tablename__ = 'audio_archive'
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    session_id = Column(String(36), index=True, nullable=False)
+    original_path = Column(String(512), unique=True, nullable=False)  # 寫進 history 的路徑
+    stored_path = Column(String(512), nullable=False)                 # 實際檔案 (.flac / .opus / .wav)
+    codec = Column(String(16), nullable=False)
+    size_bytes = Column(Integer, nullable=False)
+    original_bytes = Column(Integer, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    last_accessed = Column(DateTime, default=datetime.utcnow)
+    expired_at = Column(DateTime, nullable=True)  # 因容量 / 保存期限被刪除的時間
+
 def init_db():
     """初始化資料庫 (建立所有表格)"""
     Base.metadata.create_all(bind=engine)
@@ -1,14 +1,56 @@
 # main.py
 
 import uvicorn
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from backend.config import settings
-from backend.api import resume_router, interview_router
+from backend.api import resume_router, interview_router, admin_router, health_router
 from backend.database import init_db
+from backend.services.rag_service import rag_service
+from backend.services.speech_service import speech_service
+from backend.services.audio_archive import audio_archive
+from backend.services.audio_retention import AudioRetentionSweeper
+from backend.services.enhanced_speech_service import recognition_log
+from backend.services.ocr_service import ocr_service
+from backend.services.readiness_service import readiness_service
+from backend.utils.lazy import warm_in_background
+from backend.utils.stage_pools import shutdown_stage_pools
 from fastapi.staticfiles import StaticFiles
 
-app = FastAPI(title=settings.PROJECT_NAME, description="沉浸式智慧模擬面試訓練平台後端服務")
+
+def _on_service_ready(service):
+    # --- 知識庫監看 (可選)，需等 RAG 索引建立後才能啟動 ---
+    if service is rag_service and settings.RAG_WATCH_KNOWLEDGE:
+        rag_service.start_watcher(settings.RAG_WATCH_INTERVAL)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # --- 背景暖機：API 先開始接受請求，模型與索引在背景載入 ---
+    # 未暖機完成前收到的請求會在第一次使用時同步初始化 (LazyService 保證只建立一次)
+    if settings.WARMUP_ON_STARTUP:
+        # 服務初始化完成後再跑一次合成的檢索 / 生成 / TTS，成功後 /readyz 才會回傳 200
+        warm_in_background(rag_service, speech_service, ocr_service,
+                           on_ready=_on_service_ready, on_complete=readiness_service.warmup)
+    elif settings.RAG_WATCH_KNOWLEDGE:
+        warm_in_background(rag_service, on_ready=_on_service_ready)
+    # --- 音檔保存期限 / 容量上限 (背景淘汰) ---
+    sweeper = None
+    if settings.AUDIO_RETENTION_INTERVAL > 0:
+        sweeper = AudioRetentionSweeper(settings.AUDIO_RETENTION_INTERVAL)
+        sweeper.start()
+    yield
+    if sweeper is not None:
+        sweeper.stop()
+    if rag_service.ready:
+        rag_service.stop_watcher()
+    shutdown_stage_pools()
+    audio_archive.close()  # 寫完尚未歸檔的回答音檔
+    recognition_log.close()  # 寫完尚未寫入的 STT 辨識記錄
+
+
+app = FastAPI(title=settings.PROJECT_NAME, description="沉浸式智慧模擬面試訓練平台後端服務", lifespan=lifespan)
 app.mount("/static", StaticFiles(directory="static"), name="static")
 
 # --- 資料庫初始化 ---
@@ -27,6 +69,8 @@ app.add_middleware(
 # --- 註冊路由 ---
 app.include_router(resume_router, prefix="/api/v1/resume", tags=["履歷功能"])
 app.include_router(interview_router, prefix="/api/v1/interview", tags=["面試功能"])
+app.include_router(admin_router, prefix="/api/v1/admin", tags=["管理功能"])
+app.include_router(health_router, tags=["系統"])
 # 注意：移除了 static mount 和 audio_router
 
 @app.get("/", tags=["系統"])
@@ -1,25 +1,33 @@
-# backend/services/__init__.py
 """
 Services 模組：封裝所有業務邏輯服務
+
+子模組在第一次被存取時才匯入 (PEP 562 模組層級 __getattr__)，
+匯入 backend.services 本身不會載入 OCR / 語音 / 向量模型等重量級相依套件。
 """
+import importlib
+
+# 對外名稱 -> 所在子模組
+_EXPORTS = {
+    "ocr_service": ".ocr_service",
+    "resume_service": ".resume_service",
+    "rag_service": ".rag_service",
+    "agent_factory": ".enhanced_agent_service",
+    "feedback_service": ".feedback_service",
+    "speech_service": ".speech_service",
+    "create_session": ".session_service",
+    "get_session": ".session_service",
+    "update_session": ".session_service",
+    "readiness_service": ".readiness_service",
+    "speculation_service": ".speculation_service",
+    "audio_archive": ".audio_archive",
+}
+
+__all__ = list(_EXPORTS)
 
-# 確保按順序載入，避免循環引用
-from .ocr_service import ocr_service
-from .resume_service import resume_service
-from .rag_service import rag_service
-from .enhanced_agent_service import agent_factory
-from .feedback_service import feedback_service
-from .speech_service import speech_service
-from .session_service import create_session, get_session, update_session
 
-__all__ = [
-    "ocr_service",
-    "resume_service",
-    "rag_service",
-    "agent_factory",
-    "feedback_service",
-    "speech_service",
-    "create_session",
-    "get_session",
-    "update_session",
-]
\ No newline at end of file
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_EXPORTS[name], __name__), name)
+    globals()[name] = value
+    return value
@@ -0,0 +1,327 @@
+# backend/services/audio_archive.py
+"""
+回答音檔的背景歸檔
+
+辨識直接使用記憶體中的音訊，存檔只是留存紀錄 (回放 / 評估)，不應該擋在回應前面。
+submit() 立即回傳音檔的路徑 (寫進 session.history)，實際寫檔交給單一背景執行緒：
+
+- 佇列有上限，磁碟慢到塞滿時 submit() 不等待 (它在 event loop 上呼叫)，
+  直接放棄這次存檔並記錄 log 與 dropped 計數，而不是無限制地累積記憶體
+- 依 AUDIO_ARCHIVE_CODEC 轉成 flac / opus (backend/utils/audio_codec.py) 再寫檔，
+  寫到暫存檔再 os.replace，讀到的檔案一定是完整的
+- 每個檔案記錄在 audio_archive 資料表 (依 session 索引，路徑一律存絕對路徑)：history 內的路徑仍是原本的 .wav 路徑，
+  以 resolve() 查出實際的壓縮檔；被保存期限 / 容量上限淘汰後回傳 None (見 audio_retention.py)
+- 已排入但尚未寫完的路徑另外記錄，locate() 回報為 pending，讓呼叫端知道稍後再試，而不是當成已淘汰
+- 寫檔失敗只記錄 log 與計數，不影響面試流程
+"""
+import logging
+import os
+import queue
+import threading
+import time
+import uuid
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from backend.config import settings
+from backend.database import AudioArchiveEntry, InterviewSession, SessionLocal
+from backend.utils.audio_codec import encode
+from backend.utils.metrics import register_stats
+
+logger = logging.getLogger(__name__)
+
+
+class ArchiveIndex:
+    """audio_archive 資料表的存取"""
+
+    def __init__(self, session_factory: Callable = SessionLocal):
+        self._session_factory = session_factory
+
+    def add(self, session_id: str, original_path: str, stored_path: str, codec: str,
+            size_bytes: int, original_bytes: int):
+        original_path = os.path.abspath(original_path)
+        with self._session_factory() as db:
+            entry = db.query(AudioArchiveEntry).filter(AudioArchiveEntry.original_path == original_path).first()
+            if entry is None:
+                entry = AudioArchiveEntry(session_id=session_id, original_path=original_path)
+                db.add(entry)
+            entry.stored_path = stored_path
+            entry.codec = codec
+            entry.size_bytes = size_bytes
+            entry.original_bytes = original_bytes
+            entry.last_accessed = datetime.utcnow()
+            entry.expired_at = None
+            db.commit()
+
+    def lookup(self, original_path: str, touch: bool = True) -> Optional[Dict[str, Any]]:
+        """查詢原始路徑的歸檔紀錄；touch 時更新最後存取時間 (LRU 淘汰依據)"""
+        original_path = os.path.abspath(original_path)
+        with self._session_factory() as db:
+            entry = db.query(AudioArchiveEntry).filter(AudioArchiveEntry.original_path == original_path).first()
+            if entry is None:
+                return None
+            if touch and entry.expired_at is None:
+                entry.last_accessed = datetime.utcnow()
+                db.commit()
+            return self._as_dict(entry)
+
+    def for_session(self, session_id: str) -> List[Dict[str, Any]]:
+        with self._session_factory() as db:
+            entries = db.query(AudioArchiveEntry).filter(AudioArchiveEntry.session_id == session_id) \
+                .order_by(AudioArchiveEntry.created_at).all()
+            return [self._as_dict(e) for e in entries]
+
+    def live_entries(self) -> List[Dict[str, Any]]:
+        """尚未淘汰的紀錄，最久未存取的在前面"""
+        with self._session_factory() as db:
+            entries = db.query(AudioArchiveEntry).filter(AudioArchiveEntry.expired_at.is_(None)) \
+                .order_by(AudioArchiveEntry.last_accessed).all()
+            return [self._as_dict(e) for e in entries]
+
+    def stored_paths(self) -> set:
+        with self._session_factory() as db:
+            rows = db.query(AudioArchiveEntry.original_path, AudioArchiveEntry.stored_path).all()
+            return {os.path.abspath(p) for row in rows for p in row}
+
+    def expire(self, entries: Iterable[Dict[str, Any]]) -> int:
+        """
+        標記為已淘汰，並在對應 session 的 history 加上 audio_expired，
+        讓前端 / 報告知道這段錄音已不存在而不是讀取失敗
+        """
+        by_session: Dict[str, set] = {}
+        now = datetime.utcnow()
+        with self._session_factory() as db:
+            for item in entries:
+                entry = db.get(AudioArchiveEntry, item["id"])
+                if entry is None or entry.expired_at is not None:
+                    continue
+                entry.expired_at = now
+                by_session.setdefault(entry.session_id, set()).add(entry.original_path)
+
+            for session_id, paths in by_session.items():
+                session = db.query(InterviewSession).filter(InterviewSession.id == session_id).first()
+                if session is None or not session.history:
+                    continue
+                # JSON 欄位需要換成新的 list 才會被寫回
+                session.history = [
+                    dict(turn, audio_expired=True)
+                    if turn.get("audio_path") and os.path.abspath(turn["audio_path"]) in paths else turn
+                    for turn in session.history
+                ]
+            db.commit()
+        return sum(len(paths) for paths in by_session.values())
+
+    def stats(self) -> Dict[str, Any]:
+        entries = self.live_entries()
+        stored = sum(e["size_bytes"] for e in entries)
+        original = sum(e["original_bytes"] for e in entries)
+        return {
+            "entries": len(entries),
+            "stored_bytes": stored,
+            "original_bytes": original,
+            "compression_ratio": round(stored / original, 3) if original else None,
+        }
+
+    @staticmethod
+    def _as_dict(entry: AudioArchiveEntry) -> Dict[str, Any]:
+        return {
+            "id": entry.id,
+            "session_id": entry.session_id,
+            "original_path": entry.original_path,
+            "stored_path": entry.stored_path,
+            "codec": entry.codec,
+            "size_bytes": entry.size_bytes,
+            "original_bytes": entry.original_bytes,
+            "created_at": entry.created_at,
+            "last_accessed": entry.last_accessed,
+            "expired_at": entry.expired_at,
+        }
+
+
+class AudioArchive:
+    """
+    用法：
+        path = audio_archive.submit(session_id, wav_bytes)  # 不等寫檔完成；佇列已滿時為 None
+        audio_archive.resolve(path)                         # 實際檔案路徑；已淘汰時為 None
+        audio_archive.locate(path)                          # (狀態, 實際檔案路徑)，可區分寫檔中 / 已淘汰
+        audio_archive.flush()                               # 需要時等待佇列清空 (測試 / 關閉服務)
+    """
+
+    def __init__(self, directory: str, codec: str = "wav", index: Optional[ArchiveIndex] = None,
+                 max_pending: int = 64):
+        self.directory = directory
+        self.codec = codec
+        self.index = index
+        self._queue: "queue.Queue[Optional[tuple]]" = queue.Queue(maxsize=max_pending)
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._pending_paths: set = set()  # 已排入但尚未寫完的原始路徑 (絕對路徑)
+        self._stats = {"submitted": 0, "dropped": 0, "written": 0, "failed": 0, "bytes_in": 0, "bytes_written": 0}
+
+    def new_path(self, session_id: str, suffix: str = ".wav") -> str:
+        # 時間戳記 + UUID 防止覆蓋 (與原本 save_audio_file 的命名相同)
+        return os.path.join(self.directory, f"{session_id}_{int(time.time())}_{uuid.uuid4().hex[:5]}{suffix}")
+
+    def submit(self, session_id: str, data: bytes, suffix: str = ".wav") -> Optional[str]:
+        """排入背景寫檔並回傳 (原始格式的) 檔案路徑；佇列已滿時不等待，放棄存檔並回傳 None"""
+        path = self.new_path(session_id, suffix)
+        self._ensure_thread()
+        with self._lock:
+            self._pending_paths.add(os.path.abspath(path))
+        try:
+            self._queue.put_nowait((session_id, path, data))
+        except queue.Full:
+            logger.warning(f"[Archive] 歸檔佇列已滿 ({self._queue.maxsize})，放棄儲存 {session_id} 的音檔")
+            with self._lock:
+                self._pending_paths.discard(os.path.abspath(path))
+                self._stats["dropped"] += 1
+            return None
+        with self._lock:
+            self._stats["submitted"] += 1
+        return path
+
+    def resolve(self, path: str) -> Optional[str]:
+        """
+        history 內的音檔路徑 -> 目前實際存在的檔案
+
+        已轉檔的回傳壓縮檔路徑；被淘汰、尚未寫完或找不到時回傳 None；
+        未建立索引的舊檔 (歸檔前的 saved_audio/*.wav) 存在就原樣回傳
+        """
+        return self.locate(path)[1]
+
+    def locate(self, path: str) -> Tuple[str, Optional[str]]:
+        """
+        history 內的音檔路徑 -> (狀態, 實際檔案路徑)
+
+        狀態：
+        - ready: 檔案存在，回傳實際路徑
+        - pending: 仍在佇列中等待背景寫檔，稍後再試
+        - expired: 已被保存期限 / 容量上限淘汰
+        - missing: 找不到 (寫檔失敗、佇列已滿而放棄，或檔案被移除)
+        """
+        # 先查佇列：寫完後才移出，此時索引一定已經建立
+        with self._lock:
+            if os.path.abspath(path) in self._pending_paths:
+                return "pending", None
+        if self.index is not None:
+            entry = self.index.lookup(path)
+            if entry is not None:
+                if entry["expired_at"] is not None:
+                    return "expired", None
+                if os.path.exists(entry["stored_path"]):
+                    return "ready", entry["stored_path"]
+                return "missing", None
+        return ("ready", path) if os.path.exists(path) else ("missing", None)
+
+    def _ensure_thread(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="audio-archive", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            try:
+                if item is None:
+                    return
+                self.store(*item)
+            finally:
+                if item is not None:
+                    with self._lock:
+                        self._pending_paths.discard(os.path.abspath(item[1]))
+                self._queue.task_done()
+
+    def store(self, session_id: str, path: str, data: bytes, remove_original: bool = False) -> Optional[str]:
+        """
+        轉檔、寫檔並建立索引 (在背景執行緒執行；也用於把舊的 .wav 補轉檔)
+
+        Args:
+            path: history 內記錄的原始路徑
+            remove_original: 寫完後刪除原始路徑上的檔案 (補轉檔舊 .wav 時使用)
+
+        Returns:
+            實際寫入的檔案路徑；失敗時為 None
+        """
+        try:
+            stem, ext = os.path.splitext(path)
+            encoded, suffix, codec = encode(data, self.codec) if ext == ".wav" else (data, ext, "raw")
+            stored = stem + suffix
+            os.makedirs(os.path.dirname(stored) or ".", exist_ok=True)
+            tmp = f"{stored}.tmp"
+            try:
+                with open(tmp, "wb") as f:
+                    f.write(encoded)
+                os.replace(tmp, stored)
+            finally:
+                if os.path.exists(tmp):
+                    os.remove(tmp)
+            if self.index is not None:
+                self.index.add(session_id, path, stored, codec, len(encoded), len(data))
+            if remove_original and stored != path and os.path.exists(path):
+                os.remove(path)
+        except Exception as e:
+            logger.error(f"[Archive] 儲存音檔失敗 {path}: {e}")
+            with self._lock:
+                self._stats["failed"] += 1
+            return None
+        logger.info(f"💾 音檔已儲存: {stored} ({len(data)} -> {len(encoded)} bytes)")
+        with self._lock:
+            self._stats["written"] += 1
+            self._stats["bytes_in"] += len(data)
+            self._stats["bytes_written"] += len(encoded)
+        return stored
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """等待佇列中的音檔全部寫完；逾時回傳 False"""
+        if timeout is None:
+            self._queue.join()
+            return True
+        deadline = time.monotonic() + timeout
+        while self._queue.unfinished_tasks:
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(0.01)
+        return True
+
+    def close(self, timeout: float = 10.0):
+        """寫完剩下的音檔並停止背景執行緒 (服務關閉時呼叫)"""
+        with self._lock:
+            thread = self._thread
+        if thread is None or not thread.is_alive():
+            return
+        if not self.flush(timeout):
+            logger.warning(f"[Archive] 關閉時仍有 {self._queue.unfinished_tasks} 個音檔未寫完")
+        self._queue.put(None)
+        thread.join(timeout)
+
+    def counters(self) -> Dict[str, Any]:
+        """背景寫檔的計數 (不查資料庫)"""
+        with self._lock:
+            stats = dict(self._stats)
+        stats["pending"] = self._queue.unfinished_tasks
+        return stats
+
+    def stats(self) -> Dict[str, Any]:
+        stats = self.counters()
+        stats["codec"] = self.codec
+        if self.index is not None:
+            stats["index"] = self.index.stats()
+        return stats
+
+
+# 建立全局實例
+audio_archive = AudioArchive(settings.SAVED_AUDIO_DIR, codec=settings.AUDIO_ARCHIVE_CODEC, index=ArchiveIndex())
+
+register_stats("audio_archive", "回答音檔歸檔", audio_archive.counters,
+               counters=("submitted", "dropped", "written", "failed", "bytes_in", "bytes_written"), gauges=("pending",))
+
+
+def resolve_audio_path(path: Optional[str]) -> Optional[str]:
+    """history 內的 audio_path -> 目前實際存在的檔案 (已淘汰時為 None)"""
+    return audio_archive.resolve(path) if path else None
+
+
+def locate_audio_path(path: str) -> Tuple[str, Optional[str]]:
+    """history 內的 audio_path -> (狀態, 實際檔案路徑)，見 AudioArchive.locate()"""
+    return audio_archive.locate(path)
@@ -0,0 +1,161 @@
+# backend/services/audio_retention.py
+"""
+音檔保存期限與容量上限
+
+兩個目錄各自有「保存天數」與「總大小」兩種上限，超過時依最後存取時間 (LRU) 淘汰：
+
+- saved_audio/ (回答音檔)：以 audio_archive 資料表為準，淘汰後標記 expired_at 並在 session.history 加上
+  audio_expired，resolve_audio_path() 對這些路徑回傳 None；尚未建立索引的舊 .wav 先補轉檔再納入計算
+- static/audio/q_*.mp3 (TTS 快取關閉時逐題合成的題目語音)：沒有索引，直接以檔案的 atime / mtime 判斷
+  (static/audio/cache 與 canned 由 TTSCache / 預錄機制自行管理，不在此處理)
+
+AudioRetentionSweeper 每 AUDIO_RETENTION_INTERVAL 秒在背景執行一次 sweep()；
+也可以用 scripts/audio_retention.py 手動執行。
+"""
+import fnmatch
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from backend.config import settings
+from backend.services.audio_archive import AudioArchive, audio_archive
+
+logger = logging.getLogger(__name__)
+
+DAY = 86400
+QUESTION_AUDIO_PATTERN = "q_*.mp3"
+
+
+def compact_legacy(archive: AudioArchive, limit: Optional[int] = None) -> int:
+    """把歸檔前留下、尚未建立索引的 saved_audio/*.wav 轉檔並建立索引；回傳處理的檔案數"""
+    if archive.index is None or not os.path.isdir(archive.directory):
+        return 0
+    known = archive.index.stored_paths()
+    compacted = 0
+    for name in sorted(os.listdir(archive.directory)):
+        path = os.path.abspath(os.path.join(archive.directory, name))
+        if not name.endswith(".wav") or path in known:
+            continue
+        if limit is not None and compacted >= limit:
+            break
+        with open(path, "rb") as f:
+            data = f.read()
+        # 檔名為 {session_id}_{timestamp}_{uuid}.wav
+        if archive.store(name.split("_", 1)[0], path, data, remove_original=True):
+            compacted += 1
+    return compacted
+
+
+def enforce_archive_quota(archive: AudioArchive, max_bytes: int, max_age_days: float,
+                          now: Optional[datetime] = None) -> Dict[str, int]:
+    """
+    依保存天數與總大小淘汰回答音檔 (刪檔 + 標記 expired)
+
+    Returns:
+        {"expired": 淘汰筆數, "freed_bytes": 釋放的位元組數}
+    """
+    if archive.index is None:
+        return {"expired": 0, "freed_bytes": 0}
+    now = now or datetime.utcnow()
+    entries = archive.index.live_entries()  # 最久未存取的在前面
+    cutoff = now - timedelta(days=max_age_days) if max_age_days > 0 else None
+
+    victims = [e for e in entries if cutoff is not None and e["created_at"] < cutoff]
+    expired_ids = {e["id"] for e in victims}
+    remaining = [e for e in entries if e["id"] not in expired_ids]
+    total = sum(e["size_bytes"] for e in remaining)
+    for entry in remaining:
+        if max_bytes <= 0 or total <= max_bytes:
+            break
+        victims.append(entry)
+        total -= entry["size_bytes"]
+
+    freed = 0
+    for entry in victims:
+        try:
+            freed += os.path.getsize(entry["stored_path"])
+            os.remove(entry["stored_path"])
+        except FileNotFoundError:
+            pass
+    archive.index.expire(victims)
+    return {"expired": len(victims), "freed_bytes": freed}
+
+
+def enforce_directory_quota(directory: str, pattern: str, max_bytes: int, max_age_days: float,
+                            now: Optional[float] = None) -> Dict[str, int]:
+    """
+    沒有索引的目錄：刪除超過保存天數的檔案，總大小仍超過上限時依 max(atime, mtime) 由舊到新刪除
+
+    Returns:
+        {"removed": 刪除檔案數, "freed_bytes": 釋放的位元組數}
+    """
+    if not os.path.isdir(directory):
+        return {"removed": 0, "freed_bytes": 0}
+    now = now or time.time()
+    files: List[tuple] = []
+    for name in os.listdir(directory):
+        path = os.path.join(directory, name)
+        if not fnmatch.fnmatch(name, pattern) or not os.path.isfile(path):
+            continue
+        stat = os.stat(path)
+        files.append((max(stat.st_atime, stat.st_mtime), stat.st_mtime, stat.st_size, path))
+    files.sort()
+
+    too_old = (lambda f: now - f[1] > max_age_days * DAY) if max_age_days > 0 else (lambda f: False)
+    victims = [f for f in files if too_old(f)]
+    remaining = [f for f in files if not too_old(f)]
+    total = sum(f[2] for f in remaining)
+    for f in remaining:
+        if max_bytes <= 0 or total <= max_bytes:
+            break
+        victims.append(f)
+        total -= f[2]
+
+    freed = 0
+    for _, _, size, path in victims:
+        try:
+            os.remove(path)
+            freed += size
+        except FileNotFoundError:
+            pass
+    return {"removed": len(victims), "freed_bytes": freed}
+
+
+def sweep(archive: AudioArchive = audio_archive, question_dir: str = settings.AUDIO_DIR) -> Dict[str, Any]:
+    """依 settings 執行一次完整的轉檔補齊與淘汰"""
+    start = time.time()
+    result = {
+        "compacted": compact_legacy(archive),
+        "answers": enforce_archive_quota(archive, settings.AUDIO_ARCHIVE_MAX_MB * 1024 * 1024,
+                                         settings.AUDIO_ARCHIVE_MAX_AGE_DAYS),
+        "questions": enforce_directory_quota(question_dir, QUESTION_AUDIO_PATTERN,
+                                             settings.QUESTION_AUDIO_MAX_MB * 1024 * 1024,
+                                             settings.QUESTION_AUDIO_MAX_AGE_DAYS),
+    }
+    result["seconds"] = round(time.time() - start, 3)
+    logger.info(f"[Retention] 補轉檔 {result['compacted']} 個，淘汰回答 {result['answers']['expired']} 個，"
+                f"刪除題目語音 {result['questions']['removed']} 個 ({result['seconds']} 秒)")
+    return result
+
+
+class AudioRetentionSweeper(threading.Thread):
+    """每 interval 秒執行一次 sweep()"""
+
+    def __init__(self, interval: float):
+        super().__init__(name="audio-retention", daemon=True)
+        self.interval = interval
+        self._stop_event = threading.Event()
+
+    def run(self):
+        print(f"[Retention] 音檔保存期限管理已啟動 (每 {self.interval} 秒執行一次)")
+        while not self._stop_event.wait(self.interval):
+            try:
+                sweep()
+            except Exception as e:
+                print(f"[Retention] 執行失敗: {e}")
+
+    def stop(self):
+        self._stop_event.set()
@@ -0,0 +1,142 @@
+# backend/services/canned_audio.py
+"""
+固定語句的預錄語音
+
+面試流程中有許多固定的句子 (沒聽清楚、面試結束、LLM 失敗時的備用題…)，
+由 scripts/build_canned_audio.py 在部署前依每個設定的語音先合成成靜態音檔並寫出 manifest：
+
+    static/audio/canned/manifest.json
+    static/audio/canned/<voice>/<name>-<文字雜湊>.mp3
+
+執行時 interview_router 以文字查表即可取得 audio_url，不需要任何合成延遲；
+文字改了但還沒重新建置時查不到對應的預錄，照常走 TTS。
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Callable, Dict, Iterable, Optional
+
+from backend.config import settings
+from backend.services.enhanced_agent_service import EnhancedInterviewAgent
+
+# 名稱 -> 文字；新增固定語句時加在這裡並重新執行 build_canned_audio.py
+NOT_HEARD = "抱歉，我沒有聽清楚您的回答，可以再說一次嗎？"
+INTERVIEW_EXITED = "好的，今天的面試到此結束，辛苦了。"
+INTERVIEW_COMPLETED = "面試已完成，正在生成回饋報告…"
+
+CANNED_PHRASES: Dict[str, str] = {
+    "not_heard": NOT_HEARD,
+    "interview_exited": INTERVIEW_EXITED,
+    "interview_completed": INTERVIEW_COMPLETED,
+    "question_fallback": EnhancedInterviewAgent.QUESTION_FALLBACK,
+}
+
+MANIFEST_FILE = "manifest.json"
+URL_PREFIX = "/audio/canned"
+
+
+def phrase_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:12]
+
+
+def configured_voices() -> list:
+    """CANNED_AUDIO_VOICES (逗號分隔)，未設定時只用 TTS_VOICE"""
+    voices = [v.strip() for v in settings.CANNED_AUDIO_VOICES.split(",") if v.strip()]
+    return voices or [settings.TTS_VOICE]
+
+
+def build_bundle(output_dir: str, voices: Iterable[str], synthesize: Callable[[str, str, str], None],
+                 phrases: Optional[Dict[str, str]] = None, force: bool = False) -> Dict:
+    """
+    合成所有固定語句並寫出 manifest
+
+    Args:
+        output_dir: 輸出目錄 (通常為 static/audio/canned)
+        voices: 語音名稱清單
+        synthesize: synthesize(text, voice, output_path)
+        phrases: 名稱 -> 文字，預設為 CANNED_PHRASES
+        force: 忽略既有檔案全部重新合成
+
+    Returns:
+        dict: {"manifest": ..., "rendered": 新合成數, "reused": 沿用數}
+    """
+    phrases = phrases or CANNED_PHRASES
+    manifest_path = os.path.join(output_dir, MANIFEST_FILE)
+    previous = {}
+    if os.path.exists(manifest_path) and not force:
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            previous = json.load(f).get("voices", {})
+
+    rendered = reused = 0
+    manifest = {"generated_at": time.time(), "voices": {}}
+    for voice in voices:
+        voice_dir = os.path.join(output_dir, voice)
+        os.makedirs(voice_dir, exist_ok=True)
+        entries = {}
+        for name, text in phrases.items():
+            digest = phrase_hash(text)
+            filename = f"{name}-{digest}.mp3"
+            path = os.path.join(voice_dir, filename)
+            old = previous.get(voice, {}).get(name)
+            if old and old.get("hash") == digest and os.path.exists(path):
+                reused += 1
+            else:
+                synthesize(text, voice, path)
+                rendered += 1
+            entries[name] = {"text": text, "hash": digest, "file": f"{voice}/{filename}",
+                             "bytes": os.path.getsize(path)}
+        manifest["voices"][voice] = entries
+
+        # 清掉文字已變更的舊檔
+        current = {os.path.basename(e["file"]) for e in entries.values()}
+        for filename in os.listdir(voice_dir):
+            if filename not in current:
+                os.remove(os.path.join(voice_dir, filename))
+
+    with open(manifest_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    return {"manifest": manifest, "rendered": rendered, "reused": reused}
+
+
+class CannedAudio:
+    """讀取 manifest，以 (文字, 語音) 查詢預錄音檔的 audio_url"""
+
+    def __init__(self, directory: str, url_prefix: str = URL_PREFIX):
+        self.directory = directory
+        self.url_prefix = url_prefix.rstrip("/")
+        self._by_text: Optional[Dict[tuple, str]] = None
+        self._lock = threading.Lock()
+
+    def _load(self) -> Dict[tuple, str]:
+        by_text = {}
+        path = os.path.join(self.directory, MANIFEST_FILE)
+        if not os.path.exists(path):
+            return by_text
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                manifest = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"[Canned] manifest 讀取失敗: {e}")
+            return by_text
+        for voice, entries in manifest.get("voices", {}).items():
+            for entry in entries.values():
+                if os.path.exists(os.path.join(self.directory, entry["file"])):
+                    by_text[(entry["text"], voice)] = f"{self.url_prefix}/{entry['file']}"
+        print(f"[Canned] 已載入 {len(by_text)} 個預錄語音")
+        return by_text
+
+    def reload(self):
+        with self._lock:
+            self._by_text = self._load()
+
+    def url_for(self, text: str, voice: Optional[str] = None) -> Optional[str]:
+        """有預錄時回傳 audio_url，否則回傳 None"""
+        if self._by_text is None:
+            self.reload()
+        return self._by_text.get((text.strip(), voice or settings.TTS_VOICE))
+
+
+# 建立全局實例
+canned_audio = CannedAudio(os.path.join(settings.AUDIO_DIR, "canned"))
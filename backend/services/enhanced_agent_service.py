@@ -1,14 +1,18 @@
 # backend/services/enhanced_agent_service.py
 from ollama import Client
-from typing import List, Dict
+from typing import Dict, Iterator, List
 import json
+from backend.config import settings
 
 class EnhancedInterviewAgent:
     """增強版面試代理,支援閒聊、追問與個性化"""
+
+    QUESTION_OPTIONS = {'temperature': 0.8, 'num_predict': 150}
+    QUESTION_FALLBACK = "請分享您在上一份工作中最有挑戰性的經驗?"
     
     def __init__(self, personality: str = "friendly"):
         self.client = Client()
-        self.model = 'llama3.1:8b'
+        self.model = settings.OLLAMA_MODEL
         self.personality = personality
         self.max_questions = 10
         
@@ -44,8 +48,7 @@ class EnhancedInterviewAgent:
 
         return f"{base_role}\n{persona_desc}\n{global_rules}"
 
-    def generate_first_question(self, job_title: str, resume_text: str = "") -> str:
-        """生成第一個問題(破冰)"""
+    def _first_question_messages(self, job_title: str, resume_text: str) -> List[Dict]:
         prompt = f"""你正在面試一位應徵 {job_title} 的求職者。
 履歷摘要: {resume_text[:500]}
 
@@ -55,19 +58,37 @@ class EnhancedInterviewAgent:
 
 請只輸出問題本身,不要有其他說明。"""
 
+        return [
+            {'role': 'system', 'content': self._build_system_prompt(job_title)},
+            {'role': 'user', 'content': prompt}
+        ]
+
+    @staticmethod
+    def _first_question_fallback(job_title: str) -> str:
+        return f"您好!很高興能與您進行 {job_title} 的面試。請先用1分鐘簡單介紹您自己吧!"
+
+    def generate_first_question(self, job_title: str, resume_text: str = "") -> str:
+        """生成第一個問題(破冰)"""
         try:
             response = self.client.chat(
                 model=self.model,
-                messages=[
-                    {'role': 'system', 'content': self._build_system_prompt(job_title)},
-                    {'role': 'user', 'content': prompt}
-                ],
+                keep_alive=settings.OLLAMA_KEEP_ALIVE,
+                messages=self._first_question_messages(job_title, resume_text),
                 options={'temperature': 0.7}
             )
             return response['message']['content'].strip()
         except Exception as e:
             print(f"[ERROR] 生成第一題失敗: {e}")
-            return f"您好!很高興能與您進行 {job_title} 的面試。請先用1分鐘簡單介紹您自己吧!"
+            return self._first_question_fallback(job_title)
+
+    def stream_first_question(self, job_title: str, resume_text: str = "") -> Iterator[str]:
+        """串流版 generate_first_question，逐段產出 token 文字"""
+        yield from self._stream_chat(
+            self._first_question_messages(job_title, resume_text),
+            options={'temperature': 0.7},
+            fallback=self._first_question_fallback(job_title),
+            label="第一題"
+        )
 
     def generate_question(
         self, 
@@ -89,7 +110,57 @@ class EnhancedInterviewAgent:
         """
         if len(history) >= self.max_questions:
             return None
-        
+
+        try:
+            response = self.client.chat(
+                model=self.model,
+                keep_alive=settings.OLLAMA_KEEP_ALIVE,
+                messages=self._question_messages(job_title, resume_text, history, context),
+                options=self.QUESTION_OPTIONS
+            )
+            return response['message']['content'].strip()
+        except Exception as e:
+            print(f"[ERROR] 生成問題失敗: {e}")
+            return self.QUESTION_FALLBACK
+
+    def stream_question(
+        self,
+        job_title: str,
+        resume_text: str,
+        history: List[Dict],
+        context: str = ""
+    ) -> Iterator[str]:
+        """串流版 generate_question，逐段產出 token 文字；面試該結束時不產出任何內容"""
+        if len(history) >= self.max_questions:
+            return
+        yield from self._stream_chat(
+            self._question_messages(job_title, resume_text, history, context),
+            options=self.QUESTION_OPTIONS,
+            fallback=self.QUESTION_FALLBACK,
+            label="問題"
+        )
+
+    def _stream_chat(self, messages: List[Dict], options: Dict, fallback: str, label: str) -> Iterator[str]:
+        """以 stream=True 呼叫 Ollama；尚未產出任何內容就失敗時改送 fallback"""
+        emitted = False
+        try:
+            for part in self.client.chat(
+                model=self.model,
+                keep_alive=settings.OLLAMA_KEEP_ALIVE,
+                messages=messages,
+                options=options,
+                stream=True
+            ):
+                content = part['message']['content']
+                if content:
+                    emitted = True
+                    yield content
+        except Exception as e:
+            print(f"[ERROR] 串流生成{label}失敗: {e}")
+            if not emitted:
+                yield fallback
+
+    def _question_messages(self, job_title: str, resume_text: str, history: List[Dict], context: str) -> List[Dict]:
         # 分析最近3輪對話
         recent_qa = history[-3:] if len(history) >= 3 else history
         qa_text = "\n".join([
@@ -101,11 +172,12 @@ class EnhancedInterviewAgent:
         last_answer = history[-1]['answer'] if history else ""
         needs_chitchat = len(last_answer) < 20 or "不太清楚" in last_answer or "不太會" in last_answer
         
+        knowledge_line = f"\n                - 相關知識：{context}" if context else ""
         prompt = f"""
                 [CONTEXT]
                 - 應徵職位：{job_title}
                 - 履歷摘要：{resume_text[:800]}
-                - 歷史互動： {history}
+                - 歷史互動： {history}{knowledge_line}
 
                 [TASK]
                 生成一個與本輪焦點高度對齊的原創面試問題；若候選人可能給出抽象或不完整回答，請附上一句追問以促進具體化。
@@ -131,19 +203,10 @@ class EnhancedInterviewAgent:
                 請依照上述格式輸出。
                 """
 
-        try:
-            response = self.client.chat(
-                model=self.model,
-                messages=[
-                    {'role': 'system', 'content': self._build_system_prompt(job_title)},
-                    {'role': 'user', 'content': prompt}
-                ],
-                options={'temperature': 0.8, 'num_predict': 150}
-            )
-            return response['message']['content'].strip()
-        except Exception as e:
-            print(f"[ERROR] 生成問題失敗: {e}")
-            return "請分享您在上一份工作中最有挑戰性的經驗?"
+        return [
+            {'role': 'system', 'content': self._build_system_prompt(job_title)},
+            {'role': 'user', 'content': prompt}
+        ]
 
     def generate_feedback(self, job_title: str, history: List[Dict]) -> str:
         """生成面試總結與回饋"""
@@ -170,6 +233,7 @@ class EnhancedInterviewAgent:
         try:
             response = self.client.chat(
                 model=self.model,
+                keep_alive=settings.OLLAMA_KEEP_ALIVE,
                 messages=[{'role': 'user', 'content': prompt}],
                 options={'temperature': 0.5, 'num_predict': 300}
             )
@@ -1,6 +1,8 @@
 # backend/services/enhanced_speech_service.py
-import azure.cognitiveservices.speech as speechsdk
 from backend.config import settings
+from backend.utils.jsonl_log import RotatingJsonlWriter
+from backend.utils.lazy import LazyService, lazy_import
+from backend.utils.metrics import register_stats
 import logging
 import os
 import threading
@@ -11,6 +13,9 @@ from typing import Dict, Optional
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Azure Speech SDK 延遲到第一次建立語音設定時才匯入
+speechsdk = lazy_import("azure.cognitiveservices.speech")
+
 
 class EnhancedAzureSpeechService:
     """
@@ -40,7 +45,7 @@ class EnhancedAzureSpeechService:
                 region=settings.AZURE_SPEECH_REGION
             )
             speech_config.speech_recognition_language = "zh-TW"
-            speech_config.speech_synthesis_voice_name = "zh-TW-YunJheNeural"
+            speech_config.speech_synthesis_voice_name = settings.TTS_VOICE
             
             # 啟用詳細輸出（包含信心分數）
             speech_config.output_format = speechsdk.OutputFormat.Detailed
@@ -48,7 +53,8 @@ class EnhancedAzureSpeechService:
             self.speech_config = speech_config
             self._initialized = True
             
-            # 初始化統計資料
+            # 初始化統計資料 (多個 STT 工作執行緒會同時更新，讀寫都要持有鎖)
+            self._stats_lock = threading.Lock()
             self.stats = {
                 "total_requests": 0,
                 "successful_requests": 0,
@@ -106,7 +112,8 @@ class EnhancedAzureSpeechService:
             }
         """
         try:
-            self.stats["total_requests"] += 1
+            with self._stats_lock:
+                self.stats["total_requests"] += 1
             
             # 設定音檔輸入
             audio_config = speechsdk.audio.AudioConfig(filename=audio_path)
@@ -180,17 +187,19 @@ class EnhancedAzureSpeechService:
                 quality = "medium"
             else:
                 quality = "low"
-                self.stats["low_confidence_count"] += 1
             
             # 更新統計
-            if final_text:
-                self.stats["successful_requests"] += 1
-                self.stats["avg_confidence"] = (
-                    (self.stats["avg_confidence"] * (self.stats["successful_requests"] - 1) + avg_confidence)
-                    / self.stats["successful_requests"]
-                )
-            else:
-                self.stats["failed_requests"] += 1
+            with self._stats_lock:
+                if quality == "low":
+                    self.stats["low_confidence_count"] += 1
+                if final_text:
+                    self.stats["successful_requests"] += 1
+                    self.stats["avg_confidence"] = (
+                        (self.stats["avg_confidence"] * (self.stats["successful_requests"] - 1) + avg_confidence)
+                        / self.stats["successful_requests"]
+                    )
+                else:
+                    self.stats["failed_requests"] += 1
             
             result = {
                 "text": final_text,
@@ -211,7 +220,8 @@ class EnhancedAzureSpeechService:
                 
         except Exception as e:
             logger.error(f"[Enhanced Speech] STT 發生錯誤: {e}")
-            self.stats["failed_requests"] += 1
+            with self._stats_lock:
+                self.stats["failed_requests"] += 1
             return {
                 "text": "",
                 "confidence": 0.0,
@@ -221,27 +231,21 @@ class EnhancedAzureSpeechService:
             }
     
     def _log_recognition_result(self, result: Dict):
-        """將辨識結果記錄到日誌檔"""
-        log_dir = "logs/stt_recognition"
-        os.makedirs(log_dir, exist_ok=True)
-        
-        log_file = os.path.join(log_dir, f"stt_log_{datetime.now().strftime('%Y%m%d')}.jsonl")
-        
-        try:
-            with open(log_file, 'a', encoding='utf-8') as f:
-                f.write(json.dumps(result, ensure_ascii=False) + '\n')
-        except Exception as e:
-            logger.error(f"[Enhanced Speech] 日誌寫入失敗: {e}")
+        """將辨識結果排入背景記錄 (不在請求執行緒寫檔；佇列滿時丟棄)"""
+        if not recognition_log.submit(result):
+            logger.debug("[Enhanced Speech] 辨識記錄佇列已滿，丟棄一筆記錄")
     
     def get_statistics(self) -> Dict:
         """取得 STT 服務統計資料"""
+        with self._stats_lock:
+            stats = dict(self.stats)
         success_rate = (
-            self.stats["successful_requests"] / self.stats["total_requests"] * 100
-            if self.stats["total_requests"] > 0 else 0
+            stats["successful_requests"] / stats["total_requests"] * 100
+            if stats["total_requests"] > 0 else 0
         )
         
         return {
-            **self.stats,
+            **stats,
             "success_rate": round(success_rate, 2)
         }
     
@@ -253,5 +257,17 @@ class EnhancedAzureSpeechService:
         return result.get("text", "")
 
 
-# 建立全局實例
-enhanced_speech_service = EnhancedAzureSpeechService()
\ No newline at end of file
+# 辨識記錄：logs/stt_recognition/stt_log_YYYYMMDD.jsonl，輪替後壓縮為 .jsonl.gz
+recognition_log = RotatingJsonlWriter(
+    settings.STT_LOG_DIR, "stt_log",
+    rotate_bytes=settings.STT_LOG_ROTATE_MB * 1024 * 1024,
+    max_total_bytes=settings.STT_LOG_MAX_TOTAL_MB * 1024 * 1024,
+    max_pending=settings.STT_LOG_QUEUE_SIZE,
+    flush_interval=settings.STT_LOG_FLUSH_INTERVAL,
+)
+
+register_stats("stt_recognition_log", "STT 辨識記錄", recognition_log.stats,
+               counters=("submitted", "written", "dropped", "failed", "rotations", "removed"), gauges=("pending",))
+
+# 建立全局實例 (第一次使用時才初始化)
+enhanced_speech_service = LazyService(EnhancedAzureSpeechService, "enhanced_speech_service")
\ No newline at end of file
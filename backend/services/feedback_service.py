@@ -3,6 +3,7 @@ from typing import List, Dict, Tuple
 from dataclasses import dataclass
 from ollama import Client
 import json
+from backend.config import settings
 
 @dataclass
 class FeedbackResult:
@@ -66,7 +67,7 @@ class FeedbackService:
 
     def __init__(self):
         self.client = Client()
-        self.model = "llama3.1:8b"
+        self.model = settings.OLLAMA_MODEL
 
     def analyze_interview(
         self,
@@ -129,6 +130,7 @@ class FeedbackService:
         try:
             response = self.client.chat(
                 model=self.model,
+                keep_alive=settings.OLLAMA_KEEP_ALIVE,
                 messages=[{"role": "user", "content": prompt}],
                 options={"temperature": 0.2, "num_predict": 600},
             )
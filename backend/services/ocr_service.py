@@ -13,17 +13,13 @@ import re
 import importlib.util
 from typing import List, Dict, Any, Tuple, Optional
 from backend.config import settings
+from backend.utils.lazy import LazyService, lazy_import
+from backend.utils.metrics import stage_timer
 
-from google import genai
-
-try:
-    import cv2  # type: ignore
-except ImportError:
-    cv2 = None
-
-from azure.cognitiveservices.vision.computervision import ComputerVisionClient
-from azure.cognitiveservices.vision.computervision.models import OperationStatusCodes
-from msrest.authentication import CognitiveServicesCredentials
+# 重量級 SDK 延遲到第一次呼叫時才匯入
+genai = lazy_import("google.genai", optional=True)
+computervision = lazy_import("azure.cognitiveservices.vision.computervision")
+msrest_auth = lazy_import("msrest.authentication")
 
 
 
@@ -79,9 +75,9 @@ class OCRProcessor:
         self.config = config or OCRConfig()
         # 若環境變數沒設定，不要立即拋錯，部分功能仍可用（例如把現有 OCR JSON 轉結構化）
         if self.config.subscription_key and self.config.endpoint:
-            self.client = ComputerVisionClient(
+            self.client = computervision.ComputerVisionClient(
                 self.config.endpoint,
-                CognitiveServicesCredentials(self.config.subscription_key)
+                msrest_auth.CognitiveServicesCredentials(self.config.subscription_key)
             )
         else:
             self.client = None
@@ -334,8 +330,6 @@ class OCRProcessor:
         import json as _json
         import time as _time
         import base64
-        from google import genai
-        from google.genai import types
         import os
         
         # 👇 加上這兩行！強制 Python 讀取 .env 檔案
@@ -352,6 +346,7 @@ class OCRProcessor:
         
         if genai is None:
             return {"score": 0, "reason": "google-genai 套件未安裝"}
+        types = genai.types
         
         api_key = os.getenv("GEMINI_API_KEY")
         if not api_key:
@@ -488,7 +483,8 @@ class OCRProcessor:
         total_score = min(100, contact_score + keyword_score + length_score + extra_signal)
 
         # Gemini AI 評分（OCR 文本）
-        gemini_score = self._gemini_score_resume(full_text)
+        with stage_timer("gemini"):
+            gemini_score = self._gemini_score_resume(full_text)
 
         return {
             "gemini_score": gemini_score,
@@ -575,19 +571,21 @@ class OCRProcessor:
         fs = None
         try:
             fs = open(file_path, "rb")
-            read_response = self.client.read_in_stream(fs, raw=True)
-            operation_location = read_response.headers.get("Operation-Location")
-            if not operation_location:
-                return False, {"error": "無法取得 Operation-Location"}
-            operation_id = operation_location.split("/")[-1]
-
-            # 等待結果完成
-            while True:
-                result = self.client.get_read_result(operation_id)
-                if result.status not in ['notStarted', 'running']:
-                    break
-                time.sleep(0.5)
+            with stage_timer("ocr"):
+                read_response = self.client.read_in_stream(fs, raw=True)
+                operation_location = read_response.headers.get("Operation-Location")
+                if not operation_location:
+                    return False, {"error": "無法取得 Operation-Location"}
+                operation_id = operation_location.split("/")[-1]
+
+                # 等待結果完成
+                while True:
+                    result = self.client.get_read_result(operation_id)
+                    if result.status not in ['notStarted', 'running']:
+                        break
+                    time.sleep(0.5)
 
+            from azure.cognitiveservices.vision.computervision.models import OperationStatusCodes
             if result.status != OperationStatusCodes.succeeded:
                 return False, {"error": f"OCR 失敗: {result.status}"}
 
@@ -670,4 +668,4 @@ class FileManager:
         matches.sort()
         return matches
 
-ocr_service = OCRProcessor()
\ No newline at end of file
+ocr_service = LazyService(OCRProcessor, "ocr_service")
\ No newline at end of file
@@ -1,106 +1,451 @@
 # backend/services/rag_service.py
-from sentence_transformers import SentenceTransformer
-import faiss
 import json
+import threading
+import time
 from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
 import numpy as np
 
+from backend.utils.index_bundle import (
+    DEFAULT_INDEX_DIR,
+    IndexBundle,
+    hash_knowledge_files,
+    load_bundle,
+    make_manifest,
+    save_bundle,
+)
+from backend.utils.ann_index import (
+    build_projected_index,
+    parse_index_spec,
+    project_queries,
+    search as search_index,
+    storage_dtype,
+)
+from backend.utils.lexical_index import CharNgramBM25, reciprocal_rank_fusion
+from backend.utils.lazy import LazyService, lazy_import
+
+# 重量級套件延遲到第一次使用時才匯入 (sentence_transformers 會載入 torch)
+faiss = lazy_import("faiss")
+sentence_transformers = lazy_import("sentence_transformers", optional=True)
+
+MODEL_NAME = 'paraphrase-multilingual-MiniLM-L12-v2'
+
+
+# 檢索粒度：
+# - "position": 每個職位檔案一個向量，回傳完整職位資料 (原本的行為)
+# - "chunk": 每個 skill_areas / interview_dimensions 項目各一個向量，回傳帶有職位指標的小區塊
+GRANULARITIES = ("position", "chunk")
+
+# 檢索方式：
+# - "dense": FAISS 向量檢索 (原本的行為)
+# - "lexical": 字元 n-gram BM25，不需要呼叫向量模型
+# - "hybrid": 兩者各取候選後以 reciprocal rank fusion 融合
+RETRIEVAL_METHODS = ("dense", "lexical", "hybrid")
+HYBRID_CANDIDATES = 20  # hybrid 模式每一路至少取回的候選數
+
+
 class RAGService:
     """RAG (Retrieval-Augmented Generation) 服務"""
     
-    def __init__(self):
-        """初始化向量模型與知識庫"""
-        print("[RAG] 正在載入向量模型...")
-        self.model = SentenceTransformer('paraphrase-multilingual-MiniLM-L12-v2')
-        self.index = None
-        self.metadata = []
+    def __init__(
+        self,
+        data_dir: str = "knowledge_base",
+        index_dir: str = None,
+        use_cache: bool = True,
+        granularities: Tuple[str, ...] = GRANULARITIES,
+        load_model: bool = True,
+        index_spec=None,
+    ):
+        """
+        初始化向量模型與知識庫
+
+        Args:
+            data_dir: 知識庫資料夾
+            index_dir: 索引快照根目錄 (預設為 RAG_INDEX_DIR 或 index_cache/)
+            use_cache: 是否讀寫索引快照；False 時每次都完整重建
+            granularities: 要建立的索引粒度 (見 GRANULARITIES)
+            load_model: False 時不載入向量模型，只提供 lexical 檢索
+            index_spec: FAISS 索引規格 (見 backend.utils.ann_index，預設為 RAG_INDEX_TYPE 或 "flat")
+        """
+        self.model = None
+        if load_model:
+            print("[RAG] 正在載入向量模型...")
+            try:
+                if sentence_transformers is None:
+                    raise ImportError("sentence-transformers 套件未安裝")
+                self.model = sentence_transformers.SentenceTransformer(MODEL_NAME)
+            except Exception as e:
+                print(f"[RAG] 警告: 向量模型載入失敗，改用 lexical 檢索: {e}")
+        self.data_dir = Path(data_dir)
+        self.bundle_root = Path(index_dir or DEFAULT_INDEX_DIR) / "rag_service"
+        self.use_cache = use_cache
+        self.granularities = tuple(g for g in granularities if g in GRANULARITIES)
+        self.index_spec = parse_index_spec(index_spec)
+
+        # 目前對外服務的索引快照 {粒度: IndexBundle}；重新載入時整個 dict 一次替換
+        # (單一參照賦值為原子操作)，進行中的查詢會繼續使用它們取得的舊快照
+        self._bundles: Dict[str, IndexBundle] = {}
+        self._reload_lock = threading.Lock()
+        self._watcher: Optional["KnowledgeBaseWatcher"] = None
         self._load_knowledge_base()
 
+    @property
+    def index(self):
+        bundle = self._bundles.get("position")
+        return bundle.index if bundle else None
+
+    @property
+    def metadata(self) -> List[dict]:
+        bundle = self._bundles.get("position")
+        return bundle.metadata if bundle else []
+
     def _load_knowledge_base(self):
-        """載入知識庫並建立向量索引"""
-        path = Path("knowledge_base")
+        """載入知識庫並建立向量索引 (優先使用磁碟上的索引快照)"""
+        path = self.data_dir
         
         if not path.exists():
             print("[RAG] 警告: knowledge_base 資料夾不存在，跳過載入")
             return
         
-        texts = []
-        json_files = list(path.rglob("*.json"))
+        file_hashes = hash_knowledge_files(path)
         
-        if not json_files:
+        if not file_hashes:
             print("[RAG] 警告: knowledge_base 中無 JSON 檔案")
             return
         
-        print(f"[RAG] 找到 {len(json_files)} 個知識庫檔案")
-        
-        for file in json_files:
+        print(f"[RAG] 找到 {len(file_hashes)} 個知識庫檔案")
+
+        bundles = {}
+        for granularity in self.granularities:
+            manifest = self._make_manifest(file_hashes, granularity)
+
+            if self.use_cache:
+                bundle = load_bundle(self.bundle_root / granularity, manifest)
+                if bundle is not None:
+                    bundles[granularity] = self._attach_lexical(bundle)
+                    print(f"[RAG] 已從索引快照載入 {granularity} 索引 ({len(bundle)} 筆資料)")
+                    continue
+                print(f"[RAG] {granularity} 索引快照不存在或已過期，重新建立...")
+
+            bundle, _ = self._build_bundle(manifest, granularity)
+            if bundle is None:
+                print("[RAG] 警告: 無有效知識庫資料")
+                continue
+            bundles[granularity] = bundle
+            self._save(bundle, granularity)
+
+        self._bundles = bundles
+
+    def _make_manifest(self, file_hashes: Dict[str, str], granularity: str) -> dict:
+        return make_manifest(file_hashes, model=MODEL_NAME, granularity=granularity,
+                             index=self.index_spec.build_params())
+
+    @staticmethod
+    def _attach_lexical(bundle: IndexBundle) -> IndexBundle:
+        """由快照的 texts 建立 BM25 詞彙索引 (建立成本遠低於編碼，不另外存檔)"""
+        bundle.lexical = CharNgramBM25(bundle.texts)
+        return bundle
+
+    def _save(self, bundle: IndexBundle, granularity: str):
+        # 沒有向量的 lexical-only 快照不寫入磁碟，避免蓋掉完整快照
+        if not self.use_cache or bundle.index is None:
+            return
+        try:
+            save_bundle(self.bundle_root / granularity, bundle)
+            print(f"[RAG] 索引快照已寫入: {self.bundle_root / granularity}")
+        except Exception as e:
+            print(f"[RAG] 索引快照寫入失敗: {e}")
+
+    def _parse_file(self, rel: str, granularity: str) -> Tuple[List[str], List[dict]]:
+        """讀取單一知識庫檔案，回傳 (要編碼的文字, 對應的 metadata)"""
+        file = self.data_dir / rel
+        with open(file, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+
+        if granularity == "chunk":
+            return self._split_chunks(data, rel)
+
+        # 組合文字用於向量化
+        position = data.get('position', '')
+        industry = data.get('industry', '')
+        skills = []
+
+        for skill_area in data.get("skill_areas", []):
+            skills.extend(skill_area.get("key_concepts", []))
+
+        text = f"{position} {industry} {' '.join(skills)}"
+        return [text], [data]
+
+    @staticmethod
+    def _split_chunks(data: dict, source: str) -> Tuple[List[str], List[dict]]:
+        """
+        將職位檔案拆成技能領域 / 面試維度小區塊
+        每個區塊保留 position 與 source 作為回到完整職位資料的指標
+        """
+        position = data.get('position', '')
+        industry = data.get('industry', '')
+        texts, chunks = [], []
+
+        for skill in data.get("skill_areas", []):
+            concepts = skill.get("key_concepts", [])
+            evaluation = skill.get("evaluation_points", [])
+            area = skill.get("area", "")
+            texts.append(f"{position} {area} {' '.join(concepts)} {' '.join(evaluation)}")
+            chunks.append({
+                "type": "skill",
+                "position": position,
+                "industry": industry,
+                "source": source,
+                "area": area,
+                "importance": skill.get("importance", ""),
+                "key_concepts": concepts,
+                "evaluation_points": evaluation,
+            })
+
+        for dim in data.get("interview_dimensions", []):
+            stages = dim.get("stages", [])
+            dimension = dim.get("dimension", "")
+            description = dim.get("description", "")
+            texts.append(f"{position} {dimension} {description} {' '.join(stages)}")
+            chunks.append({
+                "type": "dimension",
+                "position": position,
+                "industry": industry,
+                "source": source,
+                "dimension": dimension,
+                "description": description,
+                "stages": stages,
+            })
+
+        return texts, chunks
+
+    def _build_bundle(self, manifest: dict, granularity: str, previous: Optional[IndexBundle] = None):
+        """
+        讀取知識庫檔案、編碼並建立 FAISS 索引
+
+        Args:
+            manifest: 目標知識庫狀態
+            granularity: 索引粒度
+            previous: 舊快照；內容雜湊未變的檔案會直接沿用舊向量，只重新編碼有變動的檔案
+
+        Returns:
+            (IndexBundle 或 None, 本次重新編碼的筆數)
+        """
+        reusable: Dict[str, List[int]] = {}
+        if previous is not None and previous.index is not None:
+            old_files = previous.manifest.get("files", {})
+            for row, rel in enumerate(previous.sources):
+                if old_files.get(rel) == manifest["files"].get(rel):
+                    reusable.setdefault(rel, []).append(row)
+
+        texts, metadata, sources = [], [], []
+        vectors: List[Optional[np.ndarray]] = []
+        pending_rows, pending_texts = [], []
+
+        for rel in manifest["files"]:
+            if rel in reusable:
+                for row in reusable[rel]:
+                    texts.append(previous.texts[row])
+                    metadata.append(previous.metadata[row])
+                    sources.append(rel)
+                    vectors.append(np.asarray(previous.embeddings[row], dtype='float32'))
+                continue
+
             try:
-                with open(file, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    
-                    # 組合文字用於向量化
-                    position = data.get('position', '')
-                    industry = data.get('industry', '')
-                    skills = []
-                    
-                    for skill_area in data.get("skill_areas", []):
-                        skills.extend(skill_area.get("key_concepts", []))
-                    
-                    text = f"{position} {industry} {' '.join(skills)}"
-                    texts.append(text)
-                    self.metadata.append(data)
-                    
+                file_texts, file_rows = self._parse_file(rel, granularity)
             except Exception as e:
-                print(f"[RAG] 載入 {file} 失敗: {e}")
-        
+                print(f"[RAG] 載入 {self.data_dir / rel} 失敗: {e}")
+                continue
+
+            for text, data in zip(file_texts, file_rows):
+                pending_rows.append(len(vectors))
+                pending_texts.append(text)
+                texts.append(text)
+                metadata.append(data)
+                sources.append(rel)
+                vectors.append(None)
+
         if not texts:
-            print("[RAG] 警告: 無有效知識庫資料")
-            return
+            return None, 0
+
+        if self.model is None:
+            print(f"[RAG] 無向量模型，僅建立 {granularity} lexical 索引 ({len(texts)} 筆資料)")
+            bundle = IndexBundle(
+                index=None,
+                embeddings=np.zeros((len(texts), 0), dtype='float32'),
+                metadata=metadata,
+                texts=texts,
+                sources=sources,
+                manifest=manifest,
+            )
+            return self._attach_lexical(bundle), 0
+
+        if pending_texts:
+            print(f"[RAG] 正在編碼 {len(pending_texts)} 筆資料...")
+            encoded = np.asarray(self.model.encode(pending_texts), dtype='float32')
+            # 正規化向量 (讓內積等同於餘弦相似度)
+            faiss.normalize_L2(encoded)
+            for row, vec in zip(pending_rows, encoded):
+                vectors[row] = vec
+
+        embeddings = np.ascontiguousarray(np.vstack(vectors), dtype='float32')
         
         # 建立 FAISS 向量索引
-        print(f"[RAG] 正在建立向量索引 ({len(texts)} 筆資料)...")
-        embeddings = self.model.encode(texts)
-        dimension = embeddings.shape[1]
-        
-        self.index = faiss.IndexFlatIP(dimension)  # 使用內積 (Inner Product)
-        
-        # 正規化向量 (讓內積等同於餘弦相似度)
-        faiss.normalize_L2(embeddings)
-        self.index.add(embeddings.astype('float32'))
+        print(f"[RAG] 正在建立 {granularity} 向量索引 ({self.index_spec.kind}, {len(texts)} 筆資料)...")
+        index, projection = build_projected_index(embeddings, self.index_spec)  # 使用內積 (Inner Product)
+        # 原始向量只用於重新載入時沿用與 hybrid 的相似度計算，壓縮儲存時改存 float16
+        embeddings = embeddings.astype(storage_dtype(self.index_spec))
         
         print(f"[RAG] 向量索引建立完成！")
+        bundle = IndexBundle(
+            index=index,
+            embeddings=embeddings,
+            metadata=metadata,
+            texts=texts,
+            sources=sources,
+            manifest=manifest,
+            projection=projection,
+        )
+        return self._attach_lexical(bundle), len(pending_texts)
+
+    def reload(self) -> Dict[str, Any]:
+        """
+        重新掃描知識庫，只重新編碼新增/變更的檔案，並原子性地替換索引快照
+
+        Returns:
+            dict: 變動摘要 (added / changed / removed / reembedded / total / elapsed)
+        """
+        with self._reload_lock:
+            start = time.time()
+            current = self._bundles
+            reference = next(iter(current.values()), None)
+            old_files = reference.manifest.get("files", {}) if reference else {}
+            file_hashes = hash_knowledge_files(self.data_dir)
+
+            added = sorted(set(file_hashes) - set(old_files))
+            removed = sorted(set(old_files) - set(file_hashes))
+            changed = sorted(rel for rel in set(file_hashes) & set(old_files)
+                             if file_hashes[rel] != old_files[rel])
+
+            report = {
+                "added": added,
+                "changed": changed,
+                "removed": removed,
+                "reembedded": 0,
+                "total": len(current["position"]) if "position" in current else 0,
+            }
+            if not (added or changed or removed) and reference is not None:
+                report["elapsed"] = round(time.time() - start, 3)
+                return report
+
+            new_bundles = {}
+            for granularity in self.granularities:
+                bundle, reembedded = self._build_bundle(
+                    self._make_manifest(file_hashes, granularity),
+                    granularity,
+                    previous=current.get(granularity),
+                )
+                report["reembedded"] += reembedded
+                if bundle is not None:
+                    new_bundles[granularity] = bundle
+                    self._save(bundle, granularity)
+
+            self._bundles = new_bundles  # 原子替換
+
+            report["total"] = len(new_bundles["position"]) if "position" in new_bundles else 0
+            report["elapsed"] = round(time.time() - start, 3)
+            print(f"[RAG] 知識庫已重新載入: 新增 {len(added)}、變更 {len(changed)}、"
+                  f"移除 {len(removed)}，重新編碼 {report['reembedded']} 筆 ({report['elapsed']} 秒)")
+            return report
 
-    def retrieve(self, query: str, top_k: int = 3):
+    def start_watcher(self, interval: float = 5.0):
+        """啟動背景檔案監看；偵測到知識庫變動時自動呼叫 reload()"""
+        if self._watcher is None:
+            self._watcher = KnowledgeBaseWatcher(self, interval)
+            self._watcher.start()
+        return self._watcher
+
+    def stop_watcher(self):
+        if self._watcher is not None:
+            self._watcher.stop()
+            self._watcher = None
+
+    def retrieve(self, query: str, top_k: int = 3, mode: str = "position", method: str = "dense",
+                 nprobe: Optional[int] = None, ef_search: Optional[int] = None):
         """
         檢索相關知識
         
         Args:
             query: 查詢文字 (例如: "後端工程師 Python FastAPI")
             top_k: 回傳前 k 筆最相關資料
+            mode: "position" 回傳完整職位資料；"chunk" 回傳技能領域/面試維度小區塊
+            method: "dense" / "lexical" / "hybrid" (見 RETRIEVAL_METHODS)；
+                    向量模型不可用時一律退回 "lexical"
+            nprobe / ef_search: 本次查詢的 IVF / HNSW 搜尋參數，預設使用 index_spec 的設定
             
         Returns:
-            list: 相關知識的 metadata
+            list: 相關知識的 metadata (附加 similarity_score / bm25_score / fusion_score)
         """
-        if not self.index or not self.metadata:
-            print("[RAG] 警告: 向量索引未建立")
+        bundle = self._bundles.get(mode)  # 取得當下快照，整個查詢過程都使用同一份
+        if bundle is None or not bundle.metadata:
+            print(f"[RAG] 警告: {mode} 向量索引未建立")
             return []
-        
-        # 將查詢轉為向量
-        query_vec = self.model.encode([query])
-        faiss.normalize_L2(query_vec)
-        
-        # 搜尋最相似的向量
-        D, I = self.index.search(query_vec.astype('float32'), top_k)
-        
-        # 回傳對應的 metadata
+
+        if method not in RETRIEVAL_METHODS:
+            print(f"[RAG] 警告: 未知的檢索方式 {method}，改用 dense")
+            method = "dense"
+        if self.model is None or bundle.index is None:
+            method = "lexical"
+
+        if method == "lexical":
+            hits = [(idx, {"bm25_score": score}) for idx, score in bundle.lexical.search(query, top_k)]
+        else:
+            hits = self._dense_or_hybrid(bundle, query, top_k, method, nprobe, ef_search)
+
+        # 回傳對應的 metadata (淺複製即可，不修改原始資料)
         results = []
-        for idx, score in zip(I[0], D[0]):
-            if idx < len(self.metadata):
-                result = self.metadata[idx].copy()
-                result['similarity_score'] = float(score)  # 加入相似度分數
-                results.append(result)
+        for idx, scores in hits:
+            result = bundle.metadata[idx].copy()
+            result.update(scores)
+            results.append(result)
         
         return results
+
+    def _dense_or_hybrid(self, bundle: IndexBundle, query: str, top_k: int, method: str,
+                         nprobe: Optional[int] = None, ef_search: Optional[int] = None):
+        """回傳 [(列編號, 分數 dict)]"""
+        # 將查詢轉為向量
+        query_vec = np.asarray(self.model.encode([query]), dtype='float32')
+        faiss.normalize_L2(query_vec)
+
+        # hybrid 需要較多候選，融合後再截斷成 top_k
+        n_candidates = top_k if method == "dense" else max(top_k * 4, HYBRID_CANDIDATES)
+        D, I = search_index(
+            bundle.index, project_queries(query_vec, bundle.projection), min(n_candidates, len(bundle)),
+            nprobe=nprobe or self.index_spec.nprobe,
+            ef_search=ef_search or self.index_spec.ef_search,
+        )
+        dense = [(int(idx), float(score)) for idx, score in zip(I[0], D[0]) if 0 <= idx < len(bundle)]
+
+        if method == "dense":
+            return [(idx, {"similarity_score": score}) for idx, score in dense]
+
+        lexical = bundle.lexical.search(query, n_candidates)
+        bm25 = dict(lexical)
+        fused = reciprocal_rank_fusion([[idx for idx, _ in dense], [idx for idx, _ in lexical]])
+        hits = []
+        for idx, fusion_score in fused[:top_k]:
+            hits.append((idx, {
+                # 只由 BM25 找到的候選也以快照中的向量補上餘弦相似度
+                "similarity_score": float(np.dot(bundle.embeddings[idx].astype('float32'), query_vec[0])),
+                "bm25_score": bm25.get(idx, 0.0),
+                "fusion_score": fusion_score,
+            }))
+        return hits
+
+    def retrieve_chunks(self, query: str, top_k: int = 3, method: str = "dense", **search_params):
+        """以技能領域 / 面試維度為單位檢索，等同 retrieve(query, top_k, mode="chunk", ...)"""
+        return self.retrieve(query, top_k=top_k, mode="chunk", method=method, **search_params)
     
     def get_position_knowledge(self, position: str):
         """
@@ -112,11 +457,59 @@ class RAGService:
         Returns:
             dict or None: 職位知識
         """
-        for data in self.metadata:
+        for data in self.metadata:  # self.metadata 取自當下快照
             if data.get('position') == position:
                 return data
         return None
 
 
-# ✅ 重點：建立全局實例
-rag_service = RAGService()
\ No newline at end of file
+def format_chunk(chunk: dict) -> str:
+    """將檢索到的小區塊轉成一行精簡的 prompt 文字"""
+    if chunk.get("type") == "skill":
+        return f"{chunk.get('position', '')}｜{chunk.get('area', '')}：{'、'.join(chunk.get('key_concepts', []))}"
+    return f"{chunk.get('position', '')}｜{chunk.get('dimension', '')}：{chunk.get('description', '')}"
+
+
+class KnowledgeBaseWatcher(threading.Thread):
+    """
+    知識庫檔案監看 (輪詢式，不需額外套件)
+
+    每 interval 秒比對 knowledge_base/ 內 JSON 檔的 (mtime, size)，
+    有新增、修改或刪除時呼叫 RAGService.reload()。
+    """
+
+    def __init__(self, service: RAGService, interval: float = 5.0):
+        super().__init__(name="knowledge-base-watcher", daemon=True)
+        self.service = service
+        self.interval = interval
+        self._stop_event = threading.Event()
+        self._signature = self._scan()
+
+    def _scan(self) -> Dict[str, Tuple[float, int]]:
+        signature = {}
+        for file in self.service.data_dir.rglob("*.json"):
+            try:
+                stat = file.stat()
+                signature[str(file)] = (stat.st_mtime, stat.st_size)
+            except OSError:
+                continue
+        return signature
+
+    def run(self):
+        print(f"[RAG] 知識庫監看已啟動 (每 {self.interval} 秒檢查一次)")
+        while not self._stop_event.wait(self.interval):
+            signature = self._scan()
+            if signature == self._signature:
+                continue
+            self._signature = signature
+            try:
+                self.service.reload()
+            except Exception as e:
+                print(f"[RAG] 自動重新載入失敗: {e}")
+
+    def stop(self):
+        self._stop_event.set()
+
+
+# ✅ 重點：建立全局實例 (第一次使用或背景暖機時才載入模型與索引)
+rag_service = LazyService(RAGService, "rag_service")
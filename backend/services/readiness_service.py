@@ -0,0 +1,151 @@
+# backend/services/readiness_service.py
+"""
+服務就緒狀態與暖機
+
+- check(): 逐項回報相依服務是否已就緒 (向量模型、FAISS 索引、Ollama 模型、Azure 語音、資料庫連線池)
+- warmup(): 執行一次合成的 RAG 檢索、LLM 生成與 TTS，讓第一位真實使用者不必承擔冷啟動成本
+
+只有 warmup() 全部成功之後 ready 才會變成 True；之後每次 /readyz 仍會重新檢查各項狀態。
+"""
+import os
+import tempfile
+import threading
+import time
+from typing import Any, Callable, Dict
+
+from ollama import Client
+from sqlalchemy import text
+
+from backend.config import settings
+from backend.database import engine
+from backend.services.rag_service import rag_service
+from backend.services.speech_service import speech_service
+
+WARMUP_QUERY = "後端工程師 Python 資料庫設計"
+WARMUP_PROMPT = "請只回覆「好」。"
+WARMUP_TTS_TEXT = "您好"
+PROBE_TIMEOUT = 2.0  # /readyz 查詢 Ollama 狀態的逾時秒數
+
+
+class ReadinessService:
+    """彙整各相依服務的暖機狀態"""
+
+    def __init__(self):
+        self.client = Client()
+        self._probe = Client(timeout=PROBE_TIMEOUT)
+        self.warmed = False
+        self.last_warmup: Dict[str, Any] = {}
+        self._warmup_lock = threading.Lock()
+
+    # --- 個別檢查 ---
+
+    def _check_embedding_model(self) -> Dict[str, Any]:
+        if not rag_service.ready:
+            return {"ok": False, "detail": "RAG 服務尚未初始化"}
+        if rag_service.model is None:
+            return {"ok": False, "detail": "向量模型未載入 (僅 lexical 檢索)"}
+        return {"ok": True, "detail": f"初始化 {rag_service.init_seconds} 秒"}
+
+    def _check_faiss_index(self) -> Dict[str, Any]:
+        if not rag_service.ready:
+            return {"ok": False, "detail": "RAG 服務尚未初始化"}
+        if rag_service.index is None:
+            return {"ok": False, "detail": "向量索引未建立"}
+        return {"ok": True, "detail": f"{rag_service.index.ntotal} 筆向量"}
+
+    def _check_ollama(self) -> Dict[str, Any]:
+        try:
+            loaded = [m.model for m in self._probe.ps().models]
+        except Exception as e:
+            return {"ok": False, "detail": f"無法連線 Ollama: {e}"}
+        if settings.OLLAMA_MODEL not in loaded:
+            return {"ok": False, "detail": f"{settings.OLLAMA_MODEL} 尚未載入記憶體"}
+        return {"ok": True, "detail": f"{settings.OLLAMA_MODEL} 已載入"}
+
+    def _check_azure_speech(self) -> Dict[str, Any]:
+        if not (settings.AZURE_SPEECH_KEY and settings.AZURE_SPEECH_REGION):
+            return {"ok": False, "detail": "未設定 AZURE_SPEECH_KEY / AZURE_SPEECH_REGION"}
+        if not speech_service.ready:
+            return {"ok": False, "detail": speech_service.error or "語音服務尚未初始化"}
+        return {"ok": True, "detail": settings.AZURE_SPEECH_REGION}
+
+    def _check_database(self) -> Dict[str, Any]:
+        try:
+            with engine.connect() as conn:
+                conn.execute(text("SELECT 1"))
+        except Exception as e:
+            return {"ok": False, "detail": f"資料庫連線失敗: {e}"}
+        return {"ok": True, "detail": engine.pool.status()}
+
+    def check(self) -> Dict[str, Any]:
+        """
+        回報目前的就緒狀態
+
+        Returns:
+            dict: {"ready": bool, "warmed": bool, "checks": {名稱: {"ok", "detail"}}}
+        """
+        checks = {
+            "embedding_model": self._check_embedding_model(),
+            "faiss_index": self._check_faiss_index(),
+            "ollama": self._check_ollama(),
+            "azure_speech": self._check_azure_speech(),
+            "database": self._check_database(),
+        }
+        all_ok = all(c["ok"] for c in checks.values())
+        return {"ready": self.warmed and all_ok, "warmed": self.warmed, "checks": checks}
+
+    # --- 暖機 ---
+
+    def _warm_retrieval(self):
+        rag_service.retrieve_chunks(WARMUP_QUERY, top_k=1, method=settings.RAG_RETRIEVAL_METHOD)
+
+    def _warm_llm(self):
+        # 同時以 keep_alive 讓模型常駐，之後的面試請求不必重新載入
+        self.client.generate(
+            model=settings.OLLAMA_MODEL,
+            prompt=WARMUP_PROMPT,
+            keep_alive=settings.OLLAMA_KEEP_ALIVE,
+            options={"num_predict": 1},
+        )
+
+    def _warm_tts(self):
+        fd, path = tempfile.mkstemp(suffix=".wav")
+        os.close(fd)
+        try:
+            speech_service.text_to_speech(WARMUP_TTS_TEXT, path)
+        finally:
+            if os.path.exists(path):
+                os.remove(path)
+
+    def warmup(self) -> Dict[str, Any]:
+        """
+        依序執行 RAG 檢索、LLM 生成與 TTS 各一次
+
+        Returns:
+            dict: {"warmed": bool, "steps": {名稱: {"ok", "seconds", "error"?}}}
+        """
+        steps: Dict[str, Callable[[], None]] = {
+            "retrieval": self._warm_retrieval,
+            "llm": self._warm_llm,
+            "tts": self._warm_tts,
+        }
+        with self._warmup_lock:
+            report = {}
+            for name, step in steps.items():
+                start = time.time()
+                try:
+                    step()
+                    report[name] = {"ok": True, "seconds": round(time.time() - start, 3)}
+                except Exception as e:
+                    report[name] = {"ok": False, "seconds": round(time.time() - start, 3), "error": str(e)}
+                    print(f"[Ready] 暖機步驟 {name} 失敗: {e}")
+
+            self.warmed = all(r["ok"] for r in report.values())
+            self.last_warmup = {"warmed": self.warmed, "steps": report}
+            print(f"[Ready] 暖機{'完成' if self.warmed else '未完成'}: "
+                  + ", ".join(f"{k} {v['seconds']}s" for k, v in report.items()))
+            return self.last_warmup
+
+
+# 建立全局實例
+readiness_service = ReadinessService()
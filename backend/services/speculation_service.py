@@ -0,0 +1,270 @@
+# backend/services/speculation_service.py
+"""
+推測式預先出題
+
+題目送出後，求職者通常要講 30–90 秒，這段時間後端原本閒置。推測階段在背景：
+1. 請 LLM 預測求職者可能的幾種回答方向
+2. 每個方向各自做一次 RAG 檢索，並以「假設的回答」走一般出題流程生成候選追問
+3. 候選題目以 session 為單位暫存 (有 TTL)
+
+回答送達後，把 STT 逐字稿與各方向做向量相似度比對：夠接近就直接採用該候選題，
+省下 RAG + LLM 的時間；否則退回一般出題。hit rate 與節省的時間由 stats() 回報。
+
+推測用的 LLM 呼叫佔用 llm 階段執行緒池的空閒執行緒 (StagePools.submit_if_idle)，
+Ollama 的總並行數不超過 STAGE_POOL_LLM；正式出題占滿時直接放棄推測 (busy)，不與其搶位置。
+已過時 (回答已送達、換題或被丟棄) 的推測在開始前就略過 (stale)。
+"""
+import json
+import re
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from ollama import Client
+
+from backend.config import settings
+from backend.services.enhanced_agent_service import agent_factory
+from backend.services.rag_service import rag_service, format_chunk
+from backend.utils.metrics import register_stats
+from backend.utils.stage_pools import get_stage_pools
+
+ANTICIPATE_PROMPT = """你是面試官的助理。面試官剛剛問了應徵 {job_title} 的求職者這個問題：
+「{question}」
+
+請預測求職者最可能的 {n} 種回答方向，每種用一句話概括回答內容 (繁體中文)。
+只輸出 JSON 陣列，例如 ["回答方向一", "回答方向二"]，不要有其他說明。"""
+
+
+@dataclass
+class Draft:
+    """一個候選追問：假設求職者的回答是 anticipated_answer 時要問的下一題"""
+    anticipated_answer: str
+    question: str
+    context: str
+    embedding: np.ndarray
+    seconds: float  # 生成這個候選題花費的 RAG + LLM 時間 (命中時即為省下的時間)
+
+
+@dataclass
+class Speculation:
+    session_id: str
+    question: str  # 這組候選題所針對的題目
+    created_at: float
+    drafts: List[Draft] = field(default_factory=list)
+    done: bool = False
+    error: Optional[str] = None
+
+
+class SpeculationService:
+    """以 session 為單位管理推測出的候選題"""
+
+    def __init__(self, num_drafts: int = 2, ttl: float = 180.0, min_similarity: float = 0.6):
+        self.client = Client()
+        self.num_drafts = num_drafts
+        self.ttl = ttl
+        self.min_similarity = min_similarity
+        self._entries: Dict[str, Speculation] = {}
+        self._lock = threading.Lock()
+        self._stats = {"scheduled": 0, "hits": 0, "misses": 0, "not_ready": 0, "expired": 0,
+                       "failed": 0, "stale": 0, "busy": 0, "saved_seconds": 0.0}
+
+    # --- 背景推測 ---
+
+    def schedule(self, session) -> bool:
+        """
+        題目送出後呼叫：在 speculation 執行緒池背景生成候選題，不會阻塞呼叫端
+
+        Returns:
+            bool: 是否已排入 (向量模型不可用時無法比對，直接略過)
+        """
+        if not rag_service.ready or rag_service.model is None:
+            return False
+        entry = Speculation(session_id=str(session.id), question=session.current_question or "",
+                            created_at=time.time())
+        snapshot = {
+            "job_title": session.job_title,
+            "resume_text": session.resume_text or "",
+            "history": list(session.history or []),
+        }
+        with self._lock:
+            self._entries[entry.session_id] = entry
+            self._stats["scheduled"] += 1
+        get_stage_pools().executor("speculation").submit(self._build, entry, snapshot)
+        return True
+
+    def _anticipate_answers(self, job_title: str, question: str) -> List[str]:
+        response = self.client.chat(
+            model=settings.OLLAMA_MODEL,
+            keep_alive=settings.OLLAMA_KEEP_ALIVE,
+            messages=[{'role': 'user', 'content': ANTICIPATE_PROMPT.format(
+                job_title=job_title, question=question, n=self.num_drafts)}],
+            options={'temperature': 0.7, 'num_predict': 200}
+        )
+        content = response['message']['content']
+        match = re.search(r"\[.*\]", content, re.DOTALL)
+        try:
+            answers = json.loads(match.group(0)) if match else []
+        except json.JSONDecodeError:
+            answers = []
+        if not answers:
+            answers = [line.strip(" -•*0123456789.、") for line in content.splitlines()]
+        return [str(a).strip() for a in answers if str(a).strip()][:self.num_drafts]
+
+    def _draft_question(self, job_title: str, resume_text: str, history: List[Dict],
+                        question: str, answer: str) -> Dict[str, str]:
+        context = ""
+        if resume_text:
+            retrieved = rag_service.retrieve_chunks(f"{job_title} {answer}", top_k=3,
+                                                    method=settings.RAG_RETRIEVAL_METHOD)
+            context = "；".join(format_chunk(r) for r in retrieved)
+        agent = agent_factory.get_agent(job_title)
+        draft = agent.generate_question(
+            job_title=job_title,
+            resume_text=resume_text,
+            history=history + [{"question": question, "answer": answer}],
+            context=context
+        )
+        return {"question": draft or "", "context": context}
+
+    def _encode(self, texts: List[str]) -> np.ndarray:
+        vectors = np.asarray(rag_service.model.encode(texts), dtype="float32")
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.maximum(norms, 1e-12)
+
+    def _llm(self, fn, *args):
+        """在 llm 階段的空閒執行緒執行推測用的 LLM 呼叫；沒有空閒執行緒時回傳 None"""
+        future = get_stage_pools().submit_if_idle("llm", fn, *args)
+        if future is None:
+            with self._lock:
+                self._stats["busy"] += 1
+            return None
+        return future.result()
+
+    def _stale(self, entry: Speculation) -> bool:
+        """回答已送達、session 已換題或候選題已被丟棄，不必再算"""
+        if self._current(entry) is entry:
+            return False
+        with self._lock:
+            self._stats["stale"] += 1
+        return True
+
+    def _build(self, entry: Speculation, snapshot: Dict[str, Any]):
+        try:
+            if self._stale(entry):
+                return
+            answers = self._llm(self._anticipate_answers, snapshot["job_title"], entry.question)
+            if answers is None:
+                entry.error = "busy"  # 已計入 busy，回答送達時不算成 misses
+                return
+            if not answers:
+                return
+            for answer, embedding in zip(answers, self._encode(answers)):
+                if self._stale(entry):
+                    return
+                start = time.time()
+                draft = self._llm(self._draft_question, snapshot["job_title"], snapshot["resume_text"],
+                                  snapshot["history"], entry.question, answer)
+                if draft is None:
+                    if not entry.drafts:
+                        entry.error = "busy"
+                    return
+                if draft["question"]:
+                    entry.drafts.append(Draft(answer, draft["question"], draft["context"], embedding,
+                                              time.time() - start))
+        except Exception as e:
+            entry.error = str(e)
+            with self._lock:
+                self._stats["failed"] += 1
+            print(f"[Speculation] 候選題生成失敗 ({entry.session_id}): {e}")
+        finally:
+            entry.done = True
+
+    def _current(self, entry: Speculation) -> Optional[Speculation]:
+        with self._lock:
+            return self._entries.get(entry.session_id)
+
+    # --- 回答送達 ---
+
+    def take(self, session_id: str, question: str, transcript: str) -> Optional[Draft]:
+        """
+        取出並比對候選題 (不論命中與否，該 session 的候選題都會被移除)
+
+        Args:
+            session_id: 面試 session ID
+            question: 求職者回答的那一題 (必須與推測時的題目相同)
+            transcript: STT 逐字稿
+
+        Returns:
+            相似度最高且超過門檻的 Draft；沒有則回傳 None，由呼叫端走一般出題流程
+        """
+        with self._lock:
+            entry = self._entries.pop(str(session_id), None)
+            self._evict_expired()
+        if entry is None or entry.question != question:
+            return None
+
+        reason = None
+        if time.time() - entry.created_at > self.ttl:
+            reason = "expired"
+        elif not entry.done and not entry.drafts:
+            reason = "not_ready"
+        elif not entry.drafts:
+            reason = "failed" if entry.error else "misses"
+
+        best, best_score = None, -1.0
+        if reason is None:
+            drafts = list(entry.drafts)  # 背景仍可能在補候選題，只看目前已完成的
+            query = self._encode([transcript])[0]
+            for draft in drafts:
+                score = float(np.dot(query, draft.embedding))
+                if score > best_score:
+                    best, best_score = draft, score
+            if best_score < self.min_similarity:
+                best, reason = None, "misses"
+
+        with self._lock:
+            if best is not None:
+                self._stats["hits"] += 1
+                self._stats["saved_seconds"] += best.seconds
+            elif reason != "failed":  # 生成失敗已在 _build 計入
+                self._stats[reason] += 1
+        if best is not None:
+            print(f"[Speculation] 命中 ({session_id}) 相似度 {best_score:.2f}，省下 {best.seconds:.2f} 秒")
+        return best
+
+    def discard(self, session_id: str):
+        """面試結束時丟棄尚未使用的候選題"""
+        with self._lock:
+            self._entries.pop(str(session_id), None)
+
+    def _evict_expired(self):
+        now = time.time()
+        for key in [k for k, e in self._entries.items() if now - e.created_at > self.ttl]:
+            del self._entries[key]
+            self._stats["expired"] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """hit rate = 命中 / 回答送達時有候選題可比對的次數"""
+        with self._lock:
+            stats = dict(self._stats)
+            pending = len(self._entries)
+        attempts = stats["hits"] + stats["misses"] + stats["not_ready"]
+        stats["hit_rate"] = round(stats["hits"] / attempts, 3) if attempts else None
+        stats["avg_saved_seconds"] = round(stats["saved_seconds"] / stats["hits"], 3) if stats["hits"] else None
+        stats["saved_seconds"] = round(stats["saved_seconds"], 3)
+        stats["pending_sessions"] = pending
+        return stats
+
+
+# 建立全局實例
+speculation_service = SpeculationService(
+    num_drafts=settings.SPECULATION_DRAFTS,
+    ttl=settings.SPECULATION_TTL,
+    min_similarity=settings.SPECULATION_MIN_SIMILARITY,
+)
+register_stats("speculation", "推測式預先出題", speculation_service.stats,
+               counters=("scheduled", "hits", "misses", "not_ready", "expired", "failed", "stale", "busy",
+                         "saved_seconds"),
+               gauges=("pending_sessions",))
@@ -0,0 +1,376 @@
+# backend/services/speech_pool.py
+"""
+語音引擎池
+
+原本每次 TTS / STT 都重新建立 SpeechSynthesizer / SpeechRecognizer 與 AudioConfig，
+辨識等待沒有逾時，也沒有限制同時進行的數量。這裡提供：
+
+- 預先建立 (並預先連線) 的合成器，輸出寫到記憶體 (result.audio_data)，用完歸還
+- 每個行程共用一個 semaphore 限制同時進行的語音工作數
+- 每次呼叫的期限：排隊逾時與執行逾時都丟出 SpeechDeadlineExceeded
+- 排隊時間、執行中數量與逾時次數等統計
+- recognize_pcm()：上傳的音訊直接從記憶體推給辨識器 (PushAudioInputStream)，不經過磁碟
+- hold()：串流辨識在整段回答期間佔用一個名額 (SpeechSlot)，與一般呼叫共用同一個上限
+
+引擎介面 SpeechEngine 有兩個實作：AzureSpeechEngine 與不需網路的 LocalSpeechEngine
+(測試與 scripts/bench_speech_pool.py 基準測試用)。
+"""
+import logging
+import math
+import queue
+import statistics
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, Optional
+
+from backend.utils.lazy import lazy_import
+from backend.utils.wav_io import WavAudio, pcm_to_wav
+
+logger = logging.getLogger(__name__)
+
+speechsdk = lazy_import("azure.cognitiveservices.speech")
+
+_PUSH_CHUNK = 64 * 1024  # memoryview 音訊推入 PushAudioInputStream 的分塊大小 (位元組)
+
+
+class SpeechDeadlineExceeded(TimeoutError):
+    """排隊或執行超過期限"""
+
+
+class SpeechEngine:
+    """語音引擎介面"""
+    name = "base"
+
+    def create_synthesizer(self, voice: Optional[str] = None) -> Any:
+        raise NotImplementedError
+
+    def synthesize(self, synthesizer: Any, text: str, timeout: float) -> bytes:
+        """以 synthesizer 合成並回傳音檔位元組；超過 timeout 丟出 SpeechDeadlineExceeded"""
+        raise NotImplementedError
+
+    def recognize(self, audio_path: str, timeout: float) -> str:
+        raise NotImplementedError
+
+    def recognize_pcm(self, audio: WavAudio, timeout: float) -> str:
+        """辨識記憶體中的音訊，不經過檔案"""
+        raise NotImplementedError
+
+
+# --- Azure ---
+
+class _AzureSynthesizer:
+    """SpeechSynthesizer + 完成事件 (speak_text_async().get() 沒有逾時，改用事件等待)"""
+
+    def __init__(self, speech_config):
+        # audio_config=None：合成結果只留在記憶體 (result.audio_data)，不寫檔也不播放
+        self.synthesizer = speechsdk.SpeechSynthesizer(speech_config=speech_config, audio_config=None)
+        self.done = threading.Event()
+        self.result = None
+
+        def on_finished(evt):
+            self.result = evt.result
+            self.done.set()
+
+        self.synthesizer.synthesis_completed.connect(on_finished)
+        self.synthesizer.synthesis_canceled.connect(on_finished)
+        try:
+            # 預先建立連線，第一次合成不必再等 TLS / WebSocket 握手
+            speechsdk.Connection.from_speech_synthesizer(self.synthesizer).open(True)
+        except Exception as e:
+            logger.warning(f"[SpeechPool] 合成器預先連線失敗: {e}")
+
+
+class AzureSpeechEngine(SpeechEngine):
+    name = "azure"
+
+    def __init__(self, speech_config, config_for_voice=None):
+        self.speech_config = speech_config
+        self._config_for_voice = config_for_voice
+
+    def create_synthesizer(self, voice: Optional[str] = None) -> _AzureSynthesizer:
+        speech_config = self.speech_config
+        if voice and voice != speech_config.speech_synthesis_voice_name:
+            speech_config = self._config_for_voice(voice)
+        return _AzureSynthesizer(speech_config)
+
+    def synthesize(self, synthesizer: _AzureSynthesizer, text: str, timeout: float) -> bytes:
+        synthesizer.done.clear()
+        synthesizer.result = None
+        synthesizer.synthesizer.speak_text_async(text)
+        if not synthesizer.done.wait(timeout):
+            synthesizer.synthesizer.stop_speaking_async()
+            raise SpeechDeadlineExceeded(f"TTS 超過 {timeout} 秒")
+        result = synthesizer.result
+        if result.reason != speechsdk.ResultReason.SynthesizingAudioCompleted:
+            raise RuntimeError(f"TTS 失敗: {result.cancellation_details.error_details}")
+        return result.audio_data
+
+    def recognize(self, audio_path: str, timeout: float) -> str:
+        return self._recognize(speechsdk.audio.AudioConfig(filename=audio_path), timeout)
+
+    def recognize_pcm(self, audio: WavAudio, timeout: float) -> str:
+        stream_format = speechsdk.audio.AudioStreamFormat(
+            samples_per_second=audio.sample_rate,
+            bits_per_sample=audio.sample_width * 8,
+            channels=audio.channels
+        )
+        # 整段音訊推入後關閉串流，辨識器讀到結尾即觸發 session_stopped (與檔案輸入相同)；
+        # SDK 只接受 bytes，memoryview 片段 (MappedWav) 分塊轉換，不必先複製整段
+        push = speechsdk.audio.PushAudioInputStream(stream_format=stream_format)
+        pcm = audio.pcm
+        if isinstance(pcm, bytes):
+            push.write(pcm)
+        else:
+            for offset in range(0, len(pcm), _PUSH_CHUNK):
+                push.write(bytes(pcm[offset:offset + _PUSH_CHUNK]))
+        push.close()
+        return self._recognize(speechsdk.audio.AudioConfig(stream=push), timeout)
+
+    def _recognize(self, audio_config, timeout: float) -> str:
+        recognizer = speechsdk.SpeechRecognizer(speech_config=self.speech_config, audio_config=audio_config)
+        done_event = threading.Event()
+        all_results = []
+        errors = []
+
+        def stop_cb(evt):
+            done_event.set()
+
+        def canceled_cb(evt):
+            # 音訊讀完也會以 EndOfStream 取消；只有 Error 才是辨識失敗 (金鑰、配額、連線...)
+            details = evt.cancellation_details
+            if details.reason == speechsdk.CancellationReason.Error:
+                errors.append(f"{details.error_code}: {details.error_details}")
+            done_event.set()
+
+        def recognized_cb(evt):
+            if evt.result.reason == speechsdk.ResultReason.RecognizedSpeech:
+                logger.info(f'[Speech] 辨識句段: {evt.result.text}')
+                all_results.append(evt.result.text)
+
+        recognizer.recognized.connect(recognized_cb)
+        recognizer.session_stopped.connect(stop_cb)
+        recognizer.canceled.connect(canceled_cb)
+        recognizer.start_continuous_recognition()
+        # 音訊讀完 Azure 會觸發 session_stopped；逾時則停止辨識並丟出例外
+        finished = done_event.wait(timeout)
+        recognizer.stop_continuous_recognition()
+        if errors:
+            raise RuntimeError(f"STT 失敗: {errors[0]}")
+        if not finished:
+            raise SpeechDeadlineExceeded(f"STT 超過 {timeout} 秒")
+        return "".join(all_results)
+
+
+# --- 替身 ---
+
+def silent_wav(seconds: float, sample_rate: int = 16000) -> bytes:
+    return pcm_to_wav(b"\0\0" * int(seconds * sample_rate), sample_rate)
+
+
+class LocalSpeechEngine(SpeechEngine):
+    """
+    不需網路的替身：以 sleep 模擬合成器建立、TTS 與 STT 的延遲，
+    TTS 回傳長度與字數成正比的靜音 wav，STT 回傳固定逐字稿
+    """
+    name = "local"
+
+    def __init__(self, init_latency: float = 0.2, tts_latency: float = 0.3, stt_latency: float = 0.5,
+                 transcript: str = "我在上一份工作主要負責後端 API 的效能優化。"):
+        self.init_latency = init_latency
+        self.tts_latency = tts_latency
+        self.stt_latency = stt_latency
+        self.transcript = transcript
+
+    def create_synthesizer(self, voice: Optional[str] = None) -> Any:
+        time.sleep(self.init_latency)
+        return object()
+
+    def synthesize(self, synthesizer: Any, text: str, timeout: float) -> bytes:
+        if self.tts_latency > timeout:
+            time.sleep(timeout)
+            raise SpeechDeadlineExceeded(f"TTS 超過 {timeout} 秒")
+        time.sleep(self.tts_latency)
+        return silent_wav(0.25 * len(text))
+
+    def recognize(self, audio_path: str, timeout: float) -> str:
+        if self.stt_latency > timeout:
+            time.sleep(timeout)
+            raise SpeechDeadlineExceeded(f"STT 超過 {timeout} 秒")
+        time.sleep(self.stt_latency)
+        return self.transcript
+
+    def recognize_pcm(self, audio: WavAudio, timeout: float) -> str:
+        return self.recognize("<memory>", timeout) if audio.pcm else ""
+
+
+class SpeechSlot:
+    """SpeechPool.hold() 取得的名額；release() 可重複呼叫，只歸還一次"""
+
+    def __init__(self, pool: "SpeechPool"):
+        self._pool = pool
+        self._released = False
+        self._lock = threading.Lock()
+
+    def release(self, error: Optional[Exception] = None):
+        """歸還名額；error 為串流失敗或逾時的原因，計入統計"""
+        with self._lock:
+            if self._released:
+                return
+            self._released = True
+        if error is not None:
+            self._pool._record_failure(error)
+        self._pool._release()
+
+
+class SpeechPool:
+    """
+    Args:
+        engine: 語音引擎
+        max_concurrency: 同時進行的 TTS + STT 上限 (每個行程)
+        synthesizers: 預先建立的合成器數；0 表示每次呼叫才建立 (舊行為，基準測試對照用)
+        queue_timeout: 排隊等待上限 (秒)
+        tts_timeout / stt_timeout: 單次合成 / 辨識的執行上限 (秒)
+    """
+
+    def __init__(self, engine: SpeechEngine, max_concurrency: int = 8, synthesizers: int = 4,
+                 queue_timeout: float = 10.0, tts_timeout: float = 15.0, stt_timeout: float = 60.0):
+        self.engine = engine
+        self.max_concurrency = max_concurrency
+        self.queue_timeout = queue_timeout
+        self.tts_timeout = tts_timeout
+        self.stt_timeout = stt_timeout
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        self._synthesizers: "queue.Queue[Any]" = queue.Queue()
+        self._pooled = synthesizers
+        self._lost = 0  # 重新建立失敗而未放回池中的合成器數，下次取用時補建
+        for _ in range(synthesizers):
+            self._synthesizers.put(engine.create_synthesizer())
+
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._queue_waits: deque = deque(maxlen=1000)  # 最近的排隊秒數
+        self._counts = {"tts": 0, "stt": 0, "queue_timeouts": 0, "call_timeouts": 0, "errors": 0}
+
+    # --- 排隊 ---
+
+    def _queue_timeout(self, kind: str):
+        with self._lock:
+            self._counts["queue_timeouts"] += 1
+        return SpeechDeadlineExceeded(f"{kind.upper()} 排隊超過 {self.queue_timeout} 秒")
+
+    def _acquire(self, kind: str) -> float:
+        """取得執行名額；回傳排隊開始時間 (perf_counter)"""
+        start = time.perf_counter()
+        if not self._slots.acquire(timeout=self.queue_timeout):
+            raise self._queue_timeout(kind)
+        with self._lock:
+            self._in_flight += 1
+            self._counts[kind] += 1
+        return start
+
+    def _record_wait(self, start: float):
+        with self._lock:
+            self._queue_waits.append(time.perf_counter() - start)
+
+    def _release(self):
+        with self._lock:
+            self._in_flight -= 1
+        self._slots.release()
+
+    def _record_failure(self, error: Exception):
+        with self._lock:
+            if isinstance(error, SpeechDeadlineExceeded):
+                self._counts["call_timeouts"] += 1
+            else:
+                self._counts["errors"] += 1
+
+    # --- 對外介面 ---
+
+    def synthesize(self, text: str, voice: Optional[str] = None) -> bytes:
+        """合成並回傳音檔位元組；指定非預設語音時臨時建立合成器"""
+        start = self._acquire("tts")
+        try:
+            pooled = self._pooled > 0 and voice is None
+            if pooled:
+                synthesizer = self._take_synthesizer(start)
+                self._record_wait(start)
+            else:
+                self._record_wait(start)
+                synthesizer = self.engine.create_synthesizer(voice)
+            try:
+                audio = self.engine.synthesize(synthesizer, text, self.tts_timeout)
+            except Exception as e:
+                self._record_failure(e)
+                if pooled:
+                    # 失敗或逾時的合成器狀態不明，換一個新的放回池中；
+                    # 重新建立也失敗時不放回，下次取用時補建，並保留原本的例外
+                    try:
+                        synthesizer = self.engine.create_synthesizer()
+                    except Exception as create_error:
+                        logger.warning(f"[SpeechPool] 重新建立合成器失敗: {create_error}")
+                        synthesizer = None
+                        with self._lock:
+                            self._lost += 1
+                raise
+            finally:
+                if pooled and synthesizer is not None:
+                    self._synthesizers.put(synthesizer)
+            return audio
+        finally:
+            self._release()
+
+    def _take_synthesizer(self, start: float) -> Any:
+        """取出閒置的合成器；先前重新建立失敗而短少時改為補建一個"""
+        with self._lock:
+            rebuild = self._lost > 0
+            if rebuild:
+                self._lost -= 1
+        if rebuild:
+            try:
+                return self.engine.create_synthesizer()
+            except Exception:
+                with self._lock:
+                    self._lost += 1
+                raise
+        # 名額可能多於合成器數，等待歸還的合成器也算排隊時間
+        remaining = self.queue_timeout - (time.perf_counter() - start)
+        try:
+            return self._synthesizers.get(timeout=max(remaining, 0))
+        except queue.Empty:
+            raise self._queue_timeout("tts")
+
+    def hold(self, kind: str = "stt") -> SpeechSlot:
+        """取得一個名額並持有到 SpeechSlot.release() 為止；排隊逾時丟出 SpeechDeadlineExceeded"""
+        self._record_wait(self._acquire(kind))
+        return SpeechSlot(self)
+
+    def recognize(self, audio_path: str) -> str:
+        return self._run_stt(self.engine.recognize, audio_path)
+
+    def recognize_pcm(self, audio: WavAudio) -> str:
+        return self._run_stt(self.engine.recognize_pcm, audio)
+
+    def _run_stt(self, recognize, audio) -> str:
+        self._record_wait(self._acquire("stt"))
+        try:
+            return recognize(audio, self.stt_timeout)
+        except Exception as e:
+            self._record_failure(e)
+            raise
+        finally:
+            self._release()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            waits = sorted(self._queue_waits)
+            stats = dict(self._counts)
+            stats["in_flight"] = self._in_flight
+        stats["max_concurrency"] = self.max_concurrency
+        stats["idle_synthesizers"] = self._synthesizers.qsize()
+        stats["queue_wait_ms"] = {
+            "avg": round(statistics.mean(waits) * 1000, 2) if waits else None,
+            "p95": round(waits[max(0, math.ceil(len(waits) * 0.95) - 1)] * 1000, 2) if waits else None,
+            "max": round(waits[-1] * 1000, 2) if waits else None,
+        }
+        return stats
@@ -1,13 +1,20 @@
 # backend/services/speech_service.py
-import azure.cognitiveservices.speech as speechsdk
 from backend.config import settings
+from backend.utils.lazy import LazyService, lazy_import
+from backend.utils.tts_cache import TTSCache
+from backend.utils.metrics import register_stats
+from backend.services.speech_pool import AzureSpeechEngine, SpeechPool
+from backend.utils.wav_io import read_wav
 import logging
 import os
-import threading# 新增：用於等待辨識完成
+from typing import Optional
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Azure Speech SDK 延遲到第一次建立語音設定時才匯入
+speechsdk = lazy_import("azure.cognitiveservices.speech")
+
 class AzureSpeechService:
     """Azure 語音服務封裝 (單例模式)"""
     
@@ -30,9 +37,18 @@ class AzureSpeechService:
                 region=settings.AZURE_SPEECH_REGION
             )
             speech_config.speech_recognition_language = "zh-TW"
-            speech_config.speech_synthesis_voice_name = "zh-TW-YunJheNeural"  # 台灣男聲
+            speech_config.speech_synthesis_voice_name = settings.TTS_VOICE
             
             self.speech_config = speech_config
+            # 預先建立合成器並限制同時進行的語音工作數
+            self.pool = SpeechPool(
+                AzureSpeechEngine(speech_config, self._config_for_voice),
+                max_concurrency=settings.SPEECH_MAX_CONCURRENCY,
+                synthesizers=settings.SPEECH_SYNTHESIZERS,
+                queue_timeout=settings.SPEECH_QUEUE_TIMEOUT,
+                tts_timeout=settings.SPEECH_TTS_TIMEOUT,
+                stt_timeout=settings.SPEECH_STT_TIMEOUT,
+            )
             self._initialized = True
             logger.info("[Speech] Azure Speech Service 初始化成功")
             
@@ -40,13 +56,23 @@ class AzureSpeechService:
             logger.error(f"[Speech] 初始化失敗: {e}")
             raise
 
-    def text_to_speech(self, text: str, output_path: str) -> str:
+    def _config_for_voice(self, voice: str):
+        """以指定語音建立另一份 SpeechConfig (預錄多種語音時使用)"""
+        speech_config = speechsdk.SpeechConfig(
+            subscription=settings.AZURE_SPEECH_KEY,
+            region=settings.AZURE_SPEECH_REGION
+        )
+        speech_config.speech_synthesis_voice_name = voice
+        return speech_config
+
+    def text_to_speech(self, text: str, output_path: str, voice: Optional[str] = None) -> str:
         """
         文字轉語音 (TTS)
         
         Args:
             text: 要合成的文字
             output_path: 輸出音檔路徑
+            voice: 語音名稱，預設為 settings.TTS_VOICE
             
         Returns:
             str: 音檔路徑
@@ -54,32 +80,32 @@ class AzureSpeechService:
         try:
             # 確保輸出資料夾存在
             os.makedirs(os.path.dirname(output_path), exist_ok=True)
-            
-            # 設定音檔輸出
-            audio_config = speechsdk.audio.AudioOutputConfig(filename=output_path)
-            
-            # 建立合成器
-            synthesizer = speechsdk.SpeechSynthesizer(
-                speech_config=self.speech_config,
-                audio_config=audio_config
-            )
-            
-            # 執行合成
-            result = synthesizer.speak_text_async(text).get()
-            
-            # 檢查結果
-            if result.reason == speechsdk.ResultReason.SynthesizingAudioCompleted:
-                logger.info(f"[Speech] TTS 成功: {output_path}")
-                return output_path
-            else:
-                error_msg = f"TTS 失敗: {result.cancellation_details.error_details}"
-                logger.error(f"[Speech] {error_msg}")
-                raise RuntimeError(error_msg)
-                
+
+            # 由引擎池的合成器合成到記憶體，再寫成檔案
+            audio = self.pool.synthesize(text, voice=voice)
+            with open(output_path, "wb") as f:
+                f.write(audio)
+            logger.info(f"[Speech] TTS 成功: {output_path}")
+            return output_path
+
         except Exception as e:
             logger.error(f"[Speech] TTS 錯誤: {e}")
             raise
 
+    def synthesize_cached(self, text: str) -> str:
+        """
+        文字轉語音 (經過 TTS 快取)：相同的文字 / 語音 / 輸出格式只會向 Azure 合成一次
+
+        Returns:
+            str: 快取音檔路徑 (以 tts_cache.url_for() 取得 audio_url)
+        """
+        return tts_cache.get_or_synthesize(
+            text,
+            self.speech_config.speech_synthesis_voice_name,
+            self.speech_config.speech_synthesis_output_format_string or "default",
+            lambda output_path: self.text_to_speech(text, output_path),
+        )
+
     def speech_to_text(self, audio_path: str) -> str:
         """
         語音轉文字 (STT)
@@ -91,59 +117,54 @@ class AzureSpeechService:
             str: 辨識的文字 (若失敗回傳空字串)
         """
         try:
-            # 設定音檔輸入
-            audio_config = speechsdk.audio.AudioConfig(filename=audio_path)
-            
-            # 建立辨識器
-            recognizer = speechsdk.SpeechRecognizer(
-                speech_config=self.speech_config,
-                audio_config=audio_config
-            )
-            
-            # 用於同步等待辨識結束的旗標
-            done_event = threading.Event()
-            all_results = []
-
-            # 3. 定義回呼函式 (Callback Functions)
-            def stop_cb(evt):
-                """當 session 停止或取消時觸發"""
-                logger.info(f'[Speech] 辨識結束或取消: {evt}')
-                done_event.set()  # 解除等待
-
-            def recognized_cb(evt):
-                """每辨識完一句話觸發"""
-                if evt.result.reason == speechsdk.ResultReason.RecognizedSpeech:
-                    logger.info(f'[Speech] 辨識句段: {evt.result.text}')
-                    all_results.append(evt.result.text)
-
-            # 4. 連接事件
-            recognizer.recognized.connect(recognized_cb)
-            recognizer.session_stopped.connect(stop_cb)
-            recognizer.canceled.connect(stop_cb)
-
-            # 5. 開始連續辨識 (Continuous Recognition)
+            # 連續辨識整個檔案；排隊與辨識都有期限 (SPEECH_QUEUE_TIMEOUT / SPEECH_STT_TIMEOUT)
             logger.info(f"[Speech] 開始連續辨識音檔: {audio_path}")
-            recognizer.start_continuous_recognition()
+            final_text = self.pool.recognize(audio_path)
 
-            # 6. 等待辨識完成
-            # 對於檔案輸入，Azure 讀完檔案會自動觸發 session_stopped，所以我們可以一直等
-            # 這裡不設 timeout，因為如果檔案很長，30秒會不夠，改讓 Azure 自己通知結束
-            done_event.wait() 
+            if not final_text:
+                logger.warning("[Speech] STT 完成但沒有辨識到文字")
+
+            return final_text
+
+        except Exception as e:
+            logger.error(f"[Speech] STT 發生錯誤: {e}")
+            return ""
+
+    def speech_to_text_bytes(self, data: bytes) -> str:
+        """
+        語音轉文字 (STT)，直接辨識記憶體中的 WAV，不寫暫存檔
+
+        Args:
+            data: 上傳的 WAV 位元組
+
+        Returns:
+            str: 辨識的文字 (若失敗回傳空字串)
+        """
+        try:
+            audio = read_wav(data)
+            logger.info(f"[Speech] 開始辨識記憶體音訊: {audio.seconds:.1f} 秒, {audio.sample_rate} Hz")
+            final_text = self.pool.recognize_pcm(audio)
 
-            # 7. 停止辨識並釋放資源
-            recognizer.stop_continuous_recognition()
-            
-            # 8. 組合結果
-            final_text = "".join(all_results)
-            
             if not final_text:
                 logger.warning("[Speech] STT 完成但沒有辨識到文字")
-                
+
             return final_text
-                
+
         except Exception as e:
             logger.error(f"[Speech] STT 發生錯誤: {e}")
             return ""
 
-# ✅ 建立全局實例
-speech_service = AzureSpeechService()
+# TTS 音檔快取 (static/audio/cache，對應 audio_url /audio/cache/...)
+# 等待其他請求合成同一句話的上限與單次合成上限相同，逾時後自行合成
+tts_cache = TTSCache(os.path.join(settings.AUDIO_DIR, "cache"), settings.TTS_CACHE_MAX_MB * 1024 * 1024,
+                     wait_timeout=settings.SPEECH_TTS_TIMEOUT)
+
+# ✅ 建立全局實例 (第一次使用或背景暖機時才初始化)
+speech_service = LazyService(AzureSpeechService, "speech_service")
+
+register_stats("tts_cache", "TTS 快取", tts_cache.stats,
+               counters=("hits", "misses", "coalesced", "wait_timeouts", "errors", "evictions", "bytes_saved"),
+               gauges=("entries", "total_bytes"))
+register_stats("speech_pool", "語音引擎池", lambda: speech_service.pool.stats() if speech_service.ready else None,
+               counters=("tts", "stt", "queue_timeouts", "call_timeouts", "errors"),
+               gauges=("in_flight", "idle_synthesizers"))
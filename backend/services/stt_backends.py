@@ -0,0 +1,235 @@
+# backend/services/stt_backends.py
+"""
+串流語音辨識後端
+
+求職者說話時頭戴裝置就把 PCM 片段一段段送上來 (WebSocket)，
+後端邊收邊餵給辨識器並回傳即時的部分結果；講完時只剩最後一小段要辨識，
+最終逐字稿在幾百毫秒內就能取得，不必等整個 .wav 上傳完再從頭辨識。
+
+- STTBackend.open_stream() 回傳 STTStream：write(pcm) 餵音訊、finish() 取得最終逐字稿
+- AzurePushStreamBackend: Azure Speech PushAudioInputStream + 連續辨識；
+  每段串流在整段回答期間佔用 SpeechPool 的一個名額，最終結果的等待上限為 stt_timeout
+- ScriptedSTTBackend: 不需要網路的替身，依收到的音訊量逐步吐出預先指定的逐字稿 (測試 / 離線開發用)
+
+後端由 settings.STT_BACKEND 選擇，新增後端時註冊到 STT_BACKENDS。
+"""
+import logging
+import threading
+from typing import Callable, Dict, List, Optional, Type
+
+from backend.config import settings
+from backend.services.speech_pool import SpeechDeadlineExceeded, SpeechPool, SpeechSlot
+from backend.services.speech_service import speech_service
+from backend.utils.lazy import lazy_import
+
+logger = logging.getLogger(__name__)
+
+speechsdk = lazy_import("azure.cognitiveservices.speech")
+
+PartialCallback = Callable[[str], None]
+
+SAMPLE_RATE = 16000  # 頭戴裝置錄音格式：16 kHz / 16-bit / mono PCM
+BITS_PER_SAMPLE = 16
+CHANNELS = 1
+FINISH_TIMEOUT = 10.0  # 送出結束後等待最終結果的上限 (秒)
+
+
+class STTStream:
+    """一段回答的串流辨識"""
+
+    def write(self, pcm: bytes):
+        raise NotImplementedError
+
+    def finish(self, timeout: Optional[float] = None) -> str:
+        """音訊已全部送出，等待並回傳最終逐字稿 (阻塞)；timeout 為 None 時使用後端的預設上限"""
+        raise NotImplementedError
+
+    def close(self):
+        """中途放棄 (例如 WebSocket 斷線)"""
+
+
+class STTBackend:
+    name = "base"
+
+    def open_stream(self, sample_rate: int = SAMPLE_RATE, on_partial: Optional[PartialCallback] = None) -> STTStream:
+        raise NotImplementedError
+
+
+# --- Azure ---
+
+class AzurePushStream(STTStream):
+    """
+    Args:
+        slot: 串流期間佔用的 SpeechPool 名額，finish() 或 close() 時歸還
+        finish_timeout: 送出結束後等待最終結果的上限 (秒)
+    """
+
+    def __init__(self, speech_config, sample_rate: int, on_partial: Optional[PartialCallback],
+                 slot: Optional[SpeechSlot] = None, finish_timeout: float = FINISH_TIMEOUT):
+        self._slot = slot
+        self._finish_timeout = finish_timeout
+        stream_format = speechsdk.audio.AudioStreamFormat(
+            samples_per_second=sample_rate, bits_per_sample=BITS_PER_SAMPLE, channels=CHANNELS
+        )
+        self._push = speechsdk.audio.PushAudioInputStream(stream_format=stream_format)
+        self._recognizer = speechsdk.SpeechRecognizer(
+            speech_config=speech_config,
+            audio_config=speechsdk.audio.AudioConfig(stream=self._push)
+        )
+        self._on_partial = on_partial
+        self._finals: List[str] = []
+        self._done = threading.Event()
+
+        def recognizing_cb(evt):
+            # 已確定的句段 + 目前這句的暫定結果
+            if self._on_partial is not None:
+                self._on_partial("".join(self._finals) + evt.result.text)
+
+        def recognized_cb(evt):
+            if evt.result.reason == speechsdk.ResultReason.RecognizedSpeech and evt.result.text:
+                self._finals.append(evt.result.text)
+                if self._on_partial is not None:
+                    self._on_partial("".join(self._finals))
+
+        def stop_cb(evt):
+            self._done.set()
+
+        self._recognizer.recognizing.connect(recognizing_cb)
+        self._recognizer.recognized.connect(recognized_cb)
+        self._recognizer.session_stopped.connect(stop_cb)
+        self._recognizer.canceled.connect(stop_cb)
+        self._recognizer.start_continuous_recognition_async().get()
+
+    def write(self, pcm: bytes):
+        self._push.write(pcm)
+
+    def _release(self, error: Optional[Exception] = None):
+        if self._slot is not None:
+            self._slot.release(error)
+
+    def finish(self, timeout: Optional[float] = None) -> str:
+        timeout = self._finish_timeout if timeout is None else timeout
+        error = None
+        try:
+            # 關閉推送串流 = 音訊結束，Azure 辨識完剩下的部分後觸發 session_stopped
+            self._push.close()
+            if not self._done.wait(timeout):
+                logger.warning(f"[STT] 等待最終結果逾時 ({timeout} 秒)，回傳目前結果")
+                error = SpeechDeadlineExceeded(f"STT 串流最終結果超過 {timeout} 秒")
+            self._recognizer.stop_continuous_recognition_async().get()
+            return "".join(self._finals)
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            self._release(error)
+
+    def close(self):
+        self._on_partial = None
+        try:
+            self._push.close()
+            self._recognizer.stop_continuous_recognition_async().get()
+        except Exception as e:
+            logger.warning(f"[STT] 關閉辨識器失敗: {e}")
+        finally:
+            self._release()
+
+
+class AzurePushStreamBackend(STTBackend):
+    """
+    Args:
+        pool: 限制同時進行語音工作數的 SpeechPool；預設為 speech_service 的引擎池，
+            串流與一般 TTS / STT 共用同一個上限
+    """
+    name = "azure"
+
+    def __init__(self, pool: Optional[SpeechPool] = None):
+        self._pool = pool
+        self._speech_config = None
+        self._lock = threading.Lock()
+
+    def _config(self):
+        with self._lock:
+            if self._speech_config is None:
+                speech_config = speechsdk.SpeechConfig(
+                    subscription=settings.AZURE_SPEECH_KEY,
+                    region=settings.AZURE_SPEECH_REGION
+                )
+                speech_config.speech_recognition_language = "zh-TW"
+                self._speech_config = speech_config
+            return self._speech_config
+
+    def _speech_pool(self) -> SpeechPool:
+        return self._pool if self._pool is not None else speech_service.pool
+
+    def open_stream(self, sample_rate: int = SAMPLE_RATE, on_partial: Optional[PartialCallback] = None) -> STTStream:
+        pool = self._speech_pool()
+        slot = pool.hold("stt")
+        try:
+            return AzurePushStream(self._config(), sample_rate, on_partial, slot, pool.stt_timeout)
+        except Exception as e:
+            slot.release(e)
+            raise
+
+
+# --- 替身 ---
+
+class ScriptedStream(STTStream):
+    def __init__(self, transcript: str, sample_rate: int, chars_per_second: float,
+                 on_partial: Optional[PartialCallback]):
+        self._transcript = transcript
+        self._bytes_per_char = sample_rate * BITS_PER_SAMPLE // 8 * CHANNELS / chars_per_second
+        self._on_partial = on_partial
+        self._received = 0
+        self._revealed = 0
+        self._closed = False
+
+    def write(self, pcm: bytes):
+        if self._closed:
+            raise RuntimeError("stream already finished")
+        self._received += len(pcm)
+        revealed = min(len(self._transcript), int(self._received / self._bytes_per_char))
+        if revealed > self._revealed:
+            self._revealed = revealed
+            if self._on_partial is not None:
+                self._on_partial(self._transcript[:revealed])
+
+    def finish(self, timeout: Optional[float] = None) -> str:
+        self._closed = True
+        return self._transcript if self._received else ""
+
+    def close(self):
+        self._closed = True
+
+
+class ScriptedSTTBackend(STTBackend):
+    """
+    依收到的音訊量 (預設每秒 4 個字) 逐步吐出 transcript 作為部分結果，finish() 回傳完整 transcript；
+    沒有收到任何音訊時回傳空字串，與真實辨識器「沒聽到」的行為一致
+    """
+    name = "scripted"
+
+    def __init__(self, transcript: str = "", chars_per_second: float = 4.0):
+        self.transcript = transcript or settings.STT_SCRIPTED_TRANSCRIPT
+        self.chars_per_second = chars_per_second
+
+    def open_stream(self, sample_rate: int = SAMPLE_RATE, on_partial: Optional[PartialCallback] = None) -> STTStream:
+        return ScriptedStream(self.transcript, sample_rate, self.chars_per_second, on_partial)
+
+
+STT_BACKENDS: Dict[str, Type[STTBackend]] = {
+    AzurePushStreamBackend.name: AzurePushStreamBackend,
+    ScriptedSTTBackend.name: ScriptedSTTBackend,
+}
+
+_backends: Dict[str, STTBackend] = {}
+
+
+def get_stt_backend(name: Optional[str] = None) -> STTBackend:
+    """取得 (必要時建立) 指定名稱的後端，預設為 settings.STT_BACKEND"""
+    name = name or settings.STT_BACKEND
+    if name not in STT_BACKENDS:
+        raise ValueError(f"未知的 STT 後端: {name}，可用: {', '.join(STT_BACKENDS)}")
+    if name not in _backends:
+        _backends[name] = STT_BACKENDS[name]()
+    return _backends[name]
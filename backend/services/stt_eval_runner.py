@@ -0,0 +1,330 @@
+# backend/services/stt_eval_runner.py
+"""
+STT 評估執行器 (scripts/evaluate_magicdata.py 與 scripts/evaluate_local.py 共用)
+
+原本逐段辨識，每段都重新建立 SpeechConfig、gc.collect() 再 sleep 0.2 秒，
+1,000 段要跑好幾個小時，中途當掉就全部重來。這裡改成：
+
+- 固定大小的工作執行緒池 + token bucket 限速 (不超過 Azure 的每秒請求上限)，同時在處理中的片段有上限，
+  音訊在工作執行緒裡才載入，記憶體不會隨資料集大小成長
+- 檢查點 (<output_csv>.checkpoint.jsonl)：每完成一段就寫一行，重新執行時略過已完成的片段
+- 辨識結果快取：以「音訊內容雜湊 + 引擎設定」為鍵，換評分方式或重跑時已辨識過的音訊不再送 API
+- 辨識失敗或結果為空的片段不寫入快取與檢查點，下次執行會重新辨識
+- 辨識引擎可替換 (backend/services/speech_pool.py 的 SpeechEngine)：azure / local (離線替身)
+- 結果逐筆寫入 CSV，結束時再依 sample_id 排序重寫一次
+
+用法：
+    engine, config = build_engine("azure")
+    runner = STTEvalRunner(engine, config, output_csv="results.csv", columns=[...],
+                           normalize=normalize_text, tokenize=tokenize, cache_path="output/stt_cache.jsonl")
+    rows = runner.run(segments)
+"""
+import csv
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from backend.config import settings
+from backend.services.speech_pool import AzureSpeechEngine, LocalSpeechEngine, SpeechEngine
+from backend.utils.edit_distance import distance, edit_ops
+from backend.utils.lazy import lazy_import
+from backend.utils.wav_io import WavAudio
+
+logger = logging.getLogger(__name__)
+
+speechsdk = lazy_import("azure.cognitiveservices.speech")
+
+SCORE_COLUMNS = ["reference", "hypothesis", "cer", "substitutions", "deletions", "insertions"]
+
+
+@dataclass
+class EvalSegment:
+    """一段待評估的音訊"""
+    sample_id: int
+    key: str                          # 檢查點用的唯一識別 (例如 "檔名@起-迄")
+    reference: str                    # 已正規化的正確文字
+    load_audio: Callable[[], WavAudio]  # 在工作執行緒中才載入音訊
+    meta: Dict[str, Any] = field(default_factory=dict)  # 其餘 CSV 欄位 (file_id / start_time ...)
+
+
+# ---------- 引擎 ----------
+
+def _azure_engine(language: str) -> Tuple[SpeechEngine, Dict[str, Any]]:
+    speech_config = speechsdk.SpeechConfig(subscription=settings.AZURE_SPEECH_KEY, region=settings.AZURE_SPEECH_REGION)
+    speech_config.speech_recognition_language = language
+    return AzureSpeechEngine(speech_config), {"backend": "azure", "region": settings.AZURE_SPEECH_REGION,
+                                              "language": language}
+
+
+def _local_engine(language: str) -> Tuple[SpeechEngine, Dict[str, Any]]:
+    engine = LocalSpeechEngine(init_latency=0, tts_latency=0, stt_latency=0.05)
+    return engine, {"backend": "local", "transcript": engine.transcript}
+
+
+# 名稱 -> 建立 (引擎, 引擎設定) 的函式；引擎設定是快取鍵的一部分
+EVAL_ENGINES: Dict[str, Callable[[str], Tuple[SpeechEngine, Dict[str, Any]]]] = {
+    "azure": _azure_engine,
+    "local": _local_engine,
+}
+
+
+def build_engine(name: str, language: str = "zh-TW") -> Tuple[SpeechEngine, Dict[str, Any]]:
+    if name not in EVAL_ENGINES:
+        raise ValueError(f"未知的辨識引擎: {name}，可用: {', '.join(EVAL_ENGINES)}")
+    return EVAL_ENGINES[name](language)
+
+
+# ---------- 限速 / 快取 / 檢查點 ----------
+
+class RateLimiter:
+    """token bucket：平均每秒 rate 次，最多累積 burst 次"""
+
+    def __init__(self, rate: float, burst: int = 1, clock: Callable[[], float] = time.monotonic,
+                 sleep: Callable[[float], None] = time.sleep):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self._clock = clock
+        self._sleep = sleep
+        self._tokens = float(self.burst)
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        if self.rate <= 0:
+            return
+        while True:
+            with self._lock:
+                now = self._clock()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait_seconds = (1 - self._tokens) / self.rate
+            self._sleep(wait_seconds)
+
+
+def audio_fingerprint(audio: WavAudio, engine_config: Dict[str, Any]) -> str:
+    """音訊內容 + 格式 + 引擎設定的雜湊"""
+    digest = hashlib.sha256()
+    digest.update(json.dumps(engine_config, sort_keys=True, ensure_ascii=False).encode("utf-8"))
+    digest.update(f"{audio.sample_rate}/{audio.channels}/{audio.sample_width}".encode("ascii"))
+    digest.update(audio.pcm)
+    return digest.hexdigest()
+
+
+class _JsonlStore:
+    """只追加的 JSONL 檔，開啟時全部載入；寫入以鎖保護，每行寫完即 flush"""
+
+    def __init__(self, path: Optional[str]):
+        self.path = path
+        self._lock = threading.Lock()
+        self.records: List[dict] = []
+        if path and os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        self.records.append(json.loads(line))
+                    except json.JSONDecodeError:
+                        break  # 當掉時寫到一半的最後一行
+        self._file = None
+
+    def append(self, record: dict):
+        if not self.path:
+            return
+        with self._lock:
+            if self._file is None:
+                os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+                self._file = open(self.path, "a", encoding="utf-8")
+            self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+            self._file.flush()
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+class TranscriptCache:
+    """audio_fingerprint -> 辨識結果 (原始文字，尚未正規化)"""
+
+    def __init__(self, path: Optional[str]):
+        self._store = _JsonlStore(path)
+        self._entries = {r["key"]: r["hypothesis"] for r in self._store.records}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            return self._entries.get(key)
+
+    def put(self, key: str, hypothesis: str):
+        with self._lock:
+            if key in self._entries:
+                return
+            self._entries[key] = hypothesis
+        self._store.append({"key": key, "hypothesis": hypothesis})
+
+    def close(self):
+        self._store.close()
+
+
+# ---------- 執行器 ----------
+
+class STTEvalRunner:
+    """
+    Args:
+        engine / engine_config: build_engine() 的回傳值
+        output_csv: 結果 CSV (逐筆寫入)；檢查點為 <output_csv>.checkpoint.jsonl
+        columns: CSV 欄位 (sample_id 與 meta 欄位在前，SCORE_COLUMNS 在後)
+        normalize / tokenize: 辨識結果的正規化與斷詞 (與 reference 相同的處理)
+        cache_path: 辨識結果快取 (None 表示不快取)
+        workers: 同時辨識的片段數
+        rate: 每秒最多送出幾次辨識 (0 = 不限)
+        resume: 是否沿用既有檢查點；False 時清除檢查點重新開始
+        retries: 辨識失敗 (例外 / 逾時) 的重試次數
+    """
+
+    def __init__(self, engine: SpeechEngine, engine_config: Dict[str, Any], output_csv: str, columns: List[str],
+                 normalize: Callable[[str], str], tokenize: Callable[[str], List[str]],
+                 cache_path: Optional[str] = None, workers: int = 4, rate: float = 5.0, resume: bool = True,
+                 retries: int = 2, timeout: float = 60.0):
+        self.engine = engine
+        self.engine_config = engine_config
+        self.output_csv = output_csv
+        self.checkpoint_path = f"{output_csv}.checkpoint.jsonl"
+        self.columns = columns
+        self.normalize = normalize
+        self.tokenize = tokenize
+        self.workers = max(1, workers)
+        self.retries = retries
+        self.timeout = timeout
+        self.limiter = RateLimiter(rate, burst=self.workers)
+        self.cache = TranscriptCache(cache_path)
+        if not resume and os.path.exists(self.checkpoint_path):
+            os.remove(self.checkpoint_path)
+        self._checkpoint = _JsonlStore(self.checkpoint_path)
+        self._csv_lock = threading.Lock()
+        self.stats = {"resumed": 0, "cached": 0, "transcribed": 0, "empty": 0, "failed": 0}
+
+    def run(self, segments: Iterable[EvalSegment]) -> List[dict]:
+        """評估所有片段，回傳依 sample_id 排序的結果 (包含先前檢查點中的)"""
+        done: Dict[str, dict] = {r["key"]: r["row"] for r in self._checkpoint.records}
+        self.stats["resumed"] = len(done)
+        # CSV 以檢查點為準重寫，之後逐筆追加
+        self._write_csv(list(done.values()))
+        pending = [s for s in segments if s.key not in done]
+        total = len(pending)
+        start = time.time()
+        print(f"[Eval] 待評估 {total} 段 (檢查點已完成 {len(done)} 段，快取 {len(self.cache)} 筆)，"
+              f"{self.workers} 個工作執行緒")
+
+        finished = 0
+        try:
+            with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                in_flight = set()
+                remaining = iter(pending)
+                while True:
+                    # 處理中的片段最多 workers * 2 個：音訊在工作執行緒中才載入
+                    while len(in_flight) < self.workers * 2:
+                        segment = next(remaining, None)
+                        if segment is None:
+                            break
+                        in_flight.add(executor.submit(self._evaluate, segment))
+                    if not in_flight:
+                        break
+                    completed, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for future in completed:
+                        finished += 1
+                        result = future.result()
+                        if result is None:
+                            continue
+                        key, row = result
+                        done[key] = row
+                        if row["hypothesis"]:
+                            self._checkpoint.append({"key": key, "row": row})
+                        self._append_csv(row)
+                        print(f"  [{finished}/{total}] #{row['sample_id']} CER {row['cer']:.2%}  "
+                              f"SUB:{row['substitutions']} DEL:{row['deletions']} INS:{row['insertions']}")
+        finally:
+            self._checkpoint.close()
+            self.cache.close()
+
+        rows = sorted(done.values(), key=lambda r: r["sample_id"])
+        self._write_csv(rows)
+        print(f"[Eval] 完成 {finished} 段，用時 {time.time() - start:.1f} 秒 "
+              f"(辨識 {self.stats['transcribed']} / 快取 {self.stats['cached']} / 空白 {self.stats['empty']} / "
+              f"失敗 {self.stats['failed']})")
+        return rows
+
+    def _evaluate(self, segment: EvalSegment) -> Optional[Tuple[str, dict]]:
+        try:
+            audio = segment.load_audio()
+            raw = self._transcribe(audio)
+        except Exception as e:
+            logger.error(f"[Eval] #{segment.sample_id} {segment.key} 失敗: {e}")
+            self._count("failed")
+            return None
+
+        hypothesis = self.normalize(raw)
+        ref_tokens = self.tokenize(segment.reference)
+        hyp_tokens = self.tokenize(hypothesis)
+        sub, dele, ins = edit_ops(ref_tokens, hyp_tokens)
+        row = {"sample_id": segment.sample_id, **segment.meta,
+               "reference": segment.reference, "hypothesis": hypothesis,
+               "cer": distance(ref_tokens, hyp_tokens) / len(ref_tokens) if ref_tokens else 0.0,
+               "substitutions": sub, "deletions": dele, "insertions": ins}
+        return segment.key, row
+
+    def _transcribe(self, audio: WavAudio) -> str:
+        key = audio_fingerprint(audio, self.engine_config)
+        cached = self.cache.get(key)
+        if cached:
+            self._count("cached")
+            return cached
+        for attempt in range(self.retries + 1):
+            self.limiter.acquire()
+            try:
+                text = self.engine.recognize_pcm(audio, self.timeout)
+                break
+            except Exception as e:
+                if attempt == self.retries:
+                    raise
+                logger.warning(f"[Eval] 辨識失敗，重試 ({attempt + 1}/{self.retries}): {e}")
+                time.sleep(2 ** attempt)
+        if not text:
+            # 沒有辨識出文字多半是暫時性的問題，不快取，下次執行重新辨識
+            self._count("empty")
+            return text
+        self.cache.put(key, text)
+        self._count("transcribed")
+        return text
+
+    def _count(self, name: str):
+        with self._csv_lock:
+            self.stats[name] += 1
+
+    def _csv_row(self, row: dict) -> dict:
+        return {c: round(row[c], 4) if c == "cer" else row.get(c) for c in self.columns}
+
+    def _write_csv(self, rows: List[dict]):
+        with self._csv_lock:
+            os.makedirs(os.path.dirname(os.path.abspath(self.output_csv)), exist_ok=True)
+            with open(self.output_csv, "w", newline="", encoding="utf-8-sig") as f:
+                writer = csv.DictWriter(f, fieldnames=self.columns)
+                writer.writeheader()
+                writer.writerows(self._csv_row(r) for r in rows)
+
+    def _append_csv(self, row: dict):
+        with self._csv_lock:
+            with open(self.output_csv, "a", newline="", encoding="utf-8") as f:
+                csv.DictWriter(f, fieldnames=self.columns).writerow(self._csv_row(row))
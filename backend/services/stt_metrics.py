@@ -7,6 +7,8 @@ import re
 from typing import Tuple, Dict, List
 import logging
 
+from backend.utils.edit_distance import distance
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
@@ -34,7 +36,7 @@ class STTMetrics:
     @staticmethod
     def levenshtein_distance(s1: str, s2: str) -> int:
         """
-        計算 Levenshtein 距離（編輯距離）
+        計算 Levenshtein 距離（編輯距離，bit-parallel，見 backend/utils/edit_distance.py）
         
         Args:
             s1: 字串1
@@ -43,24 +45,7 @@ class STTMetrics:
         Returns:
             int: 編輯距離
         """
-        if len(s1) < len(s2):
-            return STTMetrics.levenshtein_distance(s2, s1)
-        
-        if len(s2) == 0:
-            return len(s1)
-        
-        previous_row = range(len(s2) + 1)
-        for i, c1 in enumerate(s1):
-            current_row = [i + 1]
-            for j, c2 in enumerate(s2):
-                # 插入、刪除、替換的成本
-                insertions = previous_row[j + 1] + 1
-                deletions = current_row[j] + 1
-                substitutions = previous_row[j] + (c1 != c2)
-                current_row.append(min(insertions, deletions, substitutions))
-            previous_row = current_row
-        
-        return previous_row[-1]
+        return distance(s1, s2)
     
     @staticmethod
     def calculate_wer(reference: str, hypothesis: str) -> Tuple[float, Dict]:
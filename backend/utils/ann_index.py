@@ -0,0 +1,296 @@
+# backend/utils/ann_index.py
+"""
+FAISS 索引工廠
+
+知識庫目前只有百來個檔案，IndexFlatIP (暴力搜尋) 已經足夠；
+語料成長到數千個職位 / 情境題區塊後，可改用近似最近鄰 (ANN) 索引：
+
+    flat      IndexFlatIP，精確搜尋 (預設)
+    ivf_flat  IndexIVFFlat，先以 k-means 分成 nlist 群，查詢時只掃 nprobe 群
+    ivf_pq    IndexIVFPQ，IVF + Product Quantization 壓縮向量
+    hnsw      IndexHNSWFlat，圖形索引，查詢時以 efSearch 控制準確度
+
+向量儲存格式 (storage) 可選 fp32 (預設) / fp16 / sq8 (每維 1 byte 的 scalar quantization)，
+另可用 pca_dim 先以 PCA 將向量降維；投影矩陣隨索引一起存檔，查詢向量以相同方式投影。
+
+一律使用內積 (向量已正規化，等同餘弦相似度)。需要訓練的索引在 build_index() 內完成訓練，
+查詢參數 (nprobe / efSearch) 則可在每次 search() 時指定。
+
+索引規格可用字串描述，例如：
+    "flat"
+    "ivf_flat,nlist=256,nprobe=16"
+    "ivf_pq,nlist=256,pq_m=16,nprobe=16"
+    "hnsw,hnsw_m=32,ef_search=64"
+    "flat,storage=sq8,pca_dim=128"
+"""
+import math
+import os
+from dataclasses import asdict, dataclass, fields, replace
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple, Union
+
+import numpy as np
+
+from backend.utils.lazy import lazy_import
+
+faiss = lazy_import("faiss")
+
+INDEX_TYPES = ("flat", "ivf_flat", "ivf_pq", "hnsw")
+STORAGE_TYPES = ("fp32", "fp16", "sq8")
+
+# 非數值的規格欄位
+_TEXT_FIELDS = ("kind", "storage")
+
+# 預設索引規格 (可用環境變數覆寫)
+DEFAULT_INDEX_SPEC = os.getenv("RAG_INDEX_TYPE", "flat")
+
+# 只影響查詢、不影響索引內容的參數；不放進 manifest，改變時不必重建快照
+SEARCH_PARAMS = ("nprobe", "ef_search")
+
+
+@dataclass(frozen=True)
+class IndexSpec:
+    """索引規格"""
+    kind: str = "flat"
+    nlist: int = 256           # IVF 分群數 (資料量不足時自動下修)
+    nprobe: int = 16           # IVF 查詢時掃描的群數
+    pq_m: int = 16             # PQ 子向量數 (需整除維度，不能整除時自動下修)
+    pq_nbits: int = 8          # 每個子向量的編碼位元數
+    hnsw_m: int = 32           # HNSW 每個節點的鄰居數
+    ef_construction: int = 80  # HNSW 建圖時的候選數
+    ef_search: int = 64        # HNSW 查詢時的候選數
+    storage: str = "fp32"      # 索引內的向量格式 (ivf_pq 本身已壓縮，忽略此設定)
+    pca_dim: int = 0           # PCA 降維後的維度；0 表示不降維
+
+    def build_params(self) -> Dict[str, Any]:
+        """會影響索引內容的參數 (寫入 manifest)"""
+        params = asdict(self)
+        for name in SEARCH_PARAMS:
+            params.pop(name)
+        return params
+
+
+def parse_index_spec(spec) -> IndexSpec:
+    """
+    解析索引規格
+
+    Args:
+        spec: IndexSpec、dict 或字串 ("ivf_flat,nlist=128,nprobe=8")
+
+    Returns:
+        IndexSpec
+    """
+    if isinstance(spec, IndexSpec):
+        return spec
+    if spec is None:
+        spec = DEFAULT_INDEX_SPEC
+    if isinstance(spec, dict):
+        values = dict(spec)
+    else:
+        kind, *options = [part.strip() for part in str(spec).split(",") if part.strip()]
+        values = {"kind": kind}
+        for option in options:
+            key, _, value = option.partition("=")
+            values[key.strip()] = value.strip()
+
+    kind = values.get("kind", "flat")
+    if kind not in INDEX_TYPES:
+        raise ValueError(f"未知的索引類型: {kind} (可用: {', '.join(INDEX_TYPES)})")
+    storage = values.get("storage", "fp32")
+    if storage not in STORAGE_TYPES:
+        raise ValueError(f"未知的儲存格式: {storage} (可用: {', '.join(STORAGE_TYPES)})")
+
+    unknown = set(values) - {f.name for f in fields(IndexSpec)}
+    if unknown:
+        raise ValueError(f"未知的索引參數: {', '.join(sorted(unknown))}")
+
+    typed = {key: (value if key in _TEXT_FIELDS else int(value)) for key, value in values.items()}
+    return IndexSpec(**typed)
+
+
+def _effective_nlist(spec: IndexSpec, n: int) -> int:
+    # FAISS 建議每群至少 39 個訓練點
+    return max(1, min(spec.nlist, n // 39))
+
+
+def _effective_pq(spec: IndexSpec, n: int, dim: int) -> Tuple[int, int]:
+    m = max(d for d in range(1, min(spec.pq_m, dim) + 1) if dim % d == 0)
+    # 每個子量化器要訓練 2**nbits 個中心點，訓練資料不足時降低位元數
+    nbits = max(1, min(spec.pq_nbits, int(math.log2(max(n, 2)))))
+    return m, nbits
+
+
+def _scalar_quantizer(storage: str):
+    return faiss.ScalarQuantizer.QT_fp16 if storage == "fp16" else faiss.ScalarQuantizer.QT_8bit
+
+
+def storage_dtype(spec) -> np.dtype:
+    """快照中保存原始向量 (embeddings.npy) 所用的型別：壓縮儲存時改存 float16"""
+    return np.dtype('float32' if parse_index_spec(spec).storage == "fp32" else 'float16')
+
+
+def is_lossy(spec) -> bool:
+    """索引回傳的分數是否為近似值 (PCA 降維、fp16 / sq8 儲存或 PQ 壓縮)"""
+    spec = parse_index_spec(spec)
+    return spec.pca_dim > 0 or spec.storage != "fp32" or spec.kind == "ivf_pq"
+
+
+class Projection:
+    """PCA 投影：y = normalize((x - mean) @ components)"""
+
+    def __init__(self, mean: np.ndarray, components: np.ndarray):
+        self.mean = np.asarray(mean, dtype='float32')               # (dim,)
+        self.components = np.asarray(components, dtype='float32')   # (dim, out_dim)
+
+    @property
+    def out_dim(self) -> int:
+        return int(self.components.shape[1])
+
+    def apply(self, x: np.ndarray) -> np.ndarray:
+        y = np.ascontiguousarray((np.asarray(x, dtype='float32') - self.mean) @ self.components)
+        faiss.normalize_L2(y)  # 投影後重新正規化，內積仍等同餘弦相似度
+        return y
+
+    def save(self, path: Union[str, Path]) -> None:
+        with open(path, "wb") as f:
+            np.savez(f, mean=self.mean, components=self.components)
+
+    @classmethod
+    def load(cls, path: Union[str, Path]) -> "Projection":
+        with np.load(path) as data:
+            return cls(data["mean"], data["components"])
+
+
+def fit_projection(embeddings: np.ndarray, out_dim: int) -> Optional[Projection]:
+    """
+    以 PCA 求出投影矩陣
+
+    Returns:
+        Projection；out_dim 為 0 或不小於原維度時回傳 None
+    """
+    x = np.asarray(embeddings, dtype='float32')
+    n, dim = x.shape
+    if out_dim <= 0 or out_dim >= dim or n == 0:
+        return None
+    if n < out_dim:
+        print(f"[Index] 資料量 {n} 筆少於 pca_dim={out_dim}，多出的維度不帶資訊")
+
+    mean = x.mean(axis=0)
+    centered = (x - mean).astype('float64')
+    eigvals, eigvecs = np.linalg.eigh(centered.T @ centered / max(n - 1, 1))
+    order = np.argsort(eigvals)[::-1][:out_dim]
+    return Projection(mean, eigvecs[:, order])
+
+
+def build_index(embeddings: np.ndarray, spec=None):
+    """
+    依規格建立並訓練 FAISS 索引，加入所有向量 (不處理 PCA，見 build_projected_index)
+
+    Args:
+        embeddings: (n, dim) float32，已正規化
+        spec: 索引規格 (見 parse_index_spec)
+
+    Returns:
+        faiss.Index
+    """
+    spec = parse_index_spec(spec)
+    embeddings = np.ascontiguousarray(embeddings, dtype='float32')
+    n, dim = embeddings.shape
+    metric = faiss.METRIC_INNER_PRODUCT
+    compressed = spec.storage != "fp32"
+
+    if spec.kind == "flat" or n == 0:
+        if compressed:
+            index = faiss.IndexScalarQuantizer(dim, _scalar_quantizer(spec.storage), metric)
+        else:
+            index = faiss.IndexFlatIP(dim)
+    elif spec.kind == "hnsw":
+        if compressed:
+            index = faiss.IndexHNSWSQ(dim, _scalar_quantizer(spec.storage), spec.hnsw_m, metric)
+        else:
+            index = faiss.IndexHNSWFlat(dim, spec.hnsw_m, metric)
+        index.hnsw.efConstruction = spec.ef_construction
+        index.hnsw.efSearch = spec.ef_search
+    else:
+        nlist = _effective_nlist(spec, n)
+        quantizer = faiss.IndexFlatIP(dim)
+        if spec.kind == "ivf_flat" and compressed:
+            index = faiss.IndexIVFScalarQuantizer(quantizer, dim, nlist, _scalar_quantizer(spec.storage), metric)
+        elif spec.kind == "ivf_flat":
+            index = faiss.IndexIVFFlat(quantizer, dim, nlist, metric)
+        else:
+            m, nbits = _effective_pq(spec, n, dim)
+            index = faiss.IndexIVFPQ(quantizer, dim, nlist, m, nbits, metric)
+        if nlist != spec.nlist:
+            print(f"[Index] 資料量 {n} 筆，nlist 由 {spec.nlist} 下修為 {nlist}")
+        index.nprobe = min(spec.nprobe, nlist)
+
+    if not index.is_trained and n:
+        index.train(embeddings)
+    index.add(embeddings)
+    return index
+
+
+def build_projected_index(embeddings: np.ndarray, spec=None) -> Tuple[Any, Optional[Projection]]:
+    """
+    依規格 (含 pca_dim) 建立索引
+
+    Returns:
+        (faiss.Index, Projection 或 None)；查詢前需以 project_queries() 套用相同投影
+    """
+    spec = parse_index_spec(spec)
+    projection = fit_projection(embeddings, spec.pca_dim)
+    vectors = projection.apply(embeddings) if projection is not None else embeddings
+    return build_index(vectors, spec), projection
+
+
+def project_queries(queries: np.ndarray, projection: Optional[Projection]) -> np.ndarray:
+    """將 (已正規化的) 查詢向量轉到索引所在的空間"""
+    if projection is None:
+        return queries
+    return projection.apply(queries)
+
+
+def search(index, queries: np.ndarray, top_k: int,
+           nprobe: Optional[int] = None, ef_search: Optional[int] = None,
+           ids: Optional[np.ndarray] = None, exhaustive: bool = False):
+    """
+    查詢索引，可逐次指定 nprobe (IVF) / efSearch (HNSW)
+
+    Args:
+        ids: 只在這些列編號中搜尋 (faiss.IDSelectorBatch)；None 表示搜尋全部
+        exhaustive: IVF 掃描所有群、HNSW 的 efSearch 放大到資料量；
+                    過濾後的分區很小時，近似搜尋可能找不到足夠的鄰居，可用它補足
+
+    Returns:
+        (D, I)：與 faiss.Index.search 相同，不足 top_k 的位置 I 為 -1
+    """
+    selector = faiss.IDSelectorBatch(np.ascontiguousarray(ids, dtype='int64')) if ids is not None else None
+    ivf = faiss.try_extract_index_ivf(index)
+    params = None
+    if ivf is not None:
+        if exhaustive:
+            nprobe = ivf.nlist
+        if nprobe is not None or selector is not None:
+            # SearchParametersIVF 的 nprobe 預設為 1，只帶過濾條件時也要沿用索引本身的設定
+            params = faiss.SearchParametersIVF(nprobe=int(nprobe or ivf.nprobe))
+    elif isinstance(index, faiss.IndexHNSW):
+        if exhaustive:
+            ef_search = max(index.ntotal, top_k)
+        if ef_search is not None or selector is not None:
+            params = faiss.SearchParametersHNSW(efSearch=int(ef_search or index.hnsw.efSearch))
+    elif selector is not None:
+        params = faiss.SearchParameters()
+    if selector is not None:
+        params.sel = selector
+    return index.search(np.ascontiguousarray(queries, dtype='float32'), top_k, params=params)
+
+
+def index_nbytes(index) -> int:
+    """索引序列化後的大小，用來估計常駐記憶體"""
+    return int(faiss.serialize_index(index).nbytes)
+
+
+def with_overrides(spec, **overrides) -> IndexSpec:
+    """複製一份規格並覆寫部分參數"""
+    return replace(parse_index_spec(spec), **overrides)
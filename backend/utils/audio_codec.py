@@ -0,0 +1,65 @@
+# backend/utils/audio_codec.py
+"""
+回答音檔的壓縮編碼 (透過 ffmpeg，stdin -> stdout，不落地暫存檔)
+
+- flac: 無損，約原始 WAV 的 50~60%，保留給之後重新辨識 / 評估使用
+- opus: 有損語音編碼 (24 kbps)，約原始 WAV 的 5%，只需要回放時使用
+- wav:  不壓縮
+
+找不到 ffmpeg 或編碼失敗時退回 wav，歸檔永遠不會因為編碼器而遺失音檔。
+"""
+import logging
+import shutil
+import subprocess
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 編碼 -> (副檔名, ffmpeg 輸出參數)
+CODECS: Dict[str, Tuple[str, Optional[List[str]]]] = {
+    "flac": (".flac", ["-c:a", "flac", "-compression_level", "8", "-f", "flac"]),
+    "opus": (".opus", ["-c:a", "libopus", "-b:a", "24k", "-application", "voip", "-f", "ogg"]),
+    "wav": (".wav", None),
+}
+
+ENCODE_TIMEOUT = 30.0
+
+_ffmpeg_path: Optional[str] = None
+_ffmpeg_checked = False
+
+
+def ffmpeg_path() -> Optional[str]:
+    global _ffmpeg_path, _ffmpeg_checked
+    if not _ffmpeg_checked:
+        _ffmpeg_path = shutil.which("ffmpeg")
+        _ffmpeg_checked = True
+        if _ffmpeg_path is None:
+            logger.warning("[Codec] 找不到 ffmpeg，音檔將以 wav 保存")
+    return _ffmpeg_path
+
+
+def encode(wav: bytes, codec: str) -> Tuple[bytes, str, str]:
+    """
+    把 WAV 位元組編碼成指定格式
+
+    Returns:
+        (編碼後位元組, 副檔名, 實際使用的編碼)
+    """
+    if codec not in CODECS:
+        raise ValueError(f"未知的音檔編碼: {codec}，可用: {', '.join(CODECS)}")
+    suffix, args = CODECS[codec]
+    if args is None:
+        return wav, suffix, codec
+    ffmpeg = ffmpeg_path()
+    if ffmpeg is None:
+        return wav, CODECS["wav"][0], "wav"
+    try:
+        result = subprocess.run(
+            [ffmpeg, "-hide_banner", "-loglevel", "error", "-f", "wav", "-i", "pipe:0", *args, "pipe:1"],
+            input=wav, capture_output=True, timeout=ENCODE_TIMEOUT, check=True,
+        )
+        return result.stdout, suffix, codec
+    except (subprocess.SubprocessError, OSError) as e:
+        stderr = getattr(e, "stderr", b"") or b""
+        logger.warning(f"[Codec] {codec} 編碼失敗，改存 wav: {e} {stderr.decode(errors='ignore')[:200]}")
+        return wav, CODECS["wav"][0], "wav"
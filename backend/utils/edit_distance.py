@@ -0,0 +1,167 @@
+# backend/utils/edit_distance.py
+"""
+編輯距離 (CER / WER 與替換 / 刪除 / 插入統計)
+
+STTMetrics 與評估腳本 (evaluate_magicdata.py / evaluate_local.py) 原本各自用純 Python 雙迴圈，
+後者每筆樣本還配置完整的 (n+1)×(m+1) 表格再回溯，MagicData-RAMC 評估大部分時間都花在這裡。
+
+- distance()：Myers / Hyyrö bit-parallel，以 Python 大整數當位元向量，一個 hyp 字元只需十幾次整數運算，
+  時間 O(⌈m/w⌉·n)，不需要 DP 表格
+- edit_ops()：先以 distance() 取得距離 k，只計算最佳路徑可能經過的斜帶 (寬約 k + 1)，
+  滾動兩列 (O(min(n, m)) 記憶體)；與原本回溯得到的 S / D / I 完全相同 (同一組平手規則)
+- batch_edit_ops() / batch_distance()：一次評分大量 (ref, hyp)，可選擇用多個行程平行計算
+
+ref / hyp 可以是字串 (逐字) 或 token 串列 (例如 tokenize() 的結果)。
+"""
+from concurrent.futures import ProcessPoolExecutor
+from typing import Hashable, Iterable, List, NamedTuple, Sequence, Tuple
+
+Tokens = Sequence[Hashable]
+
+_INF = float("inf")
+
+
+class EditOps(NamedTuple):
+    substitutions: int
+    deletions: int
+    insertions: int
+
+    @property
+    def errors(self) -> int:
+        return self.substitutions + self.deletions + self.insertions
+
+
+def distance(ref: Tokens, hyp: Tokens) -> int:
+    """Levenshtein 距離 (Myers bit-parallel)"""
+    if len(ref) < len(hyp):
+        ref, hyp = hyp, ref
+    m = len(hyp)
+    if m == 0:
+        return len(ref)
+
+    # 以較短的 hyp 為 pattern：peq[c] 的第 i 位元表示 hyp[i] == c
+    peq = {}
+    for i, token in enumerate(hyp):
+        peq[token] = peq.get(token, 0) | (1 << i)
+
+    mask = (1 << m) - 1
+    high = 1 << (m - 1)
+    pv, mv, score = mask, 0, m
+    for token in ref:
+        eq = peq.get(token, 0)
+        xv = eq | mv
+        xh = (((eq & pv) + pv) ^ pv) | eq
+        ph = mv | (~(xh | pv) & mask)
+        mh = pv & xh
+        if ph & high:
+            score += 1
+        elif mh & high:
+            score -= 1
+        # 全域距離：第 0 列為 0, 1, 2, ...，左移時補 1
+        ph = ((ph << 1) | 1) & mask
+        mh = (mh << 1) & mask
+        pv = mh | (~(xv | ph) & mask)
+        mv = ph & xv
+    return score
+
+
+def edit_ops(ref: Tokens, hyp: Tokens) -> EditOps:
+    """
+    替換 / 刪除 / 插入次數
+
+    與原本「完整 DP 表 + 從 (n, m) 回溯」相同的平手規則：相同 > 替換 > 刪除 > 插入
+    """
+    # 共同後綴：回溯時一定先走對角線，直接略過
+    n, m = len(ref), len(hyp)
+    while n and m and ref[n - 1] == hyp[m - 1]:
+        n -= 1
+        m -= 1
+    if n == 0 or m == 0:
+        return EditOps(0, n, m)
+    ref, hyp = ref[:n], hyp[:m]
+
+    k = distance(ref, hyp)
+    if m <= n:
+        insertions = _band_insertions(ref, hyp, k, transposed=False)
+    else:
+        insertions = _band_insertions(hyp, ref, k, transposed=True)
+    deletions = insertions + n - m
+    return EditOps(k - deletions - insertions, deletions, insertions)
+
+
+def _band_insertions(outer: Tokens, inner: Tokens, k: int, transposed: bool) -> int:
+    """
+    滾動陣列 DP，每格記錄 (成本, 最佳路徑上的插入數)
+
+    outer 為較長的序列，陣列長度為 len(inner) + 1。transposed=False 時 outer 是 ref (上一列 = 刪除)，
+    True 時 outer 是 hyp (上一列 = 插入)。
+
+    經過格子 (x, y) 的路徑成本至少 |x - y| + |gap - (x - y)| (gap = 長度差)，
+    所以成本為 k 的路徑只會落在 x - y ∈ [-slack, gap + slack] 的斜帶內 (slack = (k - gap) // 2)；
+    平手時可能被選到的鄰格也都在某條最佳路徑上，結果與完整 DP 相同
+    """
+    size = len(inner) + 1
+    gap = len(outer) - len(inner)
+    slack = (k - gap) // 2
+    prev_cost = [y if y <= slack else _INF for y in range(size)]
+    prev_ins = list(range(size)) if not transposed else [0] * size
+    cur_cost = [_INF] * size
+    cur_ins = [0] * size
+
+    for x in range(1, len(outer) + 1):
+        token = outer[x - 1]
+        lo = max(1, x - gap - slack)
+        hi = min(size - 1, x + slack)
+        if lo == 1 and x <= gap + slack:
+            left_cost, left_ins = x, (x if transposed else 0)  # 邊界 (i, 0) / (0, j)
+        else:
+            left_cost, left_ins = _INF, 0
+        cur_cost[lo - 1], cur_ins[lo - 1] = left_cost, left_ins
+
+        for y in range(lo, hi + 1):
+            diag = prev_cost[y - 1]
+            if token == inner[y - 1]:
+                cost, ins = diag, prev_ins[y - 1]
+            else:
+                up = prev_cost[y]
+                best = min(diag, up, left_cost)
+                cost = best + 1
+                if diag == best:
+                    ins = prev_ins[y - 1]
+                elif not transposed:
+                    ins = prev_ins[y] if up == best else left_ins + 1
+                else:
+                    ins = left_ins if left_cost == best else prev_ins[y] + 1
+            cur_cost[y] = left_cost = cost
+            cur_ins[y] = left_ins = ins
+
+        prev_cost, cur_cost = cur_cost, prev_cost
+        prev_ins, cur_ins = cur_ins, prev_ins
+    return prev_ins[size - 1]
+
+
+def _edit_ops_pair(pair: Tuple[Tokens, Tokens]) -> EditOps:
+    return edit_ops(*pair)
+
+
+def _distance_pair(pair: Tuple[Tokens, Tokens]) -> int:
+    return distance(*pair)
+
+
+def _map(fn, pairs: Iterable[Tuple[Tokens, Tokens]], processes: int, chunksize: int) -> list:
+    if processes <= 1:
+        return [fn(pair) for pair in pairs]
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        return list(executor.map(fn, pairs, chunksize=chunksize))
+
+
+def batch_edit_ops(pairs: Iterable[Tuple[Tokens, Tokens]], processes: int = 0,
+                   chunksize: int = 256) -> List[EditOps]:
+    """一次計算多筆 (ref, hyp) 的 S / D / I；processes > 1 時分給多個行程"""
+    return _map(_edit_ops_pair, pairs, processes, chunksize)
+
+
+def batch_distance(pairs: Iterable[Tuple[Tokens, Tokens]], processes: int = 0,
+                   chunksize: int = 256) -> List[int]:
+    """一次計算多筆 (ref, hyp) 的編輯距離；processes > 1 時分給多個行程"""
+    return _map(_distance_pair, pairs, processes, chunksize)
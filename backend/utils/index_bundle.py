@@ -0,0 +1,205 @@
+# backend/utils/index_bundle.py
+"""
+知識庫索引快照 (Index Bundle)
+
+將「FAISS 索引 + 向量矩陣 + 精簡 metadata 表 + 知識庫檔案雜湊清單 (manifest)」
+一次寫入磁碟。下次啟動時只需計算 knowledge_base/ 內每個 JSON 的雜湊值，
+若與 manifest 完全一致，就以 memory-map 方式載入快照，不必重新呼叫
+SentenceTransformer 編碼；任何不一致都會回傳 None，由呼叫端完整重建。
+
+快照目錄結構：
+    <bundle_dir>/
+        index.faiss       # FAISS 索引
+        embeddings.npy    # 已正規化的原始向量 (float32 或 float16，可 mmap)
+        pca.npz           # PCA 投影矩陣 (只有設定 pca_dim 時才存在)
+        metadata.json     # {"rows": [...], "texts": [...], "sources": [...]}
+        manifest.json     # 版本、參數、每個知識庫檔案的 sha256
+"""
+import hashlib
+import json
+import os
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Union
+
+import numpy as np
+
+from backend.utils.ann_index import Projection
+from backend.utils.lazy import lazy_import
+
+faiss = lazy_import("faiss")
+
+BUNDLE_VERSION = 1
+
+INDEX_FILE = "index.faiss"
+EMBEDDINGS_FILE = "embeddings.npy"
+PROJECTION_FILE = "pca.npz"
+METADATA_FILE = "metadata.json"
+MANIFEST_FILE = "manifest.json"
+
+# 快照根目錄 (可用環境變數覆寫)；不可放在 knowledge_base/ 底下，否則會被 rglob("*.json") 掃到
+DEFAULT_INDEX_DIR = os.getenv("RAG_INDEX_DIR", "index_cache")
+
+
+@dataclass
+class IndexBundle:
+    """一份完整的索引快照 (建立後視為唯讀)"""
+    index: Any                        # faiss.Index
+    embeddings: np.ndarray            # (n, dim) float32 / float16，每列對應 metadata 的同一列
+    metadata: List[Dict[str, Any]]    # 每列的原始資料
+    texts: List[str]                  # 每列實際被編碼的文字
+    sources: List[str]                # 每列來自哪個知識庫檔案 (相對路徑)
+    manifest: Dict[str, Any] = field(default_factory=dict)
+    lexical: Any = None               # 由 texts 建立的詞彙索引 (CharNgramBM25)，不寫入磁碟
+    projection: Optional[Projection] = None  # 索引使用的 PCA 投影；查詢向量需先經過它
+
+    def __len__(self) -> int:
+        return len(self.metadata)
+
+
+def hash_knowledge_files(data_dir: Union[str, Path]) -> Dict[str, str]:
+    """
+    計算知識庫內每個 JSON 檔的 sha256
+
+    Returns:
+        dict: {相對路徑 (posix 格式): sha256}
+    """
+    root = Path(data_dir)
+    hashes: Dict[str, str] = {}
+    if not root.exists():
+        return hashes
+
+    for file in sorted(root.rglob("*.json")):
+        rel = file.relative_to(root).as_posix()
+        hashes[rel] = hashlib.sha256(file.read_bytes()).hexdigest()
+    return hashes
+
+
+def make_manifest(file_hashes: Dict[str, str], **params) -> Dict[str, Any]:
+    """
+    建立 manifest
+
+    Args:
+        file_hashes: hash_knowledge_files() 的結果
+        **params: 會影響向量內容的參數 (模型名稱、切分粒度等)，任一改變都會讓快照失效
+    """
+    return {
+        "version": BUNDLE_VERSION,
+        "params": params,
+        "files": dict(file_hashes),
+    }
+
+
+def _manifest_matches(stored: Dict[str, Any], expected: Dict[str, Any]) -> bool:
+    return (
+        stored.get("version") == expected.get("version")
+        and stored.get("params") == expected.get("params")
+        and stored.get("files") == expected.get("files")
+    )
+
+
+def save_bundle(bundle_dir: Union[str, Path], bundle: IndexBundle) -> None:
+    """
+    將快照寫入磁碟
+
+    每個檔案先寫成暫存檔再 os.replace()，manifest 最後寫入；
+    即使多個 worker 同時重建，讀取端也只會看到完整的檔案。
+    """
+    bundle_dir = Path(bundle_dir)
+    bundle_dir.mkdir(parents=True, exist_ok=True)
+    suffix = f".tmp-{os.getpid()}"
+
+    def _replace(name: str, writer):
+        tmp_path = bundle_dir / (name + suffix)
+        writer(str(tmp_path))
+        os.replace(tmp_path, bundle_dir / name)
+
+    def _write_json(payload):
+        def writer(path):
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(payload, f, ensure_ascii=False, separators=(",", ":"))
+        return writer
+
+    def _write_embeddings(path):
+        with open(path, "wb") as f:
+            np.save(f, np.ascontiguousarray(bundle.embeddings))
+
+    manifest = dict(bundle.manifest)
+    manifest["count"] = len(bundle)
+    manifest["dim"] = int(bundle.embeddings.shape[1]) if len(bundle) else 0
+    manifest["built_at"] = time.strftime("%Y-%m-%dT%H:%M:%S")
+
+    _replace(INDEX_FILE, lambda path: faiss.write_index(bundle.index, path))
+    _replace(EMBEDDINGS_FILE, _write_embeddings)
+    if bundle.projection is not None:
+        _replace(PROJECTION_FILE, bundle.projection.save)
+    elif (bundle_dir / PROJECTION_FILE).exists():
+        os.remove(bundle_dir / PROJECTION_FILE)
+    _replace(METADATA_FILE, _write_json({
+        "rows": bundle.metadata,
+        "texts": bundle.texts,
+        "sources": bundle.sources,
+    }))
+    _replace(MANIFEST_FILE, _write_json(manifest))
+    bundle.manifest = manifest
+
+
+def _read_index(path: str):
+    """優先以 mmap 讀取 FAISS 索引，不支援時退回一般讀取"""
+    flag = getattr(faiss, "IO_FLAG_MMAP_IFC", None) or getattr(faiss, "IO_FLAG_MMAP", 0)
+    if flag:
+        try:
+            return faiss.read_index(path, flag | faiss.IO_FLAG_READ_ONLY)
+        except Exception:
+            pass
+    return faiss.read_index(path)
+
+
+def load_bundle(bundle_dir: Union[str, Path], expected: Dict[str, Any]) -> Optional[IndexBundle]:
+    """
+    載入快照
+
+    Args:
+        bundle_dir: 快照目錄
+        expected: 由目前知識庫計算出的 manifest (make_manifest 的結果)
+
+    Returns:
+        IndexBundle 或 None (不存在、已過期或檔案損毀時)
+    """
+    bundle_dir = Path(bundle_dir)
+    manifest_path = bundle_dir / MANIFEST_FILE
+    if not manifest_path.exists():
+        return None
+
+    try:
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            stored = json.load(f)
+        if not _manifest_matches(stored, expected):
+            return None
+
+        with open(bundle_dir / METADATA_FILE, "r", encoding="utf-8") as f:
+            table = json.load(f)
+        embeddings = np.load(bundle_dir / EMBEDDINGS_FILE, mmap_mode="r")
+        index = _read_index(str(bundle_dir / INDEX_FILE))
+        projection_path = bundle_dir / PROJECTION_FILE
+        projection = Projection.load(projection_path) if projection_path.exists() else None
+
+        count = stored.get("count", -1)
+        if not (len(table["rows"]) == len(table["texts"]) == len(table["sources"]) == count
+                and embeddings.shape[0] == count and index.ntotal == count):
+            print(f"[Index] 快照內容不一致，忽略: {bundle_dir}")
+            return None
+
+        return IndexBundle(
+            index=index,
+            embeddings=embeddings,
+            metadata=table["rows"],
+            texts=table["texts"],
+            sources=table["sources"],
+            manifest=stored,
+            projection=projection,
+        )
+    except Exception as e:
+        print(f"[Index] 讀取快照失敗 ({bundle_dir}): {e}")
+        return None
@@ -0,0 +1,197 @@
+# backend/utils/jsonl_log.py
+"""
+背景寫入、自動輪替的 JSONL 記錄檔
+
+原本每筆 STT 辨識結果都在請求執行緒裡 open() + append 一行，磁碟慢時直接拖慢回應，檔案也無限制成長。
+RotatingJsonlWriter 把寫檔移到單一背景執行緒：
+
+- submit() 只把記錄放進有上限的佇列，絕不等待磁碟；佇列滿時丟棄並計數 (記錄檔不值得拖慢面試)
+- 背景執行緒累積到 batch_size 筆或每 flush_interval 秒寫一次
+- 目前檔案為 {prefix}_{YYYYMMDD}.jsonl；換日或超過 rotate_bytes 時壓縮成 {prefix}_{YYYYMMDD}.{n}.jsonl.gz
+- 壓縮檔總大小超過 max_total_bytes 時由舊到新刪除
+
+用法：
+    log = RotatingJsonlWriter("logs/stt_recognition", "stt_log")
+    log.submit({"text": "...", "confidence": 0.93})
+    log.close()  # 服務關閉時寫完剩下的記錄
+"""
+import glob
+import gzip
+import json
+import logging
+import os
+import queue
+import shutil
+import threading
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+_FLUSH = object()  # 佇列中的「立即寫出」標記；None 為停止
+
+
+class RotatingJsonlWriter:
+    def __init__(self, directory: str, prefix: str, rotate_bytes: int = 16 * 1024 * 1024,
+                 max_total_bytes: int = 256 * 1024 * 1024, max_pending: int = 1000,
+                 batch_size: int = 100, flush_interval: float = 2.0,
+                 clock: Callable[[], datetime] = datetime.now):
+        self.directory = directory
+        self.prefix = prefix
+        self.rotate_bytes = rotate_bytes
+        self.max_total_bytes = max_total_bytes
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._clock = clock
+        self._queue: "queue.Queue[Optional[dict]]" = queue.Queue(maxsize=max_pending)
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._flushed = threading.Condition(self._lock)
+        self._stats = {"submitted": 0, "written": 0, "dropped": 0, "failed": 0, "rotations": 0, "removed": 0}
+        # 以下只在背景執行緒中使用
+        self._file = None
+        self._day: Optional[str] = None
+
+    # ---------- 請求執行緒 ----------
+    def submit(self, record: Dict[str, Any]) -> bool:
+        """排入背景寫檔；佇列已滿時丟棄並回傳 False"""
+        self._ensure_thread()
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            with self._lock:
+                self._stats["dropped"] += 1
+            return False
+        with self._lock:
+            self._stats["submitted"] += 1
+        return True
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """要求立即寫出已排入的記錄並等待完成；逾時回傳 False"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._lock:
+            target = self._stats["submitted"]
+            thread = self._thread
+        if thread is None or not thread.is_alive():
+            return True
+        self._queue.put(_FLUSH)
+        with self._flushed:
+            while self._stats["written"] + self._stats["failed"] < target:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._flushed.wait(remaining)
+        return True
+
+    def close(self, timeout: float = 10.0):
+        """寫完剩下的記錄並停止背景執行緒 (服務關閉時呼叫)"""
+        with self._lock:
+            thread = self._thread
+        if thread is None or not thread.is_alive():
+            return
+        if not self.flush(timeout):
+            logger.warning(f"[JsonlLog] 關閉時仍有 {self._queue.qsize()} 筆記錄未寫入 ({self.prefix})")
+        self._queue.put(None)
+        thread.join(timeout)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+        stats["pending"] = self._queue.qsize()
+        return stats
+
+    def _ensure_thread(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name=f"jsonl-log-{self.prefix}", daemon=True)
+                self._thread.start()
+
+    # ---------- 背景執行緒 ----------
+    def _run(self):
+        batch: List[dict] = []
+        deadline = time.monotonic() + self.flush_interval
+        while True:
+            try:
+                item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                item = _FLUSH  # 到了 flush_interval
+            if item is not None and item is not _FLUSH:
+                batch.append(item)
+                if len(batch) < self.batch_size:
+                    continue
+            if batch:
+                self._write(batch)
+                batch = []
+            deadline = time.monotonic() + self.flush_interval
+            if item is None:
+                break
+        self._close_file()
+
+    def _write(self, batch: List[dict]):
+        try:
+            self._rotate_if_needed()
+            lines = "".join(json.dumps(r, ensure_ascii=False, default=str) + "\n" for r in batch)
+            self._file.write(lines)
+            self._file.flush()
+            ok, failed = len(batch), 0
+        except Exception as e:
+            logger.error(f"[JsonlLog] 寫入失敗 ({self.prefix}): {e}")
+            self._close_file()
+            ok, failed = 0, len(batch)
+        with self._flushed:
+            self._stats["written"] += ok
+            self._stats["failed"] += failed
+            self._flushed.notify_all()
+
+    def _current_path(self, day: str) -> str:
+        return os.path.join(self.directory, f"{self.prefix}_{day}.jsonl")
+
+    def _rotate_if_needed(self):
+        day = self._clock().strftime("%Y%m%d")
+        if self._file is not None and day == self._day and self._file.tell() < self.rotate_bytes:
+            return
+        self._close_file()
+        os.makedirs(self.directory, exist_ok=True)
+        # 換日、超過大小，或是上次未輪替就結束留下的舊檔 -> 壓縮
+        for path in sorted(glob.glob(os.path.join(self.directory, f"{self.prefix}_*.jsonl"))):
+            if path != self._current_path(day) or os.path.getsize(path) >= self.rotate_bytes:
+                self._compress(path)
+        self._enforce_quota()
+        self._day = day
+        self._file = open(self._current_path(day), "a", encoding="utf-8")
+
+    def _compress(self, path: str):
+        stem = path[:-len(".jsonl")]
+        seq = 1
+        while os.path.exists(f"{stem}.{seq}.jsonl.gz"):
+            seq += 1
+        target = f"{stem}.{seq}.jsonl.gz"
+        tmp = f"{target}.tmp"
+        with open(path, "rb") as src, gzip.open(tmp, "wb") as dst:
+            shutil.copyfileobj(src, dst)
+        os.replace(tmp, target)
+        os.remove(path)
+        with self._lock:
+            self._stats["rotations"] += 1
+
+    def _enforce_quota(self):
+        if self.max_total_bytes <= 0:
+            return
+        archives = sorted(glob.glob(os.path.join(self.directory, f"{self.prefix}_*.jsonl.gz")), key=os.path.getmtime)
+        total = sum(os.path.getsize(p) for p in archives)
+        for path in archives:
+            if total <= self.max_total_bytes:
+                break
+            total -= os.path.getsize(path)
+            os.remove(path)
+            with self._lock:
+                self._stats["removed"] += 1
+
+    def _close_file(self):
+        if self._file is not None:
+            try:
+                self._file.close()
+            except Exception:
+                pass
+            self._file = None
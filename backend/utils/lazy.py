@@ -0,0 +1,133 @@
+# backend/utils/lazy.py
+"""
+延遲初始化工具
+
+- lazy_import(): 延遲匯入重量級套件 (torch / faiss / azure / google.genai)，
+  模組物件立即可用，第一次存取屬性時才真正執行匯入
+- LazyService: 服務單例的代理物件，第一次使用 (或背景暖機) 時才建立實例；
+  呼叫端照舊寫 rag_service.retrieve(...)，不需要知道背後是延遲建立的
+- warm_in_background(): 在背景執行緒依序初始化服務，讓 API 可以先開始接受請求
+"""
+import importlib.util
+import sys
+import threading
+import time
+from typing import Any, Callable, Optional
+
+
+def lazy_import(name: str, optional: bool = False):
+    """
+    延遲匯入模組
+
+    Args:
+        name: 模組名稱，例如 "azure.cognitiveservices.speech"
+        optional: 套件未安裝時回傳 None 而不是拋出 ImportError
+
+    Returns:
+        module 或 None
+    """
+    if name in sys.modules:
+        return sys.modules[name]
+    try:
+        spec = importlib.util.find_spec(name)
+    except ModuleNotFoundError:
+        spec = None
+    if spec is None or spec.loader is None:
+        if optional:
+            return None
+        raise ImportError(f"No module named '{name}'")
+
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
+
+
+class LazyService:
+    """
+    服務單例的延遲代理
+
+    第一次存取任何屬性時呼叫 factory() 建立實例 (執行緒安全，只會建立一次)，
+    之後的屬性存取都轉給該實例。
+    """
+
+    def __init__(self, factory: Callable[[], Any], name: Optional[str] = None):
+        self._factory = factory
+        self._name = name or getattr(factory, "__name__", "service")
+        self._instance = None
+        self._lock = threading.Lock()
+        self.init_seconds: Optional[float] = None
+        self.error: Optional[str] = None
+
+    @property
+    def name(self) -> str:
+        return self._name
+
+    @property
+    def ready(self) -> bool:
+        """實例是否已建立"""
+        return self._instance is not None
+
+    def get(self):
+        """取得實例 (必要時建立)"""
+        instance = self._instance
+        if instance is not None:
+            return instance
+        with self._lock:
+            if self._instance is None:
+                start = time.time()
+                try:
+                    self._instance = self._factory()
+                except Exception as e:
+                    self.error = str(e)
+                    raise
+                self.error = None
+                self.init_seconds = round(time.time() - start, 3)
+                print(f"[Lazy] {self._name} 初始化完成 ({self.init_seconds} 秒)")
+            return self._instance
+
+    def __getattr__(self, item):
+        # 只有在代理物件本身沒有該屬性時才會進到這裡
+        if item.startswith("__"):
+            raise AttributeError(item)
+        return getattr(self.get(), item)
+
+    def __repr__(self) -> str:
+        state = "ready" if self.ready else "pending"
+        return f"<LazyService {self._name} ({state})>"
+
+
+def warm_in_background(*services: LazyService, on_ready: Callable[[LazyService], None] = None,
+                       on_complete: Callable[[], Any] = None) -> threading.Thread:
+    """
+    在背景執行緒依序初始化服務
+
+    Args:
+        services: 要暖機的 LazyService
+        on_ready: 每個服務初始化成功後呼叫 (例如啟動知識庫監看)
+        on_complete: 全部服務處理完後呼叫 (例如執行暖機請求)
+
+    Returns:
+        已啟動的執行緒
+    """
+    def _run():
+        start = time.time()
+        for service in services:
+            try:
+                service.get()
+                if on_ready is not None:
+                    on_ready(service)
+            except Exception as e:
+                print(f"[Lazy] {service.name} 背景初始化失敗: {e}")
+        print(f"[Lazy] 背景初始化完成 ({time.time() - start:.2f} 秒)")
+        if on_complete is not None:
+            try:
+                on_complete()
+            except Exception as e:
+                print(f"[Lazy] 背景暖機失敗: {e}")
+
+    thread = threading.Thread(target=_run, name="service-warmup", daemon=True)
+    thread.start()
+    return thread
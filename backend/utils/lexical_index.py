@@ -0,0 +1,143 @@
+# backend/utils/lexical_index.py
+"""
+中文字元 n-gram 倒排索引 + BM25 評分
+
+稠密向量 (MiniLM) 對「Redis」「Kubernetes」「SQL語言」這類專有名詞的精確比對較弱，
+而且每次查詢都要跑一次模型。這裡提供純 Python 的詞彙索引：
+- 中日韓文字以字元 bigram / trigram 切分 (不需斷詞)
+- 英數字以整個單字為 token (轉小寫)
+- BM25 評分，查詢時只走過查詢詞的 posting list
+
+另提供 reciprocal_rank_fusion() 將多個排名結果 (例如 BM25 與 FAISS) 融合。
+"""
+import heapq
+import math
+import re
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+# 連續的中日韓文字 / 連續的英數字
+_TOKEN_RE = re.compile(r"[㐀-䶿一-鿿豈-﫿]+|[a-z0-9][a-z0-9+#.\-]*", re.IGNORECASE)
+
+
+def tokenize(text: str, ngram_range: Tuple[int, int] = (2, 3)) -> List[str]:
+    """
+    將文字切成檢索用的 token
+
+    Args:
+        text: 原始文字
+        ngram_range: 中文字元 n-gram 的 (最小, 最大) 長度
+
+    Returns:
+        list: token 清單 (可重複，供計算詞頻)
+    """
+    tokens: List[str] = []
+    if not text:
+        return tokens
+
+    low, high = ngram_range
+    for match in _TOKEN_RE.finditer(text.lower()):
+        run = match.group(0)
+        if run[0].isascii():
+            tokens.append(run.rstrip(".-"))
+            continue
+        # 長度不足最小 n 的中文片段 (例如單字) 直接整段當 token
+        if len(run) < low:
+            tokens.append(run)
+            continue
+        for n in range(low, high + 1):
+            for i in range(len(run) - n + 1):
+                tokens.append(run[i:i + n])
+    return tokens
+
+
+class CharNgramBM25:
+    """以字元 n-gram 為詞彙單位的 BM25 倒排索引"""
+
+    def __init__(self, texts: Sequence[str], ngram_range: Tuple[int, int] = (2, 3),
+                 k1: float = 1.5, b: float = 0.75):
+        """
+        Args:
+            texts: 要索引的文件，文件編號即為其在 texts 中的位置
+            ngram_range: 中文字元 n-gram 範圍
+            k1, b: BM25 參數
+        """
+        self.ngram_range = ngram_range
+        self.k1 = k1
+        self.b = b
+        self.postings: Dict[str, List[Tuple[int, int]]] = {}
+        self.doc_lengths: List[int] = []
+
+        for doc_id, text in enumerate(texts):
+            counts = Counter(tokenize(text, ngram_range))
+            self.doc_lengths.append(sum(counts.values()))
+            for term, tf in counts.items():
+                self.postings.setdefault(term, []).append((doc_id, tf))
+
+        self.num_docs = len(self.doc_lengths)
+        self.avg_doc_length = (sum(self.doc_lengths) / self.num_docs) if self.num_docs else 0.0
+        self.idf: Dict[str, float] = {
+            term: math.log(1 + (self.num_docs - len(plist) + 0.5) / (len(plist) + 0.5))
+            for term, plist in self.postings.items()
+        }
+        # 預先計算每份文件的長度正規化項，查詢時只剩加法與乘法
+        self._norms = [
+            self.k1 * (1 - self.b + self.b * (length / self.avg_doc_length if self.avg_doc_length else 0))
+            for length in self.doc_lengths
+        ]
+
+    def __len__(self) -> int:
+        return self.num_docs
+
+    def score(self, query: str) -> Dict[int, float]:
+        """回傳 {文件編號: BM25 分數}，只包含至少命中一個查詢詞的文件"""
+        scores: Dict[int, float] = {}
+        for term, qtf in Counter(tokenize(query, self.ngram_range)).items():
+            plist = self.postings.get(term)
+            if not plist:
+                continue
+            idf = self.idf[term]
+            for doc_id, tf in plist:
+                gain = idf * tf * (self.k1 + 1) / (tf + self._norms[doc_id])
+                scores[doc_id] = scores.get(doc_id, 0.0) + gain * qtf
+        return scores
+
+    def search(self, query: str, top_k: int = 10,
+               candidates: Optional[Iterable[int]] = None) -> List[Tuple[int, float]]:
+        """
+        BM25 檢索
+
+        Args:
+            query: 查詢文字
+            top_k: 回傳筆數
+            candidates: 若提供，只在這些文件編號中排名
+
+        Returns:
+            list: [(文件編號, 分數)]，依分數由高到低
+        """
+        scores = self.score(query)
+        if candidates is not None:
+            allowed = set(candidates)
+            scores = {doc_id: s for doc_id, s in scores.items() if doc_id in allowed}
+        return heapq.nlargest(top_k, scores.items(), key=lambda kv: kv[1])
+
+
+def reciprocal_rank_fusion(rankings: Sequence[Sequence[int]], k: int = 60,
+                           weights: Optional[Sequence[float]] = None) -> List[Tuple[int, float]]:
+    """
+    Reciprocal Rank Fusion：score(d) = Σ w_i / (k + rank_i(d))
+
+    Args:
+        rankings: 多個依相關度排序的文件編號清單
+        k: 平滑常數 (常用 60)
+        weights: 每個排名的權重，預設皆為 1
+
+    Returns:
+        list: [(文件編號, 融合分數)]，依分數由高到低
+    """
+    weights = weights or [1.0] * len(rankings)
+    fused: Dict[int, float] = {}
+    for ranking, weight in zip(rankings, weights):
+        for rank, doc_id in enumerate(ranking, start=1):
+            fused[doc_id] = fused.get(doc_id, 0.0) + weight / (k + rank)
+    return sorted(fused.items(), key=lambda kv: kv[1], reverse=True)
@@ -0,0 +1,279 @@
+# backend/utils/metrics.py
+"""
+執行緒安全的指標 (Counter / Gauge / Histogram)，以 Prometheus 文字格式輸出 (GET /metrics)
+
+原本各階段耗時只印在 log ("⏱️ [計時] ...")，無法彙整成 p95 或跨 worker 比較。
+這裡提供不需額外套件的最小實作：
+
+- 每個指標各自一把鎖，observe / inc 只做 bisect 與加法，熱路徑上的成本可以忽略
+- Histogram 使用固定的延遲 bucket (秒)，可直接用 histogram_quantile() 算 p50 / p95
+- register_collector()：已經自己維護統計的元件 (階段執行緒池、TTS 快取、語音引擎池…)
+  在輸出時才讀一次 stats()，不必在每次呼叫時重複計數
+
+用法：
+    with stage_timer("ocr"):
+        result = client.analyze(...)
+    REQUEST_SECONDS.observe(elapsed, endpoint="process_answer")
+"""
+import bisect
+import math
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, Iterator, List, Sequence, Tuple
+
+# 涵蓋 DB 查詢 (毫秒級) 到回饋報告 (分鐘級)
+DEFAULT_BUCKETS: Tuple[float, ...] = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+# (名稱, 型別, 說明, [(labels, 值), ...])
+MetricFamily = Tuple[str, str, str, List[Tuple[Dict[str, str], float]]]
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if value == -math.inf:
+        return "-Inf"
+    if math.isnan(value):
+        return "NaN"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(str(v))}"' for k, v in labels.items()) + "}"
+
+
+class _Metric:
+    type = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values: Dict[tuple, object] = {}
+
+    def _key(self, labels: Dict[str, object]) -> tuple:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} 需要標籤 {self.labelnames}，收到 {tuple(labels)}")
+        return tuple(str(labels[n]) for n in self.labelnames)
+
+    def _labels(self, key: tuple) -> Dict[str, str]:
+        return dict(zip(self.labelnames, key))
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type}"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            lines.extend(self._render_value(self._labels(key), value))
+        return lines
+
+    def _render_value(self, labels: Dict[str, str], value) -> List[str]:
+        return [f"{self.name}{_format_labels(labels)} {_format_value(value)}"]
+
+
+class Counter(_Metric):
+    type = "counter"
+
+    def inc(self, amount: float = 1.0, **labels):
+        if amount < 0:
+            raise ValueError("Counter 只能增加")
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0.0)
+
+
+class Gauge(_Metric):
+    type = "gauge"
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = float(value)
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels):
+        self.inc(-amount, **labels)
+
+    def value(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0.0)
+
+
+class _HistogramValue:
+    __slots__ = ("counts", "sum", "count")
+
+    def __init__(self, size: int):
+        self.counts = [0] * size  # 非累積，輸出時才累加
+        self.sum = 0.0
+        self.count = 0
+
+
+class Histogram(_Metric):
+    type = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)  # le 為「小於等於」
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = _HistogramValue(len(self.buckets) + 1)
+            entry.counts[index] += 1
+            entry.sum += value
+            entry.count += 1
+
+    @contextmanager
+    def time(self, **labels) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def snapshot(self, **labels) -> Dict[str, object]:
+        """{"buckets": {le: 累積次數}, "sum", "count"}"""
+        with self._lock:
+            entry = self._values.get(self._key(labels))
+            counts = list(entry.counts) if entry else [0] * (len(self.buckets) + 1)
+            total, count = (entry.sum, entry.count) if entry else (0.0, 0)
+        cumulative, running = {}, 0
+        for le, n in zip(self.buckets + (math.inf,), counts):
+            running += n
+            cumulative[le] = running
+        return {"buckets": cumulative, "sum": total, "count": count}
+
+    def _render_value(self, labels: Dict[str, str], entry: _HistogramValue) -> List[str]:
+        lines, running = [], 0
+        for le, n in zip(self.buckets + (math.inf,), entry.counts):
+            running += n
+            lines.append(f"{self.name}_bucket{_format_labels({**labels, 'le': _format_value(le)})} {running}")
+        lines.append(f"{self.name}_sum{_format_labels(labels)} {_format_value(entry.sum)}")
+        lines.append(f"{self.name}_count{_format_labels(labels)} {entry.count}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._collectors: List[Callable[[], Iterable[MetricFamily]]] = []
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, cls, name: str, documentation: str, labelnames: Sequence[str], **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, documentation, labelnames, **kwargs)
+            elif type(metric) is not cls or metric.labelnames != tuple(labelnames):
+                raise ValueError(f"指標 {name} 已以不同的型別或標籤註冊")
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._get_or_create(Counter, name, documentation, labelnames)
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._get_or_create(Gauge, name, documentation, labelnames)
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._get_or_create(Histogram, name, documentation, labelnames, buckets=buckets)
+
+    def register_collector(self, collector: Callable[[], Iterable[MetricFamily]]):
+        """collector() 在每次輸出時呼叫，回傳 [(名稱, 型別, 說明, [(labels, 值), ...]), ...]"""
+        with self._lock:
+            self._collectors.append(collector)
+
+    def render(self) -> str:
+        """Prometheus text exposition format (0.0.4)"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+            collectors = list(self._collectors)
+        lines: List[str] = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        for collector in collectors:
+            try:
+                families = list(collector())
+            except Exception as e:
+                lines.append(f"# collector {getattr(collector, '__name__', collector)} 失敗: {_escape(str(e))}")
+                continue
+            for name, kind, documentation, samples in families:
+                lines.append(f"# HELP {name} {documentation}")
+                lines.append(f"# TYPE {name} {kind}")
+                for labels, value in samples:
+                    if value is None:
+                        continue
+                    lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+# 建立全局實例
+registry = MetricsRegistry()
+
+# --- 各處理階段 ---
+# 階段執行緒池 (stt / llm / rag / tts / db / feedback / io / speculation) 的每個工作自動記錄；
+# 不在執行緒池裡的 (ocr / gemini / structure / stt_finalize) 以 stage_timer() 記錄
+STAGE_SECONDS = registry.histogram("interview_stage_seconds", "各處理階段執行耗時 (秒)", ["stage"])
+STAGE_QUEUE_SECONDS = registry.histogram("interview_stage_queue_seconds", "在階段執行緒池排隊的時間 (秒)", ["stage"])
+STAGE_ERRORS = registry.counter("interview_stage_errors_total", "各處理階段丟出例外的次數", ["stage"])
+
+# --- 端點 ---
+REQUEST_SECONDS = registry.histogram("interview_request_seconds", "端點從收到請求到完成的耗時 (秒)", ["endpoint"])
+TIME_TO_FIRST_AUDIO = registry.histogram(
+    "interview_time_to_first_audio_seconds", "串流端點從收到請求到第一段語音就緒的耗時 (秒)", ["endpoint"]
+)
+
+
+@contextmanager
+def stage_timer(stage: str) -> Iterator[None]:
+    """記錄一個不在階段執行緒池中執行的處理階段"""
+    start = time.perf_counter()
+    try:
+        yield
+    except BaseException:
+        STAGE_ERRORS.inc(stage=stage)
+        raise
+    finally:
+        STAGE_SECONDS.observe(time.perf_counter() - start, stage=stage)
+
+
+def register_stats(prefix: str, documentation: str, stats: Callable[[], Dict],
+                   counters: Sequence[str] = (), gauges: Sequence[str] = ()):
+    """
+    把元件既有的 stats() 字典接到 /metrics：counters 輸出為 <prefix>_<key>_total，gauges 輸出為 <prefix>_<key>
+    stats() 回傳 None 時 (例如服務尚未初始化) 不輸出
+    """
+    def collect():
+        values = stats()
+        if values is None:
+            return []
+        families = [(f"{prefix}_{key}_total", "counter", f"{documentation} {key}", [({}, values.get(key))])
+                    for key in counters]
+        families += [(f"{prefix}_{key}", "gauge", f"{documentation} {key}", [({}, values.get(key))])
+                     for key in gauges]
+        return families
+
+    collect.__name__ = f"{prefix}_collector"
+    registry.register_collector(collect)
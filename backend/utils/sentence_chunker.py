@@ -0,0 +1,74 @@
+# backend/utils/sentence_chunker.py
+"""
+串流斷句：把 LLM 逐 token 輸出的文字切成完整句子，讓 TTS 可以一句一句先合成
+
+- 遇到 。？！?! 或換行即切出一句 (句尾的 」』” 等收尾符號一併帶走)
+- 句子過長仍沒有句號時，在最後一個 ，；、 處先切，避免第一段語音等太久
+"""
+from typing import List
+
+SENTENCE_ENDINGS = "。？！?!\n"
+CLOSING_MARKS = "」』”’）)"
+SOFT_BREAKS = "，；、,;"
+
+
+class SentenceChunker:
+    """
+    用法：
+        chunker = SentenceChunker()
+        for token in stream:
+            for sentence in chunker.feed(token):
+                ...
+        for sentence in chunker.flush():
+            ...
+    """
+
+    def __init__(self, max_chars: int = 60):
+        self.max_chars = max_chars
+        self._buffer = ""
+
+    def feed(self, text: str) -> List[str]:
+        """加入新的文字，回傳已完整的句子 (可能為空)"""
+        self._buffer += text
+        sentences = []
+        start = 0
+        i = 0
+        while i < len(self._buffer):
+            if self._buffer[i] in SENTENCE_ENDINGS:
+                end = i + 1
+                while end < len(self._buffer) and self._buffer[end] in CLOSING_MARKS:
+                    end += 1
+                if end == len(self._buffer) and self._buffer[i] != "\n":
+                    # 收尾符號可能在下一個 token 才出現，句尾標點後面還沒有字就先不切
+                    break
+                self._append(sentences, self._buffer[start:end])
+                start = i = end
+                continue
+            i += 1
+        self._buffer = self._buffer[start:]
+
+        if len(self._buffer) > self.max_chars:
+            cut = max(self._buffer.rfind(mark) for mark in SOFT_BREAKS)
+            if cut > 0:
+                self._append(sentences, self._buffer[:cut + 1])
+                self._buffer = self._buffer[cut + 1:]
+        return sentences
+
+    def flush(self) -> List[str]:
+        """串流結束時取出剩下的文字"""
+        sentences = []
+        self._append(sentences, self._buffer)
+        self._buffer = ""
+        return sentences
+
+    @staticmethod
+    def _append(sentences: List[str], text: str):
+        text = text.strip()
+        if text:
+            sentences.append(text)
+
+
+def split_sentences(text: str, max_chars: int = 60) -> List[str]:
+    """一次切完整段文字"""
+    chunker = SentenceChunker(max_chars)
+    return chunker.feed(text) + chunker.flush()
@@ -0,0 +1,157 @@
+# backend/utils/stage_pools.py
+"""
+各處理階段專用的有界執行緒池
+
+面試端點是 async def，但 STT (done_event.wait())、Ollama、向量編碼、TTS 與 SQLAlchemy 都是同步阻塞呼叫；
+直接在事件迴圈裡呼叫會讓同一個 worker 上的其他頭戴裝置全部卡住。
+這裡為每個階段建立獨立、大小可設定的執行緒池：
+
+- 阻塞工作移出事件迴圈，其他請求照常處理
+- 每個階段各自限流 (例如 LLM 只開 2 條，避免 Ollama 被塞爆)，
+  某一階段塞車也不會占滿其他階段的執行緒
+- 每個工作的排隊時間、執行時間與失敗次數記錄在 backend/utils/metrics.py (GET /metrics)
+
+用法：
+    user_answer = await run_in_stage("stt", speech_service.speech_to_text, audio_path)
+"""
+import asyncio
+import functools
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+from backend.utils.metrics import STAGE_ERRORS, STAGE_QUEUE_SECONDS, STAGE_SECONDS, registry
+
+# 階段 -> 預設執行緒數 (實際大小以 settings.STAGE_POOL_* 為準)
+DEFAULT_POOL_SIZES: Dict[str, int] = {
+    "stt": 4,
+    "llm": 2,
+    "feedback": 1,
+    "rag": 2,
+    "tts": 4,
+    "db": 8,
+    "speculation": 1,
+}
+
+
+class StagePools:
+    """一組依階段命名的 ThreadPoolExecutor"""
+
+    def __init__(self, sizes: Optional[Dict[str, int]] = None):
+        self.sizes = dict(DEFAULT_POOL_SIZES)
+        if sizes:
+            self.sizes.update({k: v for k, v in sizes.items() if v})
+        self._executors: Dict[str, ThreadPoolExecutor] = {}
+        self._active: Dict[str, int] = {stage: 0 for stage in self.sizes}
+        self._pending: Dict[str, int] = {stage: 0 for stage in self.sizes}
+        self._lock = threading.Lock()
+
+    def executor(self, stage: str) -> ThreadPoolExecutor:
+        """取得 (必要時建立) 指定階段的執行緒池"""
+        if stage not in self.sizes:
+            raise ValueError(f"未知的處理階段: {stage}，可用: {', '.join(self.sizes)}")
+        with self._lock:
+            pool = self._executors.get(stage)
+            if pool is None:
+                pool = ThreadPoolExecutor(max_workers=self.sizes[stage], thread_name_prefix=f"stage-{stage}")
+                self._executors[stage] = pool
+            return pool
+
+    def _tracked(self, stage: str, queued_at: float, fn: Callable, *args, **kwargs):
+        with self._lock:
+            self._pending[stage] -= 1
+            self._active[stage] += 1
+        start = time.perf_counter()
+        STAGE_QUEUE_SECONDS.observe(start - queued_at, stage=stage)
+        try:
+            return fn(*args, **kwargs)
+        except BaseException:
+            STAGE_ERRORS.inc(stage=stage)
+            raise
+        finally:
+            STAGE_SECONDS.observe(time.perf_counter() - start, stage=stage)
+            with self._lock:
+                self._active[stage] -= 1
+
+    async def run(self, stage: str, fn: Callable, *args, **kwargs) -> Any:
+        """在指定階段的執行緒池中執行 fn，並 await 其結果"""
+        pool = self.executor(stage)
+        with self._lock:
+            self._pending[stage] += 1
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            pool, functools.partial(self._tracked, stage, time.perf_counter(), fn, *args, **kwargs)
+        )
+
+    def submit_if_idle(self, stage: str, fn: Callable, *args, **kwargs) -> Optional[Future]:
+        """
+        指定階段有空閒的執行緒時才送出 fn (背景執行緒中的次要工作用)，否則回傳 None；
+        佔用的是同一池的執行緒，不會讓該階段的總並行數超過池的大小，也不會排在正式請求前面
+        """
+        pool = self.executor(stage)
+        with self._lock:
+            if self._active[stage] + self._pending[stage] >= self.sizes[stage]:
+                return None
+            self._pending[stage] += 1
+        return pool.submit(self._tracked, stage, time.perf_counter(), fn, *args, **kwargs)
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """各階段的執行緒數 / 執行中 / 排隊中的工作數"""
+        with self._lock:
+            return {
+                stage: {"workers": size, "active": self._active[stage], "queued": self._pending[stage]}
+                for stage, size in self.sizes.items()
+            }
+
+    def shutdown(self, wait: bool = False):
+        with self._lock:
+            executors, self._executors = self._executors, {}
+        for pool in executors.values():
+            pool.shutdown(wait=wait, cancel_futures=True)
+
+
+def _sizes_from_settings() -> Dict[str, int]:
+    from backend.config import settings
+    return {stage: getattr(settings, f"STAGE_POOL_{stage.upper()}", size)
+            for stage, size in DEFAULT_POOL_SIZES.items()}
+
+
+_pools: Optional[StagePools] = None
+_pools_lock = threading.Lock()
+
+
+def get_stage_pools() -> StagePools:
+    """全局 StagePools (第一次使用時依設定建立)"""
+    global _pools
+    if _pools is None:
+        with _pools_lock:
+            if _pools is None:
+                _pools = StagePools(_sizes_from_settings())
+    return _pools
+
+
+async def run_in_stage(stage: str, fn: Callable, *args, **kwargs) -> Any:
+    """在全局的階段執行緒池中執行阻塞呼叫"""
+    return await get_stage_pools().run(stage, fn, *args, **kwargs)
+
+
+def _collect_metrics():
+    if _pools is None:
+        return []
+    stats = _pools.stats()
+    return [
+        (f"interview_stage_pool_{field}", "gauge", doc, [({"stage": stage}, s[field]) for stage, s in stats.items()])
+        for field, doc in (("workers", "階段執行緒池大小"), ("active", "執行中的工作數"), ("queued", "排隊中的工作數"))
+    ]
+
+
+registry.register_collector(_collect_metrics)
+
+
+def shutdown_stage_pools():
+    global _pools
+    with _pools_lock:
+        if _pools is not None:
+            _pools.shutdown()
+            _pools = None
@@ -0,0 +1,250 @@
+# backend/utils/tts_cache.py
+"""
+以內容定址的 TTS 音檔快取
+
+- 快取鍵 = sha256(語音名稱, 輸出格式, 文字)，同一句話 (固定的備用題、重問的題目、預錄短句) 只合成一次
+- 檔案存在磁碟上，依總大小做 LRU 淘汰；索引 (index.json) 記錄每個檔案的大小與最後使用時間，重啟後沿用。
+  多個 worker 行程共用同一個目錄：寫入索引時持有檔案鎖，先併入其他行程寫入的項目再原子替換
+- single-flight：同一個鍵同時有多個請求時，只有第一個真的呼叫 Azure，其餘等待同一份結果；
+  等待超過 wait_timeout 秒時改為自行合成，不會因為第一個請求卡住而無限期等待
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows：沒有 flock，只依賴 os.replace 的原子性 (同時寫入時可能漏掉另一行程的項目)
+    fcntl = None
+
+INDEX_FILE = "index.json"
+LOCK_FILE = "index.lock"
+
+
+def cache_key(text: str, voice: str, output_format: str) -> str:
+    payload = "\x00".join([voice or "", output_format or "", text])
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:32]
+
+
+@contextmanager
+def _file_lock(path: str):
+    """跨行程的互斥鎖 (flock)"""
+    if fcntl is None:
+        yield
+        return
+    with open(path, "a") as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+class TTSCache:
+    """
+    用法：
+        cache = TTSCache("static/audio/cache", max_bytes=512 * 1024 * 1024)
+        path = cache.get_or_synthesize(text, voice, fmt, lambda out: synthesize(text, out))
+        audio_url = cache.url_for(path)
+    """
+
+    def __init__(self, directory: str, max_bytes: int, url_prefix: str = "/audio/cache", suffix: str = ".mp3",
+                 wait_timeout: Optional[float] = None):
+        """
+        Args:
+            wait_timeout: 等待其他請求合成同一句話的上限 (秒)，逾時後自行合成；None 表示一直等待
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.wait_timeout = wait_timeout
+        self.url_prefix = url_prefix.rstrip("/")
+        self.suffix = suffix
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()  # 最久未使用的在前面
+        self._inflight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self._total_bytes = 0
+        self._stats = {"hits": 0, "misses": 0, "coalesced": 0, "wait_timeouts": 0, "errors": 0, "evictions": 0,
+                       "bytes_saved": 0}
+        os.makedirs(directory, exist_ok=True)
+        self._merge_entries(self._read_index())
+
+    # --- 索引 ---
+
+    def _read_index(self) -> Dict[str, Dict[str, Any]]:
+        path = os.path.join(self.directory, INDEX_FILE)
+        if not os.path.exists(path):
+            return {}
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"[TTSCache] 索引讀取失敗，重新建立: {e}")
+            return {}
+
+    def _merge_entries(self, entries: Dict[str, Dict[str, Any]]):
+        """
+        併入磁碟索引中本行程還不知道的項目 (啟動時載入、或其他行程新合成的檔案)
+        檔案已不存在的項目 (已被某個行程淘汰) 略過；呼叫端需持有 self._lock 或尚未對外提供服務
+        """
+        added = False
+        for key, entry in entries.items():
+            if key in self._entries or not os.path.exists(os.path.join(self.directory, entry["file"])):
+                continue
+            self._entries[key] = entry
+            self._total_bytes += entry["bytes"]
+            added = True
+        if added:
+            # 依最後使用時間重新排列 LRU 順序 (本行程的項目本來就依此排序)
+            self._entries = OrderedDict(sorted(self._entries.items(), key=lambda kv: kv[1].get("last_used", 0)))
+
+    def _save_index(self):
+        # 呼叫端需持有 self._lock；檔案鎖讓多個行程的「讀取 → 併入 → 寫入」不會互相覆蓋
+        path = os.path.join(self.directory, INDEX_FILE)
+        with _file_lock(os.path.join(self.directory, LOCK_FILE)):
+            self._merge_entries(self._read_index())
+            tmp = f"{path}.{os.getpid()}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(self._entries, f, ensure_ascii=False)
+            os.replace(tmp, path)
+
+    # --- 查詢 / 合成 ---
+
+    def path_for(self, key: str) -> str:
+        return os.path.join(self.directory, key + self.suffix)
+
+    def url_for(self, path: str) -> str:
+        return f"{self.url_prefix}/{os.path.basename(path)}"
+
+    def lookup(self, text: str, voice: str, output_format: str) -> Optional[str]:
+        """只查不合成；命中時回傳檔案路徑並更新 LRU 順序"""
+        key = cache_key(text, voice, output_format)
+        with self._lock:
+            return self._touch(key)
+
+    def _touch(self, key: str) -> Optional[str]:
+        # 呼叫端需持有 self._lock
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        path = os.path.join(self.directory, entry["file"])
+        if not os.path.exists(path):
+            # 檔案被外部刪除，視為未命中
+            del self._entries[key]
+            self._total_bytes -= entry["bytes"]
+            return None
+        entry["last_used"] = time.time()
+        entry["hits"] = entry.get("hits", 0) + 1
+        self._entries.move_to_end(key)
+        self._stats["hits"] += 1
+        self._stats["bytes_saved"] += entry["bytes"]
+        return path
+
+    def get_or_synthesize(self, text: str, voice: str, output_format: str,
+                          synthesize: Callable[[str], Any]) -> str:
+        """
+        取得快取的音檔路徑；沒有快取時呼叫 synthesize(輸出路徑) 合成
+
+        Args:
+            text: 要合成的文字
+            voice / output_format: 會影響音檔內容的設定，一併納入快取鍵
+            synthesize: 將音檔寫到指定路徑的函式
+
+        Returns:
+            str: 快取檔案路徑
+        """
+        key = cache_key(text, voice, output_format)
+        with self._lock:
+            path = self._touch(key)
+            if path is not None:
+                return path
+            future = self._inflight.get(key)
+            owner = future is None
+            if owner:
+                future = Future()
+                self._inflight[key] = future
+                self._stats["misses"] += 1
+            else:
+                self._stats["coalesced"] += 1
+
+        if not owner:
+            try:
+                return future.result(timeout=self.wait_timeout)
+            except FutureTimeout:
+                # 第一個請求卡住 (例如 Azure 沒有回應)：不再等它，自行合成到另一個暫存檔
+                with self._lock:
+                    self._stats["wait_timeouts"] += 1
+                print(f"[TTSCache] 等待同一句話的合成超過 {self.wait_timeout} 秒，改為自行合成")
+                return self._store(key, text, voice, output_format, synthesize)
+
+        try:
+            final_path = self._store(key, text, voice, output_format, synthesize)
+        except BaseException as e:
+            with self._lock:
+                self._inflight.pop(key, None)
+            future.set_exception(e)
+            raise
+        with self._lock:
+            self._inflight.pop(key, None)
+        future.set_result(final_path)
+        return final_path
+
+    def _store(self, key: str, text: str, voice: str, output_format: str,
+               synthesize: Callable[[str], Any]) -> str:
+        """合成到暫存檔再原子替換成快取檔，並記入索引"""
+        final_path = self.path_for(key)
+        tmp_path = f"{final_path}.{uuid.uuid4().hex[:8]}.tmp"
+        try:
+            synthesize(tmp_path)
+            os.replace(tmp_path, final_path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            with self._lock:
+                self._stats["errors"] += 1
+            raise
+        size = os.path.getsize(final_path)
+        now = time.time()
+        with self._lock:
+            # 逾時自行合成的請求與原本的請求可能先後寫入同一個鍵
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._total_bytes -= previous["bytes"]
+            self._entries[key] = {"file": os.path.basename(final_path), "bytes": size, "text": text[:80],
+                                  "voice": voice, "format": output_format, "created": now,
+                                  "last_used": now, "hits": 0}
+            self._total_bytes += size
+            self._evict(keep=key)
+            self._save_index()
+        return final_path
+
+    def _evict(self, keep: str):
+        # 呼叫端需持有 self._lock；剛寫入的那一筆不淘汰
+        while self._total_bytes > self.max_bytes and len(self._entries) > 1:
+            key, entry = next(iter(self._entries.items()))
+            if key == keep:
+                break
+            del self._entries[key]
+            self._total_bytes -= entry["bytes"]
+            self._stats["evictions"] += 1
+            try:
+                os.remove(os.path.join(self.directory, entry["file"]))
+            except FileNotFoundError:
+                pass
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["entries"] = len(self._entries)
+            stats["total_bytes"] = self._total_bytes
+        stats["max_bytes"] = self.max_bytes
+        lookups = stats["hits"] + stats["misses"] + stats["coalesced"]
+        # 併入等待的請求同樣省下一次合成，算作命中
+        stats["hit_ratio"] = round((stats["hits"] + stats["coalesced"]) / lookups, 3) if lookups else None
+        return stats
@@ -0,0 +1,137 @@
+# backend/utils/wav_io.py
+"""
+記憶體內的 WAV 讀寫
+
+上傳的回答音檔直接從 UploadFile 的緩衝區解析成 PCM 交給辨識器，不必先寫檔再讀檔；
+串流收到的 PCM 也在記憶體內包成 WAV 再交給背景寫檔。
+
+評估用的長錄音 (MagicData-RAMC 一個檔案數十分鐘) 以 MappedWav 做記憶體映射：
+標頭只解析一次，每個片段都是映射區上的 memoryview，不複製也不寫暫存檔。
+"""
+import io
+import logging
+import mmap
+import struct
+import wave
+from typing import Iterable, List, NamedTuple, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+_WAVE_FORMAT_PCM = 1
+_WAVE_FORMAT_EXTENSIBLE = 0xFFFE
+
+
+class WavAudio(NamedTuple):
+    pcm: Union[bytes, memoryview]  # MappedWav 的片段為 memoryview
+    sample_rate: int
+    channels: int
+    sample_width: int  # 每個樣本的位元組數 (16-bit = 2)
+
+    @property
+    def seconds(self) -> float:
+        frame_bytes = self.channels * self.sample_width
+        return len(self.pcm) / frame_bytes / self.sample_rate if frame_bytes and self.sample_rate else 0.0
+
+
+def read_wav(data: bytes) -> WavAudio:
+    """解析 WAV 位元組；不是 PCM WAV 時丟出 wave.Error"""
+    with wave.open(io.BytesIO(data), "rb") as wav:
+        return WavAudio(
+            pcm=wav.readframes(wav.getnframes()),
+            sample_rate=wav.getframerate(),
+            channels=wav.getnchannels(),
+            sample_width=wav.getsampwidth(),
+        )
+
+
+def pcm_to_wav(pcm: bytes, sample_rate: int, channels: int = 1, sample_width: int = 2) -> bytes:
+    """把 PCM 包成 WAV 位元組 (預設 16-bit mono)"""
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav:
+        wav.setnchannels(channels)
+        wav.setsampwidth(sample_width)
+        wav.setframerate(sample_rate)
+        wav.writeframes(pcm)
+    return buffer.getvalue()
+
+
+class MappedWav:
+    """
+    記憶體映射的 PCM WAV 檔
+
+    用法：
+        with MappedWav(path) as wav:
+            audios = wav.segments([(0.0, 2.5), (3.1, 6.0)])  # 每段都是映射區上的 view
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            self._parse_header()
+        except Exception:
+            self._map.close()
+            raise
+        self._view = memoryview(self._map)
+
+    def _parse_header(self):
+        data = self._map
+        if len(data) < 12 or data[0:4] != b"RIFF" or data[8:12] != b"WAVE":
+            raise wave.Error(f"不是 WAV 檔: {self.path}")
+        fmt = None
+        pos = 12
+        while pos + 8 <= len(data):
+            chunk_id = data[pos:pos + 4]
+            size, = struct.unpack_from("<I", data, pos + 4)
+            body = pos + 8
+            if chunk_id == b"fmt ":
+                fmt = struct.unpack_from("<HHIIHH", data, body)
+            elif chunk_id == b"data":
+                if fmt is None:
+                    raise wave.Error(f"data 區塊出現在 fmt 之前: {self.path}")
+                # 串流錄音可能把大小寫成 0 / 0xFFFFFFFF，以實際檔案長度為準
+                self.data_offset = body
+                self.data_size = min(size, len(data) - body) if size else len(data) - body
+                break
+            pos = body + size + (size & 1)  # 區塊長度補齊到偶數
+        else:
+            raise wave.Error(f"找不到 data 區塊: {self.path}")
+
+        audio_format, self.channels, self.sample_rate, _, self.block_align, bits = fmt
+        if audio_format not in (_WAVE_FORMAT_PCM, _WAVE_FORMAT_EXTENSIBLE):
+            raise wave.Error(f"不支援的 WAV 格式 {audio_format}: {self.path}")
+        self.sample_width = bits // 8
+        self.frames = self.data_size // self.block_align
+
+    @property
+    def seconds(self) -> float:
+        return self.frames / self.sample_rate
+
+    def _frame(self, seconds: float) -> int:
+        return min(self.frames, max(0, int(seconds * self.sample_rate)))
+
+    def segment(self, start: float, end: float) -> WavAudio:
+        """start ~ end 秒的片段 (不複製)；超出範圍的部分截掉"""
+        first, last = self._frame(start), self._frame(end)
+        begin = self.data_offset + first * self.block_align
+        stop = self.data_offset + max(first, last) * self.block_align
+        return WavAudio(self._view[begin:stop], self.sample_rate, self.channels, self.sample_width)
+
+    def segments(self, spans: Iterable[Tuple[float, float]]) -> List[WavAudio]:
+        """多個 (start, end) 片段，依輸入順序回傳"""
+        return [self.segment(start, end) for start, end in spans]
+
+    def close(self):
+        """釋放映射；仍有片段被引用時留給 GC 釋放"""
+        self._view.release()
+        try:
+            self._map.close()
+        except BufferError:
+            logger.debug(f"[WavIO] {self.path} 仍有片段被引用，延後釋放映射")
+
+    def __enter__(self) -> "MappedWav":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,7 @@
+# benchmarks/
+"""
+基準測試套件
+
+每個測試模組都可直接執行 (uv run python -m benchmarks.<模組>)，
+結果以 JSON 寫到 benchmarks/results/，可用 --baseline 與其他 commit 的結果比較。
+"""
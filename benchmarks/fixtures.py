@@ -0,0 +1,161 @@
+# benchmarks/fixtures.py
+"""
+微基準測試用的合成資料 (固定亂數種子，每次產生的內容相同)
+
+- ocr_document(): 多頁 OCR 結果 (預設 12 頁 × 300 行，每頁的 TextLine 已依閱讀順序排序，同 OCRProcessor._lines_from_page)
+- ocr_rows(): 由群組化結果組成 process_page() 內部使用的 rows
+- resume_text(): 長篇履歷純文字 (前幾行沒有明確職稱，職稱推論需掃描全文)
+- bullet_items(): 條列式履歷的文字方塊 (含字高)
+- utterances(): STT 逐字稿 (少數包含「下一題」「結束面試」等語音指令)
+- interview_history(): 面試問答紀錄 (混合空白、跳過、過短與正常回答)
+"""
+import random
+from dataclasses import dataclass
+from typing import Dict, List
+
+from backend.services.ocr_service import TextLine
+
+PAGE_WIDTH = 2480   # A4 300 dpi
+ROW_GAP = 36        # 列距 (px)；需明顯大於 OCRConfig.y_tolerance，相鄰兩列才不會被併成一列
+
+SURNAMES = "王李張劉陳楊黃趙吳周徐孫馬朱胡林郭何高羅"
+GIVEN = "小明志豪家瑋怡君雅婷俊傑淑芬冠宇佳穎承恩"
+PHRASES = [
+    "負責跨部門溝通與進度追蹤", "參與年度預算規劃與成本控管", "建立內部教育訓練教材",
+    "協助門市營收成長百分之二十", "整理客戶回饋並提出改善方案", "導入新的排程流程縮短交期",
+    "帶領三人小組完成系統轉換", "撰寫月報並向主管簡報成果", "維護供應商關係並議價",
+    "規劃社群活動提升會員回流", "處理日常帳務與發票核對", "主導展覽攤位規劃與執行",
+]
+SECTIONS = ["工作經歷", "學歷", "技能", "證照", "語言能力", "自傳"]
+ANSWERS = [
+    "我之前在專案裡負責後端 API 的設計，也處理過資料庫效能調校的問題",
+    "遇到意見不同的時候，我會先整理雙方的考量，再找主管一起討論取捨",
+    "這個問題我比較沒有經驗，但我會先查文件並請教有經驗的同事",
+    "我最有成就感的是把部署流程自動化，讓上線時間從半天縮短到十分鐘",
+]
+COMMANDS = ["下一題", "跳過這題", "我想結束面試", "換一題好了"]
+
+
+def _name(rng: random.Random) -> str:
+    return rng.choice(SURNAMES) + rng.choice(GIVEN) + rng.choice(GIVEN)
+
+
+def _phone(rng: random.Random) -> str:
+    return f"09{rng.randint(10, 99)}-{rng.randint(100, 999)}-{rng.randint(100, 999)}"
+
+
+def _line_text(rng: random.Random) -> str:
+    roll = rng.random()
+    if roll < 0.10:
+        return rng.choice(SECTIONS)
+    if roll < 0.25:
+        return f"{rng.choice(['地址', '學校', '科系', '職稱'])}：{rng.choice(PHRASES)[:8]}"
+    if roll < 0.30:
+        return f"{rng.choice(['手機', '電話'])} {_phone(rng)}"
+    if roll < 0.55:
+        return "• " + rng.choice(PHRASES)
+    return rng.choice(PHRASES) + "，" + rng.choice(PHRASES)
+
+
+def _text_line(text: str, x: float, y: float, width: float, height: float) -> TextLine:
+    return TextLine(text, [x, y, x + width, y, x + width, y + height, x, y + height])
+
+
+def ocr_document(pages: int = 12, lines_per_page: int = 300, seed: int = 0) -> List[List[TextLine]]:
+    """
+    多頁 OCR 結果：每列 1~3 個文字方塊 (多欄排版)，同一列的 y 有幾個像素的抖動，
+    第一頁開頭是姓名 / 手機 / Email 標頭
+    """
+    rng = random.Random(seed)
+    document = []
+    for page_no in range(pages):
+        lines: List[TextLine] = []
+        y = 120.0
+        if page_no == 0:
+            lines.append(_text_line("姓名", 150, y, 80, 30))
+            lines.append(_text_line(_name(rng), 260, y + 2, 120, 30))
+            lines.append(_text_line(f"Email: user{seed}@example.com", 1400, y - 1, 420, 30))
+            y += 40
+        while len(lines) < lines_per_page:
+            columns = rng.choice([1, 1, 2, 2, 3])
+            for col in range(min(columns, lines_per_page - len(lines))):
+                text = _line_text(rng)
+                x = 150 + col * (PAGE_WIDTH - 300) / columns + rng.uniform(-10, 10)
+                lines.append(_text_line(text, x, y + rng.uniform(-4, 4), 28 * len(text), rng.choice([28, 30, 42])))
+            y += ROW_GAP + rng.uniform(-2, 2)
+        document.append(sorted(lines, key=lambda l: (l.center_y, l.x1)))
+    return document
+
+
+def ocr_rows(groups: List[List[TextLine]]) -> List[Dict]:
+    """與 OCRProcessor.process_page 相同的 rows 結構"""
+    return [{"y": sum(l.center_y for l in g) / len(g), "texts": [ln.to_dict() for ln in g]} for g in groups]
+
+
+def resume_text(lines: int = 4000, seed: int = 0) -> str:
+    """長篇履歷文字，內容不含職稱關鍵字，職稱推論會走完全文掃描與兜底規則"""
+    rng = random.Random(seed)
+    body = [_name(rng), f"{_phone(rng)}    台北市信義區"]
+    body += [rng.choice(PHRASES) + "，" + rng.choice(PHRASES) for _ in range(lines - len(body))]
+    return "\n".join(body)
+
+
+@dataclass
+class BulletItem:
+    """BulletResumeParser 需要的文字方塊 (text / 座標 / 字高)"""
+    text: str
+    x1: float
+    y1: float
+    x2: float
+    y2: float
+    height: float
+
+
+def bullet_items(count: int = 3000, seed: int = 0) -> List[BulletItem]:
+    rng = random.Random(seed)
+    items = []
+    for i in range(count):
+        roll = rng.random()
+        if roll < 0.08:
+            text, height, x = rng.choice(SECTIONS), 48.0, 150.0
+        elif roll < 0.70:
+            text, height, x = "• " + rng.choice(PHRASES), 30.0, 200.0
+        else:
+            text, height, x = rng.choice(PHRASES) + "，" + rng.choice(PHRASES), 30.0, 240.0
+        y = 100.0 + i * 36
+        items.append(BulletItem(text, x, y, x + 28 * len(text), y + height, height))
+    rng.shuffle(items)  # parse() 會自行依 y1 排序
+    return items
+
+
+def utterances(count: int = 2000, seed: int = 0) -> List[str]:
+    """STT 逐字稿：多數是一般回答 (部分很長)，約 5% 含語音指令"""
+    rng = random.Random(seed)
+    texts = []
+    for _ in range(count):
+        roll = rng.random()
+        if roll < 0.05:
+            texts.append(f"嗯 {rng.choice(COMMANDS)}。")
+        elif roll < 0.15:
+            texts.append("。".join(rng.choice(ANSWERS) for _ in range(8)) + "！")
+        else:
+            texts.append(rng.choice(ANSWERS) + "。")
+    return texts
+
+
+def interview_history(turns: int = 500, seed: int = 0) -> List[Dict[str, str]]:
+    """面試問答紀錄：約 10% 空白、10% 跳過、10% 過短，其餘為一般長度的回答"""
+    rng = random.Random(seed)
+    history = []
+    for i in range(turns):
+        roll = rng.random()
+        if roll < 0.10:
+            answer = ""
+        elif roll < 0.20:
+            answer = "（使用者語音要求跳過此題）"
+        elif roll < 0.30:
+            answer = "還好"
+        else:
+            answer = "，".join(rng.choice(ANSWERS) for _ in range(rng.randint(1, 4)))
+        history.append({"question": f"第 {i + 1} 題：請談談你在{rng.choice(PHRASES)}時遇到的挑戰？", "answer": answer})
+    return history
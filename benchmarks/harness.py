@@ -0,0 +1,156 @@
+# benchmarks/harness.py
+"""
+基準測試共用工具：延遲百分位數、峰值記憶體、結果 JSON 的寫入與比較 (回歸門檻)
+
+結果檔格式：
+    {
+      "suite": "rag_retrieval",
+      "commit": "caa82b2", "dirty": false,
+      "created_at": "...", "python": "3.11.9", "platform": "...",
+      "params": {...},   # 執行參數
+      "results": [...]   # 每個設定一列 (dict)
+    }
+"""
+import json
+import os
+import platform
+import subprocess
+import time
+import tracemalloc
+from datetime import datetime
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(ROOT, "benchmarks", "results")
+
+
+def git_revision() -> Tuple[str, bool]:
+    """回傳 (短 commit, 工作目錄是否有未提交變更)；不在 git 倉庫內時為 ("unknown", False)"""
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                                text=True, check=True).stdout.strip()
+        status = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=ROOT,
+                                capture_output=True, text=True, check=True).stdout
+        return commit, bool(status.strip())
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown", False
+
+
+def latency_summary(latencies_ms: Sequence[float]) -> Dict[str, float]:
+    """p50 / p95 / p99 / 平均 (毫秒)"""
+    if not latencies_ms:
+        return {"p50_ms": 0.0, "p95_ms": 0.0, "p99_ms": 0.0, "mean_ms": 0.0}
+    p50, p95, p99 = np.percentile(latencies_ms, [50, 95, 99])
+    return {"p50_ms": float(p50), "p95_ms": float(p95), "p99_ms": float(p99),
+            "mean_ms": float(np.mean(latencies_ms))}
+
+
+def timed(fn: Callable, *args, **kwargs):
+    """回傳 (結果, 耗時秒數)"""
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def traced(fn: Callable, *args, **kwargs):
+    """
+    以 tracemalloc 執行 fn，回傳 (結果, 峰值位元組數, 結束時仍存活的位元組數)
+
+    只計入經由 Python 配置器的記憶體 (含 numpy 陣列)；FAISS / torch 的原生配置不在其中。
+    tracemalloc 會拖慢執行，計時請另外用 timed() 量測。
+    """
+    already = tracemalloc.is_tracing()
+    if not already:
+        tracemalloc.start()
+    tracemalloc.reset_peak()
+    baseline, _ = tracemalloc.get_traced_memory()
+    try:
+        result = fn(*args, **kwargs)
+        current, peak = tracemalloc.get_traced_memory()
+    finally:
+        if not already:
+            tracemalloc.stop()
+    return result, max(0, peak - baseline), max(0, current - baseline)
+
+
+def write_results(suite: str, results: List[dict], params: dict, output: Optional[str] = None) -> str:
+    """寫入結果 JSON，預設路徑為 benchmarks/results/<suite>_<commit>.json，回傳實際路徑"""
+    commit, dirty = git_revision()
+    if output is None:
+        output = os.path.join(RESULTS_DIR, f"{suite}_{commit}{'-dirty' if dirty else ''}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    payload = {
+        "suite": suite,
+        "commit": commit,
+        "dirty": dirty,
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "params": params,
+        "results": results,
+    }
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(payload, f, ensure_ascii=False, indent=2)
+    return output
+
+
+def load_results(path: str) -> dict:
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def compare(current: Iterable[dict], baseline: Iterable[dict], key: str,
+            metrics: Sequence[str]) -> List[dict]:
+    """
+    以 key 欄位對齊兩份結果，回傳每個共同設定的指標變化
+
+    Returns:
+        [{key: ..., "<metric>": 目前值, "<metric>_base": 基準值, "<metric>_change": 相對變化}]
+        相對變化 = (目前 - 基準) / 基準；基準為 0 時為 None
+    """
+    base_rows = {row[key]: row for row in baseline}
+    rows = []
+    for row in current:
+        base = base_rows.get(row[key])
+        if base is None:
+            continue
+        diff = {key: row[key]}
+        for metric in metrics:
+            now, before = row.get(metric), base.get(metric)
+            if now is None or before is None:
+                continue
+            diff[metric] = now
+            diff[f"{metric}_base"] = before
+            diff[f"{metric}_change"] = (now - before) / before if before else None
+        rows.append(diff)
+    return rows
+
+
+def print_comparison(diffs: List[dict], key: str, metrics: Sequence[str], baseline_commit: str):
+    print(f"\n  與基準 {baseline_commit} 比較 (相對變化)")
+    print(f"  {key:<40}" + "".join(f"{m:>14}" for m in metrics))
+    for diff in diffs:
+        cells = []
+        for metric in metrics:
+            change = diff.get(f"{metric}_change")
+            cells.append(f"{change:>+14.1%}" if change is not None else f"{'-':>14}")
+        print(f"  {str(diff[key]):<40}" + "".join(cells))
+
+
+def find_regressions(diffs: List[dict], key: str, metrics: Sequence[str],
+                     threshold: float) -> List[Tuple[str, str, float]]:
+    """
+    找出退步超過 threshold 的指標 (指標皆為越小越好，例如耗時與記憶體)
+
+    Returns:
+        [(設定 key 的值, 指標, 相對變化)]
+    """
+    regressions = []
+    for diff in diffs:
+        for metric in metrics:
+            change = diff.get(f"{metric}_change")
+            if change is not None and change > threshold:
+                regressions.append((diff[key], metric, change))
+    return regressions
@@ -0,0 +1,226 @@
+# benchmarks/hot_paths.py
+"""
+純 Python 熱路徑微基準測試 (OCR 版面分析、履歷解析、語音指令與回饋摘要)
+
+每個案例以 benchmarks/fixtures.py 的合成資料 (實際尺寸：多頁、數千行的 OCR 結果與長面試紀錄)
+重複呼叫目標函式，報告：
+- 單次呼叫耗時 (最佳 / 中位數 / 平均，微秒)：自動決定每輪呼叫次數，使每輪至少 --min_time 秒
+- 配置剖析 (tracemalloc)：單次呼叫的峰值記憶體、回傳後仍存活的記憶體，以及存活記憶體最多的程式位置
+
+結果寫成 JSON (benchmarks/results/hot_paths_<commit>.json)；加上 --baseline 時與先前結果比較，
+任何案例的中位數耗時或峰值記憶體退步超過 --max_regression 即以結束碼 1 離開，可當作回歸門檻。
+
+用法：
+    uv run python -m benchmarks.hot_paths
+    uv run python -m benchmarks.hot_paths --cases ocr --scale 2
+    uv run python -m benchmarks.hot_paths --baseline benchmarks/results/hot_paths_88e792d.json --max_regression 0.2
+"""
+
+import os
+import sys
+import time
+import argparse
+import statistics
+import tracemalloc
+from contextlib import redirect_stdout
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List
+
+# 確保可以匯入 backend 模組
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks import fixtures
+from benchmarks.harness import ROOT, compare, find_regressions, load_results, print_comparison, traced, write_results
+
+SUITE = "hot_paths"
+COMPARE_METRICS = ("median_us", "peak_kb")
+
+
+@dataclass
+class Case:
+    """一個微基準案例：run() 以固定輸入呼叫一次目標函式"""
+    name: str
+    size: str
+    run: Callable[[], Any]
+
+
+def build_cases(scale: float = 1.0) -> List[Case]:
+    """建立所有案例 (合成資料在這裡一次產生，不計入量測)"""
+    from backend.api.interview_router import check_voice_command
+    from backend.services.feedback_service import feedback_service
+    from backend.services.ocr_service import OCRConfig, OCRProcessor
+    from backend.services.resume_service import resume_service
+    from backend.utils.bullet_parser import BulletResumeParser
+
+    def n(value: int) -> int:
+        return max(1, int(value * scale))
+
+    # 不連線 Azure，只使用版面分析的部分
+    config = OCRConfig()
+    config.subscription_key = config.endpoint = None
+    processor = OCRProcessor(config)
+
+    pages = fixtures.ocr_document(pages=n(12), lines_per_page=300)
+    groups = [processor._group_lines_by_row(lines) for lines in pages]
+    rows = [fixtures.ocr_rows(page_groups) for page_groups in groups]
+    ocr_size = f"{len(pages)} 頁 / {sum(len(p) for p in pages)} 行"
+
+    text = fixtures.resume_text(lines=n(4000))
+    items = fixtures.bullet_items(count=n(3000))
+    texts = fixtures.utterances(count=n(2000))
+    history = fixtures.interview_history(turns=n(500))
+
+    return [
+        Case("ocr._group_lines_by_row", ocr_size,
+             lambda: [processor._group_lines_by_row(lines) for lines in pages]),
+        Case("ocr._detect_kv_pairs", ocr_size,
+             lambda: [processor._detect_kv_pairs(page_groups) for page_groups in groups]),
+        Case("ocr._extract_compact_contact", ocr_size,
+             lambda: [processor._extract_compact_contact(page_rows) for page_rows in rows]),
+        Case("resume._infer_job_title", f"{text.count(chr(10)) + 1} 行",
+             lambda: resume_service._infer_job_title(text)),
+        Case("resume.BulletResumeParser.parse", f"{len(items)} 個文字方塊",
+             lambda: BulletResumeParser().parse(items)),
+        Case("router.check_voice_command", f"{len(texts)} 段逐字稿",
+             lambda: [check_voice_command(t) for t in texts]),
+        Case("feedback._prepare_summary", f"{len(history)} 題 (取最後 10 題)",
+             lambda: feedback_service._prepare_summary(history)),
+        Case("feedback._prepare_summary[full]", f"{len(history)} 題 (全部)",
+             lambda: feedback_service._prepare_summary(history, max_pairs=len(history))),
+    ]
+
+
+def time_case(case: Case, repeat: int, min_time: float) -> Dict[str, float]:
+    """
+    量測單次呼叫耗時 (微秒)
+
+    先倍增每輪呼叫次數直到一輪至少 min_time 秒，再重複 repeat 輪取每次呼叫的平均
+    """
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            case.run()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time or number >= 1 << 20:
+            break
+        number *= 2
+
+    per_call = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            case.run()
+        per_call.append((time.perf_counter() - start) / number * 1e6)
+    return {
+        "calls_per_round": number,
+        "best_us": min(per_call),
+        "median_us": statistics.median(per_call),
+        "mean_us": statistics.mean(per_call),
+    }
+
+
+def profile_case(case: Case, top: int = 3) -> Dict[str, Any]:
+    """單次呼叫的峰值 / 存活記憶體，與存活記憶體最多的程式位置 (只列出本專案的檔案)"""
+    result, peak, retained = traced(case.run)
+
+    # 再執行一次，在回傳值仍存活時拍快照，找出配置這些記憶體的程式行
+    tracemalloc.start()
+    try:
+        before = tracemalloc.take_snapshot()
+        result = case.run()
+        after = tracemalloc.take_snapshot()
+    finally:
+        tracemalloc.stop()
+    del result
+
+    sites = []
+    for stat in after.compare_to(before, "lineno"):
+        frame = stat.traceback[0]
+        if stat.size_diff <= 0 or not frame.filename.startswith(ROOT) or "benchmarks" in frame.filename:
+            continue
+        sites.append({
+            "site": f"{os.path.relpath(frame.filename, ROOT)}:{frame.lineno}",
+            "kb": stat.size_diff / 1024,
+            "blocks": stat.count_diff,
+        })
+        if len(sites) >= top:
+            break
+    return {"peak_kb": peak / 1024, "retained_kb": retained / 1024, "top_sites": sites}
+
+
+def run_cases(cases: List[Case], repeat: int = 7, min_time: float = 0.05) -> List[dict]:
+    rows = []
+    # 部分函式會印出 [DEBUG] 訊息，量測時導向 devnull (寫入成本仍計入)
+    with open(os.devnull, "w", encoding="utf-8") as devnull:
+        for case in cases:
+            print(f"[Bench] {case.name}", file=sys.stderr)
+            with redirect_stdout(devnull):
+                case.run()  # 暖機
+                timing = time_case(case, repeat, min_time)
+                memory = profile_case(case)
+            rows.append({"case": case.name, "size": case.size, **timing, **memory})
+    return rows
+
+
+def print_report(rows: List[dict]):
+    print("\n" + "=" * 118)
+    print("        📊 熱路徑微基準 (單次呼叫)")
+    print("=" * 118)
+    print(f"  {'案例':<36}{'資料量':<22}{'中位數 (µs)':>14}{'最佳 (µs)':>14}{'峰值 (KB)':>12}{'存活 (KB)':>12}")
+    for r in rows:
+        print(f"  {r['case']:<36}{r['size']:<22}{r['median_us']:>14.1f}{r['best_us']:>14.1f}"
+              f"{r['peak_kb']:>12.1f}{r['retained_kb']:>12.1f}")
+    print("=" * 118)
+    print("  存活記憶體最多的位置：")
+    for r in rows:
+        sites = "、".join(f"{s['site']} ({s['kb']:.1f} KB / {s['blocks']} 塊)" for s in r["top_sites"]) or "-"
+        print(f"  {r['case']:<36}{sites}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="純 Python 熱路徑微基準測試")
+    parser.add_argument("--cases", nargs="+", default=None, help="只執行名稱包含這些字串的案例 (例如 ocr feedback)")
+    parser.add_argument("--scale", type=float, default=1.0, help="合成資料尺寸倍數 (預設 1.0)")
+    parser.add_argument("--repeat", type=int, default=7, help="量測輪數 (預設 7)")
+    parser.add_argument("--min_time", type=float, default=0.05, help="每輪最短秒數 (預設 0.05)")
+    parser.add_argument("--output", default=None, help="結果 JSON 路徑 (預設 benchmarks/results/hot_paths_<commit>.json)")
+    parser.add_argument("--baseline", default=None, help="要比較的先前結果 JSON")
+    parser.add_argument("--max_regression", type=float, default=0.25,
+                        help="與 baseline 相比允許的最大退步比例 (預設 0.25)")
+    args = parser.parse_args()
+
+    baseline = load_results(args.baseline) if args.baseline else None
+    if baseline is not None:
+        # 案例名稱不含資料尺寸，不同 scale 的結果對不上，比較沒有意義
+        base_scale = baseline.get("params", {}).get("scale", 1.0)
+        if base_scale != args.scale:
+            parser.error(f"baseline 的 --scale 為 {base_scale}，與本次的 {args.scale} 不同，無法比較")
+
+    cases = build_cases(args.scale)
+    if args.cases:
+        cases = [c for c in cases if any(key in c.name for key in args.cases)]
+    if not cases:
+        print("沒有符合的案例")
+        return
+
+    rows = run_cases(cases, args.repeat, args.min_time)
+    print_report(rows)
+    params = {"scale": args.scale, "repeat": args.repeat, "min_time": args.min_time}
+    path = write_results(SUITE, rows, params, args.output)
+    print(f"  結果已寫入: {path}")
+
+    if baseline is not None:
+        diffs = compare(rows, baseline["results"], "case", COMPARE_METRICS)
+        print_comparison(diffs, "case", COMPARE_METRICS, baseline.get("commit", "?"))
+        regressions = find_regressions(diffs, "case", COMPARE_METRICS, args.max_regression)
+        if regressions:
+            print(f"\n❌ {len(regressions)} 項指標退步超過 {args.max_regression:.0%}:")
+            for key, metric, change in regressions:
+                print(f"  {key} {metric} {change:+.1%}")
+            sys.exit(1)
+        print(f"\n✅ 沒有指標退步超過 {args.max_regression:.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,345 @@
+# benchmarks/rag_retrieval.py
+"""
+RAG 檢索品質與延遲基準測試
+
+以 benchmarks/data/rag_queries.json 的標註查詢 (職位 + 求職者回答 → 應命中的職位 / 技能領域)
+比較各種引擎設定：
+- rag_service/<position|chunk>/<dense|hybrid>/<索引規格> 與 rag_service/<position|chunk>/lexical：RAGService.retrieve，
+  查詢文字與面試流程相同 ("{職位} {回答}")
+- rag_engine/item/dense/<索引規格>：RAGEngine.get_relevant (以 IDSelectorBatch 在職位分區內搜尋 FAISS 索引，
+  有損索引以快照向量重新排序，不經 Redis 快取)
+
+每個設定報告 recall@k、MRR、單筆查詢 p50 / p95 / p99 延遲、索引建立時間、
+建立時的峰值記憶體 (tracemalloc) 與 FAISS 索引大小，並將結果寫成 JSON 以便跨 commit 比較。
+同一份索引 (引擎 + 粒度 + 索引規格) 的建立數據由其上的各種檢索方式共用。
+
+查詢集由知識庫產生後存入版本控制；知識庫變動後請以 --build_queries 重新產生。
+
+用法：
+    uv run python -m benchmarks.rag_retrieval --top_k 3
+    uv run python -m benchmarks.rag_retrieval --index_specs flat "hnsw,ef_search=32" --engines rag_service
+    uv run python -m benchmarks.rag_retrieval --baseline benchmarks/results/rag_retrieval_cb7904f.json
+    uv run python -m benchmarks.rag_retrieval --build_queries
+"""
+
+import os
+import sys
+import json
+import random
+import shutil
+import hashlib
+import argparse
+import tempfile
+from typing import Callable, List, Sequence
+
+# 確保可以匯入 backend 模組
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.services.rag_service import GRANULARITIES, RETRIEVAL_METHODS, RAGService
+from backend.utils.ann_index import index_nbytes
+from backend.utils.index_bundle import hash_knowledge_files
+from benchmarks.harness import compare, latency_summary, load_results, print_comparison, timed, traced, write_results
+
+SUITE = "rag_retrieval"
+QUERY_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "rag_queries.json")
+ENGINES = ("rag_service", "rag_engine")
+COMPARE_METRICS = ("recall_at_k", "mrr", "p95_ms", "build_s", "peak_mb")
+
+# 求職者回答的樣板：只提到技術名詞 / 情境，不直接說出技能領域名稱
+CONCEPT_TEMPLATES = [
+    "我在專案裡用過{term}，也遇過不少問題",
+    "之前的工作主要負責{term}的部分",
+    "我對{term}比較熟，曾經帶過新人",
+    "面對這種情況我會先從{term}著手",
+]
+SCENARIO_TEMPLATES = [
+    "我遇過類似的情況：{scenario}，當時是和團隊一起討論解決的",
+    "像是{scenario}這種事，我會先釐清需求再動手",
+]
+
+
+# ── 查詢集 ─────────────────────────────────────────────────────────────────────
+def knowledge_hash(data_dir: str) -> str:
+    """整個知識庫內容的雜湊，用來判斷查詢集標註是否過期"""
+    return hashlib.sha256(json.dumps(hash_knowledge_files(data_dir), sort_keys=True).encode()).hexdigest()
+
+
+def _scenarios(skill: dict) -> List[str]:
+    scenarios = skill.get("example_scenarios", [])
+    if isinstance(scenarios, dict):
+        scenarios = scenarios.get("scenarios", [])
+    return scenarios
+
+
+def build_query_set(data_dir: str, per_position: int = 3, seed: int = 42) -> dict:
+    """
+    由知識庫產生標註查詢：每個職位抽 per_position 個技能領域，以其中的技術名詞或情境題組成回答
+
+    標註：
+        positions: 應命中的職位 (查詢的職位本身)
+        areas: 應命中的 [職位, 技能領域] (出題的領域 + 同職位中 key_concepts 含有該名詞的領域)
+    """
+    rng = random.Random(seed)
+    queries = []
+    for rel in hash_knowledge_files(data_dir):
+        try:
+            with open(os.path.join(data_dir, rel), "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except Exception:
+            continue
+        position = data.get("position", "")
+        skills = [s for s in data.get("skill_areas", []) if s.get("area") and s.get("key_concepts")]
+        for skill in rng.sample(skills, min(per_position, len(skills))):
+            scenarios = _scenarios(skill)
+            if scenarios and rng.random() < 0.3:
+                term = None
+                answer = rng.choice(SCENARIO_TEMPLATES).format(scenario=rng.choice(scenarios))
+            else:
+                term = rng.choice(skill["key_concepts"])
+                answer = rng.choice(CONCEPT_TEMPLATES).format(term=term)
+
+            areas = [[position, skill["area"]]]
+            if term is not None:
+                areas += [[position, other["area"]] for other in skills
+                          if other is not skill and term in other.get("key_concepts", [])]
+            queries.append({
+                "id": f"q{len(queries) + 1:04d}",
+                "job_title": position,
+                "answer": answer,
+                "positions": [position],
+                "areas": areas,
+                "source": rel,
+            })
+
+    return {
+        "version": 1,
+        "data_dir": data_dir,
+        "knowledge_hash": knowledge_hash(data_dir),
+        "seed": seed,
+        "per_position": per_position,
+        "queries": queries,
+    }
+
+
+def save_query_set(query_set: dict, path: str = QUERY_FILE):
+    """寫入查詢集：每筆查詢一行，方便在版本控制中檢視差異"""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    lines = ["{"]
+    for key, value in query_set.items():
+        if key != "queries":
+            lines.append(f" {json.dumps(key)}: {json.dumps(value, ensure_ascii=False)},")
+    lines.append(' "queries": [')
+    lines.append(",\n".join(f"  {json.dumps(q, ensure_ascii=False)}" for q in query_set["queries"]))
+    lines.append(" ]")
+    lines.append("}")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("\n".join(lines) + "\n")
+
+
+def load_query_set(path: str = QUERY_FILE) -> dict:
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+# ── 指標 ───────────────────────────────────────────────────────────────────────
+def recall_at_k(found: Sequence, gold: set, k: int) -> float:
+    """前 k 筆中找到的相關項目 / min(k, 相關項目數)"""
+    if not gold:
+        return 0.0
+    return len(set(found[:k]) & gold) / min(k, len(gold))
+
+
+def reciprocal_rank(found: Sequence, gold: set) -> float:
+    for rank, key in enumerate(found, start=1):
+        if key in gold:
+            return 1.0 / rank
+    return 0.0
+
+
+def result_keys(results: List[dict], level: str) -> list:
+    """把檢索結果轉成與標註比對的 key：position 粒度比對職位，其餘比對 (職位, 技能領域)"""
+    if level == "position":
+        return [r.get("position") for r in results]
+    return [(r.get("position"), r.get("area")) for r in results]
+
+
+def gold_keys(query: dict, level: str) -> set:
+    if level == "position":
+        return set(query["positions"])
+    return {tuple(area) for area in query["areas"]}
+
+
+def score(search: Callable[[dict], List[dict]], queries: List[dict], level: str, top_k: int) -> dict:
+    """逐筆執行查詢並計算 recall@k / MRR / 延遲"""
+    if queries:
+        search(queries[0])  # 暖機，避免第一次 encode 的初始化成本影響結果
+    latencies, recalls, ranks = [], [], []
+    for query in queries:
+        results, seconds = timed(search, query)
+        latencies.append(seconds * 1000)
+        found = result_keys(results[:top_k], level)
+        gold = gold_keys(query, level)
+        recalls.append(recall_at_k(found, gold, top_k))
+        ranks.append(reciprocal_rank(found, gold))
+
+    report = {
+        "queries": len(queries),
+        "recall_at_k": sum(recalls) / len(recalls) if recalls else 0.0,
+        "mrr": sum(ranks) / len(ranks) if ranks else 0.0,
+    }
+    report.update(latency_summary(latencies))
+    return report
+
+
+def _build_report(build_s: float, peak_bytes: int, index) -> dict:
+    return {
+        "build_s": build_s,
+        "peak_mb": peak_bytes / 1024 / 1024,
+        "index_mb": index_nbytes(index) / 1024 / 1024 if index is not None else 0.0,
+    }
+
+
+# ── 引擎設定 ───────────────────────────────────────────────────────────────────
+def run_rag_service(data_dir: str, queries: List[dict], top_k: int,
+                    modes: Sequence[str] = GRANULARITIES, methods: Sequence[str] = RETRIEVAL_METHODS,
+                    index_specs: Sequence[str] = ("flat",), load_model: bool = True) -> List[dict]:
+    """每個 (索引規格, 粒度) 各建立一次索引，再以各種檢索方式查詢"""
+    rows = []
+    for spec_no, spec in enumerate(index_specs):
+        service = RAGService(data_dir=data_dir, use_cache=False, granularities=tuple(modes),
+                             load_model=load_model, index_spec=spec)
+        spec_methods = [m for m in methods if m == "lexical" or service.model is not None]
+        if len(spec_methods) < len(methods):
+            print("[Bench] 向量模型不可用，只測試 lexical 檢索")
+        if spec_no > 0:
+            # lexical 與索引規格無關，只在第一個規格下測一次
+            spec_methods = [m for m in spec_methods if m != "lexical"]
+        if not spec_methods:
+            continue
+
+        manifests = {mode: service._make_manifest(hash_knowledge_files(data_dir), mode) for mode in modes}
+        for mode in modes:
+            # 重新建立一次計時、再建立一次量峰值記憶體 (tracemalloc 會拖慢執行)
+            (bundle, _), build_s = timed(service._build_bundle, manifests[mode], mode)
+            _, peak, _ = traced(service._build_bundle, manifests[mode], mode)
+            if bundle is None:
+                print(f"[Bench] {mode} 索引建立失敗，跳過")
+                continue
+            service._bundles[mode] = bundle
+            build = _build_report(build_s, peak, bundle.index)
+
+            for method in spec_methods:
+                # lexical 不使用向量索引，設定名稱不帶索引規格
+                config = f"rag_service/{mode}/{method}" + ("" if method == "lexical" else f"/{spec}")
+                print(f"[Bench] {config}")
+                report = score(
+                    lambda q, m=mode, mt=method: service.retrieve(f"{q['job_title']} {q['answer']}",
+                                                                  top_k=top_k, mode=m, method=mt),
+                    queries, mode, top_k,
+                )
+                rows.append({"config": config, "engine": "rag_service", "mode": mode, "method": method,
+                             "index_spec": None if method == "lexical" else spec, **report, **build})
+    return rows
+
+
+def run_rag_engine(data_dir: str, queries: List[dict], top_k: int,
+                   index_specs: Sequence[str] = ("flat",)) -> List[dict]:
+    sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+    try:
+        from rag_engine import RAGEngine
+    except ImportError as e:
+        print(f"[Bench] 無法載入 RAGEngine，跳過: {e}")
+        return []
+
+    rows = []
+    # 快照寫到暫存目錄 (與正式環境相同，有損索引會以快照向量重新排序)，不影響 index_cache/
+    index_root = tempfile.mkdtemp(prefix="rag_engine_bench_")
+    try:
+        for n, spec in enumerate(index_specs):
+            engine = RAGEngine(data_dir=data_dir, index_dir=os.path.join(index_root, str(n)),
+                               index_spec=spec, result_cache=False)
+
+            def rebuild():
+                # 刪除快照並重建，量測的是完整建立 (編碼 + 索引 + 寫入快照)
+                shutil.rmtree(engine.bundle_dir, ignore_errors=True)
+                engine.items = []
+                engine._load_and_index()
+
+            _, build_s = timed(rebuild)
+            _, peak, _ = traced(rebuild)
+            config = f"rag_engine/item/dense/{spec}"
+            print(f"[Bench] {config}")
+            report = score(lambda q: engine.get_relevant(q["answer"], q["job_title"], top_k=top_k),
+                           queries, "item", top_k)
+            rows.append({"config": config, "engine": "rag_engine", "mode": "item", "method": "dense",
+                         "index_spec": spec, "rerank": engine._rerank_vectors is not None,
+                         **report, **_build_report(build_s, peak, engine.index)})
+    finally:
+        shutil.rmtree(index_root, ignore_errors=True)
+    return rows
+
+
+def print_report(rows: List[dict], top_k: int, n_queries: int):
+    print("\n" + "=" * 112)
+    print(f"        📊 RAG 檢索基準 (查詢 {n_queries} 筆, k={top_k})")
+    print("=" * 112)
+    print(f"  {'設定':<36}{'recall@k':>10}{'MRR':>8}{'p50 (ms)':>10}{'p95 (ms)':>10}{'p99 (ms)':>10}"
+          f"{'建立 (s)':>10}{'峰值 (MB)':>11}{'索引 (MB)':>11}")
+    for r in rows:
+        print(f"  {r['config']:<36}{r['recall_at_k']:>10.1%}{r['mrr']:>8.3f}{r['p50_ms']:>10.2f}"
+              f"{r['p95_ms']:>10.2f}{r['p99_ms']:>10.2f}{r['build_s']:>10.2f}{r['peak_mb']:>11.1f}"
+              f"{r['index_mb']:>11.2f}")
+    print("=" * 112)
+    print("  position 粒度以職位比對，chunk / item 以 (職位, 技能領域) 比對；峰值記憶體不含 FAISS / torch 原生配置")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="RAG 檢索品質與延遲基準測試")
+    parser.add_argument("--data_dir", default="knowledge_base", help="知識庫資料夾")
+    parser.add_argument("--queries_file", default=QUERY_FILE, help="標註查詢集 (JSON)")
+    parser.add_argument("--top_k", type=int, default=3, help="recall@k 的 k (預設 3)")
+    parser.add_argument("--limit", type=int, default=0, help="只使用前 N 筆查詢 (預設全部)")
+    parser.add_argument("--engines", nargs="+", choices=ENGINES, default=list(ENGINES))
+    parser.add_argument("--modes", nargs="+", choices=GRANULARITIES, default=list(GRANULARITIES))
+    parser.add_argument("--methods", nargs="+", choices=RETRIEVAL_METHODS, default=list(RETRIEVAL_METHODS))
+    parser.add_argument("--index_specs", nargs="+", default=["flat"], help="FAISS 索引規格 (見 backend.utils.ann_index)")
+    parser.add_argument("--output", default=None, help="結果 JSON 路徑 (預設 benchmarks/results/rag_retrieval_<commit>.json)")
+    parser.add_argument("--baseline", default=None, help="要比較的先前結果 JSON")
+    parser.add_argument("--build_queries", action="store_true", help="由知識庫重新產生查詢集後結束")
+    parser.add_argument("--per_position", type=int, default=3, help="產生查詢集時每個職位的查詢數 (預設 3)")
+    args = parser.parse_args()
+
+    if args.build_queries:
+        query_set = build_query_set(args.data_dir, per_position=args.per_position)
+        save_query_set(query_set, args.queries_file)
+        print(f"✅ 已產生 {len(query_set['queries'])} 筆查詢: {args.queries_file}")
+        return
+
+    query_set = load_query_set(args.queries_file)
+    if query_set.get("knowledge_hash") != knowledge_hash(args.data_dir):
+        print("⚠️  知識庫內容與查詢集產生時不同，標註可能已過期 (可用 --build_queries 重新產生)")
+    queries = query_set["queries"][:args.limit] if args.limit > 0 else query_set["queries"]
+
+    rows = []
+    if "rag_service" in args.engines:
+        rows += run_rag_service(args.data_dir, queries, args.top_k, args.modes, args.methods, args.index_specs)
+    if "rag_engine" in args.engines:
+        rows += run_rag_engine(args.data_dir, queries, args.top_k, args.index_specs)
+    if not rows:
+        print("沒有可執行的引擎設定")
+        return
+
+    print_report(rows, args.top_k, len(queries))
+    params = {"top_k": args.top_k, "queries": len(queries), "knowledge_hash": query_set.get("knowledge_hash"),
+              "index_specs": args.index_specs}
+    path = write_results(SUITE, rows, params, args.output)
+    print(f"  結果已寫入: {path}")
+
+    if args.baseline:
+        baseline = load_results(args.baseline)
+        print_comparison(compare(rows, baseline["results"], "config", COMPARE_METRICS), "config",
+                         COMPARE_METRICS, baseline.get("commit", "?"))
+
+
+if __name__ == "__main__":
+    main()
@@ -6,8 +6,8 @@ import sys
 import os
 import requests
 
-def wait_for_server(url="http://localhost:8000/docs", timeout=30):
-    """等待伺服器就緒"""
+def wait_for_server(url="http://localhost:8000/readyz", timeout=120):
+    """等待伺服器就緒 (/readyz 在模型載入與暖機完成後才回傳 200)"""
     print(f"\n等待伺服器啟動...")
     start_time = time.time()
     
@@ -20,7 +20,7 @@ def wait_for_server(url="http://localhost:8000/docs", timeout=30):
         except requests.exceptions.RequestException:
             time.sleep(0.5)
     
-    print(f"等待超時，但仍嘗試開啟瀏覽器...")
+    print(f"等待超時 (可查看 {url} 了解尚未就緒的項目)，但仍嘗試開啟瀏覽器...")
     return False
 
 def open_browser():
@@ -0,0 +1,53 @@
+"""
+音檔保存期限管理 (手動執行一次；服務內另有每 AUDIO_RETENTION_INTERVAL 秒的背景執行)
+
+- 把歸檔前留下的 saved_audio/*.wav 轉成 AUDIO_ARCHIVE_CODEC 並建立索引
+- 依保存天數與容量上限淘汰回答錄音與 static/audio/q_*.mp3
+
+用法：
+    uv run scripts/audio_retention.py
+    uv run scripts/audio_retention.py --compact_only
+"""
+
+import os
+import sys
+import argparse
+
+# 確保可以匯入 backend 模組
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.config import settings
+from backend.database import init_db
+from backend.services.audio_archive import audio_archive
+from backend.services.audio_retention import compact_legacy, sweep
+
+
+def main():
+    parser = argparse.ArgumentParser(description="音檔轉檔補齊與保存期限淘汰")
+    parser.add_argument("--compact_only", action="store_true", help="只補轉檔舊的 .wav，不淘汰")
+    args = parser.parse_args()
+
+    init_db()
+    if args.compact_only:
+        result = {"compacted": compact_legacy(audio_archive)}
+    else:
+        result = sweep()
+    stats = audio_archive.stats()["index"]
+
+    print("\n" + "=" * 60)
+    print("        🗄️ 音檔保存期限管理")
+    print("=" * 60)
+    print(f"  格式       : {settings.AUDIO_ARCHIVE_CODEC}")
+    print(f"  補轉檔     : {result['compacted']} 個")
+    if "answers" in result:
+        print(f"  淘汰回答   : {result['answers']['expired']} 個 ({result['answers']['freed_bytes'] / 1024 / 1024:.1f} MB)")
+        print(f"  刪除題目   : {result['questions']['removed']} 個 ({result['questions']['freed_bytes'] / 1024 / 1024:.1f} MB)")
+    print(f"  歸檔數     : {stats['entries']}")
+    print(f"  歸檔大小   : {stats['stored_bytes'] / 1024 / 1024:.1f} MB (上限 {settings.AUDIO_ARCHIVE_MAX_MB} MB)")
+    if stats["compression_ratio"] is not None:
+        print(f"  壓縮比     : {stats['compression_ratio']:.1%}")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
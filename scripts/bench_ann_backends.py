@@ -0,0 +1,165 @@
+"""
+ANN 索引比較：flat / ivf_flat / ivf_pq / hnsw，以及 fp16 / sq8 儲存與 PCA 降維
+以 IndexFlatIP (精確搜尋) 為基準，報告各索引的 recall@k、單筆查詢 p50 / p99 延遲、
+每個 worker 的常駐記憶體 (索引 + 快照中的原始向量) 與建立時間
+
+語料為 knowledge_base/ 的 chunk 向量；可用 --scale 以加入雜訊的複本把語料放大到指定筆數，
+模擬未來數千個職位 / 情境題區塊的規模。查詢為知識庫中的技術名詞與情境題經模型編碼後的向量。
+
+用法：
+    uv run scripts/bench_ann_backends.py --top_k 5 --scale 50000
+    uv run scripts/bench_ann_backends.py --specs flat "ivf_flat,nlist=128,nprobe=8" "hnsw,ef_search=32"
+    uv run scripts/bench_ann_backends.py --specs flat "flat,storage=sq8" "flat,storage=sq8,pca_dim=128"
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import argparse
+from pathlib import Path
+from typing import Dict, List
+
+import faiss
+import numpy as np
+
+# 確保可以匯入 backend 模組
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.services.rag_service import RAGService
+from backend.utils.ann_index import (
+    build_projected_index,
+    index_nbytes,
+    parse_index_spec,
+    project_queries,
+    search,
+    storage_dtype,
+)
+
+DEFAULT_SPECS = [
+    "flat",
+    "ivf_flat,nprobe=1",
+    "ivf_flat,nprobe=8",
+    "ivf_flat,nprobe=32",
+    "ivf_pq,nprobe=8",
+    "ivf_pq,nprobe=32",
+    "hnsw,ef_search=16",
+    "hnsw,ef_search=64",
+    "flat,storage=fp16",
+    "flat,storage=sq8",
+    "flat,pca_dim=128",
+    "flat,storage=sq8,pca_dim=128",
+    "hnsw,storage=sq8,ef_search=64",
+]
+
+
+def build_query_texts(data_dir: str, limit: int, seed: int = 42) -> List[str]:
+    rng = random.Random(seed)
+    texts = []
+    for file in sorted(Path(data_dir).rglob("*.json")):
+        try:
+            with open(file, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except Exception:
+            continue
+        position = data.get("position", "")
+        for skill in data.get("skill_areas", []):
+            for term in skill.get("key_concepts", []):
+                texts.append(f"{position} {term}")
+            scenarios = skill.get("example_scenarios", [])
+            if isinstance(scenarios, dict):
+                scenarios = scenarios.get("scenarios", [])
+            texts.extend(scenarios)
+    rng.shuffle(texts)
+    return texts[:limit]
+
+
+def scale_corpus(embeddings: np.ndarray, target: int, noise: float = 0.05, seed: int = 42) -> np.ndarray:
+    """以「原向量 + 高斯雜訊」的複本把語料放大到 target 筆 (重新正規化)"""
+    if target <= len(embeddings):
+        return embeddings
+    rng = np.random.default_rng(seed)
+    picks = rng.integers(0, len(embeddings), size=target - len(embeddings))
+    extra = embeddings[picks] + rng.normal(0, noise, size=(len(picks), embeddings.shape[1])).astype('float32')
+    corpus = np.vstack([embeddings, extra]).astype('float32')
+    faiss.normalize_L2(corpus)
+    return corpus
+
+
+def recall_at_k(truth: np.ndarray, found: np.ndarray) -> float:
+    hits = [len(set(t) & set(f[f >= 0])) / len(t) for t, f in zip(truth, found)]
+    return float(np.mean(hits))
+
+
+def run_spec(spec_text: str, corpus: np.ndarray, queries: np.ndarray, truth: np.ndarray,
+             top_k: int, built: Dict[str, tuple]) -> dict:
+    spec = parse_index_spec(spec_text)
+    key = json.dumps(spec.build_params(), sort_keys=True)
+    if key not in built:
+        start = time.perf_counter()
+        index, projection = build_projected_index(corpus, spec)
+        built[key] = (index, projection, time.perf_counter() - start)
+    index, projection, build_seconds = built[key]
+    queries = project_queries(queries, projection)
+
+    latencies, found = [], []
+    for q in queries:
+        start = time.perf_counter()
+        _, I = search(index, q[None, :], top_k, nprobe=spec.nprobe, ef_search=spec.ef_search)
+        latencies.append((time.perf_counter() - start) * 1000)
+        found.append(I[0])
+
+    return {
+        "spec": spec_text,
+        "recall": recall_at_k(truth, np.asarray(found)),
+        "p50_ms": float(np.percentile(latencies, 50)),
+        "p99_ms": float(np.percentile(latencies, 99)),
+        "index_mb": index_nbytes(index) / 1024 / 1024,
+        "vectors_mb": corpus.size * storage_dtype(spec).itemsize / 1024 / 1024,
+        "build_s": build_seconds,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ANN 索引 recall / 延遲 / 記憶體比較")
+    parser.add_argument("--data_dir", default="knowledge_base", help="知識庫資料夾")
+    parser.add_argument("--top_k", type=int, default=5, help="recall@k 的 k (預設 5)")
+    parser.add_argument("--queries", type=int, default=500, help="查詢數量 (預設 500)")
+    parser.add_argument("--scale", type=int, default=0, help="將語料放大到的筆數 (預設不放大)")
+    parser.add_argument("--specs", nargs="+", default=DEFAULT_SPECS, help="要比較的索引規格")
+    args = parser.parse_args()
+
+    service = RAGService(data_dir=args.data_dir, granularities=("chunk",))
+    bundle = service._bundles.get("chunk")
+    if bundle is None or service.model is None:
+        print("需要可用的向量模型與 chunk 索引才能執行比較")
+        return
+
+    corpus = scale_corpus(np.asarray(bundle.embeddings, dtype='float32'), args.scale)
+    query_texts = build_query_texts(args.data_dir, args.queries)
+    queries = np.asarray(service.model.encode(query_texts), dtype='float32')
+    faiss.normalize_L2(queries)
+
+    # 基準：精確搜尋的結果
+    exact = faiss.IndexFlatIP(corpus.shape[1])
+    exact.add(corpus)
+    _, truth = exact.search(queries, args.top_k)
+
+    built: Dict[str, tuple] = {}
+    reports = [run_spec(spec, corpus, queries, truth, args.top_k, built) for spec in args.specs]
+
+    print("\n" + "=" * 100)
+    print(f"        📊 ANN 索引比較 (語料 {len(corpus)} 筆, 查詢 {len(queries)} 筆, k={args.top_k})")
+    print("=" * 100)
+    print(f"  {'規格':<32}{'recall@k':>10}{'p50 (ms)':>10}{'p99 (ms)':>10}"
+          f"{'索引 (MB)':>12}{'向量 (MB)':>12}{'建立 (s)':>10}")
+    for r in reports:
+        print(f"  {r['spec']:<32}{r['recall']:>10.1%}{r['p50_ms']:>10.3f}{r['p99_ms']:>10.3f}"
+              f"{r['index_mb']:>12.2f}{r['vectors_mb']:>12.2f}{r['build_s']:>10.2f}")
+    print("=" * 100)
+    print("  recall@k 以 flat (fp32) 的結果為基準，即壓縮 / 降維造成的準確度損失上限")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""
+編輯距離效能比較：原本的純 Python 實作 vs backend/utils/edit_distance.py
+
+以 MagicData-RAMC 風格的合成資料 (逐字 token，依 --error_rate 隨機替換 / 刪除 / 插入) 比較：
+- 距離：STTMetrics 原本的雙迴圈 vs Myers bit-parallel
+- S / D / I：評估腳本原本的完整 DP 表 + 回溯 vs 斜帶滾動陣列
+- 批次：batch_edit_ops() 單行程與多行程
+
+每個實作都先比對結果一致再計時。
+
+用法：
+    uv run scripts/bench_edit_distance.py
+    uv run scripts/bench_edit_distance.py --pairs 5000 --lengths 20 80 300 --error_rate 0.15 --processes 4
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+from typing import List, Tuple
+
+# 確保可以匯入 backend 模組
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.utils.edit_distance import batch_edit_ops, distance, edit_ops
+
+CHARS = "我們在上一份工作主要負責後端服務的效能優化與資料庫設計也參與過快取架構的規劃以及系統監控"
+
+
+# ── 原本的實作 (比較基準) ─────────────────────────────────────────────────────
+def legacy_distance(s1, s2) -> int:
+    if len(s1) < len(s2):
+        return legacy_distance(s2, s1)
+    if len(s2) == 0:
+        return len(s1)
+    previous_row = range(len(s2) + 1)
+    for i, c1 in enumerate(s1):
+        current_row = [i + 1]
+        for j, c2 in enumerate(s2):
+            insertions = previous_row[j + 1] + 1
+            deletions = current_row[j] + 1
+            substitutions = previous_row[j] + (c1 != c2)
+            current_row.append(min(insertions, deletions, substitutions))
+        previous_row = current_row
+    return previous_row[-1]
+
+
+def legacy_edit_ops(ref, hyp) -> Tuple[int, int, int]:
+    n, m = len(ref), len(hyp)
+    dp = [[0] * (m + 1) for _ in range(n + 1)]
+    for i in range(n + 1): dp[i][0] = i
+    for j in range(m + 1): dp[0][j] = j
+    for i in range(1, n + 1):
+        for j in range(1, m + 1):
+            if ref[i-1] == hyp[j-1]:
+                dp[i][j] = dp[i-1][j-1]
+            else:
+                dp[i][j] = 1 + min(dp[i-1][j-1], dp[i-1][j], dp[i][j-1])
+    sub = dele = ins = 0
+    i, j = n, m
+    while i > 0 or j > 0:
+        if i > 0 and j > 0 and ref[i-1] == hyp[j-1]:
+            i -= 1; j -= 1
+        elif i > 0 and j > 0 and dp[i][j] == dp[i-1][j-1] + 1:
+            sub += 1; i -= 1; j -= 1
+        elif i > 0 and dp[i][j] == dp[i-1][j] + 1:
+            dele += 1; i -= 1
+        else:
+            ins += 1; j -= 1
+    return sub, dele, ins
+
+
+# ── 合成資料 ───────────────────────────────────────────────────────────────────
+def make_pairs(count: int, length: int, error_rate: float, seed: int) -> List[Tuple[List[str], List[str]]]:
+    rng = random.Random(seed)
+    pairs = []
+    for _ in range(count):
+        ref = [rng.choice(CHARS) for _ in range(max(1, int(rng.gauss(length, length * 0.3))))]
+        hyp = []
+        for token in ref:
+            r = rng.random()
+            if r < error_rate / 3:
+                hyp.append(rng.choice(CHARS))          # 替換
+            elif r < error_rate * 2 / 3:
+                continue                               # 刪除
+            elif r < error_rate:
+                hyp.extend([token, rng.choice(CHARS)])  # 插入
+            else:
+                hyp.append(token)
+        pairs.append((ref, hyp))
+    return pairs
+
+
+def timed(fn, pairs) -> Tuple[float, list]:
+    start = time.perf_counter()
+    results = fn(pairs)
+    return time.perf_counter() - start, results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="編輯距離效能比較")
+    parser.add_argument("--pairs", type=int, default=2000, help="每種長度的樣本數 (預設 2000)")
+    parser.add_argument("--lengths", type=int, nargs="+", default=[20, 60, 200], help="平均 token 數")
+    parser.add_argument("--error_rate", type=float, default=0.1, help="合成的錯誤率 (預設 0.1)")
+    parser.add_argument("--processes", type=int, default=4, help="批次多行程的行程數")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rows = []
+    for length in args.lengths:
+        pairs = make_pairs(args.pairs, length, args.error_rate, args.seed)
+        t_old_d, old_d = timed(lambda ps: [legacy_distance(r, h) for r, h in ps], pairs)
+        t_new_d, new_d = timed(lambda ps: [distance(r, h) for r, h in ps], pairs)
+        t_old_o, old_o = timed(lambda ps: [legacy_edit_ops(r, h) for r, h in ps], pairs)
+        t_new_o, new_o = timed(lambda ps: [tuple(edit_ops(r, h)) for r, h in ps], pairs)
+        t_batch, batch_o = timed(lambda ps: batch_edit_ops(ps, processes=args.processes), pairs)
+        if old_d != new_d or old_o != new_o or old_o != [tuple(o) for o in batch_o]:
+            raise SystemExit(f"❌ 長度 {length}：新舊實作結果不一致")
+        rows.append((length, t_old_d, t_new_d, t_old_o, t_new_o, t_batch))
+        print(f"  ✅ 平均長度 {length} 完成 (結果一致)")
+
+    print("\n" + "=" * 96)
+    print(f"        📊 編輯距離比較 (每種長度 {args.pairs} 筆，錯誤率 {args.error_rate:.0%})")
+    print("=" * 96)
+    print(f"  {'長度':<6}{'距離 舊 (ms)':>14}{'距離 新 (ms)':>14}{'加速':>8}"
+          f"{'S/D/I 舊 (ms)':>16}{'S/D/I 新 (ms)':>16}{'加速':>8}{f'批次 x{args.processes} (ms)':>16}")
+    for length, t_old_d, t_new_d, t_old_o, t_new_o, t_batch in rows:
+        print(f"  {length:<6}{t_old_d * 1000:>14.0f}{t_new_d * 1000:>14.0f}{t_old_d / t_new_d:>7.1f}x"
+              f"{t_old_o * 1000:>16.0f}{t_new_o * 1000:>16.0f}{t_old_o / t_new_o:>7.1f}x{t_batch * 1000:>16.0f}")
+    print("=" * 96)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""
+RAG 檢索方式比較：dense / lexical (BM25) / hybrid (RRF 融合)
+以 chunk 粒度在 knowledge_base/ 上比較每次查詢的延遲與 recall@k
+
+查詢由知識庫自動產生：求職者回答中提到某個技術名詞 (key_concepts)，
+例如「我在專案裡用 Redis 做快取」；凡是 key_concepts 含有該名詞的區塊都視為相關。
+
+用法：
+    uv run scripts/bench_rag_hybrid.py --top_k 3 --queries 300
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import argparse
+from pathlib import Path
+from typing import Dict, List, Set, Tuple
+
+import numpy as np
+
+# 確保可以匯入 backend 模組
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.services.rag_service import RAGService, RETRIEVAL_METHODS
+
+TEMPLATES = [
+    "我在專案裡用過 {term}",
+    "{position} 面試時我會提到 {term} 的經驗",
+    "之前工作主要負責 {term} 相關的部分",
+]
+
+
+def build_queries(data_dir: str, limit: int, seed: int = 42) -> List[Tuple[str, str, str]]:
+    """回傳 [(查詢文字, 名詞, 職位)]"""
+    rng = random.Random(seed)
+    queries = []
+    for file in sorted(Path(data_dir).rglob("*.json")):
+        try:
+            with open(file, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except Exception:
+            continue
+        position = data.get("position", "")
+        for skill in data.get("skill_areas", []):
+            for term in skill.get("key_concepts", []):
+                template = rng.choice(TEMPLATES)
+                queries.append((template.format(term=term, position=position), term, position))
+    rng.shuffle(queries)
+    return queries[:limit]
+
+
+def chunk_key(chunk: dict) -> Tuple[str, str]:
+    return chunk.get("source", ""), chunk.get("area") or chunk.get("dimension", "")
+
+
+def relevant_chunks(metadata: List[dict]) -> Dict[str, Set[Tuple[str, str]]]:
+    """{名詞: key_concepts 含有該名詞的區塊}"""
+    table: Dict[str, Set[Tuple[str, str]]] = {}
+    for chunk in metadata:
+        for term in chunk.get("key_concepts", []):
+            table.setdefault(term, set()).add(chunk_key(chunk))
+    return table
+
+
+def run_method(service: RAGService, method: str, queries, relevant, top_k: int) -> dict:
+    latencies, recalls, hits = [], [], 0
+    for query, term, _ in queries:
+        start = time.perf_counter()
+        results = service.retrieve(query, top_k=top_k, mode="chunk", method=method)
+        latencies.append((time.perf_counter() - start) * 1000)
+
+        found = {chunk_key(r) for r in results}
+        gold = relevant.get(term, set())
+        overlap = len(found & gold)
+        recalls.append(overlap / min(top_k, len(gold)) if gold else 0.0)
+        hits += 1 if overlap else 0
+
+    return {
+        "method": method,
+        "p50_ms": float(np.percentile(latencies, 50)),
+        "p95_ms": float(np.percentile(latencies, 95)),
+        "recall": float(np.mean(recalls)),
+        "hit_rate": hits / len(queries) if queries else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="RAG dense / lexical / hybrid 檢索比較")
+    parser.add_argument("--data_dir", default="knowledge_base", help="知識庫資料夾")
+    parser.add_argument("--top_k", type=int, default=3, help="每次查詢回傳筆數 (預設 3)")
+    parser.add_argument("--queries", type=int, default=300, help="查詢數量 (預設 300)")
+    args = parser.parse_args()
+
+    service = RAGService(data_dir=args.data_dir, granularities=("chunk",))
+    queries = build_queries(args.data_dir, args.queries)
+    if not queries or "chunk" not in service._bundles:
+        print("知識庫中找不到可用的技術名詞，無法產生查詢")
+        return
+
+    relevant = relevant_chunks(service._bundles["chunk"].metadata)
+    methods = RETRIEVAL_METHODS if service.model is not None else ("lexical",)
+
+    # 暖機，避免第一次 encode 的初始化成本影響結果
+    for method in methods:
+        service.retrieve(queries[0][0], top_k=args.top_k, mode="chunk", method=method)
+
+    reports = [run_method(service, method, queries, relevant, args.top_k) for method in methods]
+
+    print("\n" + "=" * 64)
+    print(f"        📊 檢索方式比較 (chunk, n={len(queries)}, top_k={args.top_k})")
+    print("=" * 64)
+    print(f"  {'方式':<10}{'p50 (ms)':>10}{'p95 (ms)':>10}{'recall@k':>12}{'命中率':>10}")
+    for r in reports:
+        print(f"  {r['method']:<10}{r['p50_ms']:>10.2f}{r['p95_ms']:>10.2f}{r['recall']:>12.1%}{r['hit_rate']:>10.1%}")
+    print("=" * 64)
+
+
+if __name__ == "__main__":
+    main()
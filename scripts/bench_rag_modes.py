@@ -0,0 +1,96 @@
+"""
+RAG 檢索粒度比較
+比較 RAGService 的 "position" (整份職位) 與 "chunk" (技能領域/面試維度) 兩種模式：
+每次查詢的延遲、回傳結果大小 (JSON bytes)，以及 top-k 內是否命中正確職位
+
+查詢由知識庫自動產生：職位名稱 + 該職位某個情境題，模擬「職位 + 求職者回答」
+
+用法：
+    uv run scripts/bench_rag_modes.py --top_k 3 --queries 200
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import argparse
+from pathlib import Path
+from typing import List, Tuple
+
+import numpy as np
+
+# 確保可以匯入 backend 模組
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.services.rag_service import RAGService
+
+
+def build_queries(data_dir: str, limit: int, seed: int = 42) -> List[Tuple[str, str]]:
+    """回傳 [(查詢文字, 正確職位)]"""
+    rng = random.Random(seed)
+    queries = []
+    for file in sorted(Path(data_dir).rglob("*.json")):
+        try:
+            with open(file, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except Exception:
+            continue
+        position = data.get("position", "")
+        for skill in data.get("skill_areas", []):
+            scenarios = skill.get("example_scenarios", [])
+            if isinstance(scenarios, dict):
+                scenarios = scenarios.get("scenarios", [])
+            for scenario in scenarios:
+                queries.append((f"{position} {scenario}", position))
+    rng.shuffle(queries)
+    return queries[:limit]
+
+
+def run_mode(service: RAGService, mode: str, queries, top_k: int) -> dict:
+    latencies, sizes, hits = [], [], 0
+    for query, position in queries:
+        start = time.perf_counter()
+        results = service.retrieve(query, top_k=top_k, mode=mode)
+        latencies.append((time.perf_counter() - start) * 1000)
+        sizes.append(len(json.dumps(results, ensure_ascii=False).encode("utf-8")))
+        if any(r.get("position") == position for r in results):
+            hits += 1
+    return {
+        "mode": mode,
+        "p50_ms": float(np.percentile(latencies, 50)),
+        "p95_ms": float(np.percentile(latencies, 95)),
+        "avg_bytes": float(np.mean(sizes)),
+        "hit_rate": hits / len(queries) if queries else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="RAG position / chunk 模式比較")
+    parser.add_argument("--data_dir", default="knowledge_base", help="知識庫資料夾")
+    parser.add_argument("--top_k", type=int, default=3, help="每次查詢回傳筆數 (預設 3)")
+    parser.add_argument("--queries", type=int, default=200, help="查詢數量 (預設 200)")
+    args = parser.parse_args()
+
+    service = RAGService(data_dir=args.data_dir)
+    queries = build_queries(args.data_dir, args.queries)
+    if not queries:
+        print("知識庫中找不到可用的情境題，無法產生查詢")
+        return
+
+    # 暖機，避免第一次 encode 的初始化成本影響結果
+    service.retrieve(queries[0][0], top_k=args.top_k)
+
+    reports = [run_mode(service, mode, queries, args.top_k) for mode in ("position", "chunk")]
+
+    print("\n" + "=" * 64)
+    print(f"        📊 檢索粒度比較 (n={len(queries)}, top_k={args.top_k})")
+    print("=" * 64)
+    print(f"  {'模式':<10}{'p50 (ms)':>10}{'p95 (ms)':>10}{'平均大小 (bytes)':>18}{'職位命中率':>12}")
+    for r in reports:
+        print(f"  {r['mode']:<10}{r['p50_ms']:>10.2f}{r['p95_ms']:>10.2f}{r['avg_bytes']:>18.0f}{r['hit_rate']:>12.1%}")
+    print("=" * 64)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+RAG 啟動時間基準測試
+比較「冷啟動 (每次重新編碼整個知識庫)」與「熱啟動 (載入索引快照)」的初始化耗時
+
+用法：
+    uv run scripts/bench_rag_startup.py --repeat 3
+    uv run scripts/bench_rag_startup.py --engine rag_engine
+"""
+
+import os
+import sys
+import time
+import shutil
+import argparse
+import statistics
+import tempfile
+
+# 確保可以匯入 backend 模組
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def _load_factory(engine: str):
+    if engine == "rag_service":
+        from backend.services.rag_service import RAGService
+        return lambda **kw: RAGService(**kw)
+
+    sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+    from rag_engine import RAGEngine
+    return lambda **kw: RAGEngine(**kw)
+
+
+def _time_runs(factory, repeat: int, **kwargs) -> list:
+    timings = []
+    for i in range(repeat):
+        start = time.perf_counter()
+        factory(**kwargs)
+        elapsed = time.perf_counter() - start
+        timings.append(elapsed)
+        print(f"    run {i + 1}/{repeat}: {elapsed:.2f} 秒")
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="RAG 冷/熱啟動時間比較")
+    parser.add_argument("--engine", choices=["rag_service", "rag_engine"], default="rag_service")
+    parser.add_argument("--data_dir", default="knowledge_base", help="知識庫資料夾")
+    parser.add_argument("--repeat", type=int, default=3, help="每種模式重複次數 (預設 3)")
+    args = parser.parse_args()
+
+    factory = _load_factory(args.engine)
+
+    # 使用獨立的暫存快照目錄，避免污染正式的 index_cache/
+    index_dir = tempfile.mkdtemp(prefix="rag_bench_")
+    try:
+        common = {"data_dir": args.data_dir, "index_dir": index_dir}
+
+        print(f"\n[冷啟動] {args.engine}: 不使用快照，完整編碼知識庫")
+        cold = _time_runs(factory, args.repeat, use_cache=False, **common)
+
+        print(f"\n[建立快照] 執行一次並寫入快照...")
+        factory(use_cache=True, **common)
+
+        print(f"\n[熱啟動] {args.engine}: 載入索引快照")
+        warm = _time_runs(factory, args.repeat, use_cache=True, **common)
+    finally:
+        shutil.rmtree(index_dir, ignore_errors=True)
+
+    cold_avg = statistics.mean(cold)
+    warm_avg = statistics.mean(warm)
+
+    print("\n" + "=" * 50)
+    print("        📊 啟動時間比較")
+    print("=" * 50)
+    print(f"  引擎        : {args.engine}")
+    print(f"  冷啟動 平均 : {cold_avg:.2f} 秒 (最快 {min(cold):.2f})")
+    print(f"  熱啟動 平均 : {warm_avg:.2f} 秒 (最快 {min(warm):.2f})")
+    print(f"  節省時間    : {cold_avg - warm_avg:.2f} 秒 ({cold_avg / warm_avg:.1f}x)")
+    print("  (兩者皆包含 SentenceTransformer 模型載入時間)")
+    print("=" * 50)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+語音引擎池吞吐量比較：每次呼叫才建立合成器 (舊行為) vs 預先建立並重複使用的合成器池
+
+以 LocalSpeechEngine (sleep 模擬 Azure 的建立 / 合成 / 辨識延遲，不需網路) 模擬多場面試同時進行：
+每場面試跑數輪「STT 辨識回答 + TTS 合成下一題」，報告每秒完成輪數、每輪延遲 p50 / p95、
+排隊時間與逾時次數。
+
+用法：
+    uv run scripts/bench_speech_pool.py
+    uv run scripts/bench_speech_pool.py --sessions 1 4 8 16 32 --max_concurrency 8 --synthesizers 4
+    uv run scripts/bench_speech_pool.py --init_latency 0.4 --tts_latency 0.3 --stt_latency 0.6
+"""
+
+import os
+import sys
+import time
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from typing import List
+
+import numpy as np
+
+# 確保可以匯入 backend 模組
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.services.speech_pool import LocalSpeechEngine, SpeechDeadlineExceeded, SpeechPool
+
+QUESTION = "請分享您在上一份工作中最有挑戰性的經驗？"
+
+
+def run_sessions(pool: SpeechPool, sessions: int, turns: int) -> dict:
+    """sessions 場面試同時進行，各跑 turns 輪 STT + TTS"""
+    latencies: List[float] = []
+
+    def interview(_):
+        for _ in range(turns):
+            start = time.perf_counter()
+            try:
+                pool.recognize("answer.wav")
+                pool.synthesize(QUESTION)
+            except SpeechDeadlineExceeded:
+                continue
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=sessions) as executor:
+        list(executor.map(interview, range(sessions)))
+    elapsed = time.perf_counter() - start
+
+    stats = pool.stats()
+    return {
+        "turns_per_s": len(latencies) / elapsed,
+        "p50_ms": float(np.percentile(latencies, 50)) * 1000 if latencies else float("nan"),
+        "p95_ms": float(np.percentile(latencies, 95)) * 1000 if latencies else float("nan"),
+        "queue_p95_ms": stats["queue_wait_ms"]["p95"] or 0.0,
+        "timeouts": stats["queue_timeouts"] + stats["call_timeouts"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="語音引擎池吞吐量比較")
+    parser.add_argument("--sessions", type=int, nargs="+", default=[1, 4, 8, 16], help="同時進行的面試數")
+    parser.add_argument("--turns", type=int, default=5, help="每場面試的輪數 (預設 5)")
+    parser.add_argument("--max_concurrency", type=int, default=8, help="同時進行的語音工作上限")
+    parser.add_argument("--synthesizers", type=int, default=4, help="池中預先建立的合成器數")
+    parser.add_argument("--queue_timeout", type=float, default=30.0, help="排隊等待上限 (秒)")
+    parser.add_argument("--init_latency", type=float, default=0.2, help="模擬建立合成器 (連線) 的秒數")
+    parser.add_argument("--tts_latency", type=float, default=0.3, help="模擬單次合成的秒數")
+    parser.add_argument("--stt_latency", type=float, default=0.5, help="模擬單次辨識的秒數")
+    args = parser.parse_args()
+
+    engine = LocalSpeechEngine(args.init_latency, args.tts_latency, args.stt_latency)
+    modes = [("每次建立", 0), (f"池 x{args.synthesizers}", args.synthesizers)]
+
+    rows = []
+    for sessions in args.sessions:
+        for label, synthesizers in modes:
+            pool = SpeechPool(engine, max_concurrency=args.max_concurrency, synthesizers=synthesizers,
+                              queue_timeout=args.queue_timeout)
+            rows.append((sessions, label, run_sessions(pool, sessions, args.turns)))
+            print(f"  ✅ {sessions} 場 / {label} 完成")
+
+    print("\n" + "=" * 90)
+    print(f"        📊 語音引擎池比較 (上限 {args.max_concurrency}, 每場 {args.turns} 輪 STT + TTS)")
+    print("=" * 90)
+    print(f"  {'面試數':<8}{'模式':<12}{'輪/秒':>10}{'p50 (ms)':>12}{'p95 (ms)':>12}"
+          f"{'排隊 p95 (ms)':>16}{'逾時':>8}")
+    for sessions, label, r in rows:
+        print(f"  {sessions:<8}{label:<12}{r['turns_per_s']:>10.2f}{r['p50_ms']:>12.0f}{r['p95_ms']:>12.0f}"
+              f"{r['queue_p95_ms']:>16.0f}{r['timeouts']:>8}")
+    print("=" * 90)
+    print(f"  模擬延遲：建立合成器 {args.init_latency}s / 合成 {args.tts_latency}s / 辨識 {args.stt_latency}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""
+API 啟動時間基準測試
+
+1. 匯入時間：以 `python -X importtime -c "import backend.main"` 統計各模組的匯入耗時
+2. 首位元組時間 (TTFB)：啟動 uvicorn 子行程，量測從行程啟動到 `GET /` 第一次成功回應的時間
+   (改用 --path /readyz 則量測到暖機完成、可接流量為止的時間)
+
+用法：
+    uv run scripts/bench_startup.py --repeat 3
+    uv run scripts/bench_startup.py --skip-server --top 30
+    uv run scripts/bench_startup.py --path /readyz
+"""
+
+import os
+import re
+import sys
+import time
+import socket
+import argparse
+import statistics
+import subprocess
+from collections import defaultdict
+from typing import Dict, List, Tuple
+
+import requests
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_IMPORTTIME_RE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def measure_imports(module: str = "backend.main") -> Tuple[float, List[Tuple[str, int, int]]]:
+    """
+    Returns:
+        (總匯入秒數, [(模組, 自身 µs, 累計 µs)])
+    """
+    start = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT, capture_output=True, text=True,
+    )
+    elapsed = time.perf_counter() - start
+    if proc.returncode != 0:
+        print(proc.stderr[-2000:])
+        raise RuntimeError(f"匯入 {module} 失敗")
+
+    rows = []
+    for line in proc.stderr.splitlines():
+        match = _IMPORTTIME_RE.match(line)
+        if match:
+            rows.append((match.group(4), int(match.group(1)), int(match.group(2))))
+    return elapsed, rows
+
+
+def group_by_package(rows) -> Dict[str, int]:
+    """依最上層套件加總自身匯入時間 (µs)"""
+    totals: Dict[str, int] = defaultdict(int)
+    for name, self_us, _ in rows:
+        totals[name.split(".")[0]] += self_us
+    return totals
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def measure_ttfb(path: str = "/", timeout: float = 120.0) -> float:
+    """啟動 uvicorn，回傳從行程啟動到 path 第一次回應 200 的秒數"""
+    port = _free_port()
+    start = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "backend.main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        while time.perf_counter() - start < timeout:
+            if proc.poll() is not None:
+                raise RuntimeError("uvicorn 行程提前結束")
+            try:
+                if requests.get(f"http://127.0.0.1:{port}{path}", timeout=1).status_code == 200:
+                    return time.perf_counter() - start
+            except requests.exceptions.RequestException:
+                time.sleep(0.05)
+        raise TimeoutError(f"{timeout} 秒內未取得回應")
+    finally:
+        proc.terminate()
+        try:
+            proc.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="API 匯入時間與首位元組時間")
+    parser.add_argument("--repeat", type=int, default=3, help="TTFB 重複次數 (預設 3)")
+    parser.add_argument("--top", type=int, default=15, help="列出最慢的前 N 個模組 (預設 15)")
+    parser.add_argument("--path", default="/", help="TTFB 量測的路徑 (預設 /)")
+    parser.add_argument("--skip-server", action="store_true", help="只量測匯入時間")
+    args = parser.parse_args()
+
+    elapsed, rows = measure_imports()
+    backend_rows = sorted((r for r in rows if r[0].startswith("backend")), key=lambda r: r[2], reverse=True)
+    packages = sorted(group_by_package(rows).items(), key=lambda kv: kv[1], reverse=True)
+
+    print("\n" + "=" * 64)
+    print("        📊 匯入時間 (import backend.main)")
+    print("=" * 64)
+    print(f"  子行程總耗時 : {elapsed:.2f} 秒 (含直譯器啟動)")
+    print(f"\n  {'backend 模組':<44}{'累計 (ms)':>12}")
+    for name, _, cumulative in backend_rows[:args.top]:
+        print(f"  {name:<44}{cumulative / 1000:>12.1f}")
+    print(f"\n  {'套件 (自身時間加總)':<44}{'(ms)':>12}")
+    for name, total in packages[:args.top]:
+        print(f"  {name:<44}{total / 1000:>12.1f}")
+
+    if not args.skip_server:
+        timings = []
+        for i in range(args.repeat):
+            t = measure_ttfb(args.path)
+            timings.append(t)
+            print(f"    TTFB run {i + 1}/{args.repeat}: {t:.2f} 秒")
+        print("\n" + "=" * 64)
+        print(f"        ⏱️ 首位元組時間 (GET {args.path})")
+        print("=" * 64)
+        print(f"  平均 : {statistics.mean(timings):.2f} 秒 (最快 {min(timings):.2f})")
+    print("=" * 64)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""
+預錄固定語句的語音 (部署前執行)
+
+把 backend/services/canned_audio.py 的 CANNED_PHRASES 依每個語音合成成靜態音檔，
+並寫出 static/audio/canned/manifest.json；文字沒變的語句會沿用既有檔案。
+
+用法：
+    uv run scripts/build_canned_audio.py
+    uv run scripts/build_canned_audio.py --voices zh-TW-YunJheNeural,zh-TW-HsiaoChenNeural --force
+"""
+
+import os
+import sys
+import time
+import argparse
+
+# 確保可以匯入 backend 模組
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.config import settings
+from backend.services.canned_audio import CANNED_PHRASES, build_bundle, configured_voices
+from backend.services.speech_service import speech_service
+
+
+def main():
+    parser = argparse.ArgumentParser(description="預錄固定語句的語音")
+    parser.add_argument("--voices", default="", help="逗號分隔的語音名稱 (預設 CANNED_AUDIO_VOICES / TTS_VOICE)")
+    parser.add_argument("--output", default=os.path.join(settings.AUDIO_DIR, "canned"), help="輸出目錄")
+    parser.add_argument("--force", action="store_true", help="忽略既有檔案全部重新合成")
+    args = parser.parse_args()
+
+    voices = [v.strip() for v in args.voices.split(",") if v.strip()] or configured_voices()
+
+    def synthesize(text, voice, output_path):
+        print(f"  🎙️ [{voice}] {text}")
+        speech_service.text_to_speech(text, output_path, voice=voice)
+
+    start = time.time()
+    result = build_bundle(args.output, voices, synthesize, force=args.force)
+    total_bytes = sum(e["bytes"] for entries in result["manifest"]["voices"].values() for e in entries.values())
+
+    print("\n" + "=" * 60)
+    print("        📦 預錄語音建置完成")
+    print("=" * 60)
+    print(f"  語音       : {', '.join(voices)}")
+    print(f"  語句數     : {len(CANNED_PHRASES)} x {len(voices)}")
+    print(f"  新合成     : {result['rendered']}")
+    print(f"  沿用       : {result['reused']}")
+    print(f"  總大小     : {total_bytes / 1024:.1f} KB")
+    print(f"  耗時       : {time.time() - start:.2f} 秒")
+    print(f"  manifest   : {os.path.join(args.output, 'manifest.json')}")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,24 +1,25 @@
 """
 STT Evaluation Script - Azure Speech API + 本地 Common Voice 資料集
 使用 pydub + ffmpeg 處理 mp3，送 Azure STT 評估
+
+辨識由 backend/services/stt_eval_runner.py 平行執行 (限速、檢查點、辨識結果快取)，
+中斷後重新執行同一指令會從檢查點接續。
+
+用法：
+    uv run scripts/evaluate_local.py --samples 500 --workers 8 --rate 10
+    uv run scripts/evaluate_local.py --backend local   # 離線替身，不呼叫 Azure
 """
 
 import os
-import gc
 import csv
-import time
-import tempfile
 import argparse
 import unicodedata
 from dataclasses import dataclass
-from typing import List, Tuple
+from typing import List
 
 import numpy as np
 import pydub
-import azure.cognitiveservices.speech as speechsdk
-import editdistance
 import matplotlib.pyplot as plt
-import pandas as pd
 
 # ── 設定 ──────────────────────────────────────────────────────────────────────
 import sys
@@ -26,11 +27,8 @@ import sys
 # 確保可以匯入 backend 模組
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from backend.config import settings
-
-# 現在你可以直接使用金鑰，而不必擔心外洩
-AZURE_SPEECH_KEY = settings.AZURE_SPEECH_KEY
-AZURE_SPEECH_REGION = settings.AZURE_SPEECH_REGION
+from backend.services.stt_eval_runner import EVAL_ENGINES, SCORE_COLUMNS, EvalSegment, STTEvalRunner, build_engine
+from backend.utils.wav_io import WavAudio
 
 DATASET_ROOT = r"common_voice_zh_TW\cv-corpus-24.0-2025-12-05\zh-TW"
 CLIPS_DIR    = os.path.join(DATASET_ROOT, "clips")
@@ -73,85 +71,12 @@ def tokenize(text: str) -> List[str]:
     return [t for t in tokens if t]
 
 
-# ── 錯誤分析 ───────────────────────────────────────────────────────────────────
-def compute_edit_ops(ref: List[str], hyp: List[str]) -> Tuple[int, int, int]:
-    n, m = len(ref), len(hyp)
-    dp = [[0] * (m + 1) for _ in range(n + 1)]
-    for i in range(n + 1): dp[i][0] = i
-    for j in range(m + 1): dp[0][j] = j
-    for i in range(1, n + 1):
-        for j in range(1, m + 1):
-            if ref[i-1] == hyp[j-1]:
-                dp[i][j] = dp[i-1][j-1]
-            else:
-                dp[i][j] = 1 + min(dp[i-1][j-1], dp[i-1][j], dp[i][j-1])
-    sub = dele = ins = 0
-    i, j = n, m
-    while i > 0 or j > 0:
-        if i > 0 and j > 0 and ref[i-1] == hyp[j-1]:
-            i -= 1; j -= 1
-        elif i > 0 and j > 0 and dp[i][j] == dp[i-1][j-1] + 1:
-            sub += 1; i -= 1; j -= 1
-        elif i > 0 and dp[i][j] == dp[i-1][j] + 1:
-            dele += 1; i -= 1
-        else:
-            ins += 1; j -= 1
-    return sub, dele, ins
-
-
-def compute_cer(ref_tokens: List[str], hyp_tokens: List[str]) -> float:
-    if not ref_tokens:
-        return 0.0
-    return editdistance.eval(ref_tokens, hyp_tokens) / len(ref_tokens)
-
-
-# ── MP3 轉 WAV ────────────────────────────────────────────────────────────────
-def mp3_to_wav_tempfile(mp3_path: str) -> str:
+# ── MP3 轉 PCM ────────────────────────────────────────────────────────────────
+def load_mp3(mp3_path: str) -> WavAudio:
+    """mp3 -> 16 kHz mono PCM (記憶體內，不寫暫存檔)"""
     audio = pydub.AudioSegment.from_mp3(mp3_path)
-    audio = audio.set_frame_rate(16000).set_channels(1)
-    tmp = tempfile.NamedTemporaryFile(suffix=".wav", delete=False)
-    audio.export(tmp.name, format="wav")
-    tmp.close()
-    return tmp.name
-
-
-# ── Azure STT ─────────────────────────────────────────────────────────────────
-def transcribe_azure(mp3_path: str) -> str:
-    speech_config = speechsdk.SpeechConfig(
-        subscription=AZURE_SPEECH_KEY,
-        region=AZURE_SPEECH_REGION
-    )
-    speech_config.speech_recognition_language = "zh-TW"
-
-    wav_path = mp3_to_wav_tempfile(mp3_path)
-    text = ""
-
-    audio_config = speechsdk.AudioConfig(filename=wav_path)
-    recognizer = speechsdk.SpeechRecognizer(
-        speech_config=speech_config,
-        audio_config=audio_config
-    )
-    result = recognizer.recognize_once()
-
-    if result.reason == speechsdk.ResultReason.RecognizedSpeech:
-        text = result.text
-    elif result.reason == speechsdk.ResultReason.NoMatch:
-        text = ""
-    else:
-        print(f"  [錯誤] {result.reason}")
-        text = ""
-
-    # 釋放 SDK 資源後再刪暫存檔
-    del recognizer
-    del audio_config
-    gc.collect()
-    time.sleep(0.2)
-    try:
-        os.unlink(wav_path)
-    except Exception:
-        pass
-
-    return text
+    audio = audio.set_frame_rate(16000).set_channels(1).set_sample_width(2)
+    return WavAudio(audio.raw_data, 16000, 1, 2)
 
 
 # ── 讀取 TSV ───────────────────────────────────────────────────────────────────
@@ -167,66 +92,29 @@ def load_tsv(tsv_path: str, max_samples: int) -> List[dict]:
 
 
 # ── 主要評估流程 ───────────────────────────────────────────────────────────────
-def evaluate(max_samples: int) -> List[EvalResult]:
+def evaluate(runner: STTEvalRunner, max_samples: int) -> List[EvalResult]:
     print(f"讀取 test.tsv，前 {max_samples} 筆...")
     rows = load_tsv(TSV_PATH, max_samples)
     print(f"共載入 {len(rows)} 筆，開始評估...\n")
 
-    results = []
-
+    segments = []
     for i, row in enumerate(rows):
         file_name = row["path"]
-        reference = normalize_text(row["sentence"])
         mp3_path  = os.path.join(CLIPS_DIR, file_name)
 
-        print(f"[{i+1}/{len(rows)}] {file_name}")
-        print(f"  REF: {reference}")
-
         if not os.path.exists(mp3_path):
-            print(f"  [跳過] 找不到音訊: {mp3_path}\n")
+            print(f"  [跳過] 找不到音訊: {mp3_path}")
             continue
 
-        hypothesis = normalize_text(transcribe_azure(mp3_path))
-        print(f"  HYP: {hypothesis}")
-
-        ref_tokens = tokenize(reference)
-        hyp_tokens = tokenize(hypothesis)
-
-        cer         = compute_cer(ref_tokens, hyp_tokens)
-        sub, d, ins = compute_edit_ops(ref_tokens, hyp_tokens)
-
-        print(f"  CER: {cer:.2%}  SUB:{sub} DEL:{d} INS:{ins}\n")
-
-        results.append(EvalResult(
+        segments.append(EvalSegment(
             sample_id=i+1,
-            file_name=file_name,
-            reference=reference,
-            hypothesis=hypothesis,
-            cer=cer,
-            substitutions=sub,
-            deletions=d,
-            insertions=ins
+            key=file_name,
+            reference=normalize_text(row["sentence"]),
+            load_audio=lambda p=mp3_path: load_mp3(p),
+            meta={"file_name": file_name},
         ))
 
-        time.sleep(0.1)
-
-    return results
-
-
-# ── 輸出 CSV ───────────────────────────────────────────────────────────────────
-def save_csv(results: List[EvalResult], path: str):
-    rows = [{
-        "sample_id":     r.sample_id,
-        "file_name":     r.file_name,
-        "reference":     r.reference,
-        "hypothesis":    r.hypothesis,
-        "cer":           round(r.cer, 4),
-        "substitutions": r.substitutions,
-        "deletions":     r.deletions,
-        "insertions":    r.insertions,
-    } for r in results]
-    pd.DataFrame(rows).to_csv(path, index=False, encoding="utf-8-sig")
-    print(f"✅ CSV 已儲存: {path}")
+    return [EvalResult(**row) for row in runner.run(segments)]
 
 
 # ── 視覺化 ─────────────────────────────────────────────────────────────────────
@@ -312,11 +200,24 @@ def main():
     parser.add_argument("--samples",    type=int, default=100, help="評估筆數 (預設 100)")
     parser.add_argument("--output_csv", default="results.csv", help="CSV 輸出路徑")
     parser.add_argument("--output_dir", default="output",      help="圖表輸出資料夾")
+    parser.add_argument("--backend",    default="azure", choices=list(EVAL_ENGINES), help="辨識引擎 (預設 azure)")
+    parser.add_argument("--workers",    type=int, default=4, help="同時辨識的筆數 (預設 4)")
+    parser.add_argument("--rate",       type=float, default=5.0, help="每秒最多送出幾次辨識 (預設 5，0 = 不限)")
+    parser.add_argument("--cache",      default=None, help="辨識結果快取 (預設 <output_dir>/stt_cache.jsonl)")
+    parser.add_argument("--fresh",      action="store_true", help="忽略檢查點重新評估")
     args = parser.parse_args()
 
-    results = evaluate(args.samples)
+    engine, engine_config = build_engine(args.backend)
+    runner = STTEvalRunner(
+        engine, engine_config, args.output_csv,
+        columns=["sample_id", "file_name"] + SCORE_COLUMNS,
+        normalize=normalize_text, tokenize=tokenize,
+        cache_path=args.cache or os.path.join(args.output_dir, "stt_cache.jsonl"),
+        workers=args.workers, rate=args.rate, resume=not args.fresh,
+    )
+    results = evaluate(runner, args.samples)
     print_summary(results)
-    save_csv(results, args.output_csv)
+    print(f"\n✅ CSV 已儲存: {args.output_csv}")
     plot_results(results, args.output_dir)
 
 
@@ -1,27 +1,26 @@
 """
 STT Evaluation Script - Azure Speech API + MagicData-RAMC
 流程：讀 TXT 時間戳記 → 切割 WAV → Azure STT → 簡繁轉換 → 計算 CER
+
+辨識由 backend/services/stt_eval_runner.py 平行執行 (限速、檢查點、辨識結果快取)，
+中斷後重新執行同一指令會從檢查點接續。
+
+用法：
+    uv run scripts/evaluate_magicdata.py --samples 1000 --workers 8 --rate 10
+    uv run scripts/evaluate_magicdata.py --backend local   # 離線替身，不呼叫 Azure
+    uv run scripts/evaluate_magicdata.py --fresh           # 忽略檢查點重新評估 (快取仍會使用)
 """
 
 import os
-import gc
-import csv
 import re
-import time
-import tempfile
 import argparse
 import unicodedata
 from dataclasses import dataclass
 from typing import List, Tuple
 
 import numpy as np
-import wave
-import struct
 import opencc
-import azure.cognitiveservices.speech as speechsdk
-import editdistance
 import matplotlib.pyplot as plt
-import pandas as pd
 
 # ── 設定 ──────────────────────────────────────────────────────────────────────
 import sys
@@ -29,11 +28,8 @@ import sys
 # 確保可以匯入 backend 模組
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from backend.config import settings
-
-# 現在你可以直接使用金鑰，而不必擔心外洩
-AZURE_SPEECH_KEY = settings.AZURE_SPEECH_KEY
-AZURE_SPEECH_REGION = settings.AZURE_SPEECH_REGION
+from backend.services.stt_eval_runner import EVAL_ENGINES, SCORE_COLUMNS, EvalSegment, STTEvalRunner, build_engine
+from backend.utils.wav_io import MappedWav
 
 # DATASET_ROOT = r"test_dataset"
 # WAV_DIR      = os.path.join(DATASET_ROOT, "WAV")
@@ -89,38 +85,6 @@ def tokenize(text: str) -> List[str]:
     return [t for t in tokens if t]
 
 
-# ── 錯誤分析 ───────────────────────────────────────────────────────────────────
-def compute_edit_ops(ref: List[str], hyp: List[str]) -> Tuple[int, int, int]:
-    n, m = len(ref), len(hyp)
-    dp = [[0] * (m + 1) for _ in range(n + 1)]
-    for i in range(n + 1): dp[i][0] = i
-    for j in range(m + 1): dp[0][j] = j
-    for i in range(1, n + 1):
-        for j in range(1, m + 1):
-            if ref[i-1] == hyp[j-1]:
-                dp[i][j] = dp[i-1][j-1]
-            else:
-                dp[i][j] = 1 + min(dp[i-1][j-1], dp[i-1][j], dp[i][j-1])
-    sub = dele = ins = 0
-    i, j = n, m
-    while i > 0 or j > 0:
-        if i > 0 and j > 0 and ref[i-1] == hyp[j-1]:
-            i -= 1; j -= 1
-        elif i > 0 and j > 0 and dp[i][j] == dp[i-1][j-1] + 1:
-            sub += 1; i -= 1; j -= 1
-        elif i > 0 and dp[i][j] == dp[i-1][j] + 1:
-            dele += 1; i -= 1
-        else:
-            ins += 1; j -= 1
-    return sub, dele, ins
-
-
-def compute_cer(ref_tokens: List[str], hyp_tokens: List[str]) -> float:
-    if not ref_tokens:
-        return 0.0
-    return editdistance.eval(ref_tokens, hyp_tokens) / len(ref_tokens)
-
-
 # ── 讀取 TXT transcript ────────────────────────────────────────────────────────
 NOISE_TAGS = {"[ENS]", "[NPS]", "[LAUGHTER]", "[SONANT]", "[MUSIC]", "[SYSTEM]", "[*]"}
 
@@ -166,68 +130,14 @@ def parse_txt(txt_path: str) -> List[dict]:
 
 
 # ── 切割 WAV ───────────────────────────────────────────────────────────────────
-def slice_wav(wav_path: str, start: float, end: float) -> str:
-    """
-    從長 WAV 切出指定時間段，存成暫存 WAV 檔，回傳路徑
-    """
-    with wave.open(wav_path, "rb") as wf:
-        framerate   = wf.getframerate()
-        n_channels  = wf.getnchannels()
-        sampwidth   = wf.getsampwidth()
-
-        start_frame = int(start * framerate)
-        end_frame   = int(end * framerate)
-        n_frames    = end_frame - start_frame
-
-        wf.setpos(start_frame)
-        frames = wf.readframes(n_frames)
-
-    tmp = tempfile.NamedTemporaryFile(suffix=".wav", delete=False)
-    with wave.open(tmp.name, "wb") as out:
-        out.setnchannels(n_channels)
-        out.setsampwidth(sampwidth)
-        out.setframerate(framerate)
-        out.writeframes(frames)
-    tmp.close()
-    return tmp.name
-
-
-# ── Azure STT ─────────────────────────────────────────────────────────────────
-def transcribe_azure(wav_path: str) -> str:
-    speech_config = speechsdk.SpeechConfig(
-        subscription=AZURE_SPEECH_KEY,
-        region=AZURE_SPEECH_REGION
-    )
-    speech_config.speech_recognition_language = "zh-TW"
-
-    audio_config = speechsdk.AudioConfig(filename=wav_path)
-    recognizer   = speechsdk.SpeechRecognizer(
-        speech_config=speech_config,
-        audio_config=audio_config
-    )
-    result = recognizer.recognize_once()
-
-    text = ""
-    if result.reason == speechsdk.ResultReason.RecognizedSpeech:
-        text = result.text
-    elif result.reason == speechsdk.ResultReason.NoMatch:
-        text = ""
-    else:
-        print(f"    [錯誤] {result.reason}")
-        text = ""
-
-    del recognizer
-    del audio_config
-    gc.collect()
-    time.sleep(0.2)
-
-    return text
+# 每個長 WAV 以 MappedWav 映射一次 (標頭只解析一次)，片段是映射區上的 view，不讀檔、不寫暫存檔
 
 
 # ── 主要評估流程 ───────────────────────────────────────────────────────────────
-def evaluate(max_samples: int, per_file: int = 10) -> List[EvalResult]:
+def collect_segments(max_samples: int, per_file: int = 10) -> Tuple[List[EvalSegment], List[MappedWav]]:
     txt_files = sorted([f for f in os.listdir(TXT_DIR) if f.endswith(".txt")])
-    results   = []
+    segments  = []
+    wavs      = []
     sample_id = 0
 
     for txt_file in txt_files:
@@ -242,21 +152,21 @@ def evaluate(max_samples: int, per_file: int = 10) -> List[EvalResult]:
             print(f"[跳過] 找不到 WAV: {wav_path}")
             continue
 
-        print(f"\n📂 {base}")
-        entries = parse_txt(txt_path)
+        entries = sorted(parse_txt(txt_path), key=lambda e: e["start"])
 
         # 每個檔案等距抽樣
         if per_file > 0 and len(entries) > per_file:
             step = max(1, len(entries) // per_file)
             entries = entries[::step][:per_file]
 
-        file_count = 0
+        wav = MappedWav(wav_path)
+        wavs.append(wav)
+        # 依時間順序走一遍，每段都是 wav 映射區上的 view
         for entry in entries:
             if sample_id >= max_samples:
                 break
 
             sample_id += 1
-            file_count += 1
             start     = entry["start"]
             end       = entry["end"]
             reference = normalize_text(entry["transcript"])
@@ -264,61 +174,28 @@ def evaluate(max_samples: int, per_file: int = 10) -> List[EvalResult]:
             if not reference:
                 continue
 
-            print(f"  [{sample_id}/{max_samples}] {start:.2f}s~{end:.2f}s")
-            print(f"    REF: {reference}")
-
-            tmp_wav   = slice_wav(wav_path, start, end)
-            hypothesis = normalize_text(transcribe_azure(tmp_wav))
-
-            try:
-                os.unlink(tmp_wav)
-            except Exception:
-                pass
-
-            print(f"    HYP: {hypothesis}")
-
-            ref_tokens = tokenize(reference)
-            hyp_tokens = tokenize(hypothesis)
-
-            cer         = compute_cer(ref_tokens, hyp_tokens)
-            sub, d, ins = compute_edit_ops(ref_tokens, hyp_tokens)
-
-            print(f"    CER: {cer:.2%}  SUB:{sub} DEL:{d} INS:{ins}")
-
-            results.append(EvalResult(
+            audio = wav.segment(start, end)
+            segments.append(EvalSegment(
                 sample_id=sample_id,
-                file_id=base,
-                start_time=start,
-                end_time=end,
+                key=f"{base}@{start:.2f}-{end:.2f}",
                 reference=reference,
-                hypothesis=hypothesis,
-                cer=cer,
-                substitutions=sub,
-                deletions=d,
-                insertions=ins
+                load_audio=lambda a=audio: a,
+                meta={"file_id": base, "start_time": start, "end_time": end},
             ))
 
-            time.sleep(0.1)
-
-    return results
+    return segments, wavs
 
 
-# ── 輸出 CSV ───────────────────────────────────────────────────────────────────
-def save_csv(results: List[EvalResult], path: str):
-    rows = [{
-        "sample_id":     r.sample_id,
-        "file_id":       r.file_id,
-        "start_time":    r.start_time,
-        "end_time":      r.end_time,
-        "reference":     r.reference,
-        "hypothesis":    r.hypothesis,
-        "cer":           round(r.cer, 4),
-        "substitutions": r.substitutions,
-        "deletions":     r.deletions,
-        "insertions":    r.insertions,
-    } for r in results]
-    pd.DataFrame(rows).to_csv(path, index=False, encoding="utf-8-sig")
-    print(f"\n✅ CSV 已儲存: {path}")
+def evaluate(runner: STTEvalRunner, max_samples: int, per_file: int = 10) -> List[EvalResult]:
+    segments, wavs = collect_segments(max_samples, per_file)
+    print(f"共 {len(segments)} 段 (來自 {len(wavs)} 個音檔)，開始評估...")
+    try:
+        rows = runner.run(segments)
+    finally:
+        del segments  # 釋放片段 view 後才能解除映射
+        for wav in wavs:
+            wav.close()
+    return [EvalResult(**row) for row in rows]
 
 
 # ── 視覺化 ─────────────────────────────────────────────────────────────────────
@@ -405,11 +282,24 @@ def main():
     parser.add_argument("--output_csv", default="magicdata_results.csv", help="CSV 輸出路徑")
     parser.add_argument("--output_dir", default="output", help="圖表輸出資料夾")
     parser.add_argument("--per_file",   type=int, default=10, help="每個音檔抽幾筆 (預設 10)")
+    parser.add_argument("--backend",    default="azure", choices=list(EVAL_ENGINES), help="辨識引擎 (預設 azure)")
+    parser.add_argument("--workers",    type=int, default=4, help="同時辨識的片段數 (預設 4)")
+    parser.add_argument("--rate",       type=float, default=5.0, help="每秒最多送出幾次辨識 (預設 5，0 = 不限)")
+    parser.add_argument("--cache",      default=None, help="辨識結果快取 (預設 <output_dir>/stt_cache.jsonl)")
+    parser.add_argument("--fresh",      action="store_true", help="忽略檢查點重新評估")
     args = parser.parse_args()
 
-    results = evaluate(args.samples, args.per_file)
+    engine, engine_config = build_engine(args.backend)
+    runner = STTEvalRunner(
+        engine, engine_config, args.output_csv,
+        columns=["sample_id", "file_id", "start_time", "end_time"] + SCORE_COLUMNS,
+        normalize=normalize_text, tokenize=tokenize,
+        cache_path=args.cache or os.path.join(args.output_dir, "stt_cache.jsonl"),
+        workers=args.workers, rate=args.rate, resume=not args.fresh,
+    )
+    results = evaluate(runner, args.samples, args.per_file)
     print_summary(results)
-    save_csv(results, args.output_csv)
+    print(f"\n✅ CSV 已儲存: {args.output_csv}")
     plot_results(results, args.output_dir)
 
 
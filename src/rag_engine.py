@@ -1,16 +1,39 @@
 # rag_engine.py
 import os
+import sys
 import json
 import hashlib
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 from pathlib import Path
-from sentence_transformers import SentenceTransformer
-import faiss
 import numpy as np
 import redis
 from pydantic import BaseModel, ValidationError
 import logging
 
+# 確保可以匯入 backend 模組
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.utils.index_bundle import (
+    DEFAULT_INDEX_DIR,
+    EMBEDDINGS_FILE,
+    IndexBundle,
+    hash_knowledge_files,
+    load_bundle,
+    make_manifest,
+    save_bundle,
+)
+from backend.utils.ann_index import (
+    build_projected_index,
+    is_lossy,
+    parse_index_spec,
+    project_queries,
+    search as search_index,
+    storage_dtype,
+)
+from backend.utils.lazy import lazy_import
+
+sentence_transformers = lazy_import("sentence_transformers", optional=True)
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
@@ -18,24 +41,43 @@ class KnowledgeItem(BaseModel):
     type: str  # 'skill' or 'dimension'
     position: str
     industry: str
-    area: str = None
-    importance: str = None
+    area: Optional[str] = None
+    importance: Optional[str] = None
     concepts: List[str] = []
     evaluation: List[str] = []
     scenarios: List[str] = []
     difficulty_levels: Dict[str, str] = {}  # {'easy': '...', 'medium': '...', 'hard': '...'}
-    dimension: str = None
+    dimension: Optional[str] = None
     stages: List[str] = []
-    description: str = None
+    description: Optional[str] = None
+
+MODEL_NAME = 'paraphrase-multilingual-MiniLM-L12-v2'
+RERANK_FACTOR = 4  # 有損索引先取 top_k * 4 個候選，再以原始向量重新排序
 
 class RAGEngine:
-    def __init__(self, data_dir="knowledge_base", cache_ttl=3600):
+    def __init__(self, data_dir="knowledge_base", cache_ttl=3600, index_dir=None, use_cache=True, index_spec=None,
+                 result_cache=True):
         self.data_dir = Path(data_dir)
-        self.model = SentenceTransformer('paraphrase-multilingual-MiniLM-L12-v2')
+        if sentence_transformers is None:
+            raise ImportError("sentence-transformers 套件未安裝")
+        self.model = sentence_transformers.SentenceTransformer(MODEL_NAME)
         self.items: List[KnowledgeItem] = []
         self.index = None
-        self.redis = redis.Redis(host='localhost', port=6379, db=0, decode_responses=True)
+        self.projection = None  # 索引使用的 PCA 投影 (只有設定 pca_dim 時才有)；查詢向量需先經過它
+        # 有損索引 (PCA / fp16 / sq8 / PQ) 重新排序用的原始向量：以 mmap 開啟快照中的 embeddings.npy
+        # (storage_dtype)，查詢時只讀取候選列；精確索引或不寫快照 (use_cache=False) 時為 None
+        self._rerank_vectors = None
+        # 預先計算的分區：職位 / 產業 / 難度 -> 該分區內的 item 編號
+        self.position_ids: Dict[str, np.ndarray] = {}
+        self.industry_ids: Dict[str, np.ndarray] = {}
+        self.difficulty_ids: Dict[str, np.ndarray] = {}
+        self._job_title_cache: Dict[str, List[str]] = {}
+        # 查詢結果快取 (Redis)；result_cache=False 時每次都實際檢索 (基準測試用)
+        self.redis = redis.Redis(host='localhost', port=6379, db=0, decode_responses=True) if result_cache else None
         self.cache_ttl = cache_ttl
+        self.bundle_dir = Path(index_dir or DEFAULT_INDEX_DIR) / "rag_engine"
+        self.use_cache = use_cache
+        self.index_spec = parse_index_spec(index_spec)  # FAISS 索引規格，見 backend.utils.ann_index
         self._load_and_index()
 
     def _load_and_index(self):
@@ -43,24 +85,57 @@ class RAGEngine:
             logger.warning(f"知識庫不存在: {self.data_dir}")
             return
 
+        file_hashes = hash_knowledge_files(self.data_dir)
+        manifest = make_manifest(file_hashes, model=MODEL_NAME, granularity="item",
+                                 index=self.index_spec.build_params())
+
+        if self.use_cache:
+            bundle = load_bundle(self.bundle_dir, manifest)
+            if bundle is not None:
+                self.items = [KnowledgeItem(**row) for row in bundle.metadata]
+                self.index = bundle.index
+                self.projection = bundle.projection
+                self._rerank_vectors = bundle.embeddings if is_lossy(self.index_spec) else None
+                self._build_partitions()
+                logger.info(f"已從索引快照載入: {len(self.items)} 項")
+                return
+
         texts = []
-        for file in self.data_dir.rglob("*.json"):
+        sources = []
+        for rel in file_hashes:
+            file = self.data_dir / rel
             try:
                 with open(file, 'r', encoding='utf-8') as f:
                     data = json.load(f)
                     for item in self._parse_knowledge(data):
                         self.items.append(item)
                         texts.append(self._item_to_text(item))
+                        sources.append(rel)
             except Exception as e:
                 logger.error(f"載入失敗 {file}: {e}")
 
         if texts:
-            embeddings = self.model.encode(texts, show_progress_bar=True)
-            dim = embeddings.shape[1]
-            self.index = faiss.IndexFlatIP(dim)  # 內積相似度
-            self.index.add(embeddings.astype(np.float32))
+            embeddings = np.asarray(self.model.encode(texts, show_progress_bar=True), dtype=np.float32)
+            self.index, self.projection = build_projected_index(embeddings, self.index_spec)  # 內積相似度
+            self._build_partitions()
             logger.info(f"索引建立完成: {len(self.items)} 項")
 
+            if self.use_cache:
+                try:
+                    save_bundle(self.bundle_dir, IndexBundle(
+                        index=self.index,
+                        embeddings=embeddings.astype(storage_dtype(self.index_spec)),
+                        metadata=[item.dict() for item in self.items],
+                        texts=texts,
+                        sources=sources,
+                        manifest=manifest,
+                        projection=self.projection,
+                    ))
+                    if is_lossy(self.index_spec):
+                        self._rerank_vectors = np.load(self.bundle_dir / EMBEDDINGS_FILE, mmap_mode="r")
+                except Exception as e:
+                    logger.error(f"索引快照寫入失敗: {e}")
+
     def _parse_knowledge(self, data: Dict) -> List[KnowledgeItem]:
         items = []
         pos = data.get("position", "")
@@ -106,31 +181,99 @@ class RAGEngine:
             return f"{item.area} {' '.join(item.concepts)} {' '.join(item.evaluation)}"
         return f"{item.dimension} {item.description} {' '.join(item.stages)}"
 
+    def _build_partitions(self):
+        """依職位、產業與難度建立 item 編號分區，過濾查詢只在該分區內搜尋索引"""
+        positions: Dict[str, List[int]] = {}
+        industries: Dict[str, List[int]] = {}
+        difficulties: Dict[str, List[int]] = {}
+        for idx, item in enumerate(self.items):
+            positions.setdefault(item.position, []).append(idx)
+            industries.setdefault(item.industry, []).append(idx)
+            for level in item.difficulty_levels:
+                difficulties.setdefault(level, []).append(idx)
+
+        def _to_arrays(groups):
+            return {k: np.asarray(v, dtype=np.int64) for k, v in groups.items()}
+
+        self.position_ids = _to_arrays(positions)
+        self.industry_ids = _to_arrays(industries)
+        self.difficulty_ids = _to_arrays(difficulties)
+        self._job_title_cache = {}
+
+    def _match_positions(self, job_title: str) -> List[str]:
+        """找出與 job_title 互相包含的職位名稱 (與舊版的比對規則相同)，結果會快取"""
+        key = job_title.lower()
+        if key not in self._job_title_cache:
+            self._job_title_cache[key] = [
+                pos for pos in self.position_ids
+                if key in pos.lower() or pos.lower() in key
+            ]
+        return self._job_title_cache[key]
+
+    def _candidate_ids(self, job_title: str, industry: str = None) -> np.ndarray:
+        """取得 job_title (與可選的產業) 對應的 item 編號"""
+        groups = [self.position_ids[pos] for pos in self._match_positions(job_title)]
+        if not groups:
+            return np.empty(0, dtype=np.int64)
+        ids = np.unique(np.concatenate(groups))
+        if industry is not None:
+            ids = np.intersect1d(ids, self.industry_ids.get(industry, np.empty(0, dtype=np.int64)))
+        return ids
+
+    def _search_partition(self, q_emb: np.ndarray, ids: np.ndarray, top_k: int) -> List[tuple]:
+        """
+        以 FAISS 索引只在指定分區內搜尋 (IDSelectorBatch) 並取前 top_k，回傳 [(item 編號, 分數)]
+
+        有損索引會多取 RERANK_FACTOR 倍的候選，再以快照中的原始向量計算精確內積重新排序
+        """
+        if top_k <= 0 or ids.size == 0:
+            return []
+        rerank = self._rerank_vectors is not None
+        k = min(top_k * RERANK_FACTOR if rerank else top_k, int(ids.size))
+        queries = project_queries(q_emb[None, :], self.projection)
+        hits = self._index_hits(queries, ids, k)
+        if len(hits) < k:
+            # IVF / HNSW 在很小的分區內可能找不到足夠的鄰居，改以完整搜尋補足
+            hits = self._index_hits(queries, ids, k, exhaustive=True)
+        if rerank and hits:
+            candidates = np.sort(np.asarray([idx for idx, _ in hits], dtype=np.int64))
+            scores = np.asarray(self._rerank_vectors[candidates], dtype=np.float32) @ q_emb
+            hits = sorted(zip(candidates.tolist(), scores.tolist()), key=lambda hit: -hit[1])
+        return hits[:top_k]
+
+    def _index_hits(self, queries: np.ndarray, ids: np.ndarray, k: int, exhaustive: bool = False) -> List[tuple]:
+        D, I = search_index(self.index, queries, k, nprobe=self.index_spec.nprobe,
+                            ef_search=self.index_spec.ef_search, ids=ids, exhaustive=exhaustive)
+        return [(int(idx), float(score)) for idx, score in zip(I[0], D[0]) if idx >= 0]
+
+    def _encode_query(self, query: str) -> np.ndarray:
+        return np.asarray(self.model.encode([query]), dtype=np.float32)[0]
+
     def _cache_key(self, query: str) -> str:
         return f"rag:{hashlib.md5(query.encode()).hexdigest()}"
 
-    def get_relevant(self, query: str, job_title: str, top_k: int = 2) -> List[Dict]:
-        cache_key = self._cache_key(query)
-        cached = self.redis.get(cache_key)
+    def get_relevant(self, query: str, job_title: str, top_k: int = 2, industry: str = None) -> List[Dict]:
+        """搜尋 job_title 對應職位中最相關的知識
+
+        以 IDSelectorBatch 將索引搜尋限制在符合職位 (及可選產業) 的分區；只要分區內有足夠項目，
+        一定回傳 top_k 筆 (不再有舊版 top_k * 3 過濾後不足或為空的情況)。
+        """
+        cache_key = self._cache_key(f"{query}|{job_title}|{industry}|{top_k}")
+        cached = self.redis.get(cache_key) if self.redis is not None else None
         if cached:
             return json.loads(cached)
 
-        if not self.index:
+        if self.index is None:
             return []
 
-        q_emb = self.model.encode([query])
-        D, I = self.index.search(q_emb.astype(np.float32), top_k * 3)
+        ids = self._candidate_ids(job_title, industry)
+        if ids.size == 0:
+            return []
 
-        results = []
-        for idx, score in zip(I[0], D[0]):
-            if score < 0.3: continue
-            item = self.items[idx]
-            if job_title.lower() in item.position.lower() or item.position.lower() in job_title.lower():
-                results.append(item.dict())
-                if len(results) >= top_k:
-                    break
+        hits = self._search_partition(self._encode_query(query), ids, top_k)
+        results = [self.items[idx].dict() for idx, _ in hits]
 
-        if results:
+        if results and self.redis is not None:
             self.redis.setex(cache_key, self.cache_ttl, json.dumps(results))
         return results
     
@@ -141,6 +284,8 @@ class RAGEngine:
     def get_relevant_knowledge_by_difficulty(self, query: str, job_title: str, difficulty: str = "medium", top_k: int = 2) -> List[Dict]:
         """根據難度級別搜尋相關知識
         
+        先在「職位 ∩ 具有該難度標籤」的分區中搜尋，不足 top_k 時再以同職位的其他項目補足。
+        
         Args:
             query: 搜尋關鍵詞
             job_title: 職位名稱
@@ -150,34 +295,37 @@ class RAGEngine:
         Returns:
             包含難度級別資訊的知識項目列表
         """
-        cache_key = self._cache_key(f"{query}:{difficulty}")
-        cached = self.redis.get(cache_key)
+        cache_key = self._cache_key(f"{query}|{job_title}|{difficulty}|{top_k}")
+        cached = self.redis.get(cache_key) if self.redis is not None else None
         if cached:
             return json.loads(cached)
 
-        if not self.index:
+        if self.index is None:
+            return []
+
+        ids = self._candidate_ids(job_title)
+        if ids.size == 0:
             return []
 
-        q_emb = self.model.encode([query])
-        D, I = self.index.search(q_emb.astype(np.float32), top_k * 3)
+        q_emb = self._encode_query(query)
+        tagged = np.intersect1d(ids, self.difficulty_ids.get(difficulty, np.empty(0, dtype=np.int64)))
+        hits = self._search_partition(q_emb, tagged, top_k)
+        if len(hits) < top_k:
+            rest = np.setdiff1d(ids, tagged)
+            hits += self._search_partition(q_emb, rest, top_k - len(hits))
 
         results = []
-        for idx, score in zip(I[0], D[0]):
-            if score < 0.3: 
-                continue
+        for idx, _ in hits:
             item = self.items[idx]
-            if job_title.lower() in item.position.lower() or item.position.lower() in job_title.lower():
-                result_dict = item.dict()
-                
-                # 如果有難度級別資訊，加入難度相關的提示
-                if item.difficulty_levels and difficulty in item.difficulty_levels:
-                    result_dict["difficulty_hint"] = item.difficulty_levels[difficulty]
-                    result_dict["current_difficulty"] = difficulty
-                
-                results.append(result_dict)
-                if len(results) >= top_k:
-                    break
+            result_dict = item.dict()
+
+            # 如果有難度級別資訊，加入難度相關的提示
+            if item.difficulty_levels and difficulty in item.difficulty_levels:
+                result_dict["difficulty_hint"] = item.difficulty_levels[difficulty]
+                result_dict["current_difficulty"] = difficulty
 
-        if results:
+            results.append(result_dict)
+
+        if results and self.redis is not None:
             self.redis.setex(cache_key, self.cache_ttl, json.dumps(results))
-        return results
\ No newline at end of file
+        return results
@@ -1,6 +1,84 @@
 # tests/conftest.py
+import hashlib
+import json
 import sys
 import os
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
 
 # 將 src 目錄加入系統路徑，這樣測試程式才能 import src 裡的模組
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
\ No newline at end of file
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+
+class HashEncoder:
+    """
+    測試用的向量模型：每個字元雜湊到固定維度後累加 (相同字元越多越相似)
+
+    encoded 記錄實際被編碼的文字數，可用來判斷是否重新編碼了知識庫
+    """
+    dim = 64
+
+    def __init__(self, name=None):
+        self.encoded = 0
+
+    def encode(self, texts, **kwargs):
+        self.encoded += len(texts)
+        vectors = np.zeros((len(texts), self.dim), dtype='float32')
+        for row, text in enumerate(texts):
+            for ch in text:
+                vectors[row, int(hashlib.md5(ch.encode()).hexdigest(), 16) % self.dim] += 1
+        return vectors
+
+
+@pytest.fixture
+def hash_encoder(monkeypatch):
+    """讓 RAGService 載入 HashEncoder 取代 SentenceTransformer"""
+    import backend.services.rag_service as rag_module
+    monkeypatch.setattr(rag_module, "sentence_transformers", SimpleNamespace(SentenceTransformer=HashEncoder))
+    return HashEncoder
+
+
+SAMPLE_POSITIONS = {
+    "tech/後端工程師.json": {
+        "position": "後端工程師", "industry": "科技",
+        "skill_areas": [
+            {"area": "資料庫", "importance": "核心", "key_concepts": ["SQL", "索引", "交易"],
+             "evaluation_points": ["能設計正規化的資料表"], "example_scenarios": ["查詢變慢時如何調校"]},
+            {"area": "API 設計", "importance": "核心", "key_concepts": ["REST", "FastAPI"],
+             "evaluation_points": ["能設計版本化的 API"], "example_scenarios": ["設計訂單 API"]},
+        ],
+        "interview_dimensions": [{"dimension": "問題解決", "description": "拆解問題的能力", "stages": ["技術面"]}],
+    },
+    "tech/前端工程師.json": {
+        "position": "前端工程師", "industry": "科技",
+        "skill_areas": [
+            {"area": "JavaScript", "importance": "核心", "key_concepts": ["閉包", "事件迴圈"],
+             "evaluation_points": ["理解非同步流程"], "example_scenarios": ["處理表單驗證"]},
+        ],
+        "interview_dimensions": [],
+    },
+    "finance/會計師.json": {
+        "position": "會計師", "industry": "金融",
+        "skill_areas": [
+            {"area": "財務報表", "importance": "核心", "key_concepts": ["資產負債表", "現金流量"],
+             "evaluation_points": ["能解讀報表"], "example_scenarios": ["查核異常帳目"]},
+        ],
+        "interview_dimensions": [{"dimension": "細心程度", "description": "核對數字的習慣", "stages": ["實務面"]}],
+    },
+}
+
+
+def write_knowledge_base(root, positions=SAMPLE_POSITIONS):
+    for rel, data in positions.items():
+        path = root / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+    return root
+
+
+@pytest.fixture
+def knowledge_dir(tmp_path):
+    """含三個職位檔案的小型知識庫"""
+    return write_knowledge_base(tmp_path / "knowledge_base")
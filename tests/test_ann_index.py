@@ -0,0 +1,67 @@
+# tests/test_ann_index.py
+import faiss
+import numpy as np
+import pytest
+from backend.utils.ann_index import (
+    INDEX_TYPES,
+    Projection,
+    build_index,
+    build_projected_index,
+    parse_index_spec,
+    project_queries,
+    search,
+)
+
+
+class TestParseIndexSpec:
+    def test_string_with_options(self):
+        spec = parse_index_spec("ivf_flat,nlist=64,nprobe=4")
+        assert (spec.kind, spec.nlist, spec.nprobe) == ("ivf_flat", 64, 4)
+
+    def test_search_params_not_in_build_params(self):
+        params = parse_index_spec("hnsw,ef_search=8").build_params()
+        assert "ef_search" not in params and "nprobe" not in params
+
+    def test_unknown_kind(self):
+        with pytest.raises(ValueError):
+            parse_index_spec("lsh")
+
+
+class TestBuildIndex:
+    @pytest.fixture
+    def vectors(self):
+        rng = np.random.default_rng(0)
+        x = rng.normal(size=(2000, 32)).astype('float32')
+        faiss.normalize_L2(x)
+        return x
+
+    @pytest.mark.parametrize("kind", INDEX_TYPES)
+    def test_finds_itself(self, vectors, kind):
+        index = build_index(vectors, f"{kind},nlist=16")
+        assert index.ntotal == len(vectors)
+        _, I = search(index, vectors[:20], 1, nprobe=16, ef_search=64)
+        assert (I[:, 0] == np.arange(20)).mean() >= 0.9
+
+    @pytest.mark.parametrize("storage", ["fp16", "sq8"])
+    def test_compressed_storage(self, vectors, storage):
+        index = build_index(vectors, f"flat,storage={storage}")
+        _, I = search(index, vectors[:20], 1)
+        assert (I[:, 0] == np.arange(20)).all()
+
+    def test_pca_projection(self, vectors, tmp_path):
+        index, projection = build_projected_index(vectors, "flat,pca_dim=16")
+        assert projection.out_dim == 16 and index.d == 16
+
+        projection.save(tmp_path / "pca.npz")
+        loaded = Projection.load(tmp_path / "pca.npz")
+        queries = project_queries(vectors[:5], loaded)
+        np.testing.assert_allclose(np.linalg.norm(queries, axis=1), 1.0, rtol=1e-5)
+
+    @pytest.mark.parametrize("spec", ["flat", "flat,storage=sq8", "ivf_flat,nlist=16,nprobe=1", "hnsw,ef_search=4"])
+    def test_filtered_search(self, vectors, spec):
+        index = build_index(vectors, spec)
+        ids = np.array([5, 40, 300, 1200, 1999])
+        _, I = search(index, vectors[:3], 5, ids=ids, exhaustive=True)
+        assert all(sorted(row) == sorted(ids) for row in I.tolist())
+        _, I = search(index, vectors[[40]], 2, ids=ids)
+        assert I[0, 0] == 40 and set(I[0].tolist()) <= set(ids.tolist()) | {-1}
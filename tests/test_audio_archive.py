@@ -0,0 +1,288 @@
+# tests/test_audio_archive.py
+import importlib
+import os
+import threading
+import time
+import wave
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+
+for _key in ("AZURE_SUBSCRIPTION_KEY", "AZURE_ENDPOINT", "AZURE_SPEECH_KEY", "AZURE_SPEECH_REGION"):
+    os.environ.setdefault(_key, "test")
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from backend.database import AudioArchiveEntry, Base, InterviewSession
+from backend.services.audio_archive import ArchiveIndex, AudioArchive
+from backend.services.audio_retention import compact_legacy, enforce_archive_quota, enforce_directory_quota
+from backend.services.speech_pool import LocalSpeechEngine, SpeechPool
+from backend.utils import audio_codec
+from backend.utils.wav_io import MappedWav, pcm_to_wav, read_wav
+
+ONE_SECOND = b"\1\0" * 16000  # 16 kHz / 16-bit / mono
+
+
+class TestWavIO:
+    def test_round_trip(self):
+        audio = read_wav(pcm_to_wav(ONE_SECOND, 16000))
+        assert audio.pcm == ONE_SECOND
+        assert (audio.sample_rate, audio.channels, audio.sample_width) == (16000, 1, 2)
+        assert audio.seconds == pytest.approx(1.0)
+
+    def test_not_wav(self):
+        with pytest.raises(wave.Error):
+            read_wav(b"not a wav file at all")
+
+    def test_recognize_from_memory(self):
+        pool = SpeechPool(LocalSpeechEngine(init_latency=0, stt_latency=0, transcript="您好"), synthesizers=0)
+        assert pool.recognize_pcm(read_wav(pcm_to_wav(ONE_SECOND, 16000))) == "您好"
+        assert pool.stats()["stt"] == 1
+
+
+class TestMappedWav:
+    @pytest.fixture
+    def wav_path(self, tmp_path):
+        pcm = bytes(range(256)) * 250  # 2 秒 16 kHz / 16-bit / mono
+        path = tmp_path / "long.wav"
+        path.write_bytes(pcm_to_wav(pcm, 16000))
+        return str(path), pcm
+
+    def test_segments_match_read_wav(self, wav_path):
+        path, pcm = wav_path
+        with MappedWav(path) as wav:
+            assert (wav.sample_rate, wav.channels, wav.sample_width) == (16000, 1, 2)
+            assert wav.seconds == pytest.approx(len(pcm) / 32000)
+            first, second = wav.segments([(0.0, 0.5), (0.25, 1.0)])
+            assert isinstance(first.pcm, memoryview)
+            assert bytes(first.pcm) == pcm[:16000]
+            assert bytes(second.pcm) == pcm[8000:32000]
+            assert second.seconds == pytest.approx(0.75)
+            del first, second
+
+    def test_clamps_to_file(self, wav_path):
+        path, pcm = wav_path
+        with MappedWav(path) as wav:
+            assert bytes(wav.segment(1.5, 10.0).pcm) == pcm[48000:]
+            assert len(wav.segment(5.0, 6.0).pcm) == 0
+
+    def test_not_wav(self, tmp_path):
+        path = tmp_path / "bad.wav"
+        path.write_bytes(b"not a wav file at all")
+        with pytest.raises(wave.Error):
+            MappedWav(str(path))
+
+    def test_close_while_view_is_held(self, wav_path):
+        path, pcm = wav_path
+        wav = MappedWav(path)
+        audio = wav.segment(0.0, 0.1)
+        wav.close()
+        assert bytes(audio.pcm) == pcm[:3200]
+
+
+class TestCodec:
+    def test_falls_back_to_wav_without_ffmpeg(self, monkeypatch):
+        monkeypatch.setattr(audio_codec, "ffmpeg_path", lambda: None)
+        wav = pcm_to_wav(ONE_SECOND, 16000)
+        assert audio_codec.encode(wav, "flac") == (wav, ".wav", "wav")
+
+    def test_unknown_codec(self):
+        with pytest.raises(ValueError):
+            audio_codec.encode(b"", "mp3")
+
+
+class TestAudioArchive:
+    @pytest.fixture
+    def archive(self, tmp_path):
+        archive = AudioArchive(str(tmp_path / "saved_audio"))
+        yield archive
+        archive.close()
+
+    def test_submit_returns_before_write(self, archive, monkeypatch):
+        gate = threading.Event()
+        original = archive.store
+        monkeypatch.setattr(archive, "store", lambda *args: (gate.wait(5), original(*args)))
+
+        path = archive.submit("s1", b"RIFF....")
+        assert os.path.basename(path).startswith("s1_") and path.endswith(".wav")
+        assert not os.path.exists(path)
+        assert archive.stats()["pending"] == 1
+
+        gate.set()
+        assert archive.flush(timeout=5)
+        with open(path, "rb") as f:
+            assert f.read() == b"RIFF...."
+        assert archive.stats()["written"] == 1
+
+    def test_failed_write_is_counted(self, archive, tmp_path):
+        # 目錄位置被同名檔案占用，寫檔失敗
+        (tmp_path / "saved_audio").write_bytes(b"")
+        archive.submit("s1", b"data")
+        assert archive.flush(timeout=5)
+        stats = archive.stats()
+        assert stats["failed"] == 1 and stats["written"] == 0
+
+    def test_full_queue_drops_without_blocking(self, tmp_path, monkeypatch):
+        archive = AudioArchive(str(tmp_path / "saved_audio"), max_pending=1)
+        started, gate = threading.Event(), threading.Event()
+        original = archive.store
+        monkeypatch.setattr(archive, "store", lambda *args: (started.set(), gate.wait(5), original(*args)))
+        try:
+            first = archive.submit("s1", b"x")
+            assert started.wait(5)
+            # 背景執行緒卡在第一個檔案，佇列只放得下一個，其餘直接放棄
+            paths = [archive.submit("s1", b"x") for _ in range(3)]
+            assert first is not None and paths[0] is not None and paths[1:] == [None, None]
+            stats = archive.stats()
+            assert stats["submitted"] == 2 and stats["dropped"] == 2
+        finally:
+            gate.set()
+            archive.close()
+
+    def test_close_drains_queue(self, archive):
+        paths = [archive.submit("s1", b"x" * 10) for _ in range(5)]
+        archive.close()
+        assert all(os.path.exists(p) for p in paths)
+        assert archive.stats()["bytes_written"] == 50
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    return sessionmaker(bind=engine)
+
+
+class TestRetention:
+    @pytest.fixture
+    def archive(self, tmp_path, db):
+        archive = AudioArchive(str(tmp_path / "saved_audio"), codec="wav", index=ArchiveIndex(db))
+        yield archive
+        archive.close()
+
+    def _answer(self, archive, db, session_id="s1"):
+        path = archive.submit(session_id, pcm_to_wav(ONE_SECOND, 16000))
+        assert archive.flush(timeout=5)
+        with db() as s:
+            s.add(InterviewSession(id=session_id, user_id="u1", job_title="後端工程師",
+                                   history=[{"question": "請自我介紹", "answer": "您好", "audio_path": path}]))
+            s.commit()
+        return path
+
+    def test_indexed_by_session_and_resolvable(self, archive, db):
+        path = self._answer(archive, db)
+        assert archive.resolve(path) == os.path.abspath(path)
+        assert [e["original_path"] for e in archive.index.for_session("s1")] == [os.path.abspath(path)]
+        # 相對路徑 (舊 history) 也查得到
+        assert archive.resolve(os.path.relpath(path)) == os.path.abspath(path)
+
+    def test_size_quota_expires_lru_and_marks_history(self, archive, db):
+        old = self._answer(archive, db, "s1")
+        new = self._answer(archive, db, "s2")
+        archive.resolve(new)  # s2 較近期被存取
+        size = os.path.getsize(new)
+
+        result = enforce_archive_quota(archive, max_bytes=size, max_age_days=0)
+        assert result == {"expired": 1, "freed_bytes": size}
+        assert not os.path.exists(old)
+        assert archive.resolve(old) is None
+        assert archive.resolve(new) is not None
+        with db() as s:
+            assert s.get(InterviewSession, "s1").history[0]["audio_expired"] is True
+            assert "audio_expired" not in s.get(InterviewSession, "s2").history[0]
+
+    def test_age_quota(self, archive, db):
+        path = self._answer(archive, db)
+        result = enforce_archive_quota(archive, max_bytes=0, max_age_days=30,
+                                       now=datetime.utcnow() + timedelta(days=31))
+        assert result["expired"] == 1
+        assert archive.resolve(path) is None
+        with db() as s:
+            assert s.query(AudioArchiveEntry).one().expired_at is not None
+
+    def test_locate_distinguishes_pending_from_expired(self, tmp_path, db, monkeypatch):
+        # flac 歸檔時 .wav 路徑從不存在，寫完前既沒有檔案也沒有索引
+        archive = AudioArchive(str(tmp_path / "saved_audio"), codec="flac", index=ArchiveIndex(db))
+        gate = threading.Event()
+        original = archive.store
+        monkeypatch.setattr(archive, "store", lambda *args: (gate.wait(5), original(*args)))
+        try:
+            path = archive.submit("s1", pcm_to_wav(ONE_SECOND, 16000))
+            assert archive.locate(path) == ("pending", None)
+            gate.set()
+            assert archive.flush(timeout=5)
+            state, stored = archive.locate(path)
+            assert state == "ready" and os.path.exists(stored)
+
+            enforce_archive_quota(archive, max_bytes=0, max_age_days=30, now=datetime.utcnow() + timedelta(days=31))
+            assert archive.locate(path) == ("expired", None)
+            assert archive.locate(str(tmp_path / "saved_audio" / "nope.wav")) == ("missing", None)
+        finally:
+            gate.set()
+            archive.close()
+
+    def test_compact_legacy_wav(self, archive):
+        os.makedirs(archive.directory)
+        legacy = os.path.join(archive.directory, "s9_1700000000_abcde.wav")
+        with open(legacy, "wb") as f:
+            f.write(pcm_to_wav(ONE_SECOND, 16000))
+        assert compact_legacy(archive) == 1
+        assert compact_legacy(archive) == 0
+        assert archive.index.for_session("s9")[0]["codec"] == "wav"
+        assert archive.resolve(legacy) == os.path.abspath(legacy)
+
+    def test_question_audio_quota(self, tmp_path):
+        now = time.time()
+        for i, age_days in enumerate([10, 3, 2, 1]):
+            path = tmp_path / f"q_s1_{i}.mp3"
+            path.write_bytes(b"x" * 100)
+            os.utime(path, (now - age_days * 86400, now - age_days * 86400))
+        (tmp_path / "other.mp3").write_bytes(b"x" * 100)
+
+        result = enforce_directory_quota(str(tmp_path), "q_*.mp3", max_bytes=200, max_age_days=7, now=now)
+        assert result == {"removed": 2, "freed_bytes": 200}
+        assert sorted(p.name for p in tmp_path.iterdir()) == ["other.mp3", "q_s1_2.mp3", "q_s1_3.mp3"]
+
+
+class TestAnswerAudioEndpoint:
+    @pytest.fixture
+    def client(self, tmp_path, monkeypatch):
+        from fastapi import FastAPI
+        from fastapi.testclient import TestClient
+        module = importlib.import_module("backend.api.interview_router")
+
+        archive = AudioArchive(str(tmp_path / "saved_audio"))
+        gate = threading.Event()
+        original = archive.store
+        monkeypatch.setattr(archive, "store", lambda *args: (gate.wait(5), original(*args)))
+        path = archive.submit("s1", pcm_to_wav(ONE_SECOND, 16000))
+        session = SimpleNamespace(history=[{"question": "請自我介紹", "answer": "您好", "audio_path": path}])
+        monkeypatch.setattr(module, "get_session", lambda sid: session)
+        monkeypatch.setattr(module, "locate_audio_path", archive.locate)
+
+        app = FastAPI()
+        app.include_router(module.router)
+        yield TestClient(app), archive, gate
+        gate.set()
+        archive.close()
+
+    def test_pending_then_ready(self, client):
+        client, archive, gate = client
+        response = client.get("/answer_audio/s1/0")
+        assert response.status_code == 425 and response.headers["retry-after"] == "1"
+
+        gate.set()
+        assert archive.flush(timeout=5)
+        response = client.get("/answer_audio/s1/0")
+        assert response.status_code == 200 and response.content.startswith(b"RIFF")
+
+    def test_missing_file_is_not_reported_as_expired(self, client):
+        client, archive, gate = client
+        gate.set()
+        assert archive.flush(timeout=5)
+        for name in os.listdir(archive.directory):
+            os.remove(os.path.join(archive.directory, name))
+        assert client.get("/answer_audio/s1/0").status_code == 404
@@ -0,0 +1,55 @@
+# tests/test_canned_audio.py
+import json
+import os
+
+import pytest
+
+for _key in ("AZURE_SUBSCRIPTION_KEY", "AZURE_ENDPOINT", "AZURE_SPEECH_KEY", "AZURE_SPEECH_REGION"):
+    os.environ.setdefault(_key, "test")
+
+from backend.services.canned_audio import CannedAudio, build_bundle
+
+PHRASES = {"not_heard": "抱歉，我沒有聽清楚。", "bye": "辛苦了。"}
+VOICES = ["voice-a", "voice-b"]
+
+
+@pytest.fixture
+def calls():
+    return []
+
+
+@pytest.fixture
+def synthesize(calls):
+    def _synthesize(text, voice, path):
+        calls.append((text, voice))
+        with open(path, "wb") as f:
+            f.write(text.encode("utf-8"))
+    return _synthesize
+
+
+class TestCannedAudio:
+    def test_build_and_resolve(self, tmp_path, synthesize, calls):
+        result = build_bundle(str(tmp_path), VOICES, synthesize, phrases=PHRASES)
+        assert result["rendered"] == 4 and len(calls) == 4
+
+        canned = CannedAudio(str(tmp_path))
+        url = canned.url_for("辛苦了。", voice="voice-b")
+        assert url.startswith("/audio/canned/voice-b/bye-")
+        assert os.path.exists(os.path.join(str(tmp_path), url[len("/audio/canned/"):]))
+        assert canned.url_for("不在清單裡", voice="voice-a") is None
+        assert canned.url_for("辛苦了。", voice="voice-c") is None
+
+    def test_rebuild_reuses_unchanged_and_prunes_stale(self, tmp_path, synthesize, calls):
+        build_bundle(str(tmp_path), ["voice-a"], synthesize, phrases=PHRASES)
+        calls.clear()
+        changed = dict(PHRASES, bye="今天辛苦了。")
+        result = build_bundle(str(tmp_path), ["voice-a"], synthesize, phrases=changed)
+        assert result["reused"] == 1 and calls == [("今天辛苦了。", "voice-a")]
+        assert len(os.listdir(tmp_path / "voice-a")) == 2
+
+        canned = CannedAudio(str(tmp_path))
+        assert canned.url_for("辛苦了。", voice="voice-a") is None
+        assert canned.url_for("今天辛苦了。", voice="voice-a") is not None
+
+    def test_missing_manifest(self, tmp_path):
+        assert CannedAudio(str(tmp_path)).url_for("辛苦了。", voice="voice-a") is None
@@ -0,0 +1,80 @@
+# tests/test_edit_distance.py
+import random
+
+import pytest
+
+from backend.services.stt_metrics import STTMetrics
+from backend.utils.edit_distance import EditOps, batch_distance, batch_edit_ops, distance, edit_ops
+
+
+def full_table_ops(ref, hyp):
+    """評估腳本原本的實作：完整 DP 表 + 回溯"""
+    n, m = len(ref), len(hyp)
+    dp = [[0] * (m + 1) for _ in range(n + 1)]
+    for i in range(n + 1):
+        dp[i][0] = i
+    for j in range(m + 1):
+        dp[0][j] = j
+    for i in range(1, n + 1):
+        for j in range(1, m + 1):
+            if ref[i - 1] == hyp[j - 1]:
+                dp[i][j] = dp[i - 1][j - 1]
+            else:
+                dp[i][j] = 1 + min(dp[i - 1][j - 1], dp[i - 1][j], dp[i][j - 1])
+    sub = dele = ins = 0
+    i, j = n, m
+    while i > 0 or j > 0:
+        if i > 0 and j > 0 and ref[i - 1] == hyp[j - 1]:
+            i, j = i - 1, j - 1
+        elif i > 0 and j > 0 and dp[i][j] == dp[i - 1][j - 1] + 1:
+            sub, i, j = sub + 1, i - 1, j - 1
+        elif i > 0 and dp[i][j] == dp[i - 1][j] + 1:
+            dele, i = dele + 1, i - 1
+        else:
+            ins, j = ins + 1, j - 1
+    return dp[n][m], (sub, dele, ins)
+
+
+def random_pairs(count, alphabet="abcd", max_len=15, seed=0):
+    rng = random.Random(seed)
+    return [("".join(rng.choice(alphabet) for _ in range(rng.randint(0, max_len))),
+             "".join(rng.choice(alphabet) for _ in range(rng.randint(0, max_len))))
+            for _ in range(count)]
+
+
+class TestEditDistance:
+    @pytest.mark.parametrize("ref, hyp, expected", [
+        ("", "", 0), ("abc", "", 3), ("", "ab", 2), ("kitten", "sitting", 3),
+        ("下一題", "下一天", 1), ("我想應徵後端工程師", "我想應徵前端工程師的職位", 4),
+    ])
+    def test_distance(self, ref, hyp, expected):
+        assert distance(ref, hyp) == expected
+        assert distance(hyp, ref) == expected
+
+    def test_long_sequences(self):
+        # 超過 64 位元的 pattern
+        ref = "資料庫" * 100
+        hyp = "資料褲" * 90
+        assert distance(ref, hyp) == full_table_ops(ref, hyp)[0]
+        assert tuple(edit_ops(ref, hyp)) == full_table_ops(ref, hyp)[1]
+
+    def test_matches_full_table_backtrace(self):
+        for ref, hyp in random_pairs(3000):
+            dist, ops = full_table_ops(ref, hyp)
+            assert distance(ref, hyp) == dist
+            assert tuple(edit_ops(ref, hyp)) == ops, (ref, hyp)
+
+    def test_token_lists(self):
+        ops = edit_ops(["我", "有", "PYTHON", "經驗"], ["我", "有", "派森", "經驗", "啊"])
+        assert ops == EditOps(substitutions=1, deletions=0, insertions=1)
+        assert ops.errors == 2
+
+    def test_batch(self):
+        pairs = random_pairs(200, seed=1)
+        assert batch_distance(pairs) == [distance(r, h) for r, h in pairs]
+        assert batch_edit_ops(pairs) == [edit_ops(r, h) for r, h in pairs]
+        assert batch_edit_ops(pairs[:20], processes=2, chunksize=5) == [edit_ops(r, h) for r, h in pairs[:20]]
+
+    def test_stt_metrics_uses_shared_engine(self):
+        assert STTMetrics.levenshtein_distance("下一題", "下一天") == 1
+        assert STTMetrics.calculate_cer("下一題", "下一天")[1]["edit_distance"] == 1
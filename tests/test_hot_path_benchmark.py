@@ -0,0 +1,67 @@
+# tests/test_hot_path_benchmark.py
+import json
+import os
+import sys
+
+import pytest
+
+for _key in ("AZURE_SUBSCRIPTION_KEY", "AZURE_ENDPOINT", "AZURE_SPEECH_KEY", "AZURE_SPEECH_REGION"):
+    os.environ.setdefault(_key, "test")
+
+from benchmarks import fixtures
+from benchmarks.harness import compare, find_regressions
+from benchmarks.hot_paths import build_cases, main, run_cases
+
+
+class TestFixtures:
+    def test_deterministic_and_sized(self):
+        document = fixtures.ocr_document(pages=3, lines_per_page=120)
+        assert [len(page) for page in document] == [120, 120, 120]
+        again = fixtures.ocr_document(pages=3, lines_per_page=120)
+        assert [l.text for l in document[1]] == [l.text for l in again[1]]
+        assert len(fixtures.resume_text(lines=50).splitlines()) == 50
+        assert len(fixtures.interview_history(turns=40)) == 40
+
+    def test_rows_are_not_merged(self):
+        from backend.services.ocr_service import OCRConfig, OCRProcessor
+        config = OCRConfig()
+        config.subscription_key = config.endpoint = None
+        processor = OCRProcessor(config)
+        page = fixtures.ocr_document(pages=1, lines_per_page=300)[0]
+        groups = processor._group_lines_by_row(page)
+        assert max(len(g) for g in groups) <= 3  # 最多三欄
+        contact = processor._extract_compact_contact(fixtures.ocr_rows(groups))
+        assert contact["Email"] == "user0@example.com" and contact["姓名"]
+
+
+class TestHotPathBenchmark:
+    def test_every_case_reports_timing_and_allocations(self):
+        cases = build_cases(scale=0.02)
+        assert len({c.name for c in cases}) == len(cases) == 8
+        rows = run_cases(cases, repeat=2, min_time=0.001)
+        for row in rows:
+            assert 0 < row["best_us"] <= row["median_us"]
+            assert row["calls_per_round"] >= 1
+            assert row["peak_kb"] >= row["retained_kb"] >= 0
+            for site in row["top_sites"]:
+                assert site["site"].startswith("backend")
+
+    def test_regression_gate(self):
+        baseline = [{"case": "a", "median_us": 100.0, "peak_kb": 10.0},
+                    {"case": "b", "median_us": 100.0, "peak_kb": 0.0}]
+        current = [{"case": "a", "median_us": 130.0, "peak_kb": 10.5},
+                   {"case": "b", "median_us": 90.0, "peak_kb": 4.0},
+                   {"case": "new", "median_us": 1.0, "peak_kb": 1.0}]
+        diffs = compare(current, baseline, "case", ["median_us", "peak_kb"])
+        assert [d["case"] for d in diffs] == ["a", "b"]
+        assert find_regressions(diffs, "case", ["median_us", "peak_kb"], 0.25) == [("a", "median_us", 0.3)]
+
+    def test_baseline_with_other_scale_is_refused(self, tmp_path, monkeypatch, capsys):
+        baseline = tmp_path / "baseline.json"
+        baseline.write_text(json.dumps({"suite": "hot_paths", "params": {"scale": 2.0}, "results": []}))
+        monkeypatch.setattr(sys, "argv", ["hot_paths", "--scale", "0.02", "--baseline", str(baseline),
+                                          "--output", str(tmp_path / "out.json")])
+        with pytest.raises(SystemExit) as exc:
+            main()
+        assert exc.value.code == 2 and "--scale" in capsys.readouterr().err
+        assert not (tmp_path / "out.json").exists()
@@ -0,0 +1,108 @@
+# tests/test_index_bundle.py
+import json
+
+import faiss
+import numpy as np
+
+from backend.services.rag_service import RAGService
+from backend.utils.ann_index import build_projected_index, parse_index_spec
+from backend.utils.index_bundle import (
+    METADATA_FILE,
+    IndexBundle,
+    hash_knowledge_files,
+    load_bundle,
+    make_manifest,
+    save_bundle,
+)
+
+
+def make_bundle(manifest, spec="flat", count=20, dim=16):
+    rng = np.random.default_rng(0)
+    embeddings = rng.normal(size=(count, dim)).astype('float32')
+    faiss.normalize_L2(embeddings)
+    index, projection = build_projected_index(embeddings, parse_index_spec(spec))
+    return IndexBundle(
+        index=index,
+        embeddings=embeddings,
+        metadata=[{"row": i} for i in range(count)],
+        texts=[f"text {i}" for i in range(count)],
+        sources=["tech/後端工程師.json"] * count,
+        manifest=manifest,
+        projection=projection,
+    )
+
+
+def manifest_for(knowledge_dir, spec="flat"):
+    return make_manifest(hash_knowledge_files(knowledge_dir), model="test", granularity="chunk",
+                         index=parse_index_spec(spec).build_params())
+
+
+class TestIndexBundle:
+    def test_round_trip(self, knowledge_dir, tmp_path):
+        manifest = manifest_for(knowledge_dir)
+        bundle = make_bundle(manifest)
+        save_bundle(tmp_path / "bundle", bundle)
+
+        loaded = load_bundle(tmp_path / "bundle", manifest_for(knowledge_dir))
+        assert loaded is not None
+        assert loaded.metadata == bundle.metadata and loaded.sources == bundle.sources
+        np.testing.assert_array_equal(np.asarray(loaded.embeddings), bundle.embeddings)
+        assert loaded.index.ntotal == 20 and loaded.manifest["count"] == 20
+
+    def test_pca_projection_round_trip(self, knowledge_dir, tmp_path):
+        manifest = manifest_for(knowledge_dir, "flat,pca_dim=8")
+        save_bundle(tmp_path / "bundle", make_bundle(manifest, "flat,pca_dim=8"))
+        loaded = load_bundle(tmp_path / "bundle", manifest)
+        assert loaded.projection is not None and loaded.index.d == 8
+
+    def test_changed_knowledge_file_invalidates(self, knowledge_dir, tmp_path):
+        save_bundle(tmp_path / "bundle", make_bundle(manifest_for(knowledge_dir)))
+        path = knowledge_dir / "tech/後端工程師.json"
+        data = json.loads(path.read_text(encoding="utf-8"))
+        data["skill_areas"][0]["key_concepts"].append("Redis")
+        path.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+
+        assert load_bundle(tmp_path / "bundle", manifest_for(knowledge_dir)) is None
+
+    def test_added_or_removed_file_invalidates(self, knowledge_dir, tmp_path):
+        save_bundle(tmp_path / "bundle", make_bundle(manifest_for(knowledge_dir)))
+        (knowledge_dir / "finance/會計師.json").unlink()
+        assert load_bundle(tmp_path / "bundle", manifest_for(knowledge_dir)) is None
+
+    def test_index_spec_mismatch_invalidates(self, knowledge_dir, tmp_path):
+        save_bundle(tmp_path / "bundle", make_bundle(manifest_for(knowledge_dir)))
+        assert load_bundle(tmp_path / "bundle", manifest_for(knowledge_dir, "hnsw")) is None
+        assert load_bundle(tmp_path / "bundle", manifest_for(knowledge_dir, "flat,storage=fp16")) is None
+
+    def test_count_mismatch_falls_back(self, knowledge_dir, tmp_path):
+        manifest = manifest_for(knowledge_dir)
+        save_bundle(tmp_path / "bundle", make_bundle(manifest))
+        table_path = tmp_path / "bundle" / METADATA_FILE
+        table = json.loads(table_path.read_text(encoding="utf-8"))
+        table["rows"].pop()
+        table_path.write_text(json.dumps(table, ensure_ascii=False), encoding="utf-8")
+
+        assert load_bundle(tmp_path / "bundle", manifest) is None
+
+    def test_missing_bundle(self, knowledge_dir, tmp_path):
+        assert load_bundle(tmp_path / "nothing", manifest_for(knowledge_dir)) is None
+
+
+class TestServiceSnapshot:
+    def test_reuses_snapshot_and_rebuilds_on_spec_change(self, hash_encoder, knowledge_dir, tmp_path):
+        common = {"data_dir": str(knowledge_dir), "index_dir": str(tmp_path / "index")}
+        first = RAGService(**common)
+        assert first.model.encoded > 0
+
+        warm = RAGService(**common)
+        assert warm.model.encoded == 0  # 直接載入快照，不重新編碼
+        assert warm.metadata == first.metadata
+
+        rebuilt = RAGService(index_spec="flat,storage=fp16", **common)
+        assert rebuilt.model.encoded == first.model.encoded
+        assert rebuilt._bundles["chunk"].embeddings.dtype == np.float16
+
+    def test_no_cache_always_rebuilds(self, hash_encoder, knowledge_dir, tmp_path):
+        common = {"data_dir": str(knowledge_dir), "index_dir": str(tmp_path / "index")}
+        RAGService(**common)
+        assert RAGService(use_cache=False, **common).model.encoded > 0
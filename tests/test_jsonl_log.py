@@ -0,0 +1,84 @@
+# tests/test_jsonl_log.py
+import gzip
+import json
+import threading
+from datetime import datetime
+
+import pytest
+
+from backend.utils.jsonl_log import RotatingJsonlWriter
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = datetime(2026, 10, 1, 9, 0)
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def writer(tmp_path, clock):
+    writer = RotatingJsonlWriter(str(tmp_path), "stt_log", rotate_bytes=1024, max_total_bytes=0,
+                                 flush_interval=60, clock=clock)
+    yield writer
+    writer.close()
+
+
+def _read(path):
+    opener = gzip.open if str(path).endswith(".gz") else open
+    with opener(path, "rt", encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+class TestRotatingJsonlWriter:
+    def test_batches_are_written_on_flush(self, writer, tmp_path):
+        for i in range(5):
+            assert writer.submit({"i": i, "text": "您好"})
+        assert writer.flush(timeout=5)
+        assert _read(tmp_path / "stt_log_20261001.jsonl") == [{"i": i, "text": "您好"} for i in range(5)]
+        assert writer.stats()["written"] == 5
+
+    def test_submit_does_not_block_when_full(self, tmp_path, clock, monkeypatch):
+        writer = RotatingJsonlWriter(str(tmp_path), "stt_log", max_pending=2, batch_size=1, clock=clock)
+        gate = threading.Event()
+        original = writer._write
+        monkeypatch.setattr(writer, "_write", lambda batch: (gate.wait(5), original(batch)))
+        try:
+            results = [writer.submit({"i": i}) for i in range(10)]
+            assert results.count(False) >= 7
+            assert writer.stats()["dropped"] == results.count(False)
+        finally:
+            gate.set()
+            writer.close()
+
+    def test_rotates_on_day_change_and_size(self, writer, tmp_path, clock):
+        writer.submit({"day": 1})
+        writer.flush(timeout=5)
+        clock.now = datetime(2026, 10, 2, 9, 0)
+        writer.submit({"day": 2, "pad": "x" * 2000})
+        writer.flush(timeout=5)
+        writer.submit({"day": 2, "after": "rotate"})
+        writer.flush(timeout=5)
+
+        assert _read(tmp_path / "stt_log_20261001.1.jsonl.gz") == [{"day": 1}]
+        assert _read(tmp_path / "stt_log_20261002.1.jsonl.gz")[0]["day"] == 2
+        assert _read(tmp_path / "stt_log_20261002.jsonl") == [{"day": 2, "after": "rotate"}]
+        assert writer.stats()["rotations"] == 2
+
+    def test_total_size_quota(self, tmp_path, clock):
+        writer = RotatingJsonlWriter(str(tmp_path), "stt_log", rotate_bytes=5, max_total_bytes=1,
+                                     flush_interval=60, clock=clock)
+        try:
+            for i in range(3):
+                writer.submit({"i": i})
+                writer.flush(timeout=5)
+        finally:
+            writer.close()
+        assert list(tmp_path.glob("*.gz")) == []
+        assert writer.stats()["removed"] == 2
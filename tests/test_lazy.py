@@ -0,0 +1,40 @@
+# tests/test_lazy.py
+import threading
+import time
+
+from backend.utils.lazy import LazyService, lazy_import
+
+
+class _Heavy:
+    created = 0
+
+    def __init__(self):
+        time.sleep(0.05)
+        _Heavy.created += 1
+        self.value = 42
+
+    def ping(self):
+        return "pong"
+
+
+class TestLazyService:
+    def test_not_created_until_used(self):
+        _Heavy.created = 0
+        service = LazyService(_Heavy, "heavy")
+        assert not service.ready and _Heavy.created == 0
+        assert service.ping() == "pong" and service.value == 42
+        assert service.ready and service.init_seconds is not None
+
+    def test_created_once_across_threads(self):
+        _Heavy.created = 0
+        service = LazyService(_Heavy, "heavy")
+        threads = [threading.Thread(target=service.get) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert _Heavy.created == 1
+
+
+def test_lazy_import_optional_missing():
+    assert lazy_import("no_such_package_xyz", optional=True) is None
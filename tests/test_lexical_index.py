@@ -0,0 +1,51 @@
+# tests/test_lexical_index.py
+import pytest
+from backend.utils.lexical_index import CharNgramBM25, reciprocal_rank_fusion, tokenize
+
+
+class TestTokenize:
+    def test_chinese_ngrams(self):
+        assert tokenize("資料庫") == ["資料", "料庫", "資料庫"]
+
+    def test_ascii_words_lowercased(self):
+        assert tokenize("熟悉 Redis 與 Kubernetes") == ["熟悉", "redis", "與", "kubernetes"]
+
+    def test_mixed_term(self):
+        # 「SQL語言」應同時產生英文 token 與中文 n-gram
+        assert tokenize("SQL語言") == ["sql", "語言"]
+
+
+class TestCharNgramBM25:
+    @pytest.fixture
+    def index(self):
+        return CharNgramBM25([
+            "後端工程師 資料庫 SQL 索引優化",
+            "後端工程師 快取 Redis 分散式鎖",
+            "DevOps 工程師 Kubernetes 容器編排",
+            "行銷企劃 品牌策略 社群經營",
+        ])
+
+    def test_exact_term_ranks_first(self, index):
+        assert index.search("我用 Redis 做過快取", top_k=1)[0][0] == 1
+        assert index.search("部署在 kubernetes 上", top_k=1)[0][0] == 2
+
+    def test_no_match_returns_empty(self, index):
+        assert index.search("完全無關的字詞xyz", top_k=3) == []
+
+    def test_candidates_filter(self, index):
+        results = index.search("工程師", top_k=5, candidates=[0, 3])
+        assert [doc_id for doc_id, _ in results] == [0]
+
+    def test_scores_sorted(self, index):
+        scores = [score for _, score in index.search("後端工程師 資料庫", top_k=4)]
+        assert scores == sorted(scores, reverse=True)
+
+
+class TestReciprocalRankFusion:
+    def test_agreement_wins(self):
+        fused = reciprocal_rank_fusion([[1, 2, 3], [2, 1, 4]])
+        assert {fused[0][0], fused[1][0]} == {1, 2}
+        assert fused[-1][0] in (3, 4)
+
+    def test_single_list_keeps_order(self):
+        assert [doc_id for doc_id, _ in reciprocal_rank_fusion([[5, 3, 9]])] == [5, 3, 9]
@@ -0,0 +1,102 @@
+# tests/test_metrics.py
+import asyncio
+import threading
+
+import pytest
+
+from backend.utils.metrics import MetricsRegistry, STAGE_ERRORS, STAGE_QUEUE_SECONDS, STAGE_SECONDS, stage_timer
+from backend.utils.stage_pools import StagePools
+
+
+@pytest.fixture
+def registry():
+    return MetricsRegistry()
+
+
+class TestRegistry:
+    def test_counter_and_gauge(self, registry):
+        hits = registry.counter("cache_hits_total", "命中次數", ["cache"])
+        hits.inc(cache="tts")
+        hits.inc(2, cache="tts")
+        registry.gauge("queue_depth", "佇列長度").set(3)
+
+        text = registry.render()
+        assert "# TYPE cache_hits_total counter" in text
+        assert 'cache_hits_total{cache="tts"} 3' in text
+        assert "queue_depth 3" in text
+
+    def test_labels_are_validated_and_escaped(self, registry):
+        counter = registry.counter("errors_total", "錯誤次數", ["reason"])
+        with pytest.raises(ValueError):
+            counter.inc(stage="stt")
+        counter.inc(reason='bad "quote"\n')
+        assert 'errors_total{reason="bad \\"quote\\"\\n"} 1' in registry.render()
+
+    def test_get_or_create(self, registry):
+        assert registry.counter("a_total", "a") is registry.counter("a_total", "a")
+        with pytest.raises(ValueError):
+            registry.gauge("a_total", "a")
+
+    def test_histogram_buckets_are_cumulative(self, registry):
+        latency = registry.histogram("latency_seconds", "耗時", buckets=(0.1, 1.0))
+        for value in (0.05, 0.1, 0.5, 2.0):
+            latency.observe(value)
+
+        snapshot = latency.snapshot()
+        assert list(snapshot["buckets"].values()) == [2, 3, 4]
+        assert snapshot["count"] == 4 and snapshot["sum"] == pytest.approx(2.65)
+        text = registry.render()
+        assert 'latency_seconds_bucket{le="0.1"} 2' in text
+        assert 'latency_seconds_bucket{le="+Inf"} 4' in text
+        assert "latency_seconds_count 4" in text
+
+    def test_concurrent_increments(self, registry):
+        counter = registry.counter("ops_total", "次數")
+        latency = registry.histogram("ops_seconds", "耗時")
+
+        def work():
+            for _ in range(1000):
+                counter.inc()
+                latency.observe(0.01)
+
+        threads = [threading.Thread(target=work) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert counter.value() == 8000
+        assert latency.snapshot()["count"] == 8000
+
+    def test_collectors(self, registry):
+        registry.register_collector(lambda: [("pool_workers", "gauge", "執行緒數", [({"stage": "stt"}, 4)])])
+
+        def broken():
+            raise RuntimeError("boom")
+
+        registry.register_collector(broken)
+        text = registry.render()
+        assert 'pool_workers{stage="stt"} 4' in text
+        assert "# collector broken 失敗: boom" in text
+
+
+class TestStageMetrics:
+    def test_stage_timer_counts_errors(self):
+        before = STAGE_SECONDS.snapshot(stage="test_timer")["count"]
+        with pytest.raises(RuntimeError):
+            with stage_timer("test_timer"):
+                raise RuntimeError("boom")
+        assert STAGE_SECONDS.snapshot(stage="test_timer")["count"] == before + 1
+        assert STAGE_ERRORS.value(stage="test_timer") >= 1
+
+    def test_stage_pool_tasks_are_observed(self):
+        pools = StagePools({"test_pool": 2})
+        before = STAGE_SECONDS.snapshot(stage="test_pool")["count"]
+        try:
+            asyncio.run(pools.run("test_pool", sum, [1, 2]))
+            with pytest.raises(ZeroDivisionError):
+                asyncio.run(pools.run("test_pool", lambda: 1 / 0))
+        finally:
+            pools.shutdown()
+        assert STAGE_SECONDS.snapshot(stage="test_pool")["count"] == before + 2
+        assert STAGE_QUEUE_SECONDS.snapshot(stage="test_pool")["count"] >= 2
+        assert STAGE_ERRORS.value(stage="test_pool") >= 1
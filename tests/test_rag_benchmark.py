@@ -0,0 +1,81 @@
+# tests/test_rag_benchmark.py
+import json
+from types import SimpleNamespace
+
+import pytest
+
+import rag_engine
+
+from backend.services.rag_service import RAGService
+from benchmarks.harness import compare, traced, write_results
+from benchmarks.rag_retrieval import (
+    build_query_set,
+    gold_keys,
+    load_query_set,
+    reciprocal_rank,
+    recall_at_k,
+    run_rag_engine,
+    run_rag_service,
+    save_query_set,
+)
+from tests.conftest import HashEncoder
+
+
+@pytest.fixture(scope="module")
+def query_set():
+    return load_query_set()
+
+
+class TestRagBenchmark:
+    def test_metrics(self):
+        gold = {("後端工程師", "資料庫"), ("後端工程師", "API 設計")}
+        found = [("後端工程師", "雲端"), ("後端工程師", "資料庫"), ("前端工程師", "資料庫")]
+        assert recall_at_k(found, gold, 3) == pytest.approx(0.5)
+        assert recall_at_k(found, gold, 1) == 0.0
+        assert reciprocal_rank(found, gold) == pytest.approx(0.5)
+        assert reciprocal_rank([], gold) == 0.0
+
+    def test_labels_exist_in_knowledge_base(self, query_set):
+        service = RAGService(use_cache=False, load_model=False)
+        positions = {row["position"] for row in service._bundles["position"].metadata}
+        areas = {(row["position"], row["area"]) for row in service._bundles["chunk"].metadata
+                 if row["type"] == "skill"}
+        assert len(query_set["queries"]) > 200
+        for query in query_set["queries"]:
+            assert gold_keys(query, "position") <= positions
+            assert gold_keys(query, "chunk") <= areas
+
+    def test_query_set_round_trip(self, query_set, tmp_path):
+        rebuilt = build_query_set("knowledge_base", per_position=query_set["per_position"],
+                                  seed=query_set["seed"])
+        save_query_set(rebuilt, str(tmp_path / "queries.json"))
+        assert load_query_set(str(tmp_path / "queries.json")) == rebuilt
+
+    def test_lexical_run_and_results_file(self, query_set, tmp_path):
+        queries = query_set["queries"][:20]
+        rows = run_rag_service("knowledge_base", queries, top_k=3, methods=("lexical",), load_model=False)
+        assert [r["config"] for r in rows] == ["rag_service/position/lexical", "rag_service/chunk/lexical"]
+        for row in rows:
+            assert row["queries"] == 20 and 0.0 < row["recall_at_k"] <= 1.0
+            assert row["p50_ms"] <= row["p95_ms"] <= row["p99_ms"]
+            assert row["build_s"] > 0 and row["peak_mb"] > 0
+
+        path = write_results("rag_retrieval", rows, {"top_k": 3}, str(tmp_path / "out.json"))
+        with open(path, encoding="utf-8") as f:
+            saved = json.load(f)
+        assert saved["suite"] == "rag_retrieval" and saved["results"] == rows
+        diffs = compare(rows, saved["results"], "config", ["recall_at_k"])
+        assert [d["recall_at_k_change"] for d in diffs] == [0.0, 0.0]
+
+    def test_rag_engine_row_per_index_spec(self, query_set, monkeypatch):
+        monkeypatch.setattr(rag_engine, "sentence_transformers", SimpleNamespace(SentenceTransformer=HashEncoder))
+        rows = run_rag_engine("knowledge_base", query_set["queries"][:10], top_k=3,
+                              index_specs=("flat", "flat,storage=sq8"))
+        assert [r["config"] for r in rows] == ["rag_engine/item/dense/flat", "rag_engine/item/dense/flat,storage=sq8"]
+        assert [r["rerank"] for r in rows] == [False, True]
+        # 搜尋經過各自的索引，壓縮儲存的索引較小
+        assert rows[1]["index_mb"] < rows[0]["index_mb"]
+
+    def test_traced_reports_peak(self):
+        _, peak, current = traced(lambda: bytearray(4 * 1024 * 1024) and None)
+        assert peak >= 4 * 1024 * 1024 and current < peak
@@ -0,0 +1,114 @@
+# tests/test_rag_engine.py
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+import rag_engine
+from rag_engine import RAGEngine
+from tests.conftest import HashEncoder, write_knowledge_base
+
+
+def skill(area, concepts, levels=None):
+    scenarios = {"scenarios": [], "difficulty_levels": levels} if levels else []
+    return {"area": area, "importance": "核心", "key_concepts": concepts,
+            "evaluation_points": [], "example_scenarios": scenarios}
+
+
+# 前端工程師的內容刻意與「資料庫」查詢相近，用來確認結果不會跨出職位分區
+ENGINE_POSITIONS = {
+    "tech/後端工程師.json": {
+        "position": "後端工程師", "industry": "科技",
+        "skill_areas": [
+            skill("資料庫", ["SQL", "索引", "交易"],
+                  {"easy": "說明 JOIN", "medium": "設計索引", "hard": "處理死結"}),
+            skill("API 設計", ["REST", "版本控制"], {"medium": "設計分頁 API"}),
+            skill("快取", ["Redis", "失效策略"]),
+            skill("訊息佇列", ["Kafka", "重試"]),
+        ],
+        "interview_dimensions": [{"dimension": "問題解決", "description": "拆解問題", "stages": ["技術面"]}],
+    },
+    "finance/後端工程師.json": {
+        "position": "後端工程師", "industry": "金融",
+        "skill_areas": [skill("交易系統", ["SQL", "對帳"], {"hard": "跨行交易一致性"}),
+                        skill("資安", ["加密", "稽核"])],
+    },
+    "tech/前端工程師.json": {
+        "position": "前端工程師", "industry": "科技",
+        "skill_areas": [skill("資料庫存取", ["SQL", "索引", "交易", "IndexedDB"]),
+                        skill("JavaScript", ["閉包", "事件迴圈"])],
+    },
+}
+
+SPECS = ["flat", "hnsw,hnsw_m=4,ef_search=2", "ivf_flat,nlist=4,nprobe=1", "flat,storage=fp16,pca_dim=8"]
+
+
+@pytest.fixture
+def encoder(monkeypatch):
+    monkeypatch.setattr(rag_engine, "sentence_transformers", SimpleNamespace(SentenceTransformer=HashEncoder))
+    return HashEncoder
+
+
+@pytest.fixture(params=SPECS)
+def engine(request, encoder, tmp_path):
+    data_dir = write_knowledge_base(tmp_path / "knowledge_base", ENGINE_POSITIONS)
+    return RAGEngine(data_dir=str(data_dir), index_dir=str(tmp_path / "index"),
+                     index_spec=request.param, result_cache=False)
+
+
+class TestPartitionedSearch:
+    def test_returns_top_k_within_position(self, engine):
+        results = engine.get_relevant("SQL 索引 交易", "後端工程師", top_k=3)
+        assert len(results) == 3
+        assert all(r["position"] == "後端工程師" for r in results)
+        assert results[0]["area"] in ("資料庫", "交易系統")
+
+    def test_industry_filter(self, engine):
+        results = engine.get_relevant("SQL", "後端工程師", top_k=2, industry="金融")
+        assert len(results) == 2
+        assert {r["area"] for r in results} == {"交易系統", "資安"}
+
+    def test_partition_smaller_than_top_k(self, engine):
+        results = engine.get_relevant("SQL 索引", "前端工程師", top_k=5)
+        assert sorted(r["area"] for r in results) == ["JavaScript", "資料庫存取"]
+        assert len(engine.get_relevant("SQL", "後端工程師", top_k=5, industry="金融")) == 2
+
+    def test_unknown_position(self, engine):
+        assert engine.get_relevant("SQL", "會計師", top_k=2) == []
+        assert engine.get_relevant("SQL", "後端工程師", top_k=2, industry="零售") == []
+
+    def test_difficulty_partition_first_then_fill(self, engine):
+        results = engine.get_relevant_knowledge_by_difficulty("SQL 交易", "後端工程師", "hard", top_k=3)
+        assert len(results) == 3
+        assert all(r["position"] == "後端工程師" for r in results)
+        # 具有 hard 標籤的兩項排在前面，其餘以同職位的項目補足
+        assert {r["area"] for r in results[:2]} == {"資料庫", "交易系統"}
+        assert all(r["current_difficulty"] == "hard" for r in results[:2])
+        assert "difficulty_hint" not in results[2]
+
+    def test_difficulty_fallback_when_position_is_small(self, engine):
+        results = engine.get_relevant_knowledge_by_difficulty("SQL", "後端工程師", "medium", top_k=20)
+        assert len(results) == 7  # 後端工程師 (科技 5 項 + 金融 2 項) 全部回傳
+        assert len({(r["industry"], r["area"] or r["dimension"]) for r in results}) == 7
+
+
+class TestSnapshot:
+    def test_second_start_loads_snapshot(self, encoder, tmp_path):
+        data_dir = write_knowledge_base(tmp_path / "knowledge_base", ENGINE_POSITIONS)
+        common = {"data_dir": str(data_dir), "index_dir": str(tmp_path / "index"), "result_cache": False}
+        first = RAGEngine(**common)
+        warm = RAGEngine(**common)
+        assert first.model.encoded == 9 and warm.model.encoded == 0
+        assert warm.get_relevant("Redis", "後端工程師", top_k=1) == first.get_relevant("Redis", "後端工程師", top_k=1)
+
+    def test_raw_vectors_not_resident(self, encoder, tmp_path):
+        data_dir = write_knowledge_base(tmp_path / "knowledge_base", ENGINE_POSITIONS)
+        exact = RAGEngine(data_dir=str(data_dir), index_dir=str(tmp_path / "exact"), result_cache=False)
+        assert exact._rerank_vectors is None and not hasattr(exact, "embeddings")
+
+        lossy = RAGEngine(data_dir=str(data_dir), index_dir=str(tmp_path / "lossy"),
+                          index_spec="flat,storage=fp16,pca_dim=4", result_cache=False)
+        # 只保留 mmap 開啟的快照向量，重新排序後與精確索引的結果一致
+        assert isinstance(lossy._rerank_vectors, np.memmap) and lossy._rerank_vectors.dtype == np.float16
+        query = ("SQL 索引 交易", "後端工程師")
+        assert lossy.get_relevant(*query, top_k=2) == exact.get_relevant(*query, top_k=2)
@@ -0,0 +1,103 @@
+# tests/test_rag_service.py
+import json
+
+from backend.services.rag_service import RAGService, format_chunk
+from tests.conftest import SAMPLE_POSITIONS
+
+
+def edit_position(knowledge_dir, rel, update):
+    path = knowledge_dir / rel
+    data = json.loads(path.read_text(encoding="utf-8"))
+    update(data)
+    path.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+
+
+def add_framework_area(data):
+    data["skill_areas"].append({"area": "框架", "importance": "核心", "key_concepts": ["Vue", "元件"],
+                                "evaluation_points": ["能拆分可重用元件"], "example_scenarios": []})
+
+
+class TestReload:
+    def test_reembeds_only_changed_file(self, hash_encoder, knowledge_dir, tmp_path):
+        service = RAGService(data_dir=str(knowledge_dir), index_dir=str(tmp_path / "index"))
+        before = service.model.encoded
+        assert service.reload()["reembedded"] == 0  # 沒有變動
+
+        edit_position(knowledge_dir, "tech/前端工程師.json", add_framework_area)
+        report = service.reload()
+
+        assert report["changed"] == ["tech/前端工程師.json"]
+        assert report["added"] == report["removed"] == []
+        # position 1 筆 + chunk 2 筆 (JavaScript 與新增的框架)
+        assert report["reembedded"] == 3 == service.model.encoded - before
+        assert report["total"] == 3
+
+        hits = service.retrieve("Vue 元件", top_k=1, mode="chunk")
+        assert hits[0]["area"] == "框架"
+        frontend = service.get_position_knowledge("前端工程師")
+        assert [s["area"] for s in frontend["skill_areas"]] == ["JavaScript", "框架"]
+
+    def test_added_and_removed_files(self, hash_encoder, knowledge_dir, tmp_path):
+        service = RAGService(data_dir=str(knowledge_dir), index_dir=str(tmp_path / "index"))
+        (knowledge_dir / "finance/會計師.json").unlink()
+        (knowledge_dir / "tech/測試工程師.json").write_text(json.dumps({
+            "position": "測試工程師", "industry": "科技",
+            "skill_areas": [{"area": "自動化測試", "key_concepts": ["pytest", "CI"]}],
+        }, ensure_ascii=False), encoding="utf-8")
+
+        report = service.reload()
+
+        assert report["added"] == ["tech/測試工程師.json"]
+        assert report["removed"] == ["finance/會計師.json"]
+        assert report["reembedded"] == 2 and report["total"] == 3
+        assert service.get_position_knowledge("會計師") is None
+        assert {c["position"] for c in service._bundles["chunk"].metadata} == {"後端工程師", "前端工程師", "測試工程師"}
+
+    def test_lexical_only_reload(self, knowledge_dir, tmp_path):
+        service = RAGService(data_dir=str(knowledge_dir), index_dir=str(tmp_path / "index"), load_model=False)
+        edit_position(knowledge_dir, "tech/前端工程師.json", add_framework_area)
+
+        report = service.reload()
+
+        assert report["changed"] == ["tech/前端工程師.json"]
+        assert report["reembedded"] == 0 and report["total"] == 3
+        hits = service.retrieve("Vue 元件", top_k=1, mode="chunk", method="dense")
+        assert hits[0]["area"] == "框架" and "bm25_score" in hits[0]
+
+
+class TestChunks:
+    def test_one_chunk_per_skill_area_and_dimension(self):
+        texts, chunks = RAGService._split_chunks(SAMPLE_POSITIONS["tech/後端工程師.json"], "tech/後端工程師.json")
+
+        assert len(texts) == len(chunks) == 3
+        assert [c["type"] for c in chunks] == ["skill", "skill", "dimension"]
+        assert [c.get("area") or c.get("dimension") for c in chunks] == ["資料庫", "API 設計", "問題解決"]
+        for chunk in chunks:
+            assert chunk["position"] == "後端工程師"
+            assert chunk["industry"] == "科技"
+            assert chunk["source"] == "tech/後端工程師.json"
+        assert chunks[0]["key_concepts"] == ["SQL", "索引", "交易"]
+        assert chunks[2]["stages"] == ["技術面"]
+        # 每個區塊的文字只包含自己的概念，不會混入同職位的其他技能領域
+        assert "SQL" in texts[0] and "REST" not in texts[0]
+        assert texts[1].startswith("後端工程師 API 設計")
+
+    def test_position_without_dimensions(self):
+        _, chunks = RAGService._split_chunks(SAMPLE_POSITIONS["tech/前端工程師.json"], "tech/前端工程師.json")
+        assert [c["area"] for c in chunks] == ["JavaScript"]
+
+    def test_retrieve_chunk_mode(self, hash_encoder, knowledge_dir, tmp_path):
+        service = RAGService(data_dir=str(knowledge_dir), index_dir=str(tmp_path / "index"))
+        assert len(service._bundles["chunk"]) == 6
+        assert len(service.metadata) == 3
+
+        hits = service.retrieve("資產負債表 現金流量", top_k=2, mode="chunk")
+        assert len(hits) == 2
+        assert hits[0]["type"] == "skill" and hits[0]["area"] == "財務報表"
+        assert "similarity_score" in hits[0] and "skill_areas" not in hits[0]
+        assert service.retrieve_chunks("資產負債表 現金流量", top_k=2) == hits
+
+    def test_format_chunk(self):
+        _, chunks = RAGService._split_chunks(SAMPLE_POSITIONS["finance/會計師.json"], "finance/會計師.json")
+        assert format_chunk(chunks[0]) == "會計師｜財務報表：資產負債表、現金流量"
+        assert format_chunk(chunks[1]) == "會計師｜細心程度：核對數字的習慣"
@@ -0,0 +1,89 @@
+# tests/test_readiness.py
+import importlib
+import os
+from types import SimpleNamespace
+
+import pytest
+
+for _key in ("AZURE_SUBSCRIPTION_KEY", "AZURE_ENDPOINT", "AZURE_SPEECH_KEY", "AZURE_SPEECH_REGION"):
+    os.environ.setdefault(_key, "test")
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+
+from backend.config import settings
+
+# backend.api 以同名的 router 物件匯出 health_router，需以 import_module 取得模組本身
+health_router = importlib.import_module("backend.api.health_router")
+readiness_module = importlib.import_module("backend.services.readiness_service")
+
+
+def fail(message):
+    def raiser(*args, **kwargs):
+        raise RuntimeError(message)
+    return raiser
+
+
+@pytest.fixture
+def readiness(monkeypatch):
+    """所有相依服務都以假物件取代，暖機與檢查都不連線外部服務"""
+    monkeypatch.setattr(readiness_module, "rag_service", SimpleNamespace(
+        ready=True, model=object(), init_seconds=0.1, index=SimpleNamespace(ntotal=3),
+        retrieve_chunks=lambda *args, **kwargs: []))
+    monkeypatch.setattr(readiness_module, "speech_service", SimpleNamespace(
+        ready=True, error=None, text_to_speech=lambda text, path: path))
+    monkeypatch.setattr(readiness_module, "engine", create_engine("sqlite://"))
+
+    service = readiness_module.ReadinessService()
+    service.client = SimpleNamespace(generate=lambda **kwargs: {"response": "好"})
+    service._probe = SimpleNamespace(ps=lambda: SimpleNamespace(models=[SimpleNamespace(model=settings.OLLAMA_MODEL)]))
+    monkeypatch.setattr(health_router, "readiness_service", service)
+    return service
+
+
+@pytest.fixture
+def client(readiness):
+    app = FastAPI()
+    app.include_router(health_router.router)
+    return TestClient(app)
+
+
+class TestReadyz:
+    def test_not_ready_before_warmup(self, client):
+        response = client.get("/readyz")
+        assert response.status_code == 503
+        body = response.json()
+        assert body["warmed"] is False and body["ready"] is False
+        assert all(check["ok"] for check in body["checks"].values())
+
+    def test_ready_after_warmup(self, client):
+        warmup = client.post("/warmup")
+        assert warmup.status_code == 200
+        assert set(warmup.json()["steps"]) == {"retrieval", "llm", "tts"}
+
+        response = client.get("/readyz")
+        assert response.status_code == 200 and response.json()["ready"] is True
+
+    def test_failed_warmup_step_keeps_503(self, client, readiness):
+        readiness.client = SimpleNamespace(generate=fail("model not found"))
+
+        report = readiness.warmup()
+        assert report["warmed"] is False
+        assert report["steps"]["llm"] == {"ok": False, "seconds": report["steps"]["llm"]["seconds"],
+                                          "error": "model not found"}
+        assert report["steps"]["retrieval"]["ok"] and report["steps"]["tts"]["ok"]
+        assert client.post("/warmup").status_code == 503
+        assert client.get("/readyz").status_code == 503
+
+    def test_dependency_down_after_warmup(self, client, readiness):
+        readiness.warmup()
+        readiness._probe = SimpleNamespace(ps=fail("connection refused"))
+
+        response = client.get("/readyz")
+        assert response.status_code == 503
+        body = response.json()
+        assert body["warmed"] is True and body["checks"]["ollama"]["ok"] is False
+
+    def test_healthz_always_ok(self, client):
+        assert client.get("/healthz").json() == {"status": "ok"}
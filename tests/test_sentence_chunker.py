@@ -0,0 +1,24 @@
+# tests/test_sentence_chunker.py
+from backend.utils.sentence_chunker import SentenceChunker, split_sentences
+
+
+class TestSentenceChunker:
+    def test_emits_sentences_as_tokens_arrive(self):
+        chunker = SentenceChunker()
+        emitted = []
+        for token in ["您好", "！請先", "介紹自己", "。為什麼", "想應徵？"]:
+            emitted.append(chunker.feed(token))
+        # 句尾標點要等下一個字出現才切，確保收尾引號不會被拆開
+        assert emitted == [[], ["您好！"], [], ["請先介紹自己。"], []]
+        assert chunker.flush() == ["為什麼想應徵？"]
+
+    def test_keeps_closing_quote_with_sentence(self):
+        assert split_sentences("他說「好。」接著呢？") == ["他說「好。」", "接著呢？"]
+
+    def test_soft_break_on_long_run(self):
+        chunker = SentenceChunker(max_chars=10)
+        assert chunker.feed("在高併發情境下，你會如何設計快取") == ["在高併發情境下，"]
+        assert chunker.flush() == ["你會如何設計快取"]
+
+    def test_newline_and_blank_segments(self):
+        assert split_sentences("第一行問題？\n\n追問一句") == ["第一行問題？", "追問一句"]
@@ -0,0 +1,106 @@
+# tests/test_speculation.py
+import importlib
+import os
+import threading
+import time
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+for _key in ("AZURE_SUBSCRIPTION_KEY", "AZURE_ENDPOINT", "AZURE_SPEECH_KEY", "AZURE_SPEECH_REGION"):
+    os.environ.setdefault(_key, "test")
+
+# 每個「回答方向」對應一個固定向量，逐字稿以最接近的方向命中
+VECTORS = {
+    "談快取設計": [1.0, 0.0, 0.0],
+    "談資料庫索引": [0.0, 1.0, 0.0],
+    "我主要用 Redis 做快取": [0.9, 0.1, 0.0],
+    "我喜歡爬山": [0.0, 0.0, 1.0],
+}
+
+
+@pytest.fixture
+def service(monkeypatch):
+    module = importlib.import_module("backend.services.speculation_service")
+    monkeypatch.setattr(module, "rag_service", SimpleNamespace(ready=True, model=object()))
+    svc = module.SpeculationService(num_drafts=2, ttl=60, min_similarity=0.8)
+    monkeypatch.setattr(svc, "_anticipate_answers", lambda job, q: ["談快取設計", "談資料庫索引"])
+    monkeypatch.setattr(svc, "_draft_question",
+                        lambda job, resume, history, q, answer: {"question": f"追問：{answer}", "context": ""})
+
+    def encode(texts):
+        vectors = np.asarray([VECTORS[t] for t in texts], dtype="float32")
+        return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+    monkeypatch.setattr(svc, "_encode", encode)
+    return svc
+
+
+def _schedule(service, question="請談談效能優化經驗"):
+    session = SimpleNamespace(id="s1", current_question=question, job_title="後端工程師",
+                              resume_text="", history=[])
+    assert service.schedule(session)
+    deadline = time.time() + 5
+    while not service._entries["s1"].done and time.time() < deadline:
+        time.sleep(0.01)
+    return question
+
+
+class TestSpeculationService:
+    def test_hit_returns_closest_draft(self, service):
+        question = _schedule(service)
+        draft = service.take("s1", question, "我主要用 Redis 做快取")
+        assert draft is not None and draft.question == "追問：談快取設計"
+        stats = service.stats()
+        assert stats["hits"] == 1 and stats["hit_rate"] == 1.0
+
+    def test_miss_below_threshold(self, service):
+        question = _schedule(service)
+        assert service.take("s1", question, "我喜歡爬山") is None
+        assert service.stats()["misses"] == 1
+
+    def test_question_mismatch_and_single_use(self, service):
+        _schedule(service)
+        assert service.take("s1", "另一題", "我主要用 Redis 做快取") is None
+        # 候選題取過一次就移除
+        assert service.take("s1", "請談談效能優化經驗", "我主要用 Redis 做快取") is None
+
+    def test_expired(self, service):
+        question = _schedule(service)
+        service._entries["s1"].created_at -= 120
+        assert service.take("s1", question, "我主要用 Redis 做快取") is None
+        assert service.stats()["expired"] == 1
+
+    def test_skipped_without_embedding_model(self, service, monkeypatch):
+        module = importlib.import_module("backend.services.speculation_service")
+        monkeypatch.setattr(module, "rag_service", SimpleNamespace(ready=True, model=None))
+        session = SimpleNamespace(id="s2", current_question="q", job_title="j", resume_text="", history=[])
+        assert not service.schedule(session)
+
+    def test_stale_entry_skips_llm(self, service, monkeypatch):
+        calls = []
+        monkeypatch.setattr(service, "_anticipate_answers", lambda job, q: calls.append(q) or ["談快取設計"])
+        module = importlib.import_module("backend.services.speculation_service")
+        entry = module.Speculation(session_id="s1", question="q", created_at=time.time())
+        service._entries["s1"] = entry
+        service.discard("s1")  # 排隊中就已被丟棄
+        service._build(entry, {"job_title": "後端工程師", "resume_text": "", "history": []})
+        assert calls == [] and entry.done and service.stats()["stale"] == 1
+
+    def test_busy_llm_pool_skips_speculation(self, service, monkeypatch):
+        from backend.utils import stage_pools
+        pools = stage_pools.StagePools({"llm": 1})
+        monkeypatch.setattr(stage_pools, "_pools", pools)
+        release = threading.Event()
+        try:
+            # 正式出題占滿 llm 池：推測不送出 LLM 呼叫，也不算成 misses
+            pools.submit_if_idle("llm", release.wait, 5)
+            question = _schedule(service)
+            assert service.take("s1", question, "我主要用 Redis 做快取") is None
+            stats = service.stats()
+            assert stats["busy"] == 1 and stats["misses"] == 0 and stats["scheduled"] == 1
+        finally:
+            release.set()
+            pools.shutdown()
+
@@ -0,0 +1,248 @@
+# tests/test_speech_pool.py
+import os
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+for _key in ("AZURE_SUBSCRIPTION_KEY", "AZURE_ENDPOINT", "AZURE_SPEECH_KEY", "AZURE_SPEECH_REGION"):
+    os.environ.setdefault(_key, "test")
+
+from backend.services import speech_pool, stt_backends
+from backend.services.speech_pool import AzureSpeechEngine, LocalSpeechEngine, SpeechDeadlineExceeded, SpeechPool
+
+
+class _CountingEngine(LocalSpeechEngine):
+    """記錄建立的合成器數與同時進行的最大數量"""
+
+    def __init__(self, **kwargs):
+        super().__init__(init_latency=0.0, **kwargs)
+        self.created = 0
+        self.active = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    def create_synthesizer(self, voice=None):
+        with self._lock:
+            self.created += 1
+        return super().create_synthesizer(voice)
+
+    def recognize(self, audio_path, timeout):
+        with self._lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        try:
+            return super().recognize(audio_path, timeout)
+        finally:
+            with self._lock:
+                self.active -= 1
+
+
+class _Signal:
+    def __init__(self):
+        self.callbacks = []
+
+    def connect(self, callback):
+        self.callbacks.append(callback)
+
+
+class _FakeRecognizer:
+    """不會觸發 session_stopped 的辨識器：最終結果一定等到逾時"""
+
+    def __init__(self, speech_config, audio_config):
+        self.recognizing, self.recognized = _Signal(), _Signal()
+        self.session_stopped, self.canceled = _Signal(), _Signal()
+
+    def start_continuous_recognition_async(self):
+        return SimpleNamespace(get=lambda: None)
+
+    stop_continuous_recognition_async = start_continuous_recognition_async
+
+
+FAKE_SDK = SimpleNamespace(
+    SpeechRecognizer=_FakeRecognizer,
+    audio=SimpleNamespace(
+        AudioStreamFormat=lambda **kwargs: None,
+        PushAudioInputStream=lambda stream_format: SimpleNamespace(write=lambda pcm: None, close=lambda: None),
+        AudioConfig=lambda stream: None,
+    ),
+)
+
+
+class _CanceledRecognizer:
+    """開始辨識就以 cancellation_details.reason 取消 (不觸發 session_stopped)"""
+    reason = "Error"
+
+    def __init__(self, speech_config, audio_config):
+        self.recognized, self.session_stopped, self.canceled = _Signal(), _Signal(), _Signal()
+
+    def start_continuous_recognition(self):
+        details = SimpleNamespace(reason=self.reason, error_code="AuthenticationFailure", error_details="401")
+        for callback in self.canceled.callbacks:
+            callback(SimpleNamespace(cancellation_details=details))
+
+    def stop_continuous_recognition(self):
+        pass
+
+
+def _run_parallel(fn, n):
+    errors = []
+
+    def target():
+        try:
+            fn()
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=target) for _ in range(n)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return errors
+
+
+class TestSpeechPool:
+    def test_synthesizers_are_reused(self):
+        engine = _CountingEngine(tts_latency=0.0)
+        pool = SpeechPool(engine, max_concurrency=4, synthesizers=2)
+        for _ in range(5):
+            assert pool.synthesize("您好").startswith(b"RIFF")
+        assert engine.created == 2
+        assert pool.stats()["idle_synthesizers"] == 2
+
+    def test_per_call_mode_creates_each_time(self):
+        engine = _CountingEngine(tts_latency=0.0)
+        pool = SpeechPool(engine, synthesizers=0)
+        for _ in range(3):
+            pool.synthesize("您好")
+        assert engine.created == 3
+
+    def test_concurrency_cap(self):
+        engine = _CountingEngine(stt_latency=0.05)
+        pool = SpeechPool(engine, max_concurrency=2, synthesizers=0)
+        assert _run_parallel(lambda: pool.recognize("a.wav"), 6) == []
+        assert engine.peak == 2
+        stats = pool.stats()
+        assert stats["stt"] == 6
+        assert stats["in_flight"] == 0
+        assert stats["queue_wait_ms"]["max"] > 0
+
+    def test_queue_timeout(self):
+        pool = SpeechPool(LocalSpeechEngine(stt_latency=0.3), max_concurrency=1, synthesizers=0,
+                          queue_timeout=0.05)
+        errors = _run_parallel(lambda: pool.recognize("a.wav"), 2)
+        assert len(errors) == 1 and isinstance(errors[0], SpeechDeadlineExceeded)
+        assert pool.stats()["queue_timeouts"] == 1
+
+    def test_waiting_for_synthesizer_counts_as_queue(self):
+        # 名額有 2 個但合成器只有 1 個：第二個呼叫在等合成器時逾時
+        pool = SpeechPool(LocalSpeechEngine(init_latency=0.0, tts_latency=0.3), max_concurrency=2,
+                          synthesizers=1, queue_timeout=0.05)
+        errors = _run_parallel(lambda: pool.synthesize("您好"), 2)
+        assert len(errors) == 1 and isinstance(errors[0], SpeechDeadlineExceeded)
+        stats = pool.stats()
+        assert stats["queue_timeouts"] == 1
+        assert stats["in_flight"] == 0
+        assert stats["idle_synthesizers"] == 1
+
+    def test_call_timeout_replaces_synthesizer(self):
+        engine = _CountingEngine(tts_latency=0.2)
+        pool = SpeechPool(engine, synthesizers=1, tts_timeout=0.05)
+        with pytest.raises(SpeechDeadlineExceeded):
+            pool.synthesize("您好")
+        stats = pool.stats()
+        assert stats["call_timeouts"] == 1
+        assert stats["idle_synthesizers"] == 1
+        assert engine.created == 2
+
+    def test_failed_replacement_keeps_original_error(self):
+        class Flaky(_CountingEngine):
+            def synthesize(self, synthesizer, text, timeout):
+                raise RuntimeError("synthesis failed")
+
+            def create_synthesizer(self, voice=None):
+                if self.created >= 1 and self.fail_create:
+                    raise RuntimeError("create failed")
+                return super().create_synthesizer(voice)
+
+        engine = Flaky()
+        engine.fail_create = True
+        pool = SpeechPool(engine, synthesizers=1, queue_timeout=0.05)
+        with pytest.raises(RuntimeError, match="synthesis failed"):
+            pool.synthesize("您好")
+        assert pool.stats()["idle_synthesizers"] == 0
+
+        # 短少的合成器在下次取用時補建，不會讓呼叫一直排隊逾時
+        engine.fail_create = False
+        with pytest.raises(RuntimeError, match="synthesis failed"):
+            pool.synthesize("您好")
+        stats = pool.stats()
+        assert stats["idle_synthesizers"] == 1
+        assert stats["queue_timeouts"] == 0 and stats["in_flight"] == 0
+
+    def test_slot_released_after_error(self):
+        class Broken(LocalSpeechEngine):
+            def recognize(self, audio_path, timeout):
+                raise RuntimeError("boom")
+
+        pool = SpeechPool(Broken(), max_concurrency=1, synthesizers=0, queue_timeout=0.05)
+        for _ in range(2):
+            with pytest.raises(RuntimeError):
+                pool.recognize("a.wav")
+        stats = pool.stats()
+        assert stats["errors"] == 2
+        assert stats["queue_timeouts"] == 0
+
+
+class TestAzureCancellation:
+    @pytest.fixture
+    def engine(self, monkeypatch):
+        monkeypatch.setattr(speech_pool, "speechsdk", SimpleNamespace(
+            SpeechRecognizer=_CanceledRecognizer,
+            CancellationReason=SimpleNamespace(Error="Error", EndOfStream="EndOfStream"),
+            ResultReason=SimpleNamespace(RecognizedSpeech="RecognizedSpeech"),
+        ))
+        return AzureSpeechEngine(speech_config=None)
+
+    def test_error_cancellation_raises(self, engine):
+        with pytest.raises(RuntimeError, match="AuthenticationFailure"):
+            engine._recognize(None, timeout=1.0)
+
+    def test_end_of_stream_is_not_an_error(self, engine, monkeypatch):
+        monkeypatch.setattr(_CanceledRecognizer, "reason", "EndOfStream")
+        assert engine._recognize(None, timeout=1.0) == ""
+
+
+class TestStreamSlots:
+    @pytest.fixture
+    def backend(self, monkeypatch):
+        monkeypatch.setattr(stt_backends, "speechsdk", FAKE_SDK)
+        monkeypatch.setattr(stt_backends.AzurePushStreamBackend, "_config", lambda self: None)
+        pool = SpeechPool(LocalSpeechEngine(stt_latency=0.0), max_concurrency=1, synthesizers=0,
+                          queue_timeout=0.05, stt_timeout=0.05)
+        return stt_backends.AzurePushStreamBackend(pool), pool
+
+    def test_stream_holds_slot_until_finish(self, backend):
+        backend, pool = backend
+        stream = backend.open_stream()
+        assert pool.stats()["in_flight"] == 1
+        with pytest.raises(SpeechDeadlineExceeded):
+            pool.recognize("a.wav")
+
+        # 最終結果等待上限為 stt_timeout，逾時計入統計並歸還名額
+        assert stream.finish() == ""
+        stream.close()
+        stats = pool.stats()
+        assert stats["call_timeouts"] == 1 and stats["in_flight"] == 0
+        assert pool.recognize("a.wav")
+
+    def test_closed_stream_releases_once(self, backend):
+        backend, pool = backend
+        stream = backend.open_stream()
+        with pytest.raises(SpeechDeadlineExceeded):
+            backend.open_stream()
+        stream.close()
+        stream.close()
+        assert pool.stats()["in_flight"] == 0
+        backend.open_stream().close()
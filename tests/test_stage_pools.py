@@ -0,0 +1,127 @@
+# tests/test_stage_pools.py
+import asyncio
+import importlib
+import os
+import time
+from types import SimpleNamespace
+
+import httpx
+import pytest
+
+from backend.utils.stage_pools import StagePools
+
+for _key in ("AZURE_SUBSCRIPTION_KEY", "AZURE_ENDPOINT", "AZURE_SPEECH_KEY", "AZURE_SPEECH_REGION"):
+    os.environ.setdefault(_key, "test")
+
+STAGE_DELAY = 0.2
+
+
+async def _gather_timed(coros):
+    start = time.perf_counter()
+    results = await asyncio.gather(*coros)
+    return results, time.perf_counter() - start
+
+
+class TestStagePools:
+    def test_runs_in_parallel_up_to_pool_size(self):
+        pools = StagePools({"stt": 4})
+        try:
+            _, elapsed = asyncio.run(_gather_timed(pools.run("stt", time.sleep, STAGE_DELAY) for _ in range(4)))
+        finally:
+            pools.shutdown()
+        assert elapsed < STAGE_DELAY * 2
+
+    def test_pool_size_bounds_concurrency(self):
+        pools = StagePools({"llm": 2})
+        try:
+            _, elapsed = asyncio.run(_gather_timed(pools.run("llm", time.sleep, STAGE_DELAY) for _ in range(4)))
+        finally:
+            pools.shutdown()
+        # 4 個工作、2 條執行緒 -> 至少兩輪
+        assert elapsed >= STAGE_DELAY * 2 * 0.9
+
+    def test_event_loop_stays_responsive(self):
+        pools = StagePools({"tts": 1})
+
+        async def scenario():
+            blocking = asyncio.ensure_future(pools.run("tts", time.sleep, STAGE_DELAY))
+            start = time.perf_counter()
+            await asyncio.sleep(0.01)
+            latency = time.perf_counter() - start
+            await blocking
+            return latency
+
+        try:
+            assert asyncio.run(scenario()) < STAGE_DELAY / 2
+        finally:
+            pools.shutdown()
+
+    def test_unknown_stage(self):
+        pools = StagePools()
+        with pytest.raises(ValueError):
+            pools.executor("gpu")
+
+    def test_stats_after_run(self):
+        pools = StagePools({"db": 3})
+        try:
+            assert asyncio.run(pools.run("db", lambda x: x * 2, 21)) == 42
+            assert pools.stats()["db"] == {"workers": 3, "active": 0, "queued": 0}
+        finally:
+            pools.shutdown()
+
+    def test_submit_if_idle(self):
+        pools = StagePools({"llm": 1})
+        try:
+            busy = pools.submit_if_idle("llm", time.sleep, STAGE_DELAY)
+            assert busy is not None
+            assert pools.submit_if_idle("llm", lambda: 1) is None  # 池已滿，不排隊
+            busy.result()
+            assert pools.submit_if_idle("llm", lambda: 1).result() == 1
+            assert pools.stats()["llm"] == {"workers": 1, "active": 0, "queued": 0}
+        finally:
+            pools.shutdown()
+
+
+class TestConcurrentSessions:
+    """N 個面試同時開始時，總耗時應接近單一請求，而不是 N 倍"""
+
+    @pytest.fixture
+    def app(self, monkeypatch):
+        from fastapi import FastAPI
+        from backend.utils import stage_pools
+        # backend.api 的 __init__ 以同名 router 覆蓋了子模組屬性，需直接取模組
+        module = importlib.import_module("backend.api.interview_router")
+
+        def slow(result=None):
+            def _call(*args, **kwargs):
+                time.sleep(STAGE_DELAY)
+                return result
+            return _call
+
+        agent = SimpleNamespace(generate_first_question=slow("請先自我介紹"))
+        monkeypatch.setattr(module, "create_session",
+                            lambda **kw: SimpleNamespace(id="s", current_question="", question_count=0))
+        monkeypatch.setattr(module, "update_session", lambda session: True)
+        monkeypatch.setattr(module, "agent_factory", SimpleNamespace(get_agent=lambda *a, **kw: agent))
+        monkeypatch.setattr(module, "speech_service", SimpleNamespace(text_to_speech=slow(True),
+                                                                synthesize_cached=slow("cache/q.mp3")))
+        monkeypatch.setattr(stage_pools, "_pools", StagePools({"llm": 8, "tts": 8}))
+
+        app = FastAPI()
+        app.include_router(module.router)
+        yield app
+        stage_pools.shutdown_stage_pools()
+
+    def test_sessions_scale(self, app):
+        sessions = 6
+        payload = {"user_id": "u", "job_title": "後端工程師"}
+
+        async def scenario():
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                return await _gather_timed(client.post("/start_interview", json=payload) for _ in range(sessions))
+
+        responses, elapsed = asyncio.run(scenario())
+        assert all(r.status_code == 200 for r in responses)
+        # 每個請求 = LLM + TTS 兩個階段；序列化執行需要 sessions * 2 * STAGE_DELAY
+        assert elapsed < sessions * 2 * STAGE_DELAY / 2
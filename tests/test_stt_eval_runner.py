@@ -0,0 +1,127 @@
+# tests/test_stt_eval_runner.py
+import csv
+import os
+import threading
+
+import pytest
+
+for _key in ("AZURE_SUBSCRIPTION_KEY", "AZURE_ENDPOINT", "AZURE_SPEECH_KEY", "AZURE_SPEECH_REGION"):
+    os.environ.setdefault(_key, "test")
+
+from backend.services.speech_pool import SpeechEngine
+from backend.services.stt_eval_runner import SCORE_COLUMNS, EvalSegment, RateLimiter, STTEvalRunner
+from backend.utils.wav_io import WavAudio
+
+REFERENCES = ["我想應徵後端工程師", "我有三年的開發經驗", "下一題", "請問貴公司的團隊規模", "謝謝"]
+
+
+class ScriptedEngine(SpeechEngine):
+    """音訊內容就是 UTF-8 編碼的逐字稿；fail 中的逐字稿會丟出例外，silent 中的回傳空字串"""
+    name = "scripted"
+
+    def __init__(self, fail=(), silent=()):
+        self.fail = set(fail)
+        self.silent = set(silent)
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def recognize_pcm(self, audio, timeout):
+        with self._lock:
+            self.calls += 1
+        text = audio.pcm.decode("utf-8")
+        if text in self.fail:
+            raise RuntimeError("boom")
+        if text in self.silent:
+            return ""
+        return text.replace("題", "天")
+
+
+def segments():
+    return [EvalSegment(sample_id=i + 1, key=f"clip_{i}", reference=ref,
+                        load_audio=lambda r=ref: WavAudio(r.encode("utf-8"), 16000, 1, 2),
+                        meta={"file_name": f"clip_{i}.mp3"})
+            for i, ref in enumerate(REFERENCES)]
+
+
+@pytest.fixture
+def make_runner(tmp_path):
+    def make(engine, **kwargs):
+        kwargs.setdefault("cache_path", str(tmp_path / "cache.jsonl"))
+        return STTEvalRunner(engine, {"backend": engine.name}, str(tmp_path / "results.csv"),
+                             columns=["sample_id", "file_name"] + SCORE_COLUMNS,
+                             normalize=str.strip, tokenize=list, workers=3, rate=0, retries=0, **kwargs)
+    return make
+
+
+def read_csv(path):
+    with open(path, encoding="utf-8-sig") as f:
+        return list(csv.DictReader(f))
+
+
+class TestSTTEvalRunner:
+    def test_scores_and_writes_sorted_csv(self, make_runner, tmp_path):
+        engine = ScriptedEngine()
+        rows = make_runner(engine).run(segments())
+
+        assert [r["sample_id"] for r in rows] == [1, 2, 3, 4, 5]
+        assert rows[2]["hypothesis"] == "下一天" and rows[2]["substitutions"] == 1
+        assert rows[2]["cer"] == pytest.approx(1 / 3)
+        assert engine.calls == 5
+        csv_rows = read_csv(tmp_path / "results.csv")
+        assert [r["file_name"] for r in csv_rows] == [f"clip_{i}.mp3" for i in range(5)]
+        assert csv_rows[2]["cer"] == "0.3333"
+
+    def test_resume_from_checkpoint(self, make_runner, tmp_path):
+        make_runner(ScriptedEngine(), cache_path=None).run(segments()[:3])
+
+        engine = ScriptedEngine()
+        runner = make_runner(engine, cache_path=None)
+        rows = runner.run(segments())
+        assert engine.calls == 2  # 只辨識檢查點之後的
+        assert runner.stats["resumed"] == 3
+        assert len(rows) == 5 and len(read_csv(tmp_path / "results.csv")) == 5
+
+    def test_cache_skips_transcribed_audio(self, make_runner):
+        make_runner(ScriptedEngine()).run(segments())
+
+        engine = ScriptedEngine()
+        runner = make_runner(engine, resume=False)
+        assert len(runner.run(segments())) == 5
+        assert engine.calls == 0 and runner.stats["cached"] == 5
+
+    def test_failed_segments_are_retried_next_run(self, make_runner):
+        runner = make_runner(ScriptedEngine(fail={"下一題"}))
+        rows = runner.run(segments())
+        assert len(rows) == 4 and runner.stats["failed"] == 1
+
+        engine = ScriptedEngine()
+        rows = make_runner(engine).run(segments())
+        assert len(rows) == 5 and engine.calls == 1
+
+    def test_empty_transcripts_are_not_cached_or_checkpointed(self, make_runner):
+        runner = make_runner(ScriptedEngine(silent={"謝謝"}))
+        rows = runner.run(segments())
+        assert len(rows) == 5 and rows[-1]["hypothesis"] == "" and rows[-1]["cer"] == 1.0
+        assert runner.stats["empty"] == 1 and runner.stats["transcribed"] == 4
+
+        engine = ScriptedEngine()
+        runner = make_runner(engine)
+        rows = runner.run(segments())
+        assert engine.calls == 1 and runner.stats["resumed"] == 4
+        assert rows[-1]["hypothesis"] == "謝謝"
+
+
+class TestRateLimiter:
+    def test_waits_for_tokens(self):
+        now = [0.0]
+        sleeps = []
+
+        def sleep(seconds):
+            sleeps.append(seconds)
+            now[0] += seconds
+
+        limiter = RateLimiter(rate=2.0, burst=2, clock=lambda: now[0], sleep=sleep)
+        for _ in range(4):
+            limiter.acquire()
+        assert sleeps == [pytest.approx(0.5), pytest.approx(0.5)]
+        assert now[0] == pytest.approx(1.0)
@@ -0,0 +1,179 @@
+# tests/test_stt_stream.py
+import importlib
+import os
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+for _key in ("AZURE_SUBSCRIPTION_KEY", "AZURE_ENDPOINT", "AZURE_SPEECH_KEY", "AZURE_SPEECH_REGION"):
+    os.environ.setdefault(_key, "test")
+
+from backend.services.audio_archive import AudioArchive
+from backend.services.stt_backends import ScriptedSTTBackend, get_stt_backend
+
+TRANSCRIPT = "我負責後端效能優化"
+ONE_SECOND = b"\0" * 32000  # 16 kHz / 16-bit / mono
+
+
+class TestScriptedBackend:
+    def test_partials_follow_audio(self):
+        partials = []
+        stream = ScriptedSTTBackend(TRANSCRIPT, chars_per_second=4).open_stream(on_partial=partials.append)
+        stream.write(ONE_SECOND)
+        stream.write(ONE_SECOND)
+        assert partials == ["我負責後", "我負責後端效能優"]
+        assert stream.finish() == TRANSCRIPT
+
+    def test_no_audio_is_empty(self):
+        assert ScriptedSTTBackend(TRANSCRIPT).open_stream().finish() == ""
+
+    def test_unknown_backend(self):
+        with pytest.raises(ValueError):
+            get_stt_backend("whisper-gpu")
+
+
+class TestAnswerStreamEndpoint:
+    @pytest.fixture
+    def client(self, monkeypatch, tmp_path):
+        from fastapi import FastAPI
+        from fastapi.testclient import TestClient
+        module = importlib.import_module("backend.api.interview_router")
+
+        session = SimpleNamespace(id="s1", job_title="後端工程師", resume_text="", history=[],
+                                  current_question="請自我介紹", question_count=1, ended_at=None)
+        agent = SimpleNamespace(stream_question=lambda **kw: iter(["說說", "快取設計？"]))
+        monkeypatch.chdir(tmp_path)
+        monkeypatch.setattr(module, "get_session", lambda sid: session if sid == "s1" else None)
+        monkeypatch.setattr(module, "update_session", lambda s: True)
+        monkeypatch.setattr(module, "agent_factory", SimpleNamespace(get_agent=lambda *a, **kw: agent))
+        monkeypatch.setattr(module, "get_stt_backend", lambda: ScriptedSTTBackend(TRANSCRIPT))
+        monkeypatch.setattr(module.settings, "TTS_CACHE_ENABLED", False)
+        monkeypatch.setattr(module, "speech_service", SimpleNamespace(text_to_speech=lambda text, path: path))
+        monkeypatch.setattr(module, "audio_archive", AudioArchive(str(tmp_path / "saved_audio")))
+
+        app = FastAPI()
+        app.include_router(module.router)
+        return TestClient(app), session, module
+
+    def test_partial_final_then_question(self, client):
+        client, session, module = client
+        with client.websocket_connect("/answer_stream/s1") as ws:
+            ws.send_json({"type": "start", "sample_rate": 16000})
+            ws.send_bytes(ONE_SECOND)
+            assert ws.receive_json() == {"type": "partial", "text": "我負責後"}
+            ws.send_bytes(ONE_SECOND)
+            assert ws.receive_json()["type"] == "partial"
+            ws.send_json({"type": "end"})
+
+            final = ws.receive_json()
+            assert final["type"] == "final" and final["text"] == TRANSCRIPT
+            events = [ws.receive_json()]
+            while events[-1]["type"] not in ("done", "result", "error"):
+                events.append(ws.receive_json())
+
+        assert [e["type"] for e in events] == ["sentence", "done"]
+        assert events[-1]["question"] == "說說快取設計？"
+        assert session.history[-1]["answer"] == TRANSCRIPT
+        assert module.audio_archive.flush(timeout=5)
+        assert os.path.exists(session.history[-1]["audio_path"])
+
+    def test_no_audio_is_not_archived(self, client):
+        client, session, module = client
+        with client.websocket_connect("/answer_stream/s1") as ws:
+            ws.send_json({"type": "start", "sample_rate": 16000})
+            ws.send_json({"type": "end"})
+            assert ws.receive_json()["text"] == ""
+            while ws.receive_json()["type"] not in ("done", "result", "error"):
+                pass
+        assert module.audio_archive.counters()["submitted"] == 0
+
+    def test_disconnect_closes_stream_off_the_loop(self, client, monkeypatch):
+        client, _, module = client
+        closing, released, results = threading.Event(), threading.Event(), []
+
+        class BlockingStream:
+            """close() 一直卡住，直到另一個請求在事件迴圈上被處理"""
+            def write(self, pcm):
+                pass
+
+            def close(self):
+                closing.set()
+                results.append(released.wait(2))
+
+        monkeypatch.setattr(module, "get_stt_backend", lambda: SimpleNamespace(
+            name="blocking", open_stream=lambda *args: BlockingStream()))
+
+        async def ping():
+            await module.run_in_stage("db", closing.wait, 2)
+            released.set()
+            return {"ok": True}
+
+        client.app.add_api_route("/ping", ping)
+        with client:  # 同一個事件迴圈處理 WebSocket 與 /ping
+            pinger = threading.Thread(target=lambda: results.append(client.get("/ping").json()))
+            pinger.start()
+            with client.websocket_connect("/answer_stream/s1") as ws:
+                ws.send_bytes(ONE_SECOND)
+            pinger.join(5)
+        # close() 在執行緒池裡等待時，/ping 照常完成並放行
+        assert True in results and {"ok": True} in results
+
+    def test_unknown_session(self, client):
+        client, _, _ = client
+        with client.websocket_connect("/answer_stream/nope") as ws:
+            assert ws.receive_json()["type"] == "error"
+
+
+class TestSSEErrors:
+    @pytest.fixture
+    def app(self, monkeypatch, tmp_path):
+        from fastapi import FastAPI
+        from fastapi.testclient import TestClient
+        module = importlib.import_module("backend.api.interview_router")
+
+        session = SimpleNamespace(id="s1", job_title="後端工程師", resume_text="", history=[],
+                                  current_question="請自我介紹", question_count=1, ended_at=None)
+        saved = []
+
+        def broken_stream(*args, **kwargs):
+            yield "說說"
+            raise RuntimeError("LLM 連線中斷")
+
+        agent = SimpleNamespace(stream_question=broken_stream, stream_first_question=broken_stream)
+        monkeypatch.chdir(tmp_path)
+        monkeypatch.setattr(module, "get_session", lambda sid: session)
+        monkeypatch.setattr(module, "create_session", lambda **kw: session)
+        monkeypatch.setattr(module, "update_session", lambda s: saved.append(list(s.history)) or True)
+        monkeypatch.setattr(module, "agent_factory", SimpleNamespace(get_agent=lambda *a, **kw: agent))
+        monkeypatch.setattr(module.settings, "SPECULATION_ENABLED", False)
+        monkeypatch.setattr(module, "speech_service", SimpleNamespace(
+            speech_to_text_bytes=lambda data: TRANSCRIPT, text_to_speech=lambda text, path: path))
+        monkeypatch.setattr(module.settings, "TTS_CACHE_ENABLED", False)
+        monkeypatch.setattr(module, "audio_archive", AudioArchive(str(tmp_path / "saved_audio")))
+
+        app = FastAPI()
+        app.include_router(module.router)
+        return TestClient(app), saved
+
+    @staticmethod
+    def event_names(body: str):
+        return [line[len("event: "):] for line in body.splitlines() if line.startswith("event: ")]
+
+    def test_process_answer_stream_error_event_and_save(self, app):
+        client, saved = app
+        response = client.post("/process_answer/stream", data={"session_id": "s1"},
+                               files={"audio": ("a.wav", ONE_SECOND, "audio/wav")})
+        assert response.status_code == 200
+        assert self.event_names(response.text)[-1] == "error"
+        assert "LLM 連線中斷" in response.text
+        # 生成失敗也會儲存，已記錄的回答不會遺失
+        assert saved and saved[-1][-1]["answer"] == TRANSCRIPT
+
+    def test_start_interview_stream_error_event_and_save(self, app):
+        client, saved = app
+        response = client.post("/start_interview/stream", json={"user_id": "u1", "job_title": "後端工程師"})
+        assert response.status_code == 200
+        assert self.event_names(response.text)[0] == "session"
+        assert self.event_names(response.text)[-1] == "error"
+        assert len(saved) == 1
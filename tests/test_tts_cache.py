@@ -0,0 +1,122 @@
+# tests/test_tts_cache.py
+import threading
+import time
+
+import pytest
+
+from backend.utils.tts_cache import TTSCache, cache_key
+
+VOICE = "zh-TW-YunJheNeural"
+FMT = "default"
+
+
+class _Synth:
+    """假的合成器：寫入固定大小的檔案並計數"""
+
+    def __init__(self, size=100, delay=0.0):
+        self.size = size
+        self.delay = delay
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, text):
+        def write(path):
+            with self._lock:
+                self.calls += 1
+            time.sleep(self.delay)
+            with open(path, "wb") as f:
+                f.write(b"\0" * self.size)
+        return write
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return TTSCache(str(tmp_path / "cache"), max_bytes=1000)
+
+
+class TestTTSCache:
+    def test_hit_after_first_synthesis(self, cache):
+        synth = _Synth()
+        first = cache.get_or_synthesize("您好", VOICE, FMT, synth("您好"))
+        second = cache.get_or_synthesize("您好", VOICE, FMT, synth("您好"))
+        assert first == second and synth.calls == 1
+        assert cache.url_for(first) == f"/audio/cache/{cache_key('您好', VOICE, FMT)}.mp3"
+        stats = cache.stats()
+        assert stats["hits"] == 1 and stats["misses"] == 1 and stats["bytes_saved"] == 100
+
+    def test_key_includes_voice_and_format(self, cache):
+        synth = _Synth()
+        cache.get_or_synthesize("您好", VOICE, FMT, synth("您好"))
+        cache.get_or_synthesize("您好", "zh-TW-HsiaoChenNeural", FMT, synth("您好"))
+        cache.get_or_synthesize("您好", VOICE, "Audio24Khz48KBitRateMonoMp3", synth("您好"))
+        assert synth.calls == 3
+
+    def test_single_flight(self, cache):
+        synth = _Synth(delay=0.1)
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(
+            cache.get_or_synthesize("同一句話", VOICE, FMT, synth("同一句話")))) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert synth.calls == 1 and len(set(results)) == 1
+        assert cache.stats()["coalesced"] == 7
+
+    def test_lru_eviction_by_size(self, cache):
+        synth = _Synth(size=400)
+        for text in ["一", "二"]:
+            cache.get_or_synthesize(text, VOICE, FMT, synth(text))
+        cache.lookup("一", VOICE, FMT)  # 「一」變成最近使用
+        cache.get_or_synthesize("三", VOICE, FMT, synth("三"))
+        assert cache.lookup("二", VOICE, FMT) is None
+        assert cache.lookup("一", VOICE, FMT) is not None
+        assert cache.stats()["total_bytes"] == 800
+
+    def test_index_survives_restart(self, cache):
+        synth = _Synth()
+        path = cache.get_or_synthesize("重啟", VOICE, FMT, synth("重啟"))
+        reopened = TTSCache(cache.directory, max_bytes=1000)
+        assert reopened.lookup("重啟", VOICE, FMT) == path
+
+    def test_failure_is_not_cached(self, cache):
+        def broken(path):
+            raise RuntimeError("azure down")
+        with pytest.raises(RuntimeError):
+            cache.get_or_synthesize("失敗", VOICE, FMT, broken)
+        synth = _Synth()
+        cache.get_or_synthesize("失敗", VOICE, FMT, synth("失敗"))
+        assert synth.calls == 1
+
+    def test_waiter_times_out_and_synthesizes(self, tmp_path):
+        cache = TTSCache(str(tmp_path / "cache"), max_bytes=1000, wait_timeout=0.05)
+        release = threading.Event()
+
+        def stuck(path):
+            release.wait(5)
+            with open(path, "wb") as f:
+                f.write(b"\0" * 100)
+
+        owner = threading.Thread(target=lambda: cache.get_or_synthesize("卡住", VOICE, FMT, stuck))
+        owner.start()
+        time.sleep(0.02)
+        synth = _Synth()
+        path = cache.get_or_synthesize("卡住", VOICE, FMT, synth("卡住"))
+        assert synth.calls == 1 and cache.stats()["wait_timeouts"] == 1
+        release.set()
+        owner.join()
+        # 兩邊寫入同一個鍵，大小只計一次
+        assert cache.lookup("卡住", VOICE, FMT) == path and cache.stats()["total_bytes"] == 100
+
+    def test_processes_sharing_directory_keep_each_others_entries(self, cache):
+        # 兩個實例模擬兩個 worker 行程各自合成不同的句子
+        other = TTSCache(cache.directory, max_bytes=1000)
+        synth = _Synth()
+        cache.get_or_synthesize("甲", VOICE, FMT, synth("甲"))
+        other.get_or_synthesize("乙", VOICE, FMT, synth("乙"))
+        cache.get_or_synthesize("丙", VOICE, FMT, synth("丙"))
+
+        reopened = TTSCache(cache.directory, max_bytes=1000)
+        assert all(reopened.lookup(t, VOICE, FMT) for t in ["甲", "乙", "丙"])
+        assert cache.lookup("乙", VOICE, FMT) is not None  # 寫入索引時已併入另一個行程的項目
+        assert reopened.stats()["total_bytes"] == 300